@@ -0,0 +1,108 @@
+"""剪贴板变化检测基准测试
+
+使用内存剪贴板后端比较三种检测方式：
+
+* 旧的定时轮询：每次都完整读取剪贴板并计算哈希
+* 带序号检查的轮询：序号未变化时不读取内容
+* 事件通知：等待变化通知，超时后才做一次序号检查
+
+输出空闲时每小时的 CPU 时间，以及快速连续复制时的捕获率。
+
+用法::
+
+    python benchmarks/bench_change_detection.py --burst 50 --rate 20
+"""
+import time
+import argparse
+import tempfile
+import threading
+
+from common import make_monitor
+from PIL import Image
+from src.monitor import ClipboardMonitor
+from src.backends import FakeClipboardBackend, ClipboardEvent
+from src.constants import ConfigKeys, ContentType, DetectionMode
+
+
+def make_detection_monitor(base_dir: str, backend: FakeClipboardBackend, mode: str,
+                           check_interval: float, event_timeout: float) -> ClipboardMonitor:
+    """在临时目录中创建一个使用指定检测方式的监控器"""
+    return make_monitor(base_dir, backend, {
+        ConfigKeys.General.SECTION: {
+            ConfigKeys.General.CHECK_INTERVAL: check_interval,
+            ConfigKeys.General.DETECTION_MODE: mode,
+            ConfigKeys.General.EVENT_TIMEOUT: event_timeout
+        }
+    })
+
+
+def measure_tick_cost(func, ticks: int) -> float:
+    """测量单次唤醒消耗的 CPU 时间（秒）"""
+    start = time.process_time()
+    for _ in range(ticks):
+        func()
+    return (time.process_time() - start) / ticks
+
+
+def bench_idle(ticks: int, check_interval: float, event_timeout: float):
+    """测量剪贴板保持不变时每小时消耗的 CPU 时间"""
+    backend = FakeClipboardBackend()
+    backend.set_image(Image.effect_noise((1920, 1080), 64).convert("RGB"))
+    with tempfile.TemporaryDirectory() as base_dir:
+        monitor = make_detection_monitor(base_dir, backend, DetectionMode.POLL.value, check_interval, event_timeout)
+        monitor.check_and_save()
+
+        def full_read():
+            content = monitor._read_clipboard()
+            if content:
+                content.get_hash()
+
+        full_cost = measure_tick_cost(full_read, ticks)
+        gated_cost = measure_tick_cost(monitor.check_and_save, ticks * 100)
+        monitor.close()
+
+    results = [
+        ("旧轮询（每次完整读取）", full_cost, 3600 / check_interval),
+        ("轮询 + 序号检查", gated_cost, 3600 / check_interval),
+        ("事件通知", gated_cost, 3600 / event_timeout),
+    ]
+    print(f"\n空闲 CPU（剪贴板中为 1920x1080 图片，轮询间隔 {check_interval}s，事件超时 {event_timeout}s）")
+    for name, cost, wakeups in results:
+        print(f"  {name:<22} 每次唤醒 {cost * 1000:9.3f} ms  每小时 {cost * wakeups:9.3f} s CPU")
+
+
+def bench_burst(mode: str, burst: int, rate: float, check_interval: float, event_timeout: float) -> float:
+    """以指定速率连续复制若干条文本，返回被记录下来的比例"""
+    backend = FakeClipboardBackend()
+    events = [ClipboardEvent(0.0, ContentType.TEXT.value, f"burst text {i}") for i in range(burst)]
+    with tempfile.TemporaryDirectory() as base_dir:
+        monitor = make_detection_monitor(base_dir, backend, mode, check_interval, event_timeout)
+        runner = threading.Thread(target=monitor.run, daemon=True)
+        runner.start()
+        backend.replay(events, rate=rate)
+        time.sleep(min(check_interval, 0.2) + 0.05)
+        monitor.stop()
+        runner.join()
+        captured = len(monitor.logger._read_log_file(monitor.logger._get_log_file()))
+    return captured / burst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="剪贴板变化检测基准测试")
+    parser.add_argument("--ticks", type=int, default=20, help="测量完整读取成本的次数")
+    parser.add_argument("--burst", type=int, default=50, help="连续复制的条数")
+    parser.add_argument("--rate", type=float, default=20.0, help="连续复制的速率（次/秒）")
+    parser.add_argument("--check-interval", type=float, default=1.0, help="轮询间隔（秒）")
+    parser.add_argument("--event-timeout", type=float, default=60.0, help="事件模式的等待超时（秒）")
+    args = parser.parse_args()
+
+    bench_idle(args.ticks, args.check_interval, args.event_timeout)
+
+    print(f"\n连续复制捕获率（{args.burst} 条，{args.rate} 次/秒）")
+    for mode in (DetectionMode.POLL.value, DetectionMode.EVENT.value):
+        ratio = bench_burst(mode, args.burst, args.rate, args.check_interval, args.event_timeout)
+        print(f"  {mode:<6} {ratio * 100:6.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""压缩存储基准测试
+
+生成若干天的合成文本记录（大部分是短文本，少量是几十到几百 KB 的长文本），
+比较三种配置下的磁盘占用和读写吞吐：
+
+* 不压缩
+* 只压缩超过阈值的长文本
+* 压缩长文本，并将往日日志整体压缩封存（写完全部记录后封存，耗时计入写入吞吐）
+
+用法::
+
+    python benchmarks/bench_compression.py --days 7 --per-day 500 --format jsonl
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from common import make_logger
+from src.models import ClipboardContent
+from src.compression import available_codec
+from src.constants import ConfigKeys, ContentType, JsonKeys, StorageFormat
+
+WORDS = ("def class return import self value config logger clipboard entry timestamp "
+         "剪贴板 日志 记录 内容 配置 错误 图片 文本 保存 读取").split()
+
+
+def make_text(rng: random.Random, length: int) -> str:
+    """生成指定长度左右、类似代码或日志的文本"""
+    lines = []
+    size = 0
+    while size < length:
+        line = "    " * rng.randint(0, 3) + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def make_day(rng: random.Random, day: str, count: int):
+    """生成一天的剪贴板内容，约 5% 为长文本"""
+    contents = []
+    for i in range(count):
+        content = ClipboardContent()
+        content.content_type = ContentType.TEXT.value
+        length = rng.randint(20_000, 300_000) if rng.random() < 0.05 else rng.randint(10, 400)
+        content.data[JsonKeys.TEXT_CONTENT] = make_text(rng, length) + f" #{day}-{i}"
+        content.timestamp = f"{day}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}"
+        contents.append(content)
+    return contents
+
+
+def log_bytes(logger) -> int:
+    """日志文件占用的总字节数"""
+    return sum(os.path.getsize(path) for path in logger._list_log_files())
+
+
+def run(base_dir: str, days, storage_format: str, threshold: int, seal: bool, batch: int):
+    """按指定配置写入并读回全部记录，返回各项指标"""
+    logger = make_logger(base_dir, {
+        ConfigKeys.General.SECTION: {ConfigKeys.General.MAX_LOG_FILES: len(days) + 1},
+        ConfigKeys.Logging.SECTION: {
+            ConfigKeys.Logging.STORAGE_FORMAT: storage_format,
+            ConfigKeys.Logging.MAX_ENTRIES: max(len(contents) for _, contents in days),
+            ConfigKeys.Logging.COMPRESS_TEXT_THRESHOLD: threshold,
+            ConfigKeys.Logging.COMPRESS_SEALED_LOGS: seal,
+            ConfigKeys.Logging.DEDUP_HISTORY: False,
+        },
+    })
+    raw_bytes = 0
+    write_time = 0.0
+    # 记录按自身的时间戳写入对应日期的日志
+    for day, contents in days:
+        raw_bytes += sum(len(c.data[JsonKeys.TEXT_CONTENT].encode('utf-8')) for c in contents)
+        start = time.perf_counter()
+        for i in range(0, len(contents), batch):
+            logger.save_batch(contents[i:i + batch])
+        write_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    logger.seal_old_logs()
+    write_time += time.perf_counter() - start
+    disk = log_bytes(logger)
+
+    start = time.perf_counter()
+    count = sum(len(records) for records in logger.iter_log_files())
+    read_time = time.perf_counter() - start
+    logger.close()
+    return {
+        "raw_mb": raw_bytes / (1 << 20),
+        "disk_mb": disk / (1 << 20),
+        "write_mb_s": raw_bytes / (1 << 20) / write_time,
+        "read_mb_s": raw_bytes / (1 << 20) / read_time,
+        "count": count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩存储基准测试")
+    parser.add_argument("--days", type=int, default=7, help="生成的天数")
+    parser.add_argument("--per-day", type=int, default=500, help="每天的记录数")
+    parser.add_argument("--format", default=StorageFormat.JSONL.value,
+                        choices=[StorageFormat.JSON.value, StorageFormat.JSONL.value], help="日志存储格式")
+    parser.add_argument("--threshold", type=int, default=4096, help="单条文本压缩阈值（字符）")
+    parser.add_argument("--batch", type=int, default=32, help="每批写入的条数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    days = [(f"2024-01-{d + 1:02d}", make_day(rng, f"2024-01-{d + 1:02d}", args.per_day)) for d in range(args.days)]
+    configs = [
+        ("不压缩", 0, False),
+        ("压缩长文本", args.threshold, False),
+        ("长文本 + 封存", args.threshold, True),
+    ]
+    print(f"\n{args.days} 天 × {args.per_day} 条，格式 {args.format}，压缩算法 {available_codec('zstd')}")
+    print(f"  {'配置':<14} {'原始(MB)':>9} {'磁盘(MB)':>9} {'写入(MB/s)':>11} {'读取(MB/s)':>11}")
+    for name, threshold, seal in configs:
+        with tempfile.TemporaryDirectory() as base_dir:
+            result = run(base_dir, days, args.format, threshold, seal, args.batch)
+        assert result["count"] == args.days * args.per_day
+        print(f"  {name:<14} {result['raw_mb']:9.1f} {result['disk_mb']:9.1f} {result['write_mb_s']:11.1f} "
+              f"{result['read_mb_s']:11.1f}")
+
+
+if __name__ == '__main__':
+    main()
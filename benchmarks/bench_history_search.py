@@ -0,0 +1,91 @@
+"""历史搜索基准测试
+
+生成若干条合成文本记录，分别写入 JSONL 日志和 SQLite 历史数据库，
+比较“扫描全部日志文件”与“数据库全文索引”两种方式的搜索耗时。
+
+用法::
+
+    python benchmarks/bench_history_search.py --entries 200000
+"""
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from common import make_logger
+from src.constants import ConfigKeys, ContentType, JsonKeys, StorageFormat
+
+WORDS = ["clipboard", "recorder", "python", "剪贴板", "历史记录", "日志", "monitor",
+         "database", "搜索", "config", "image", "文本", "session", "window", "报告"]
+
+
+def make_records(count: int, per_day: int):
+    """生成按天分组的合成文本记录"""
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        timestamp = start + timedelta(days=i // per_day, seconds=i % per_day)
+        text = " ".join(rng.choice(WORDS) for _ in range(12)) + f" item{i}"
+        yield {
+            JsonKeys.TIMESTAMP: timestamp.isoformat(),
+            JsonKeys.CONTENT_TYPE: ContentType.TEXT.value,
+            JsonKeys.TEXT_CONTENT: text,
+        }
+
+
+def scan_logs(logger, query: str, limit: int):
+    """旧的搜索方式：逐个解析日志文件并过滤"""
+    results = []
+    for records in logger.iter_log_files():
+        results.extend(r for r in records if query in r.get(JsonKeys.TEXT_CONTENT, ""))
+    results.sort(key=lambda r: r[JsonKeys.TIMESTAMP], reverse=True)
+    return results[:limit]
+
+
+def timed(func, rounds: int) -> float:
+    """返回平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史搜索基准测试")
+    parser.add_argument("--entries", type=int, default=200000, help="记录总数")
+    parser.add_argument("--per-day", type=int, default=5000, help="每个日志文件的记录数")
+    parser.add_argument("--rounds", type=int, default=5, help="每种查询的重复次数")
+    args = parser.parse_args()
+
+    queries = ["item12345", "历史记录", "clipboard"]
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = make_logger(base_dir, {
+            ConfigKeys.Logging.SECTION: {
+                ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSONL.value,
+                ConfigKeys.Logging.MAX_ENTRIES: args.per_day,
+            },
+            ConfigKeys.Database.SECTION: {ConfigKeys.Database.ENABLE_INDEX: True},
+        })
+        records = list(make_records(args.entries, args.per_day))
+        by_day = {}
+        for record in records:
+            by_day.setdefault(record[JsonKeys.TIMESTAMP][:10], []).append(record)
+
+        start = time.perf_counter()
+        for day, day_records in by_day.items():
+            log_file = logger._get_log_file(day)
+            logger._append_journal(log_file, day_records)
+        logger.history_db.insert_records(records)
+        print(f"\n写入 {args.entries} 条记录：{time.perf_counter() - start:.1f} s")
+
+        print(f"  {'查询':<12} {'扫描日志(ms)':>14} {'数据库(ms)':>12}")
+        for query in queries:
+            scan = timed(lambda: scan_logs(logger, query, 20), args.rounds)
+            indexed = timed(lambda: logger.history_db.search(query, limit=20), args.rounds)
+            print(f"  {query:<12} {scan:14.1f} {indexed:12.1f}")
+        logger.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""图片编码基准测试
+
+* 编码吞吐：比较各编码格式处理一张 4K 截图和一张照片类图片的耗时与文件大小，
+  以及编码线程池在不同线程数下每秒能编码的截图数
+* 排队时的捕获延迟：连续复制若干张不同的 4K 截图，比较在监控线程中编码与交给
+  编码线程池时每次检查剪贴板的耗时，以及写完全部图片的总耗时
+
+用法::
+
+    python benchmarks/bench_image_encoding.py --images 8
+"""
+import io
+import os
+import time
+import argparse
+import tempfile
+
+from common import SIZE_4K, make_config, make_monitor, make_screenshot
+from PIL import Image
+from src.backends import FakeClipboardBackend
+from src.constants import ConfigKeys, ImageCodec
+from src.image_codec import ImageEncoder
+
+
+def make_photo(size=SIZE_4K) -> Image.Image:
+    """生成一张颜色丰富、类似照片的合成图片"""
+    width, height = size
+    noise = Image.effect_noise((width // 8, height // 8), 48).resize(size, Image.BICUBIC)
+    gradient = Image.linear_gradient("L").resize(size)
+    return Image.merge("RGB", (noise, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+
+
+def encoding_config(base_dir: str, codec: str, workers: int):
+    """生成使用指定编码格式和线程数的配置"""
+    return make_config(base_dir, {
+        ConfigKeys.Encoding.SECTION: {ConfigKeys.Encoding.CODEC: codec, ConfigKeys.Encoding.WORKERS: workers}
+    })
+
+
+def bench_codecs(rounds: int):
+    """比较各编码格式的耗时和文件大小"""
+    images = (("截图", make_screenshot(SIZE_4K)), ("照片", make_photo(SIZE_4K)))
+    print(f"\n各编码格式处理一张 4K 图片（{rounds} 次平均）")
+    print(f"  {'图片':<4} {'格式':<14} {'编码(ms)':>10} {'缩略图(ms)':>11} {'大小(KB)':>10}")
+    with tempfile.TemporaryDirectory() as base_dir:
+        for label, image in images:
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            for _ in range(rounds):
+                buffer = io.BytesIO()
+                image.save(buffer, format="PNG")
+            legacy_ms = (time.perf_counter() - start) / rounds * 1000
+            print(f"  {label:<4} {'PNG（旧默认）':<14} {legacy_ms:10.1f} {'-':>11} {len(buffer.getvalue()) / 1024:10.1f}")
+
+            for codec in ImageCodec:
+                encoder = ImageEncoder(encoding_config(base_dir, codec.value, 0))
+                encode_time = thumbnail_time = 0.0
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    data = encoder._save(image, encoder.choose_format(image))
+                    encode_time += time.perf_counter() - start
+                    start = time.perf_counter()
+                    encoder.make_thumbnail(image)
+                    thumbnail_time += time.perf_counter() - start
+                name = f"{codec.value}→{encoder.choose_format(image)}"
+                print(f"  {label:<4} {name:<14} {encode_time / rounds * 1000:10.1f} "
+                      f"{thumbnail_time / rounds * 1000:11.1f} {len(data) / 1024:10.1f}")
+
+
+def bench_throughput(count: int):
+    """测量编码线程池在不同线程数下的吞吐"""
+    images = [make_screenshot(SIZE_4K, seed) for seed in range(count)]
+    print(f"\n编码线程池吞吐（{count} 张 4K 截图，codec=auto，{os.cpu_count()} 个 CPU）")
+    with tempfile.TemporaryDirectory() as base_dir:
+        for workers in (1, 2, 4):
+            encoder = ImageEncoder(encoding_config(base_dir, ImageCodec.AUTO.value, workers))
+            start = time.perf_counter()
+            futures = [encoder.submit(image) for image in images]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+            encoder.close()
+            print(f"  {workers} 个线程  {count / elapsed:8.2f} 张/秒")
+
+
+def bench_capture_latency(count: int):
+    """连续复制多张截图，测量每次检查剪贴板的耗时和写完全部图片的总耗时"""
+    images = [make_screenshot(SIZE_4K, seed) for seed in range(count)]
+    print(f"\n连续复制 {count} 张不同的 4K 截图")
+    print(f"  {'编码方式':<16} {'平均捕获(ms)':>12} {'最大捕获(ms)':>12} {'全部写完(ms)':>12}")
+    for label, workers in (("监控线程中编码", 0), ("线程池 2 线程", 2), ("线程池 4 线程", 4)):
+        backend = FakeClipboardBackend()
+        with tempfile.TemporaryDirectory() as base_dir:
+            monitor = make_monitor(base_dir, backend, {
+                ConfigKeys.Encoding.SECTION: {ConfigKeys.Encoding.WORKERS: workers}
+            })
+            latencies = []
+            begin = time.perf_counter()
+            for image in images:
+                backend.set_image(image)
+                start = time.perf_counter()
+                assert monitor.check_and_save()
+                latencies.append(time.perf_counter() - start)
+            monitor.close()
+            total = time.perf_counter() - begin
+        print(f"  {label:<16} {sum(latencies) / count * 1000:12.1f} "
+              f"{max(latencies) * 1000:12.1f} {total * 1000:12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片编码基准测试")
+    parser.add_argument("--rounds", type=int, default=3, help="编码格式比较的重复次数")
+    parser.add_argument("--images", type=int, default=8, help="吞吐和捕获延迟测试的截图数")
+    args = parser.parse_args()
+
+    bench_codecs(args.rounds)
+    bench_throughput(args.images)
+    bench_capture_latency(args.images)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""图片处理路径基准测试
+
+比较一张 4K 截图在旧的编码/解码链路与当前链路上的耗时和内存分配：
+
+* 旧链路：PNG 编码 -> base64 编码 -> 计算哈希时 base64 解码 ->
+  保存图片时再次 base64 解码 -> base64 内联写入 JSON 日志
+* 当前链路：按配置的格式编码，缩略图由另一个编码线程同时生成，编码结果以内存视图传递，
+  哈希只计算一次，按内容哈希写入图片存储
+* 图片未变化：只计算像素哈希，命中后跳过 PNG 编码
+
+用法::
+
+    python benchmarks/bench_image_pipeline.py --rounds 5
+"""
+import io
+import os
+import json
+import time
+import base64
+import hashlib
+import argparse
+import tempfile
+import tracemalloc
+
+from common import SIZE_4K, make_monitor, make_screenshot
+from src.models import ClipboardContent
+from src.backends import FakeClipboardBackend
+from src.hashing import pixel_hash
+
+
+def legacy_chain(image, base_dir: str):
+    """重现旧版本中一张图片经过的完整处理链路"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    hashlib.md5(base64.b64decode(encoded)).hexdigest()
+    with open(os.path.join(base_dir, "legacy.png"), 'wb') as f:
+        f.write(base64.b64decode(encoded))
+    with open(os.path.join(base_dir, "legacy.json"), 'w', encoding='utf-8') as f:
+        json.dump([{"image_base64": encoded}], f, indent=2)
+
+
+def current_chain(monitor, image):
+    """当前版本的处理链路"""
+    content = monitor._process_pil_image(ClipboardContent(), image)
+    content.get_hash()
+    monitor.logger.save(content)
+
+
+def unchanged_check(monitor, image):
+    """剪贴板中仍是上一张图片时的处理链路"""
+    content = monitor._process_pil_image(ClipboardContent(), image)
+    assert content.get_hash() == monitor.last_hash
+
+
+def measure(func, rounds: int):
+    """返回平均耗时（毫秒）和峰值内存分配（MB）"""
+    elapsed = 0.0
+    peak = 0
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed / rounds * 1000, peak / (1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片处理路径基准测试")
+    parser.add_argument("--rounds", type=int, default=5, help="每种链路的重复次数")
+    args = parser.parse_args()
+
+    images = [make_screenshot(SIZE_4K, seed) for seed in range(args.rounds)]
+    with tempfile.TemporaryDirectory() as base_dir:
+        monitor = make_monitor(base_dir, FakeClipboardBackend())
+        # 预热：第一次编码时创建编码线程池并加载图片编码插件，不计入每张截图的耗时和内存
+        warmup = make_screenshot(SIZE_4K, args.rounds)
+        legacy_chain(warmup, base_dir)
+        current_chain(monitor, warmup)
+        legacy_images = iter(images)
+        current_images = iter(images)
+        legacy = measure(lambda: legacy_chain(next(legacy_images), base_dir), args.rounds)
+        current = measure(lambda: current_chain(monitor, next(current_images)), args.rounds)
+        last_image = images[-1]
+        monitor.last_hash = monitor._process_pil_image(ClipboardContent(), last_image).get_hash()
+        monitor.last_pixel_hash = pixel_hash(last_image)
+        unchanged = measure(lambda: unchanged_check(monitor, last_image), args.rounds)
+        monitor.close()
+
+    print(f"\n每张 4K 截图（{SIZE_4K[0]}x{SIZE_4K[1]}，{args.rounds} 次平均）")
+    print(f"  {'链路':<8} {'耗时(ms)':>10} {'峰值分配(MB)':>14}")
+    print(f"  {'旧链路':<8} {legacy[0]:10.1f} {legacy[1]:14.2f}")
+    print(f"  {'当前链路':<8} {current[0]:10.1f} {current[1]:14.2f}")
+    print(f"  {'图片未变化':<8} {unchanged[0]:10.1f} {unchanged[1]:14.2f}")
+
+
+if __name__ == '__main__':
+    main()
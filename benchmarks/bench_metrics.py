@@ -0,0 +1,139 @@
+"""运行指标开销基准测试
+
+使用内存剪贴板后端连续复制文本，同步写入日志（不启用写入流水线，整个捕获到写盘的过程都在
+监控循环中），比较启用指标和将计数器、直方图替换为空操作时每次捕获的耗时，
+以及剪贴板没有变化时每次检查的耗时。两种情况交替运行多轮，取各自的最小值以减少抖动。
+
+最后启动 HTTP 端点，读取 /metrics.json 并输出各环节的耗时汇总。
+
+用法::
+
+    python benchmarks/bench_metrics.py --changes 2000 --rounds 5
+"""
+import json
+import time
+import socket
+import argparse
+import tempfile
+import urllib.request
+
+from common import make_config, make_monitor
+from src.backends import FakeClipboardBackend
+from src.constants import ConfigKeys
+from src.metrics import METRICS_JSON_PATH, Counter, Histogram, MetricsExporter
+
+# 每条文本的长度（字符）
+TEXT_LENGTH = 400
+# 测量空闲检查时的检查次数
+IDLE_TICKS = 100000
+
+
+def run_changes(base_dir: str, changes: int, offset: int) -> float:
+    """连续复制 changes 条不同的文本并逐条检查保存，返回每次捕获的平均耗时（秒）"""
+    backend = FakeClipboardBackend()
+    monitor = make_monitor(base_dir, backend, {
+        ConfigKeys.Pipeline.SECTION: {ConfigKeys.Pipeline.ENABLE_ASYNC: False},
+        ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.MAX_ENTRIES: changes + 1}
+    })
+    texts = [f"{offset + i:08d} " + "x" * TEXT_LENGTH for i in range(changes)]
+    start = time.perf_counter()
+    for text in texts:
+        backend.set_text(text)
+        monitor.check_and_save()
+    elapsed = time.perf_counter() - start
+    monitor.close()
+    return elapsed / changes
+
+
+def run_idle(base_dir: str) -> float:
+    """剪贴板保持不变时反复检查，返回每次检查的平均耗时（秒）"""
+    backend = FakeClipboardBackend()
+    backend.set_text("idle")
+    monitor = make_monitor(base_dir, backend)
+    monitor.check_and_save()
+    start = time.perf_counter()
+    for _ in range(IDLE_TICKS):
+        monitor.check_and_save()
+    elapsed = time.perf_counter() - start
+    monitor.close()
+    return elapsed / IDLE_TICKS
+
+
+class disabled_metrics:
+    """在 with 代码块内将计数器和直方图的记录方法替换为空操作"""
+
+    def __enter__(self):
+        self._saved = (Counter.inc, Histogram.observe)
+        Counter.inc = lambda self, amount=1: None
+        Histogram.observe = lambda self, value: None
+
+    def __exit__(self, *exc_info):
+        Counter.inc, Histogram.observe = self._saved
+
+
+def measure(func, rounds: int):
+    """交替运行启用和禁用指标的情况，返回 (启用, 禁用) 各自的最小耗时"""
+    enabled, disabled = [], []
+    for i in range(rounds):
+        with tempfile.TemporaryDirectory() as base_dir:
+            enabled.append(func(base_dir, i * 2))
+        with tempfile.TemporaryDirectory() as base_dir, disabled_metrics():
+            disabled.append(func(base_dir, i * 2 + 1))
+    return min(enabled), min(disabled)
+
+
+def print_row(label: str, enabled: float, disabled: float):
+    """输出一行启用与禁用指标的耗时对比"""
+    overhead = (enabled - disabled) / disabled * 100
+    print(f"  {label:<12} 启用 {enabled * 1e6:9.2f} µs  禁用 {disabled * 1e6:9.2f} µs  开销 {overhead:+6.2f}%")
+
+
+def free_port() -> int:
+    """向系统申请一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch_summary(base_dir: str):
+    """按配置启动 HTTP 端点，读取 /metrics.json"""
+    config = make_config(base_dir, {ConfigKeys.Metrics.SECTION: {ConfigKeys.Metrics.HTTP_PORT: free_port()}})
+    exporter = MetricsExporter(config)
+    exporter.start()
+    try:
+        host, port = exporter.address
+        with urllib.request.urlopen(f"http://{host}:{port}{METRICS_JSON_PATH}") as response:
+            return json.load(response)
+    finally:
+        exporter.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行指标开销基准测试")
+    parser.add_argument("--changes", type=int, default=2000, help="每轮复制的文本条数")
+    parser.add_argument("--rounds", type=int, default=5, help="交替运行的轮数")
+    args = parser.parse_args()
+
+    print(f"\n每次捕获（{args.changes} 条 {TEXT_LENGTH} 字符文本，同步写入，{args.rounds} 轮取最小值）")
+    enabled, disabled = measure(lambda base_dir, i: run_changes(base_dir, args.changes, i * args.changes),
+                                args.rounds)
+    print_row("捕获并写盘", enabled, disabled)
+    enabled, disabled = measure(lambda base_dir, i: run_idle(base_dir), args.rounds)
+    print_row("空闲检查", enabled, disabled)
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        summary = fetch_summary(base_dir)
+    print(f"\n{METRICS_JSON_PATH} 中的耗时汇总（启用指标的各轮累计）")
+    for name, samples in summary.items():
+        if not isinstance(samples, list):
+            continue
+        for sample in samples:
+            if "p99_ms" not in sample:
+                continue
+            labels = ",".join(f"{k}={v}" for k, v in sample.items() if isinstance(v, str))
+            print(f"  {name + ('{' + labels + '}' if labels else ''):<40} 次数 {sample['count']:8d}  "
+                  f"平均 {sample['avg_ms']:8.3f} ms  p99 {sample['p99_ms']:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
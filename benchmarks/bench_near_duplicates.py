@@ -0,0 +1,155 @@
+"""相似内容检测基准测试
+
+分三部分：
+
+* 指纹计算：不同长度文本的 SimHash 与 4K 合成截图的 dHash 的耗时
+* 识别效果：只差行尾空白或插入几个字的文本、多了一个光标的截图与原内容的指纹距离，
+  以及不相关内容之间的距离。SimHash 反映的是片段的分布，用同一小词表随机组成的两段文本
+  距离也很小，因此相似文本只标记，合并空白后完全相同时才生成引用记录
+* 索引查找：文本和图片索引中各有 --entries 条指纹（随机生成），分别查找与某条已有指纹
+  相差若干位的指纹（命中）和随机指纹（未命中），与逐条比较的线性扫描对比耗时，
+  两种方式找到的距离必须相同
+
+用法::
+
+    python benchmarks/bench_near_duplicates.py --entries 100000 --queries 2000
+"""
+import time
+import random
+import argparse
+
+from PIL import ImageDraw
+
+from common import SIZE_4K, make_screenshot
+from src.similarity import (
+    IMAGE_ALGORITHM, IMAGE_BITS, TEXT_ALGORITHM, TEXT_BITS,
+    SimilarityIndex, hamming_distance, image_fingerprint, parse_fingerprint, text_fingerprint
+)
+
+# 默认的判定距离，与 config.json 中的默认值相同
+TEXT_DISTANCE = 3
+IMAGE_DISTANCE = 8
+
+# 两组不重叠的词，分别用于生成原文本和不相关的文本
+WORDS = ["剪贴板", "历史", "记录", "clipboard", "history", "monitor", "文本", "内容", "the", "quick", "fox"]
+OTHER_WORDS = ["会议", "纪要", "预算", "report", "budget", "quarter", "表格", "数据", "sales", "region", "total"]
+
+
+def timed(func, rounds: int) -> float:
+    """执行 rounds 次，返回每次的平均耗时（毫秒）"""
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def percentile(values, q: float) -> float:
+    """按最近秩法计算分位数"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+
+def make_text(rng: random.Random, length: int, words=WORDS) -> str:
+    """从词表中随机取词，生成中英文混合的文本"""
+    parts = []
+    while sum(len(part) + 1 for part in parts) < length:
+        parts.append(rng.choice(words))
+    return " ".join(parts)[:length]
+
+
+def value(fingerprint: str) -> int:
+    """指纹的整数值"""
+    return parse_fingerprint(fingerprint)[1]
+
+
+def fingerprint_cost():
+    """输出指纹计算的耗时"""
+    rng = random.Random(0)
+    print("\n指纹计算")
+    for length in (100, 1000, 10000):
+        text = make_text(rng, length)
+        print(f"  文本 {length:>6} 字符            {timed(lambda: text_fingerprint(text), 20):8.3f} ms")
+    screenshot = make_screenshot(SIZE_4K)
+    print(f"  截图 {SIZE_4K[0]}x{SIZE_4K[1]}             {timed(lambda: image_fingerprint(screenshot), 5):8.3f} ms")
+
+
+def detection_quality():
+    """输出典型的相似与不相关内容之间的指纹距离"""
+    rng = random.Random(1)
+    text = make_text(rng, 1000)
+    middle = len(text) // 2
+    original = value(text_fingerprint(text))
+    print(f"\n指纹距离（文本判定距离 {TEXT_DISTANCE} / {TEXT_BITS} 位，图片判定距离 {IMAGE_DISTANCE} / {IMAGE_BITS} 位）")
+    for label, variant in (
+        ("文本：行尾多了空白和换行", text + "  \n"),
+        ("文本：中间插入几个字", text[:middle] + "新增内容" + text[middle:]),
+        ("文本：删除一个单词", text[:middle] + text[middle + 8:]),
+        ("文本：同一词表的另一段文本", make_text(random.Random(2), 1000)),
+        ("文本：不相关的文本", make_text(random.Random(2), 1000, OTHER_WORDS)),
+    ):
+        print(f"  {label:<24} {hamming_distance(original, value(text_fingerprint(variant))):4d}")
+
+    screenshot = make_screenshot(SIZE_4K)
+    original = value(image_fingerprint(screenshot))
+    cursor = screenshot.copy()
+    ImageDraw.Draw(cursor).rectangle((1200, 800, 1202, 830), fill=(0, 0, 0))
+    for label, variant in (
+        ("截图：多了一个光标", cursor),
+        ("截图：另一张截图", make_screenshot(SIZE_4K, seed=1)),
+    ):
+        print(f"  {label:<24} {hamming_distance(original, value(image_fingerprint(variant))):4d}")
+
+
+def lookup_cost(bits: int, max_distance: int, entries: int, queries: int, label: str):
+    """在 entries 条随机指纹的索引中查找，与线性扫描比较"""
+    rng = random.Random(bits)
+    fingerprints = [rng.getrandbits(bits) for _ in range(entries)]
+    start = time.perf_counter()
+    index = SimilarityIndex(bits, max_distance, entries)
+    for i, fingerprint in enumerate(fingerprints):
+        index.add(fingerprint, str(i), str(i))
+    build = time.perf_counter() - start
+
+    hits = []
+    for _ in range(queries):
+        fingerprint = rng.choice(fingerprints)
+        for bit in rng.sample(range(bits), rng.randint(0, max_distance)):
+            fingerprint ^= 1 << bit
+        hits.append(fingerprint)
+    misses = [rng.getrandbits(bits) for _ in range(queries)]
+
+    print(f"\n{label}：{entries} 条 {bits} 位指纹，判定距离 {max_distance}，建立索引 {build:.2f} s")
+    print(f"  {'查询':<8} {'p50(ms)':>10} {'p99(ms)':>10} {'线性扫描(ms)':>14}")
+    for name, batch in (("命中", hits), ("未命中", misses)):
+        latencies = []
+        for fingerprint in batch:
+            start = time.perf_counter()
+            index.lookup(fingerprint)
+            latencies.append((time.perf_counter() - start) * 1000)
+        # 线性扫描只取少量查询，同时核对结果
+        sample = batch[:20]
+        start = time.perf_counter()
+        for fingerprint in sample:
+            nearest = min(hamming_distance(fingerprint, other) for other in fingerprints)
+            found = index.lookup(fingerprint)
+            if (found[0] if found else None) != (nearest if nearest <= max_distance else None):
+                raise SystemExit(f"{label} 查找结果与线性扫描不一致")
+        scan = (time.perf_counter() - start) / len(sample) * 1000
+        print(f"  {name:<8} {percentile(latencies, 0.5):10.4f} {percentile(latencies, 0.99):10.4f} {scan:14.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="相似内容检测基准测试")
+    parser.add_argument("--entries", type=int, default=100000, help="索引中的指纹数")
+    parser.add_argument("--queries", type=int, default=2000, help="查询次数")
+    args = parser.parse_args()
+
+    fingerprint_cost()
+    detection_quality()
+    lookup_cost(TEXT_BITS, TEXT_DISTANCE, args.entries, args.queries, f"文本索引（{TEXT_ALGORITHM}）")
+    lookup_cost(IMAGE_BITS, IMAGE_DISTANCE, args.entries, args.queries, f"图片索引（{IMAGE_ALGORITHM}）")
+
+
+if __name__ == '__main__':
+    main()
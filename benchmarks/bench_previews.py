@@ -0,0 +1,131 @@
+"""预览缓存基准测试
+
+生成若干条文本和截图混合的记录，比较列出最近若干条记录时的耗时：
+
+* 读取预览：从预览缓存批量读取文本预览和缩略图，分别测量新打开日志目录（冷）
+  和内存 LRU 已缓存（热）的情况
+* 解码完整图片：读取完整记录，并像没有预览缓存时一样解码每张图片生成缩略图
+
+用法::
+
+    python benchmarks/bench_previews.py --entries 5000 --list 5000
+"""
+import time
+import argparse
+import tempfile
+from itertools import islice
+
+from common import make_logger, make_screenshot
+from PIL import Image
+from src.constants import ConfigKeys, ContentType, ImageStorage, JsonKeys, StorageFormat
+from src.history import HistoryReader
+from src.image_codec import ImageEncoder
+from src.models import ClipboardContent
+
+# 合成截图的尺寸，保持较小以便快速生成数千张
+IMAGE_SIZE = (960, 540)
+# 每批保存的记录数
+SAVE_BATCH = 200
+
+
+def make_contents(count: int, image_every: int, encoder: ImageEncoder):
+    """生成文本和截图混合的剪贴板内容，每 image_every 条中有一张截图"""
+    for i in range(count):
+        content = ClipboardContent()
+        if image_every and i % image_every == 0:
+            content.set_encoded_image(encoder.encode(make_screenshot(IMAGE_SIZE, i)))
+        else:
+            content.content_type = ContentType.TEXT.value
+            content.data = {JsonKeys.TEXT_CONTENT: f"剪贴板文本 {i} " + "lorem ipsum dolor sit amet " * 20}
+        yield content
+
+
+def populate(base_dir: str, overrides, count: int, image_every: int):
+    """写入合成记录，返回写入耗时（秒）"""
+    logger = make_logger(base_dir, overrides)
+    encoder = ImageEncoder(logger._config)
+    start = time.perf_counter()
+    contents = make_contents(count, image_every, encoder)
+    while True:
+        batch = list(islice(contents, SAVE_BATCH))
+        if not batch:
+            break
+        logger.save_batch(batch)
+    elapsed = time.perf_counter() - start
+    logger.close()
+    return elapsed
+
+
+def list_previews(reader: HistoryReader, limit: int) -> int:
+    """列出最近 limit 条记录的预览，返回带缩略图的条数"""
+    return sum(
+        1 for summary in islice(reader.iter_previews(), limit)
+        if summary[JsonKeys.PREVIEW] and JsonKeys.THUMBNAIL_BASE64 in summary[JsonKeys.PREVIEW]
+    )
+
+
+def decode_images(reader: HistoryReader, limit: int, thumbnail_size: int) -> int:
+    """读取最近 limit 条完整记录，解码每张图片并生成缩略图，返回图片数"""
+    images = 0
+    store = reader.logger.image_store
+    for entry in islice(reader.iter_entries(), limit):
+        if entry.get(JsonKeys.CONTENT_TYPE) != ContentType.IMAGE.value:
+            continue
+        with Image.open(store.find(entry[JsonKeys.CONTENT_HASH])) as image:
+            image.thumbnail((thumbnail_size, thumbnail_size))
+        images += 1
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预览缓存基准测试")
+    parser.add_argument("--entries", type=int, default=5000, help="记录总数")
+    parser.add_argument("--image-every", type=int, default=10, help="每多少条记录中有一张截图")
+    parser.add_argument("--list", dest="limit", type=int, default=5000, help="列出的最近记录数")
+    parser.add_argument("--rounds", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    # 全部记录写入同一天的日志，单个日志文件需要容纳全部记录
+    overrides = {ConfigKeys.Logging.SECTION: {
+        ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSONL.value,
+        ConfigKeys.Logging.MAX_ENTRIES: args.entries,
+        ConfigKeys.Logging.IMAGE_STORAGE: ImageStorage.CONTENT.value,
+    }}
+    with tempfile.TemporaryDirectory() as base_dir:
+        elapsed = populate(base_dir, overrides, args.entries, args.image_every)
+        print(f"\n写入 {args.entries} 条记录（每 {args.image_every} 条一张 {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]} 截图）："
+              f"{elapsed:.1f} s")
+
+        logger = make_logger(base_dir, overrides)
+        print(f"预览缓存：{len(logger.preview_cache)} 条，"
+              f"内存 LRU 最多 {logger.preview_cache.memory_entries} 条")
+        logger.close()
+
+        print(f"\n列出最近 {args.limit} 条记录（{args.rounds} 次平均）")
+        cold = 0.0
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            logger = make_logger(base_dir, overrides)
+            thumbnails = list_previews(HistoryReader(logger), args.limit)
+            cold += time.perf_counter() - start
+            logger.close()
+        print(f"  {'读取预览（冷，含打开日志目录）':<24} {cold / args.rounds * 1000:10.1f} ms  缩略图 {thumbnails} 张")
+
+        logger = make_logger(base_dir, overrides)
+        reader = HistoryReader(logger)
+        list_previews(reader, args.limit)
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            list_previews(reader, args.limit)
+        print(f"  {'读取预览（热）':<24} {(time.perf_counter() - start) / args.rounds * 1000:10.1f} ms")
+
+        thumbnail_size = logger._config.get(ConfigKeys.Encoding.SECTION, ConfigKeys.Encoding.THUMBNAIL_SIZE)
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            images = decode_images(reader, args.limit, thumbnail_size)
+        print(f"  {'解码完整图片':<24} {(time.perf_counter() - start) / args.rounds * 1000:10.1f} ms  图片 {images} 张")
+        logger.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""记录序列化基准测试
+
+生成一个写满 max_entries_per_file 条记录的日志（短文本和文件路径混合），比较：
+
+* 编码整份 JSON 日志：原来的 json.dump(indent=2) 写入文本文件，与 serialization.dumps
+  （当前实现见输出中的 BACKEND）的缩进和紧凑格式
+* 解析整份 JSON 日志：json.loads 与 serialization.loads
+* 逐条编码 JSONL 记录：json.dumps 后再编码为 UTF-8，与 serialization.dumps
+* ClipboardContent：首次 to_dict / get_hash 与缓存后的调用
+
+用法::
+
+    python benchmarks/bench_serialization.py --entries 1000 --rounds 20
+"""
+import io
+import json
+import time
+import argparse
+
+import common  # noqa: F401  将仓库根目录加入 sys.path
+from src import serialization
+from src.constants import ContentType, JsonKeys
+from src.models import ClipboardContent
+
+# 每条文本记录的长度（字符）
+TEXT_LENGTH = 300
+
+
+def make_contents(count: int):
+    """生成短文本和文件路径混合的剪贴板内容，每 5 条中有一条文件路径"""
+    contents = []
+    for i in range(count):
+        content = ClipboardContent()
+        content.formats = {"CF_UNICODETEXT": 13, "CF_LOCALE": 16, "CF_TEXT": 1}
+        if i % 5 == 0:
+            content.content_type = ContentType.FILES.value
+            content.data[JsonKeys.FILE_PATHS] = [f"C:\\Users\\用户\\文档\\报告_{i}_{j}.docx" for j in range(5)]
+        else:
+            content.content_type = ContentType.TEXT.value
+            content.data[JsonKeys.TEXT_CONTENT] = f"剪贴板文本 {i} " + "lorem ipsum 你好世界 " * (TEXT_LENGTH // 20)
+        contents.append(content)
+    return contents
+
+
+def timed(func, rounds: int) -> float:
+    """执行 rounds 次，返回每次的平均耗时（毫秒）"""
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def print_row(label: str, baseline_ms: float, ms: float):
+    """输出一行耗时与相对原实现的加速比"""
+    print(f"  {label:<36} {ms:9.3f} ms  {baseline_ms / ms:6.1f}x")
+
+
+def json_dump_indent(records):
+    """原来的写法：json.dump(indent=2) 写入文本文件"""
+    buffer = io.StringIO()
+    json.dump(records, buffer, ensure_ascii=False, indent=2)
+    return buffer.getvalue().encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="记录序列化基准测试")
+    parser.add_argument("--entries", type=int, default=1000, help="日志中的记录数")
+    parser.add_argument("--rounds", type=int, default=20, help="重复次数")
+    args = parser.parse_args()
+
+    contents = make_contents(args.entries)
+    records = [content.to_dict() for content in contents]
+    document = json_dump_indent(records)
+    print(f"\n序列化实现：{serialization.BACKEND}，{args.entries} 条记录，"
+          f"缩进格式 {len(document) / 1024:.0f} KB")
+
+    print("\n编码整份 JSON 日志（写入 JSON 格式日志时每次保存都要执行）")
+    base = timed(lambda: json_dump_indent(records), args.rounds)
+    print_row("json.dump(indent=2)", base, base)
+    print_row("serialization.dumps(indent=True)", base,
+              timed(lambda: serialization.dumps(records, indent=True), args.rounds))
+    print_row("serialization.dumps()", base, timed(lambda: serialization.dumps(records), args.rounds))
+
+    print("\n解析整份 JSON 日志")
+    text = document.decode('utf-8')
+    base = timed(lambda: json.loads(text), args.rounds)
+    print_row("json.loads", base, base)
+    print_row("serialization.loads", base, timed(lambda: serialization.loads(text), args.rounds))
+
+    print("\n逐条编码 JSONL 记录")
+    base = timed(lambda: [(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+                          for r in records], args.rounds)
+    print_row("json.dumps + encode", base, base)
+    print_row("serialization.dumps", base,
+              timed(lambda: [serialization.dumps(r) + b'\n' for r in records], args.rounds))
+
+    print("\nClipboardContent（全部记录）")
+
+    def first_call():
+        for content in contents:
+            content._hash = None
+            content._record = None
+            content.to_dict()
+
+    base = timed(first_call, args.rounds)
+    print_row("首次 get_hash + to_dict", base, base)
+    print_row("缓存后 to_dict", base, timed(lambda: [content.to_dict() for content in contents], args.rounds))
+    print_row("缓存后 get_hash", base, timed(lambda: [content.get_hash() for content in contents], args.rounds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""图片传递方式的内存基准测试
+
+每种方式在新的子进程中运行，连续捕获若干张 4K/8K 截图，报告每个进程在捕获期间
+常驻内存峰值相对捕获前的增量，以及监控线程处理一张图片的耗时：
+
+* 单进程：监控线程中完成 PNG 编码和写入
+* 拆分·直接发送：捕获进程复制原始像素并通过连接发送，存储进程接收后编码
+* 拆分·共享内存：捕获进程将像素复制到共享内存缓冲池，存储进程直接读取共享内存编码
+
+共享内存的页面同时计入两个进程的常驻内存，但整个链路只有一份像素数据。
+峰值重置依赖 Linux 的 /proc/self/clear_refs，其他平台上的峰值包含生成截图的开销。
+
+用法::
+
+    python benchmarks/bench_shared_memory.py --rounds 5
+"""
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+from common import SIZE_4K, SIZE_8K, make_config, make_screenshot, peak_rss_mb, reset_peak_rss, rss_mb
+from src.config import Config
+from src.backends import FakeClipboardBackend
+from src.constants import ConfigKeys, StorageFormat
+from src.ipc import RemoteStore, StorageServer
+from src.monitor import ClipboardMonitor
+
+SINGLE = "单进程"
+SPLIT_INLINE = "拆分·直接发送"
+SPLIT_SHARED = "拆分·共享内存"
+
+
+def measure_peak() -> float:
+    """捕获前调用，重置峰值并返回当前常驻内存"""
+    baseline = rss_mb() or 0.0
+    reset_peak_rss()
+    return baseline
+
+
+def store_main(config_file: str, results):
+    """存储进程：运行到收到 shutdown 为止，报告峰值增量"""
+    server = StorageServer(Config(config_file))
+    baseline = measure_peak()
+    server.serve_forever()
+    results.put(("store", (peak_rss_mb() or 0.0) - baseline))
+
+
+def capture_main(config_file: str, scenario: str, size, rounds: int, results):
+    """捕获进程：每轮修改一个像素后放入剪贴板并捕获，报告峰值增量和平均耗时"""
+    config = Config(config_file)
+    backend = FakeClipboardBackend()
+    if scenario == SINGLE:
+        monitor = ClipboardMonitor(config, backend)
+    else:
+        store = RemoteStore(config)
+        store.connect()
+        monitor = ClipboardMonitor(config, backend, store=store)
+    image = make_screenshot(size)
+    baseline = measure_peak()
+    elapsed = 0.0
+    for i in range(rounds):
+        image.putpixel((i, 0), (i % 256, 0, 0))
+        backend.set_image(image)
+        start = time.perf_counter()
+        assert monitor.check_and_save()
+        elapsed += time.perf_counter() - start
+    monitor.close()
+    results.put(("capture", ((peak_rss_mb() or 0.0) - baseline, elapsed / rounds * 1000)))
+
+
+def run(scenario: str, size, rounds: int):
+    """在子进程中运行一种方式，返回捕获耗时和两个进程的峰值增量"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as base_dir:
+        config = make_config(base_dir, {
+            ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSONL.value},
+            ConfigKeys.Ipc.SECTION: {ConfigKeys.Ipc.SHARED_MEMORY: scenario == SPLIT_SHARED},
+        })
+        store = None
+        if scenario != SINGLE:
+            store = context.Process(target=store_main, args=(config.config_file, results))
+            store.start()
+        capture = context.Process(target=capture_main, args=(config.config_file, scenario, size, rounds, results))
+        capture.start()
+        measured = dict([results.get()])
+        capture.join()
+        if store is not None:
+            RemoteStore(config).shutdown()
+            measured.update([results.get()])
+            store.join()
+    capture_peak, capture_ms = measured["capture"]
+    return capture_ms, capture_peak, measured.get("store")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片传递方式的内存基准测试")
+    parser.add_argument("--rounds", type=int, default=5, help="每种方式捕获的图片数")
+    args = parser.parse_args()
+
+    print(f"\n每种方式连续捕获 {args.rounds} 张截图（峰值为相对捕获前的增量）")
+    print(f"  {'尺寸':<6} {'方式':<14} {'捕获耗时(ms)':>12} {'捕获进程峰值(MB)':>16} {'存储进程峰值(MB)':>16}")
+    for label, size in (("4K", SIZE_4K), ("8K", SIZE_8K)):
+        for scenario in (SINGLE, SPLIT_INLINE, SPLIT_SHARED):
+            capture_ms, capture_peak, store_peak = run(scenario, size, args.rounds)
+            store_text = "-" if store_peak is None else f"{store_peak:.1f}"
+            print(f"  {label:<6} {scenario:<14} {capture_ms:12.1f} {capture_peak:16.1f} {store_text:>16}")
+
+
+if __name__ == '__main__':
+    main()
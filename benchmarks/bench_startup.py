@@ -0,0 +1,119 @@
+"""启动耗时基准测试
+
+生成一个包含大量内联图片的当天日志，比较两种恢复去重状态的方式：
+
+* 旧方式：json.load 解析整个日志文件，再对第一条记录的 base64 图片解码并计算哈希
+* 当前方式：创建监控器，只读取日志中最新的一条记录（JSON 读开头，JSONL 读末尾）
+
+当前方式分别测试 JSON 与 JSONL 两种存储格式，均为去重索引已建立后的再次启动。
+
+用法::
+
+    python benchmarks/bench_startup.py --entries 1000 --image-kb 256
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import argparse
+import tempfile
+import tracemalloc
+
+from common import make_config
+from src.logger import ClipboardLogger
+from src.monitor import ClipboardMonitor
+from src.backends import FakeClipboardBackend
+from src.journal import write_journal
+from src.constants import ConfigKeys, ContentType, ImageStorage, JsonKeys, StorageFormat
+
+
+def make_entries(count: int, image_kb: int):
+    """生成按时间从新到旧排列、带内联 base64 图片的日志记录"""
+    entries = []
+    for i in range(count):
+        image_bytes = os.urandom(image_kb * 1024)
+        entries.append({
+            JsonKeys.TIMESTAMP: f"2024-01-01T12:00:00.{count - i:06d}",
+            JsonKeys.CONTENT_TYPE: ContentType.IMAGE.value,
+            JsonKeys.CONTENT_HASH: hashlib.sha256(image_bytes).hexdigest(),
+            JsonKeys.IMAGE_BASE64: base64.b64encode(image_bytes).decode('ascii'),
+        })
+    return entries
+
+
+def legacy_load(log_file: str) -> str:
+    """旧版本的 _load_last_hash"""
+    with open(log_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return hashlib.sha256(base64.b64decode(data[0][JsonKeys.IMAGE_BASE64])).hexdigest()
+
+
+def current_load(config) -> str:
+    """当前版本：创建监控器即完成去重状态恢复"""
+    monitor = ClipboardMonitor(config, FakeClipboardBackend())
+    last_hash = monitor.last_hash
+    monitor.close()
+    return last_hash
+
+
+def measure(func, rounds: int):
+    """返回平均耗时（毫秒）和峰值内存分配（MB）"""
+    elapsed = 0.0
+    peak = 0
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed / rounds * 1000, peak / (1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--entries", type=int, default=1000, help="日志中的记录数")
+    parser.add_argument("--image-kb", type=int, default=256, help="每张内联图片的大小（KB）")
+    parser.add_argument("--rounds", type=int, default=3, help="每种方式的重复次数")
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries, args.image_kb)
+    expected = entries[0][JsonKeys.CONTENT_HASH]
+    results = []
+    with tempfile.TemporaryDirectory() as base_dir:
+        for storage_format in (StorageFormat.JSON.value, StorageFormat.JSONL.value):
+            run_dir = os.path.join(base_dir, storage_format)
+            os.makedirs(run_dir)
+            config = make_config(run_dir, {
+                ConfigKeys.Logging.SECTION: {
+                    ConfigKeys.Logging.STORAGE_FORMAT: storage_format,
+                    ConfigKeys.Logging.IMAGE_STORAGE: ImageStorage.TIMESTAMPED.value,
+                    ConfigKeys.Logging.DEDUP_HISTORY: True,
+                },
+                ConfigKeys.Pipeline.SECTION: {ConfigKeys.Pipeline.ENABLE_ASYNC: False},
+            })
+            logger = ClipboardLogger(config)
+            log_file = logger._get_log_file()
+            logger.close()
+            if storage_format == StorageFormat.JSONL.value:
+                write_journal(log_file, entries[::-1])
+            else:
+                with open(log_file, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f)
+                results.append(("旧方式（JSON）", measure(lambda: legacy_load(log_file), args.rounds)))
+
+            # 第一次启动建立去重索引，之后的启动才是日常情况
+            assert current_load(config) == expected
+            results.append((f"当前方式（{storage_format.upper()}）",
+                            measure(lambda: current_load(config), args.rounds)))
+            size_mb = os.path.getsize(log_file) / (1 << 20)
+
+    print(f"\n当天日志 {args.entries} 条记录，每条内联 {args.image_kb} KB 图片（约 {size_mb:.0f} MB）")
+    print(f"  {'方式':<16} {'耗时(ms)':>10} {'峰值分配(MB)':>14}")
+    for name, (elapsed, peak) in results:
+        print(f"  {name:<16} {elapsed:10.1f} {peak:14.2f}")
+
+
+if __name__ == '__main__':
+    main()
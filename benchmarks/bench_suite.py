@@ -0,0 +1,264 @@
+"""捕获到写盘全路径的基准测试套件
+
+依次运行 workloads.py 中的合成负载，每个负载在新的临时目录中用两种方式驱动：
+
+* monitor：将事件逐条放入内存剪贴板后端，调用 ClipboardMonitor.check_and_save 检查并同步写入
+  （不启用写入流水线，每次调用的耗时就是从读取剪贴板到写完磁盘的耗时）
+* logger：事先将事件转换为剪贴板内容（图片已编码），只测量 ClipboardLogger.save
+
+每个负载运行若干轮，每轮在新的子进程中进行，合并各轮的单次调用耗时后输出吞吐量和 p50/p99，
+以及各轮子进程中最高的常驻内存峰值和每轮写入的字节数。峰值是整个子进程的峰值，
+包括解释器、导入的模块和生成的事件，前面的负载留下的内存不会计入后面的负载。
+写入字节数来自运行指标中的 clipboard_bytes_written_total，包括 JSON 日志每次整体重写的数据，
+不包括 SQLite 历史数据库。
+
+结果可以保存为基线文件，之后在其他提交上与基线比较，吞吐量下降、p99 耗时或写入字节数
+增加超过阈值时列出回退项并以非零状态退出。
+
+用法::
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --threshold 0.1
+    python benchmarks/bench_suite.py --workloads small_text_burst,full_log --driver monitor
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import platform
+import subprocess
+import multiprocessing
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from common import make_logger, make_monitor, peak_rss_mb
+from workloads import Workload, build_workloads, make_content
+from src.backends import FakeClipboardBackend
+from src.constants import ConfigKeys
+from src.image_codec import ImageEncoder
+from src.metrics import REGISTRY
+
+DRIVERS = ("monitor", "logger")
+# 同步写入，单次 check_and_save 的耗时包含写盘
+SYNC_OVERRIDES = {ConfigKeys.Pipeline.SECTION: {ConfigKeys.Pipeline.ENABLE_ASYNC: False}}
+# 与基线比较的指标：(名称, 越大越好)
+COMPARED = (("ops_per_second", True), ("p99_ms", False), ("bytes_written", False))
+# 预填充时每批保存的条数
+PREFILL_BATCH = 200
+
+
+def bytes_written() -> int:
+    """运行指标中累计写入磁盘的字节数"""
+    return sum(int(sample["value"]) for sample in REGISTRY.to_dict().get("clipboard_bytes_written_total", []))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """按最近秩法计算分位数"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def merge_overrides(*parts: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """按区段合并多份覆盖配置，后面的优先"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for part in parts:
+        for section, values in part.items():
+            merged.setdefault(section, {}).update(values)
+    return merged
+
+
+def prefill(logger, workload: Workload):
+    """将预填充内容分批写入日志"""
+    contents = workload.prefill_contents()
+    for start in range(0, len(contents), PREFILL_BATCH):
+        logger.save_batch(contents[start:start + PREFILL_BATCH])
+
+
+def drive_monitor(base_dir: str, workload: Workload) -> List[float]:
+    """逐条回放事件并调用 check_and_save，返回每次调用的耗时（秒）"""
+    backend = FakeClipboardBackend()
+    monitor = make_monitor(base_dir, backend, merge_overrides(SYNC_OVERRIDES, workload.overrides))
+    prefill(monitor.logger, workload)
+    latencies = []
+    try:
+        for event in workload.events:
+            backend.apply(event)
+            start = time.perf_counter()
+            monitor.check_and_save()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        monitor.close()
+    return latencies
+
+
+def drive_logger(base_dir: str, workload: Workload) -> List[float]:
+    """事先准备好剪贴板内容，逐条调用 ClipboardLogger.save，返回每次调用的耗时（秒）"""
+    logger = make_logger(base_dir, workload.overrides)
+    encoder = ImageEncoder(logger._config)
+    contents = [make_content(event, encoder) for event in workload.events]
+    prefill(logger, workload)
+    latencies = []
+    try:
+        for content in contents:
+            start = time.perf_counter()
+            logger.save(content)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        logger.close()
+    return latencies
+
+
+def run_round(name: str, scale: float, driver: str, results):
+    """子进程：在新的临时目录中运行一轮负载，报告耗时、写入字节数和本进程的常驻内存峰值"""
+    workload = build_workloads(scale)[name]
+    # 事件在计时之前生成
+    events = len(workload.events)
+    written = bytes_written()
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as base_dir:
+        if driver == "monitor":
+            latencies = drive_monitor(base_dir, workload)
+        else:
+            latencies = drive_logger(base_dir, workload)
+    results.put({
+        "events": events,
+        "latencies": latencies,
+        "bytes_written": bytes_written() - written,
+        "wall_seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def run(name: str, scale: float, driver: str, rounds: int) -> Dict[str, Any]:
+    """运行一个负载 rounds 轮，每轮使用新的子进程和临时目录，合并各轮的耗时后返回结果"""
+    context = multiprocessing.get_context("spawn")
+    outcomes = []
+    for _ in range(rounds):
+        results = context.Queue()
+        process = context.Process(target=run_round, args=(name, scale, driver, results))
+        process.start()
+        outcomes.append(results.get())
+        process.join()
+    latencies = [latency for outcome in outcomes for latency in outcome["latencies"]]
+    peaks = [outcome["peak_rss_mb"] for outcome in outcomes]
+    total = sum(latencies)
+    return {
+        "events": outcomes[0]["events"],
+        "ops_per_second": len(latencies) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": max(peaks) if None not in peaks else None,
+        "bytes_written": sum(outcome["bytes_written"] for outcome in outcomes) // rounds,
+        "wall_seconds": sum(outcome["wall_seconds"] for outcome in outcomes) / rounds,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """当前提交的哈希，不在 git 仓库中时返回 None"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_bytes(size: float) -> str:
+    """将字节数格式化为便于阅读的形式"""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_result(name: str, driver: str, result: Dict[str, Any]):
+    """输出一个负载的结果"""
+    peak = result["peak_rss_mb"]
+    print(f"  {name:<18} {driver:<8} {result['ops_per_second']:10.1f} 次/s  "
+          f"p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms  "
+          f"峰值 {peak if peak is not None else float('nan'):7.1f} MB  写入 {format_bytes(result['bytes_written']):>10}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """与基线比较，输出变化并返回超过阈值的回退项"""
+    print(f"\n与基线比较（提交 {baseline.get('commit') or '未知'}，阈值 {threshold:.0%}）")
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            print(f"  {key:<28} 基线中没有此项")
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED:
+            old, new = base.get(metric), result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            changes.append(f"{metric} {change:+7.1%}")
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{key} {metric}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+        print(f"  {key:<28} " + "  ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="捕获到写盘全路径的基准测试套件")
+    parser.add_argument("--workloads", default="", help="要运行的负载，逗号分隔，默认全部")
+    parser.add_argument("--driver", choices=DRIVERS + ("both",), default="both", help="驱动方式")
+    parser.add_argument("--scale", type=float, default=1.0, help="事件数的缩放倍数")
+    parser.add_argument("--rounds", type=int, default=3, help="每个负载运行的轮数")
+    parser.add_argument("--save", metavar="FILE", help="将结果保存为基线文件")
+    parser.add_argument("--compare", metavar="FILE", help="与基线文件比较")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定为回退的变化比例")
+    args = parser.parse_args()
+
+    workloads = build_workloads(args.scale)
+    names = [name for name in args.workloads.split(",") if name] or list(workloads)
+    unknown = [name for name in names if name not in workloads]
+    if unknown:
+        parser.error(f"未知的负载：{', '.join(unknown)}，可选：{', '.join(workloads)}")
+    drivers = DRIVERS if args.driver == "both" else (args.driver,)
+
+    print(f"\n基准测试套件（提交 {git_commit() or '未知'}，缩放 {args.scale}，{args.rounds} 轮）")
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        workload = workloads[name]
+        print(f"{name}：{workload.description}")
+        for driver in drivers:
+            result = run(name, args.scale, driver, args.rounds)
+            results[f"{name}/{driver}"] = result
+            print_result(name, driver, result)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                "commit": git_commit(),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "scale": args.scale,
+                "rounds": args.rounds,
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"\n注意：基线的缩放倍数为 {baseline.get('scale')}，结果不能直接比较")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n回退：")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("\n没有超过阈值的回退")
+
+
+if __name__ == '__main__':
+    main()
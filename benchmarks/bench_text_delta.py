@@ -0,0 +1,204 @@
+"""文本增量保存基准测试
+
+模拟“复制、修改、再复制”的编辑流：几份文档交替被修改后复制，中间穿插不相关的短文本
+和长文本。编辑流包括：
+
+* 文档修订：几 KB 的中英文混合文档，每个版本插入一句话、删除或替换一个词
+* 代码片段：一段代码，每个版本重命名一个标识符（多处分散的修改）或增加一行
+* 追加笔记：不断在末尾追加一行的笔记
+
+分别关闭和开启文本增量，比较日志占用的磁盘空间和写入耗时，然后：
+
+* 顺序读取：从新到旧读出全部记录并还原，核对每条文本与写入时相同
+* 随机读取：清空已还原文本的缓存后单独还原一条记录，按增量链长度统计 p50/p99
+
+用法::
+
+    python benchmarks/bench_text_delta.py --versions 60 --format jsonl
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from common import make_logger
+from src.models import ClipboardContent
+from src.history import HistoryReader
+from src.constants import ConfigKeys, ContentType, JsonKeys, StorageFormat
+
+WORDS = ("剪贴板 历史 记录 内容 配置 修改 版本 文档 段落 clipboard history monitor "
+         "the quick brown fox jumps over lazy dog release notes").split()
+IDENTIFIERS = ["value", "entry", "record", "buffer", "result", "offset", "length", "handler"]
+
+
+def make_sentence(rng: random.Random) -> str:
+    """生成一句中英文混合的话"""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))) + "。"
+
+
+def make_document(rng: random.Random, length: int) -> str:
+    """生成由若干段落组成的文档"""
+    paragraphs = []
+    while sum(len(p) for p in paragraphs) < length:
+        paragraphs.append("".join(make_sentence(rng) for _ in range(rng.randint(3, 6))))
+    return "\n\n".join(paragraphs)
+
+
+def make_code(rng: random.Random, lines: int) -> str:
+    """生成一段类似 Python 的代码"""
+    body = []
+    for i in range(lines):
+        name, other = rng.sample(IDENTIFIERS, 2)
+        body.append(f"    {name}_{i % 7} = compute({other}, {rng.randint(0, 999)})  # {make_sentence(rng)}")
+    return "def process(value, entry):\n" + "\n".join(body) + "\n    return result\n"
+
+
+def revise_document(rng: random.Random, text: str) -> str:
+    """在随机位置插入一句话，或删除、替换一个词"""
+    position = rng.randrange(len(text))
+    action = rng.random()
+    if action < 0.4:
+        return text[:position] + make_sentence(rng) + text[position:]
+    end = text.find(" ", position + 1)
+    end = end if end != -1 else len(text)
+    if action < 0.7:
+        return text[:position] + text[end:]
+    return text[:position] + " " + rng.choice(WORDS) + text[end:]
+
+
+def revise_code(rng: random.Random, text: str) -> str:
+    """重命名一个标识符的全部出现，或增加一行代码"""
+    if rng.random() < 0.5:
+        old = rng.choice(IDENTIFIERS)
+        return text.replace(f"{old}_", f"{old}{rng.randint(2, 9)}_")
+    lines = text.split("\n")
+    position = rng.randint(1, len(lines) - 2)
+    lines.insert(position, f"    extra_{rng.randint(0, 99)} = {rng.choice(IDENTIFIERS)}_0 + 1")
+    return "\n".join(lines)
+
+
+def append_note(rng: random.Random, text: str) -> str:
+    """在笔记末尾追加一行"""
+    return text + "\n- " + make_sentence(rng)
+
+
+def make_stream(versions: int, seed: int = 0) -> List[str]:
+    """生成交替编辑三份内容并穿插无关内容的剪贴板文本序列"""
+    rng = random.Random(seed)
+    streams = [
+        [make_document(rng, 4000), revise_document],
+        [make_code(rng, 40), revise_code],
+        ["# 会议笔记\n- " + "\n- ".join(make_sentence(rng) for _ in range(6)), append_note],
+    ]
+    texts = []
+    for _ in range(versions):
+        for stream in streams:
+            if rng.random() < 0.7:
+                stream[0] = stream[1](rng, stream[0])
+                texts.append(stream[0])
+        # 不相关的内容：短文本不参与增量，偶尔有一段新的长文档
+        texts.append(f"https://example.com/{rng.randint(0, 10 ** 6)}")
+        if rng.random() < 0.1:
+            texts.append(make_document(rng, rng.randint(500, 3000)))
+    return texts
+
+
+def make_contents(texts: List[str]) -> List[ClipboardContent]:
+    """按顺序生成当天的文本内容，时间戳间隔 1 秒"""
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    contents = []
+    for i, text in enumerate(texts):
+        content = ClipboardContent()
+        content.content_type = ContentType.TEXT.value
+        content.data[JsonKeys.TEXT_CONTENT] = text
+        content.timestamp = (start + timedelta(seconds=i)).isoformat()
+        contents.append(content)
+    return contents
+
+
+def percentile(values, q: float) -> float:
+    """按最近秩法计算分位数"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+
+def run(base_dir: str, texts: List[str], storage_format: str, delta: bool, samples: int) -> Dict[str, object]:
+    """写入编辑流并读回，返回磁盘占用、耗时和随机还原的延迟"""
+    logger = make_logger(base_dir, {
+        ConfigKeys.Logging.SECTION: {
+            ConfigKeys.Logging.STORAGE_FORMAT: storage_format,
+            ConfigKeys.Logging.MAX_ENTRIES: len(texts) + 1,
+            ConfigKeys.Logging.SEGMENT_KB: 0,
+        },
+        ConfigKeys.TextDelta.SECTION: {ConfigKeys.TextDelta.ENABLE: delta},
+    })
+    contents = make_contents(texts)
+    start = time.perf_counter()
+    for content in contents:
+        logger.save(content)
+    write_ms = (time.perf_counter() - start) / len(contents) * 1000
+    logger.close()
+    disk = sum(os.path.getsize(path) for path in logger._list_log_files())
+
+    reader = HistoryReader(logger)
+    expected = {content.timestamp: content.data[JsonKeys.TEXT_CONTENT] for content in contents}
+    start = time.perf_counter()
+    count = 0
+    for entry in reader.iter_entries():
+        if entry.get(JsonKeys.TEXT_CONTENT) != expected[entry[JsonKeys.TIMESTAMP]]:
+            raise SystemExit(f"{entry[JsonKeys.TIMESTAMP]} 还原的文本与写入时不同")
+        count += 1
+    read_ms = (time.perf_counter() - start) * 1000
+    if count != len(texts):
+        raise SystemExit(f"读出 {count} 条记录，应为 {len(texts)} 条")
+
+    raw = list(reader.iter_entries(resolve=False))
+    deltas = [entry for entry in raw if JsonKeys.TEXT_DELTA in entry]
+    by_depth: Dict[int, List[float]] = {}
+    rng = random.Random(1)
+    for entry in rng.sample(raw, min(samples, len(raw))):
+        logger._delta_texts.clear()
+        start = time.perf_counter()
+        resolved = logger.resolve_entry(entry)
+        elapsed = (time.perf_counter() - start) * 1000
+        if resolved.get(JsonKeys.TEXT_CONTENT) != expected[entry[JsonKeys.TIMESTAMP]]:
+            raise SystemExit(f"{entry[JsonKeys.TIMESTAMP]} 随机还原的文本与写入时不同")
+        by_depth.setdefault(entry.get(JsonKeys.DELTA_DEPTH, 0), []).append(elapsed)
+    return {"disk": disk, "write_ms": write_ms, "read_ms": read_ms, "deltas": len(deltas), "by_depth": by_depth}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文本增量保存基准测试")
+    parser.add_argument("--versions", type=int, default=60, help="每份内容的修改轮数")
+    parser.add_argument("--format", default=StorageFormat.JSONL.value,
+                        choices=[StorageFormat.JSON.value, StorageFormat.JSONL.value], help="日志存储格式")
+    parser.add_argument("--samples", type=int, default=200, help="随机还原的记录数")
+    args = parser.parse_args()
+
+    texts = make_stream(args.versions)
+    raw = sum(len(text.encode('utf-8')) for text in texts)
+    print(f"\n{len(texts)} 条剪贴板文本，原始 {raw / 1024:.0f} KB，格式 {args.format}")
+    results = {}
+    for name, delta in (("完整保存", False), ("增量保存", True)):
+        with tempfile.TemporaryDirectory() as base_dir:
+            results[name] = run(base_dir, texts, args.format, delta, args.samples)
+
+    print(f"  {'配置':<10} {'磁盘(KB)':>10} {'增量记录':>8} {'写入(ms/条)':>12} {'顺序读取(ms)':>13}")
+    for name, result in results.items():
+        print(f"  {name:<10} {result['disk'] / 1024:10.0f} {result['deltas']:8d} "
+              f"{result['write_ms']:12.3f} {result['read_ms']:13.1f}")
+    saved = 1 - results["增量保存"]["disk"] / results["完整保存"]["disk"]
+    print(f"  节省磁盘空间 {saved:.1%}")
+
+    print("\n随机还原单条记录（不使用缓存）")
+    print(f"  {'增量链长度':<10} {'条数':>6} {'p50(ms)':>10} {'p99(ms)':>10}")
+    for depth, latencies in sorted(results["增量保存"]["by_depth"].items()):
+        print(f"  {depth:<10} {len(latencies):6d} {percentile(latencies, 0.5):10.3f} "
+              f"{percentile(latencies, 0.99):10.3f}")
+
+
+if __name__ == '__main__':
+    main()
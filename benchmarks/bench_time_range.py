@@ -0,0 +1,115 @@
+"""按时间范围读取历史的基准测试
+
+生成一整天的 JSONL 日志（按 segment_kb 分段，每个分段带时间索引），随机选取若干个
+5 分钟的时间窗口，比较两种读取方式：
+
+* 解析全天：逐个读取当天的全部分段并解析每一行，再按时间过滤（分段和索引之前的做法）
+* 时间索引：HistoryReader.iter_entries(since, until)，在每个分段的索引中二分查找后只解析窗口附近的记录
+
+分别在未压缩和压缩封存后的日志上运行，两种方式返回的记录必须完全相同。
+
+用法::
+
+    python benchmarks/bench_time_range.py --entries 50000 --queries 20
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from common import make_logger
+from src.constants import ConfigKeys, JsonKeys, StorageFormat
+from src.history import HistoryReader
+from src.journal import iter_journal
+
+# 每条文本记录的长度（字符）
+TEXT_LENGTH = 300
+# 查询窗口的长度
+WINDOW = timedelta(minutes=5)
+
+
+def make_records(day: datetime, count: int):
+    """生成均匀分布在一天之内、按时间排列的文本记录"""
+    step = 86400 / count
+    rng = random.Random(count)
+    for i in range(count):
+        timestamp = day + timedelta(seconds=i * step)
+        yield {
+            JsonKeys.TIMESTAMP: timestamp.isoformat(),
+            JsonKeys.CONTENT_TYPE: "text",
+            JsonKeys.TEXT_CONTENT: f"记录 {i} " + "".join(rng.choices("abcdefghij 剪贴板", k=TEXT_LENGTH)),
+        }
+
+
+def full_scan(logger, since: str, until: str):
+    """解析当天全部分段的每一行，再按时间过滤"""
+    return [
+        record for log_file in logger._list_log_files() for record in iter_journal(log_file)
+        if since <= record[JsonKeys.TIMESTAMP] < until
+    ]
+
+
+def indexed(reader: HistoryReader, since: str, until: str):
+    """通过时间索引读取窗口内的记录"""
+    return list(reader.iter_entries(since=since, until=until, newest_first=False, resolve=False))
+
+
+def timed(func, windows) -> float:
+    """对每个窗口执行一次，返回每次查询的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for since, until in windows:
+        func(since, until)
+    return (time.perf_counter() - start) / len(windows) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按时间范围读取历史的基准测试")
+    parser.add_argument("--entries", type=int, default=50000, help="一天内的记录数")
+    parser.add_argument("--queries", type=int, default=20, help="查询的时间窗口数")
+    parser.add_argument("--segment-kb", type=int, default=4096, help="分段大小（KB）")
+    args = parser.parse_args()
+
+    day = datetime(2024, 1, 2)
+    rng = random.Random(0)
+    windows = []
+    for _ in range(args.queries):
+        since = day + timedelta(seconds=rng.randrange(86400 - int(WINDOW.total_seconds())))
+        windows.append((since.isoformat(), (since + WINDOW).isoformat()))
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = make_logger(base_dir, {
+            ConfigKeys.Logging.SECTION: {
+                ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSONL.value,
+                ConfigKeys.Logging.SEGMENT_KB: args.segment_kb,
+                ConfigKeys.Logging.MAX_ENTRIES: args.entries,
+                ConfigKeys.Logging.DEDUP_HISTORY: False,
+            },
+        })
+        records = list(make_records(day, args.entries))
+        for start in range(0, len(records), 500):
+            logger._append_journal(logger._writable_log_file("2024-01-02", "2024-01-02"), records[start:start + 500])
+        logger._journal.close()
+        reader = HistoryReader(logger)
+        segments = logger._list_log_files()
+        size = sum(os.path.getsize(log_file) for log_file in segments)
+        print(f"\n{args.entries} 条记录，{len(segments)} 个分段共 {size / (1 << 20):.1f} MB，"
+              f"{args.queries} 个 {int(WINDOW.total_seconds() // 60)} 分钟的窗口")
+
+        print(f"  {'日志':<10} {'解析全天(ms)':>14} {'时间索引(ms)':>14} {'加速':>8}")
+        for label in ("未压缩", "压缩封存"):
+            if label == "压缩封存":
+                logger.compress_sealed_logs = True
+                logger.seal_old_logs()
+            for since, until in windows:
+                if full_scan(logger, since, until) != indexed(reader, since, until):
+                    raise SystemExit(f"结果不一致：{since} - {until}")
+            scan = timed(lambda since, until: full_scan(logger, since, until), windows)
+            fast = timed(lambda since, until: indexed(reader, since, until), windows)
+            print(f"  {label:<10} {scan:14.1f} {fast:14.2f} {scan / fast:7.0f}x")
+        logger.close()
+
+
+if __name__ == '__main__':
+    main()
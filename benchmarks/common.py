@@ -0,0 +1,141 @@
+"""基准测试的公共工具
+
+提供在临时目录中创建监控器和日志管理器、生成合成截图、读取进程内存占用等辅助函数。
+"""
+import os
+import sys
+import json
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+from src.config import Config
+from src.logger import ClipboardLogger
+from src.monitor import ClipboardMonitor
+from src.backends import ClipboardBackend
+from src.constants import ConfigKeys
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 常用截图尺寸
+SIZE_4K = (3840, 2160)
+SIZE_8K = (7680, 4320)
+
+
+def make_config(base_dir: str, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Config:
+    """在临时目录中写入配置文件并加载。
+
+    日志目录固定为 base_dir/logs，控制台预览默认关闭。
+
+    Args:
+        base_dir (str): 临时目录
+        overrides (Optional[Dict[str, Dict[str, Any]]], optional): 按区段覆盖的配置项
+
+    Returns:
+        Config: 配置对象
+    """
+    settings: Dict[str, Dict[str, Any]] = {
+        ConfigKeys.General.SECTION: {
+            ConfigKeys.General.BASE_DIR: os.path.join(base_dir, "logs")
+        },
+        ConfigKeys.Display.SECTION: {
+            ConfigKeys.Display.SHOW_PREVIEW: False
+        }
+    }
+    for section, values in (overrides or {}).items():
+        settings.setdefault(section, {}).update(values)
+
+    config_file = os.path.join(base_dir, "config.json")
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump(settings, f)
+    return Config(config_file)
+
+
+def make_monitor(base_dir: str, backend: ClipboardBackend,
+                 overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> ClipboardMonitor:
+    """在临时目录中创建使用指定后端的监控器"""
+    return ClipboardMonitor(make_config(base_dir, overrides), backend)
+
+
+def make_logger(base_dir: str, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> ClipboardLogger:
+    """在临时目录中创建日志管理器"""
+    return ClipboardLogger(make_config(base_dir, overrides))
+
+
+def make_screenshot(size: Tuple[int, int] = SIZE_4K, seed: int = 0) -> Image.Image:
+    """生成一张类似桌面截图的合成图片。
+
+    由渐变背景、纯色窗口和文本行状的色块组成，压缩特性接近真实截图。
+
+    Args:
+        size (Tuple[int, int], optional): 图片尺寸。默认为 4K
+        seed (int, optional): 用于区分不同截图的种子。默认为 0
+
+    Returns:
+        Image.Image: RGB 图片
+    """
+    width, height = size
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for window in range(6):
+        left = (window * 613 + seed * 97) % max(1, width // 2)
+        top = (window * 389 + seed * 53) % max(1, height // 2)
+        right, bottom = left + width // 3, top + height // 3
+        draw.rectangle((left, top, right, bottom), fill=(240, 240, 240), outline=(60, 60, 60))
+        for line in range(top + 20, bottom - 20, 18):
+            length = ((line * 31 + window * 17 + seed) % (right - left - 40)) + 20
+            draw.rectangle((left + 20, line, left + 20 + length, line + 8), fill=(30, 30, 30))
+    return image
+
+
+def rss_mb() -> Optional[float]:
+    """当前进程的常驻内存（MB），无法获取时返回 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1 << 20)
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程的常驻内存峰值（MB），无法获取时返回 None"""
+    try:
+        # Linux 上读取可被 reset_peak_rss 重置的 VmHWM
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 为单位，macOS 以字节为单位
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), "peak_wset", 0) / (1 << 20) or None
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """将常驻内存峰值重置为当前值，只在 Linux 上可用，返回是否成功。
+
+    重置后的峰值仍包含进程此前分配、尚未归还给系统的内存，比较多个负载的峰值时
+    应让每个负载在单独的子进程中运行。
+    """
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,169 @@
+"""基准测试的合成负载
+
+每个负载由一串剪贴板事件和运行前的准备组成，可以回放到内存剪贴板后端驱动监控器，
+也可以直接转换为剪贴板内容交给日志管理器保存。内容由固定种子生成，每次运行完全相同，
+不同提交之间的结果可以直接比较。
+
+Classes:
+    Workload: 一个命名的合成负载
+
+Functions:
+    make_content: 将事件转换为日志管理器可以直接保存的剪贴板内容
+    build_workloads: 按缩放倍数生成全部负载
+"""
+import random
+import string
+from typing import Any, Callable, Dict, List, Optional
+
+from common import SIZE_4K, SIZE_8K, make_screenshot
+from src.backends import ClipboardEvent
+from src.constants import ConfigKeys, ContentType, JsonKeys
+from src.image_codec import ImageEncoder
+from src.models import ClipboardContent
+
+# 所有负载共用的随机种子
+SEED = 20240601
+# 大文本的长度（字符）
+LARGE_TEXT_CHARS = 1 << 20
+# 预填充日志时每条文本的长度（字符）
+PREFILL_TEXT_CHARS = 200
+
+Overrides = Dict[str, Dict[str, Any]]
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    """生成由单词和空白组成的随机文本"""
+    alphabet = string.ascii_letters + string.digits
+    words = []
+    size = 0
+    while size < length:
+        word = "".join(rng.choices(alphabet, k=rng.randint(2, 10)))
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def _text_events(count: int, min_chars: int, max_chars: int, tag: str) -> List[ClipboardEvent]:
+    """生成 count 条长度在 min_chars 到 max_chars 之间的文本事件"""
+    rng = random.Random(f"{SEED}-{tag}")
+    return [
+        ClipboardEvent(0.0, ContentType.TEXT.value, f"{tag} {i} " + _random_text(rng, rng.randint(min_chars, max_chars)))
+        for i in range(count)
+    ]
+
+
+def _large_text_events(count: int, tag: str) -> List[ClipboardEvent]:
+    """生成 count 条 LARGE_TEXT_CHARS 字符的文本事件"""
+    # 只生成一段随机文本，每条在开头加上序号，避免生成数 MB 随机数
+    body = _random_text(random.Random(f"{SEED}-{tag}"), LARGE_TEXT_CHARS)
+    return [ClipboardEvent(0.0, ContentType.TEXT.value, f"{i:08d}" + body[8:]) for i in range(count)]
+
+
+def _screenshot_events(count: int, size) -> List[ClipboardEvent]:
+    """生成 count 张指定尺寸的不同截图事件"""
+    return [ClipboardEvent(0.0, ContentType.IMAGE.value, make_screenshot(size, i)) for i in range(count)]
+
+
+def _file_drop_events(count: int, tag: str) -> List[ClipboardEvent]:
+    """生成 count 次文件拖放事件，每次 1-50 个文件"""
+    rng = random.Random(f"{SEED}-{tag}")
+    events = []
+    for i in range(count):
+        folder = "/".join(_random_text(rng, 8).split()) or "dir"
+        paths = [f"/home/user/{folder}/file_{i}_{j}.txt" for j in range(rng.randint(1, 50))]
+        events.append(ClipboardEvent(0.0, ContentType.FILES.value, paths))
+    return events
+
+
+class Workload:
+    """一个命名的合成负载。
+
+    Attributes:
+        name (str): 负载名称，也是基线文件中的键
+        description (str): 负载说明
+        overrides (Overrides): 运行该负载时覆盖的配置项
+        prefill (int): 运行前预先写入日志的文本条数
+    """
+
+    def __init__(self, name: str, description: str, make_events: Callable[[], List[ClipboardEvent]],
+                 overrides: Optional[Overrides] = None, prefill: int = 0):
+        """初始化负载，事件在第一次使用时才生成。
+
+        Args:
+            name (str): 负载名称
+            description (str): 负载说明
+            make_events (Callable[[], List[ClipboardEvent]]): 生成事件列表的函数
+            overrides (Optional[Overrides], optional): 覆盖的配置项
+            prefill (int, optional): 运行前预先写入日志的文本条数。默认为 0
+        """
+        self.name = name
+        self.description = description
+        self.overrides = overrides or {}
+        self.prefill = prefill
+        self._make_events = make_events
+        self._events: Optional[List[ClipboardEvent]] = None
+
+    @property
+    def events(self) -> List[ClipboardEvent]:
+        """负载的事件列表，多次运行时复用"""
+        if self._events is None:
+            self._events = self._make_events()
+        return self._events
+
+    def prefill_contents(self) -> List[ClipboardContent]:
+        """预填充日志的文本内容"""
+        return [make_content(event) for event in _text_events(self.prefill, PREFILL_TEXT_CHARS,
+                                                             PREFILL_TEXT_CHARS, f"{self.name}-prefill")]
+
+
+def make_content(event: ClipboardEvent, encoder: Optional[ImageEncoder] = None) -> ClipboardContent:
+    """将事件转换为日志管理器可以直接保存的剪贴板内容。
+
+    Args:
+        event (ClipboardEvent): 剪贴板事件
+        encoder (Optional[ImageEncoder], optional): 图片编码器，图片事件必须提供
+
+    Returns:
+        ClipboardContent: 剪贴板内容，图片已编码
+    """
+    content = ClipboardContent()
+    if event.content_type == ContentType.IMAGE.value:
+        content.set_encoded_image(encoder.encode(event.payload))
+    elif event.content_type == ContentType.FILES.value:
+        content.content_type = ContentType.FILES.value
+        content.data[JsonKeys.FILE_PATHS] = list(event.payload)
+    else:
+        content.content_type = ContentType.TEXT.value
+        content.data[JsonKeys.TEXT_CONTENT] = event.payload
+    return content
+
+
+def build_workloads(scale: float = 1.0) -> Dict[str, Workload]:
+    """按缩放倍数生成全部负载。
+
+    Args:
+        scale (float, optional): 事件数的缩放倍数，每个负载至少一条事件。默认为 1.0
+
+    Returns:
+        Dict[str, Workload]: 按名称索引的负载，按运行顺序排列
+    """
+    def count(base: int) -> int:
+        return max(1, round(base * scale))
+
+    small = count(1000)
+    return {workload.name: workload for workload in (
+        Workload("small_text_burst", f"{small} 条 10-200 字符的短文本连续复制",
+                 lambda: _text_events(small, 10, 200, "small")),
+        Workload("large_text", f"{count(10)} 段 1 MiB 文本",
+                 lambda: _large_text_events(count(10), "large")),
+        Workload("screenshot_4k", f"{count(5)} 张 4K 截图",
+                 lambda: _screenshot_events(count(5), SIZE_4K)),
+        Workload("screenshot_8k", f"{count(2)} 张 8K 截图",
+                 lambda: _screenshot_events(count(2), SIZE_8K)),
+        Workload("file_drops", f"{count(500)} 次拖放 1-50 个文件",
+                 lambda: _file_drop_events(count(500), "files")),
+        Workload("full_log", f"日志预先写满 max_entries_per_file 后再复制 {count(200)} 条短文本",
+                 lambda: _text_events(count(200), 10, 200, "full"),
+                 prefill=1000,
+                 overrides={ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.MAX_ENTRIES: 1000}}),
+    )}
@@ -1,5 +1,15 @@
-"""主程序入口"""
+"""主程序入口
+
+用法::
+
+    python main.py                  # 按配置文件中的 ipc.mode 运行，默认单进程
+    python main.py --mode split     # 捕获进程 + 存储子进程
+    python main.py --mode store     # 只运行存储进程，可供多个捕获进程连接
+    python main.py --mode capture   # 只运行捕获进程，连接已启动的存储进程
+"""
 import sys
+import argparse
+import multiprocessing
 from pathlib import Path
 from typing import NoReturn
 
@@ -18,15 +28,34 @@ def setup_python_path() -> None:
 def main() -> NoReturn:
     """
     主程序入口函数
-    启动剪贴板监控器
+    按运行模式启动剪贴板监控器或存储进程
     """
-    from src.monitor import ClipboardMonitor
-    
     setup_python_path()
-    monitor = ClipboardMonitor()
-    monitor.run()
+    from src.config import Config
+    from src.constants import ConfigKeys, Paths, ProcessMode
+
+    parser = argparse.ArgumentParser(description="剪贴板记录器")
+    parser.add_argument("--mode", choices=[mode.value for mode in ProcessMode], default=None,
+                        help="运行模式，默认取配置文件中的 ipc.mode")
+    parser.add_argument("--config", default=Paths.DEFAULT_CONFIG_FILE, help="配置文件路径")
+    args = parser.parse_args()
+
+    config = Config(args.config)
+    mode = args.mode or config.get(ConfigKeys.Ipc.SECTION, ConfigKeys.Ipc.MODE)
+    if mode == ProcessMode.SINGLE.value:
+        from src.monitor import ClipboardMonitor
+        ClipboardMonitor(config).run()
+        return
+
+    from src.ipc import StorageServer, run_capture
+    if mode == ProcessMode.STORE.value:
+        StorageServer(config).serve_forever()
+    else:
+        run_capture(config, spawn_store=mode == ProcessMode.SPLIT.value)
 
 if __name__ == "__main__":
+    # 打包为可执行文件后启动存储子进程需要
+    multiprocessing.freeze_support()
     try:
         main()
     except KeyboardInterrupt:
@@ -11,10 +11,14 @@ from .models import ClipboardContent
 from .config import Config
 from .logger import ClipboardLogger
 from .monitor import ClipboardMonitor
+from .backends import ClipboardBackend, Win32ClipboardBackend, FakeClipboardBackend
 
 __all__ = [
     'ClipboardContent',
     'Config',
     'ClipboardLogger',
-    'ClipboardMonitor'
+    'ClipboardMonitor',
+    'ClipboardBackend',
+    'Win32ClipboardBackend',
+    'FakeClipboardBackend'
 ] 
\ No newline at end of file
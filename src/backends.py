@@ -0,0 +1,576 @@
+"""剪贴板后端模块
+
+此模块定义了访问系统剪贴板的后端接口，将监控逻辑与具体的剪贴板 API 解耦。
+Windows 下使用 win32clipboard、pyperclip 和 PIL.ImageGrab 实现；
+同时提供一个可编排的内存后端，可以按任意速率回放录制的剪贴板事件，
+使监控循环能够在非 Windows 环境下运行和进行性能测试。
+
+Classes:
+    ClipboardBackend: 剪贴板后端抽象接口
+    Win32ClipboardBackend: 基于 Windows 剪贴板 API 的后端
+    ClipboardEvent: 一条录制的剪贴板事件
+    FakeClipboardBackend: 可编排、可回放事件的内存后端
+"""
+import os
+import json
+import time
+import ctypes
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from PIL import Image
+from .constants import ContentType, JsonKeys, Messages
+
+# 后端 get_image 的返回值：PIL 图片、图片文件路径列表或 None
+ImageResult = Union[Image.Image, List[str], None]
+
+# 模拟 Windows 标准剪贴板格式编号
+CF_UNICODETEXT = 13
+CF_DIB = 8
+CF_HDROP = 15
+
+# Windows 剪贴板更新消息
+WM_CLIPBOARDUPDATE = 0x031D
+
+
+class ClipboardBackend(ABC):
+    """剪贴板后端抽象接口。
+
+    监控器只通过此接口访问剪贴板。每个读取方法都是独立的一次访问，
+    后端自行负责打开和关闭剪贴板。
+    """
+
+    @abstractmethod
+    def get_sequence_number(self) -> int:
+        """获取剪贴板变更序号。
+
+        剪贴板内容每变化一次，序号都会增加。
+
+        Returns:
+            int: 当前的变更序号
+        """
+
+    @abstractmethod
+    def get_formats(self) -> Dict[str, int]:
+        """枚举剪贴板中可用的格式。
+
+        Returns:
+            Dict[str, int]: 格式名称到格式编号的映射
+
+        Raises:
+            Exception: 剪贴板暂时无法访问，例如被其他进程占用
+        """
+
+    @abstractmethod
+    def get_text(self) -> Optional[str]:
+        """读取剪贴板中的文本。
+
+        Returns:
+            Optional[str]: 文本内容，没有文本时返回 None 或空字符串
+        """
+
+    def get_text_length(self) -> Optional[int]:
+        """在不复制文本的情况下获取剪贴板中文本的长度。
+
+        Returns:
+            Optional[int]: 文本长度（字符），后端无法预先获取时返回 None
+        """
+        return None
+
+    def iter_text_chunks(self, chunk_size: int) -> Iterator[str]:
+        """按块读取剪贴板中的文本，用于超长文本的流式捕获。
+
+        默认实现先完整读取文本再切分，后端可以覆盖以避免完整复制。
+
+        Args:
+            chunk_size (int): 每块的字符数
+
+        Yields:
+            str: 文本块
+        """
+        text = self.get_text()
+        if text:
+            for start in range(0, len(text), chunk_size):
+                yield text[start:start + chunk_size]
+
+    @abstractmethod
+    def get_image(self) -> ImageResult:
+        """读取剪贴板中的图片。
+
+        Returns:
+            ImageResult: 与 PIL.ImageGrab.grabclipboard 一致，返回图片对象、
+            文件路径列表或 None
+        """
+
+    @abstractmethod
+    def get_file_paths(self) -> Optional[Tuple[str, ...]]:
+        """读取剪贴板中拖放的文件路径。
+
+        内容哈希由路径序列的字符串形式计算，各后端都返回元组（与 win32clipboard 一致），
+        同样的文件在不同后端和版本之间得到相同的哈希。
+
+        Returns:
+            Optional[Tuple[str, ...]]: 文件路径，剪贴板中没有文件时返回 None
+        """
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """等待剪贴板变化通知。
+
+        不支持变化通知的后端直接等待超时，此时监控器退化为轮询。
+
+        Args:
+            timeout (float): 最长等待时间（秒）
+
+        Returns:
+            bool: 在超时前收到变化通知则返回 True
+        """
+        time.sleep(timeout)
+        return False
+
+    def wake(self):
+        """唤醒正在 wait_for_change 中等待的线程"""
+
+    def close(self):
+        """释放后端占用的资源"""
+
+
+class Win32ClipboardBackend(ClipboardBackend):
+    """基于 Windows 剪贴板 API 的后端。
+
+    依赖的 win32clipboard、pyperclip 和 PIL.ImageGrab 在初始化时才导入，
+    因此在其他平台上导入本模块不会失败。
+    """
+
+    def __init__(self):
+        """初始化后端并导入 Windows 专用模块"""
+        import win32clipboard
+        import win32con
+        import pyperclip
+        from PIL import ImageGrab
+        self._win32clipboard = win32clipboard
+        self._win32con = win32con
+        self._pyperclip = pyperclip
+        self._image_grab = ImageGrab
+        # 使用独立的 WinDLL 实例并只设置一次函数原型，不影响其他模块通过 ctypes.windll 调用同名函数
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._user32.AddClipboardFormatListener.argtypes = [ctypes.c_void_p]
+        self._user32.RemoveClipboardFormatListener.argtypes = [ctypes.c_void_p]
+        self._user32.GetClipboardData.argtypes = [ctypes.c_uint]
+        self._user32.GetClipboardData.restype = ctypes.c_void_p
+        self._kernel32.GlobalSize.argtypes = [ctypes.c_void_p]
+        self._kernel32.GlobalSize.restype = ctypes.c_size_t
+        self._kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+        self._kernel32.GlobalLock.restype = ctypes.c_void_p
+        self._kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+        # 窗口类名在进程内全局有效，每个实例使用各自的类名，同时运行的多个实例互不影响
+        self._class_name = f"ClipboardRecorderListener-{os.getpid()}-{id(self)}"
+        self._changed = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._listener_ready = threading.Event()
+        self._hwnd = None
+
+    def _window_proc(self, hwnd, msg, wparam, lparam):
+        """监听窗口的消息处理函数"""
+        import win32gui
+        if msg == WM_CLIPBOARDUPDATE:
+            self._changed.set()
+            return 0
+        if msg == self._win32con.WM_DESTROY:
+            win32gui.PostQuitMessage(0)
+            return 0
+        return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+    def _listen(self):
+        """创建仅接收消息的隐藏窗口，注册剪贴板变化通知并运行消息循环"""
+        import win32api
+        import win32gui
+        user32 = self._user32
+        hwnd = None
+        class_atom = None
+        window_class = win32gui.WNDCLASS()
+        window_class.lpfnWndProc = self._window_proc
+        window_class.lpszClassName = self._class_name
+        window_class.hInstance = win32api.GetModuleHandle(None)
+        try:
+            class_atom = win32gui.RegisterClass(window_class)
+            hwnd = win32gui.CreateWindowEx(
+                0, class_atom, "", 0, 0, 0, 0, 0,
+                self._win32con.HWND_MESSAGE, 0, window_class.hInstance, None
+            )
+            if not user32.AddClipboardFormatListener(hwnd):
+                raise ctypes.WinError(ctypes.get_last_error())
+            self._hwnd = hwnd
+        except Exception as e:
+            print(Messages.Error.CHANGE_LISTENER_ERROR.format(str(e)))
+            if hwnd:
+                win32gui.DestroyWindow(hwnd)
+            if class_atom is not None:
+                win32gui.UnregisterClass(class_atom, window_class.hInstance)
+            self._listener_ready.set()
+            return
+
+        self._listener_ready.set()
+        try:
+            win32gui.PumpMessages()
+        finally:
+            user32.RemoveClipboardFormatListener(hwnd)
+            self._hwnd = None
+            win32gui.UnregisterClass(class_atom, window_class.hInstance)
+
+    def _start_listener(self) -> bool:
+        """按需启动变化通知监听线程"""
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+            self._listener_ready.wait()
+        return self._hwnd is not None
+
+    def wait_for_change(self, timeout: float) -> bool:
+        if not self._start_listener():
+            return super().wait_for_change(timeout)
+        fired = self._changed.wait(timeout)
+        self._changed.clear()
+        return fired
+
+    def wake(self):
+        self._changed.set()
+
+    def close(self):
+        if self._hwnd is not None:
+            import win32gui
+            win32gui.PostMessage(self._hwnd, self._win32con.WM_CLOSE, 0, 0)
+            self._listener.join(timeout=1.0)
+
+    def _open(self) -> bool:
+        """打开剪贴板"""
+        try:
+            self._win32clipboard.OpenClipboard()
+            return True
+        except self._win32clipboard.error:
+            return False
+
+    def _close(self):
+        """关闭剪贴板"""
+        try:
+            self._win32clipboard.CloseClipboard()
+        except self._win32clipboard.error:
+            pass
+
+    def _get_format_name(self, format_id: int) -> str:
+        """获取剪贴板格式名称"""
+        try:
+            return self._win32clipboard.GetClipboardFormatName(format_id)
+        except self._win32clipboard.error:
+            return f"Unknown Format ({format_id})"
+
+    def get_sequence_number(self) -> int:
+        return self._win32clipboard.GetClipboardSequenceNumber()
+
+    def get_formats(self) -> Dict[str, int]:
+        formats = {}
+        # 剪贴板被其他进程占用时抛出异常，由调用方按读取失败处理，而不是当作空剪贴板
+        self._win32clipboard.OpenClipboard()
+        try:
+            format_id = 0
+            while format_id := self._win32clipboard.EnumClipboardFormats(format_id):
+                formats[self._get_format_name(format_id)] = format_id
+        except self._win32clipboard.error:
+            pass
+        finally:
+            self._close()
+        return formats
+
+    def get_text(self) -> Optional[str]:
+        return self._pyperclip.paste()
+
+    def get_text_length(self) -> Optional[int]:
+        # 只读取剪贴板内存块的大小，不复制文本；结果包含结尾的空字符，因此是上限
+        if not self._open():
+            return None
+        try:
+            handle = self._user32.GetClipboardData(self._win32con.CF_UNICODETEXT)
+            if not handle:
+                return None
+            return max(0, self._kernel32.GlobalSize(handle) // 2 - 1)
+        finally:
+            self._close()
+
+    def _copy_text_data(self) -> Optional[bytes]:
+        """在一次打开剪贴板期间复制文本内存块中的 UTF-16 数据，没有文本时返回 None"""
+        if not self._open():
+            return None
+        try:
+            handle = self._user32.GetClipboardData(self._win32con.CF_UNICODETEXT)
+            if not handle:
+                return None
+            size = self._kernel32.GlobalSize(handle)
+            pointer = self._kernel32.GlobalLock(handle)
+            if not pointer:
+                return None
+            try:
+                return ctypes.string_at(pointer, size)
+            finally:
+                self._kernel32.GlobalUnlock(handle)
+        finally:
+            self._close()
+
+    def iter_text_chunks(self, chunk_size: int) -> Iterator[str]:
+        # 先在一次打开剪贴板期间复制 UTF-16 数据，再从副本逐块解码；调用方在两块之间处理数据时
+        # 剪贴板已经关闭，不会阻塞其他程序。副本每个字符 2 字节，不会生成完整的 str
+        data = self._copy_text_data()
+        if data is None:
+            return
+        view = memoryview(data)
+        units = len(data) // 2
+        position = 0
+        while position < units:
+            end = min(position + chunk_size, units)
+            # 不在代理对中间切分，避免产生无法编码的半个字符
+            if end < units and 0xD800 <= int.from_bytes(view[end * 2 - 2:end * 2], 'little') <= 0xDBFF:
+                end -= 1
+            chunk = str(view[position * 2:end * 2], 'utf-16-le', 'surrogatepass')
+            terminator = chunk.find('\0')
+            if terminator >= 0:
+                if terminator:
+                    yield chunk[:terminator]
+                return
+            position = end
+            yield chunk
+
+    def get_image(self) -> ImageResult:
+        return self._image_grab.grabclipboard()
+
+    def get_file_paths(self) -> Optional[Tuple[str, ...]]:
+        if not self._open():
+            return None
+        try:
+            if self._win32clipboard.IsClipboardFormatAvailable(self._win32con.CF_HDROP):
+                return tuple(self._win32clipboard.GetClipboardData(self._win32con.CF_HDROP))
+            return None
+        finally:
+            self._close()
+
+
+class ClipboardEvent:
+    """一条录制的剪贴板事件。
+
+    录制文件为 JSONL 格式，每行一个事件。图片事件可以引用图片文件路径，
+    也可以只给出尺寸和颜色，由回放时生成纯色图片。
+
+    Attributes:
+        offset (float): 相对于录制开始的时间（秒）
+        content_type (str): 内容类型，取值见 constants.ContentType
+        payload (Any): 文本、图片对象或文件路径列表
+    """
+
+    def __init__(self, offset: float, content_type: str, payload: Any):
+        """初始化事件。
+
+        Args:
+            offset (float): 相对于录制开始的时间（秒）
+            content_type (str): 内容类型
+            payload (Any): 事件内容
+        """
+        self.offset = offset
+        self.content_type = content_type
+        self.payload = payload
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ClipboardEvent':
+        """从录制文件中的一行数据创建事件。
+
+        Args:
+            data (Dict[str, Any]): 事件数据
+
+        Returns:
+            ClipboardEvent: 事件对象
+        """
+        content_type = data[JsonKeys.CONTENT_TYPE]
+        if content_type == ContentType.TEXT.value:
+            payload = data[JsonKeys.TEXT_CONTENT]
+        elif content_type == ContentType.FILES.value:
+            payload = list(data[JsonKeys.FILE_PATHS])
+        elif content_type == ContentType.IMAGE.value:
+            if JsonKeys.IMAGE_PATH in data:
+                with Image.open(data[JsonKeys.IMAGE_PATH]) as img:
+                    payload = img.copy()
+            else:
+                payload = Image.new(
+                    data.get("mode", "RGB"),
+                    tuple(data.get("size", (64, 64))),
+                    tuple(data.get("color", (0, 0, 0)))
+                )
+        else:
+            payload = None
+        return cls(float(data.get("offset", 0.0)), content_type, payload)
+
+
+def load_events(path: str) -> List[ClipboardEvent]:
+    """从 JSONL 录制文件加载剪贴板事件。
+
+    Args:
+        path (str): 录制文件路径
+
+    Returns:
+        List[ClipboardEvent]: 按时间排序的事件列表
+    """
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(ClipboardEvent.from_dict(json.loads(line)))
+    events.sort(key=lambda e: e.offset)
+    return events
+
+
+class FakeClipboardBackend(ClipboardBackend):
+    """可编排的内存剪贴板后端。
+
+    剪贴板状态保存在内存中，可以直接设置内容，也可以按任意速率回放录制的事件流。
+    每次设置内容都会增加变更序号。所有方法都是线程安全的，
+    因此回放线程可以与监控循环并发运行。
+
+    Attributes:
+        read_delay (float): 每次读取前人为增加的延迟（秒），用于模拟慢速剪贴板
+    """
+
+    def __init__(self, read_delay: float = 0.0):
+        """初始化内存后端。
+
+        Args:
+            read_delay (float, optional): 每次读取前的延迟（秒）。默认为 0
+        """
+        self.read_delay = read_delay
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._formats: Dict[str, int] = {}
+        self._text: Optional[str] = None
+        self._image: ImageResult = None
+        self._files: Optional[List[str]] = None
+        self._changed = threading.Event()
+
+    def _set(self, formats: Dict[str, int], text: Optional[str] = None,
+             image: ImageResult = None, files: Optional[List[str]] = None):
+        """原子地替换剪贴板内容"""
+        with self._lock:
+            self._formats = formats
+            self._text = text
+            self._image = image
+            self._files = files
+            self._sequence += 1
+        self._changed.set()
+
+    def get_text_length(self) -> Optional[int]:
+        with self._lock:
+            return len(self._text) if self._text is not None else None
+
+    def set_text(self, text: str):
+        """将文本放入剪贴板"""
+        self._set({"CF_UNICODETEXT": CF_UNICODETEXT}, text=text)
+
+    def set_image(self, image: Image.Image):
+        """将图片的副本放入剪贴板，与系统剪贴板一样，之后修改原图不影响剪贴板中的内容"""
+        self._set({"CF_DIB": CF_DIB}, image=image.copy())
+
+    def set_files(self, paths: List[str]):
+        """将文件路径列表放入剪贴板"""
+        self._set({"CF_HDROP": CF_HDROP}, image=list(paths), files=list(paths))
+
+    def clear(self):
+        """清空剪贴板"""
+        self._set({})
+
+    def apply(self, event: ClipboardEvent):
+        """将一条事件应用到剪贴板"""
+        if event.content_type == ContentType.TEXT.value:
+            self.set_text(event.payload)
+        elif event.content_type == ContentType.IMAGE.value:
+            self.set_image(event.payload)
+        elif event.content_type == ContentType.FILES.value:
+            self.set_files(event.payload)
+        else:
+            self.clear()
+
+    def replay(self, events: Iterable[ClipboardEvent], rate: Optional[float] = None,
+               speed: float = 1.0, on_event: Optional[Callable[[ClipboardEvent], None]] = None):
+        """按指定速率回放事件流。
+
+        Args:
+            events (Iterable[ClipboardEvent]): 要回放的事件
+            rate (Optional[float], optional): 每秒回放的事件数，指定时忽略事件自带的时间。
+                为 0 表示不等待，尽可能快地回放。默认为 None，按录制时间回放
+            speed (float, optional): 按录制时间回放时的加速倍数。默认为 1.0
+            on_event (Optional[Callable], optional): 每条事件应用后调用的回调，
+                可用于同步驱动监控器
+        """
+        start = time.perf_counter()
+        for index, event in enumerate(events):
+            if rate is None:
+                due = event.offset / speed
+            else:
+                due = index / rate if rate > 0 else 0.0
+            delay = due - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            self.apply(event)
+            if on_event is not None:
+                on_event(event)
+
+    def start_replay(self, events: Iterable[ClipboardEvent], rate: Optional[float] = None,
+                     speed: float = 1.0) -> threading.Thread:
+        """在后台线程中回放事件流。
+
+        Args:
+            events (Iterable[ClipboardEvent]): 要回放的事件
+            rate (Optional[float], optional): 每秒回放的事件数。默认按录制时间回放
+            speed (float, optional): 按录制时间回放时的加速倍数。默认为 1.0
+
+        Returns:
+            threading.Thread: 已启动的回放线程
+        """
+        thread = threading.Thread(
+            target=self.replay,
+            args=(list(events), rate, speed),
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _wait(self):
+        """模拟读取延迟"""
+        if self.read_delay > 0:
+            time.sleep(self.read_delay)
+
+    def wait_for_change(self, timeout: float) -> bool:
+        fired = self._changed.wait(timeout)
+        self._changed.clear()
+        return fired
+
+    def wake(self):
+        self._changed.set()
+
+    def get_sequence_number(self) -> int:
+        with self._lock:
+            return self._sequence
+
+    def get_formats(self) -> Dict[str, int]:
+        self._wait()
+        with self._lock:
+            return dict(self._formats)
+
+    def get_text(self) -> Optional[str]:
+        self._wait()
+        with self._lock:
+            return self._text
+
+    def get_image(self) -> ImageResult:
+        self._wait()
+        with self._lock:
+            return self._image
+
+    def get_file_paths(self) -> Optional[Tuple[str, ...]]:
+        self._wait()
+        with self._lock:
+            return tuple(self._files) if self._files is not None else None
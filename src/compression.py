@@ -0,0 +1,251 @@
+"""压缩存储模块
+
+此模块为日志提供两级压缩：
+
+* 单条记录：超过阈值的文本内容压缩后以 base64 形式保存在 ``text_compressed`` 字段中，
+  值带有算法前缀，例如 ``zstd:KLUv/...``
+* 封存日志：不再写入的往日日志整体压缩为 ``.zst`` 或 ``.gz`` 文件
+
+安装了 zstandard 时使用 zstd，否则使用标准库中的 zlib（封存日志使用 gzip 格式）。
+读取时根据前缀和文件后缀自动选择解压方式，调用方不需要关心数据是否经过压缩。
+
+Functions:
+    available_codec: 获取实际可用的压缩算法
+    compress_text: 压缩文本并编码为带算法前缀的字符串
+    decompress_text: 解压缩 compress_text 生成的字符串
+    compress_record: 压缩记录中较大的文本内容
+    decode_record: 还原记录中被压缩的文本内容
+    is_compressed_file: 判断文件是否为压缩的封存日志
+    strip_compression_suffix: 去掉文件名中的压缩后缀
+    open_log: 以文本方式打开日志文件，压缩文件自动解压
+    open_log_binary: 以二进制方式打开日志文件，压缩文件自动解压
+    codec_suffix: 获取压缩算法对应的文件后缀
+    open_writer: 打开一个边写入边压缩的二进制文件
+    compress_file: 将日志文件压缩为封存文件
+"""
+import os
+import io
+import gzip
+import zlib
+import base64
+from typing import IO, Optional
+from .constants import CompressionCodec, FileFormat, JsonKeys, Messages
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 单条记录压缩使用的压缩级别
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+# 压缩封存日志时每次读取的字节数
+COPY_BLOCK_SIZE = 1 << 20
+
+
+def available_codec(codec: str) -> str:
+    """获取实际可用的压缩算法，未安装 zstandard 时退回 zlib"""
+    if codec == CompressionCodec.ZSTD.value and zstandard is None:
+        return CompressionCodec.ZLIB.value
+    return codec
+
+
+def compress_text(text: str, codec: str = CompressionCodec.ZSTD.value) -> str:
+    """压缩文本并编码为带算法前缀的字符串。
+
+    Args:
+        text (str): 要压缩的文本
+        codec (str, optional): 压缩算法，取值见 constants.CompressionCodec。默认为 zstd
+
+    Returns:
+        str: 形如 ``zstd:<base64>`` 的字符串
+    """
+    codec = available_codec(codec)
+    data = text.encode('utf-8')
+    if codec == CompressionCodec.ZSTD.value:
+        compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        compressed = zlib.compress(data, ZLIB_LEVEL)
+    return f"{codec}:{base64.b64encode(compressed).decode('ascii')}"
+
+
+def decompress_text(value: str) -> str:
+    """解压缩 compress_text 生成的字符串。
+
+    Args:
+        value (str): 带算法前缀的压缩数据
+
+    Returns:
+        str: 原始文本
+
+    Raises:
+        ValueError: 算法前缀未知，或数据使用 zstd 压缩但未安装 zstandard
+    """
+    codec, _, payload = value.partition(':')
+    data = base64.b64decode(payload)
+    if codec == CompressionCodec.ZLIB.value:
+        return zlib.decompress(data).decode('utf-8')
+    if codec == CompressionCodec.ZSTD.value:
+        if zstandard is None:
+            raise ValueError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    raise ValueError(f"unknown codec: {codec}")
+
+
+def compress_record(record: dict, threshold: int, codec: str) -> dict:
+    """压缩记录中超过阈值的文本内容。
+
+    Args:
+        record (dict): 日志记录
+        threshold (int): 文本长度（字符）达到此值时才压缩，0 表示不压缩
+        codec (str): 压缩算法
+
+    Returns:
+        dict: 文本被压缩时返回新的记录，否则返回原记录
+    """
+    text = record.get(JsonKeys.TEXT_CONTENT)
+    if not threshold or not isinstance(text, str) or len(text) < threshold:
+        return record
+    compressed = {k: v for k, v in record.items() if k != JsonKeys.TEXT_CONTENT}
+    compressed[JsonKeys.TEXT_COMPRESSED] = compress_text(text, codec)
+    return compressed
+
+
+def decode_record(record: dict) -> dict:
+    """就地还原记录中被压缩的文本内容。
+
+    解压失败时保留压缩字段并打印错误信息。
+
+    Args:
+        record (dict): 日志记录
+
+    Returns:
+        dict: 同一个记录对象
+    """
+    value = record.get(JsonKeys.TEXT_COMPRESSED)
+    if value is None:
+        return record
+    try:
+        record[JsonKeys.TEXT_CONTENT] = decompress_text(value)
+        del record[JsonKeys.TEXT_COMPRESSED]
+    except (ValueError, zlib.error) as e:
+        print(Messages.Error.DECOMPRESS_ERROR.format(str(e)))
+    return record
+
+
+def is_compressed_file(path: str) -> bool:
+    """判断文件是否为压缩的封存日志"""
+    return path.endswith((FileFormat.ZSTD_FILE_SUFFIX, FileFormat.GZIP_FILE_SUFFIX))
+
+
+def strip_compression_suffix(path: str) -> str:
+    """去掉文件名中的压缩后缀，得到原始日志文件名"""
+    for suffix in (FileFormat.ZSTD_FILE_SUFFIX, FileFormat.GZIP_FILE_SUFFIX):
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def open_log(path: str) -> IO[str]:
+    """以 UTF-8 文本方式打开日志文件，压缩的封存日志会在读取时流式解压。
+
+    Args:
+        path (str): 日志文件路径
+
+    Returns:
+        IO[str]: 文本文件对象
+
+    Raises:
+        IOError: 文件无法打开，或文件使用 zstd 压缩但未安装 zstandard
+    """
+    if path.endswith(FileFormat.GZIP_FILE_SUFFIX):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith(FileFormat.ZSTD_FILE_SUFFIX):
+        if zstandard is None:
+            raise IOError(f"zstandard is not installed, cannot read {path}")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True),
+                                encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def open_log_binary(path: str) -> IO[bytes]:
+    """以二进制方式打开日志文件，压缩的封存日志会在读取时流式解压。
+
+    返回的文件对象支持逐行读取。未压缩的文件可以任意定位；gzip 文件向前定位时边解压边跳过；
+    zstd 文件不支持定位，调用方需要通过读取跳过。
+
+    Args:
+        path (str): 日志文件路径
+
+    Returns:
+        IO[bytes]: 二进制文件对象
+
+    Raises:
+        IOError: 文件无法打开，或文件使用 zstd 压缩但未安装 zstandard
+    """
+    if path.endswith(FileFormat.GZIP_FILE_SUFFIX):
+        return gzip.open(path, 'rb')
+    if path.endswith(FileFormat.ZSTD_FILE_SUFFIX):
+        if zstandard is None:
+            raise IOError(f"zstandard is not installed, cannot read {path}")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    return open(path, 'rb')
+
+
+def codec_suffix(codec: str) -> str:
+    """获取压缩算法对应的文件后缀，未安装 zstandard 时为 gzip 的后缀"""
+    if available_codec(codec) == CompressionCodec.ZSTD.value:
+        return FileFormat.ZSTD_FILE_SUFFIX
+    return FileFormat.GZIP_FILE_SUFFIX
+
+
+def open_writer(raw: IO[bytes], codec: str, filename: str = "") -> IO[bytes]:
+    """在已打开的二进制文件上创建边写入边压缩的写入器。
+
+    关闭写入器时写入压缩流的结尾，但不会关闭底层文件，调用方可以继续 fsync。
+
+    Args:
+        raw (IO[bytes]): 以二进制写入方式打开的文件
+        codec (str): 压缩算法
+        filename (str, optional): 记录在 gzip 文件头中的原始文件名
+
+    Returns:
+        IO[bytes]: 压缩写入器
+    """
+    if available_codec(codec) == CompressionCodec.ZSTD.value:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+    return gzip.GzipFile(filename=filename, mode='wb', fileobj=raw)
+
+
+def compress_file(path: str, codec: str) -> Optional[str]:
+    """将日志文件压缩为封存文件，成功后删除原文件。
+
+    通过临时文件写入并在落盘后替换，中途失败时原文件保持不变。
+
+    Args:
+        path (str): 未压缩的日志文件路径
+        codec (str): 压缩算法
+
+    Returns:
+        Optional[str]: 压缩后的文件路径，失败时返回 None
+    """
+    target = f"{path}{codec_suffix(codec)}"
+    temp_file = f"{target}{FileFormat.TEMP_FILE_SUFFIX}"
+    try:
+        with open(path, 'rb') as source, open(temp_file, 'wb') as raw:
+            with open_writer(raw, codec, os.path.basename(path)) as writer:
+                for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b''):
+                    writer.write(block)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_file, target)
+        os.remove(path)
+        return target
+    except (IOError, OSError) as e:
+        print(Messages.Error.SEAL_LOG_ERROR.format(str(e)))
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+        return None
@@ -2,23 +2,219 @@
 
 此模块负责加载和管理程序的配置信息，支持从配置文件读取和合并默认配置。
 
+配置加载后生成不可变的设置快照（Settings），监控循环等频繁执行的代码直接读取快照的属性，
+不必每次通过 section 和 key 查找。配置文件修改后由 ConfigWatcher 重新加载，新的快照
+整体替换旧的快照，读取方拿到的始终是某一时刻完整的配置。
+
+每个配置项的取值按默认配置中对应值的类型校验，类型不符的取值打印警告并使用默认值。
+快照以外的配置项只在创建日志管理器等组件时读取一次，重新加载时这类配置项发生变化会提示需要重启。
+
 Classes:
+    Settings: 不可变的设置快照
     Config: 配置管理类，处理配置的加载和访问
+    ConfigWatcher: 监视配置文件并在修改后重新加载的后台线程
 """
 import json
 import os
-from typing import Dict, Any
-from .constants import Paths, DefaultConfig, Messages
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+from .constants import ConfigKeys, Paths, DefaultConfig, Messages
+
+
+class Settings(NamedTuple):
+    """不可变的设置快照。
+
+    包含监控循环、内容读取、图片编码和日志写入中每次都要读取的配置项，取值已转换为
+    对应的类型。其他配置项通过 Config.get 读取。
+
+    Attributes:
+        sections (Mapping[str, Mapping[str, Any]]): 合并默认配置后的完整配置，只读
+        check_interval (float): poll 模式下检查剪贴板的间隔（秒）
+        detection_mode (str): 变化检测方式
+        event_timeout (float): event 模式下等待通知的最长时间（秒）
+        config_reload_interval (float): 检查配置文件是否修改的间隔（秒），0 表示不检查
+        base_dir (str): 日志根目录
+        enable_text (bool): 是否记录文本
+        enable_image (bool): 是否记录图片
+        enable_files (bool): 是否记录文件路径
+        max_text_length (int): 文本最大长度（字符）
+        max_image_size (int): 图片最大字节数
+        oversized_text (str): 超长文本的处理方式
+        save_image_file (bool): 是否保存图片文件
+        save_image_base64 (bool): 是否在日志中保存图片的 base64 数据
+        max_entries_per_file (int): 每个日志文件的最大记录数
+        indent_json (bool): 是否格式化 JSON 日志
+        compression_codec (str): 压缩算法
+        codec (str): 图片编码格式
+        png_compress_level (int): PNG 压缩级别
+        webp_method (int): 无损 WebP 的编码方法
+        thumbnail_size (int): 缩略图长边的像素数
+        show_preview (bool): 是否在控制台显示内容预览
+        max_preview_length (int): 控制台预览的最大长度
+        show_timestamps (bool): 是否在控制台显示时间戳
+        console_width (int): 控制台分隔线宽度
+    """
+    sections: Mapping[str, Mapping[str, Any]]
+    check_interval: float
+    detection_mode: str
+    event_timeout: float
+    config_reload_interval: float
+    base_dir: str
+    enable_text: bool
+    enable_image: bool
+    enable_files: bool
+    max_text_length: int
+    max_image_size: int
+    oversized_text: str
+    save_image_file: bool
+    save_image_base64: bool
+    max_entries_per_file: int
+    indent_json: bool
+    compression_codec: str
+    codec: str
+    png_compress_level: int
+    webp_method: int
+    thumbnail_size: int
+    show_preview: bool
+    max_preview_length: int
+    show_timestamps: bool
+    console_width: int
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, Any]) -> 'Settings':
+        """由合并后的配置字典生成快照。
+
+        Args:
+            sections (Dict[str, Any]): 合并默认配置后的配置字典
+
+        Returns:
+            Settings: 设置快照，类型不符的配置值已替换为默认值
+        """
+        sections = validate_sections(sections)
+        values = {}
+        for name, (section, key) in SETTINGS_FIELDS.items():
+            value = sections.get(section, {}).get(key, DefaultConfig.DEFAULT_CONFIG[section][key])
+            values[name] = cls.__annotations__[name](value)
+        return cls(MappingProxyType(sections), **values)
+
+
+def _check_value(value: Any, default: Any) -> Tuple[bool, Any]:
+    """按默认值的类型校验配置值，返回是否有效以及转换后的值。
+
+    bool 不接受其他类型（例如字符串 "false"）；int 接受没有小数部分的 float；
+    float 接受 int，但都不接受 bool。
+    """
+    if isinstance(default, bool):
+        return isinstance(value, bool), value
+    if isinstance(value, bool):
+        return False, value
+    if isinstance(default, int):
+        if isinstance(value, float) and value.is_integer():
+            return True, int(value)
+        return isinstance(value, int), value
+    if isinstance(default, float):
+        return isinstance(value, (int, float)), value
+    return isinstance(value, type(default)), value
+
+
+def validate_sections(sections: Dict[str, Any]) -> Dict[str, Any]:
+    """校验合并后的配置，类型与默认配置不符的取值打印警告并替换为默认值。
+
+    默认配置中没有的区段和配置项原样保留。
+
+    Args:
+        sections (Dict[str, Any]): 合并默认配置后的配置字典
+
+    Returns:
+        Dict[str, Any]: 校验后的配置字典，不修改传入的字典
+    """
+    result = dict(sections)
+    for section, defaults in DefaultConfig.DEFAULT_CONFIG.items():
+        values = result.get(section)
+        if not isinstance(values, dict):
+            if values is not None:
+                print(Messages.Error.CONFIG_VALUE_INVALID.format(section, "*", values, defaults))
+            result[section] = dict(defaults)
+            continue
+        checked = dict(values)
+        for key, default in defaults.items():
+            if key not in checked:
+                continue
+            valid, value = _check_value(checked[key], default)
+            if not valid:
+                print(Messages.Error.CONFIG_VALUE_INVALID.format(section, key, checked[key], default))
+                value = default
+            checked[key] = value
+        result[section] = checked
+    return result
+
+
+# 快照字段 -> 配置中的 (section, key)
+SETTINGS_FIELDS: Dict[str, Tuple[str, str]] = {
+    "check_interval": (ConfigKeys.General.SECTION, ConfigKeys.General.CHECK_INTERVAL),
+    "detection_mode": (ConfigKeys.General.SECTION, ConfigKeys.General.DETECTION_MODE),
+    "event_timeout": (ConfigKeys.General.SECTION, ConfigKeys.General.EVENT_TIMEOUT),
+    "config_reload_interval": (ConfigKeys.General.SECTION, ConfigKeys.General.CONFIG_RELOAD_INTERVAL),
+    "base_dir": (ConfigKeys.General.SECTION, ConfigKeys.General.BASE_DIR),
+    "enable_text": (ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.ENABLE_TEXT),
+    "enable_image": (ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.ENABLE_IMAGE),
+    "enable_files": (ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.ENABLE_FILES),
+    "max_text_length": (ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.MAX_TEXT_LENGTH),
+    "max_image_size": (ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.MAX_IMAGE_SIZE),
+    "oversized_text": (ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.OVERSIZED_TEXT),
+    "save_image_file": (ConfigKeys.Logging.SECTION, ConfigKeys.Logging.SAVE_IMAGE_FILE),
+    "save_image_base64": (ConfigKeys.Logging.SECTION, ConfigKeys.Logging.SAVE_IMAGE_BASE64),
+    "max_entries_per_file": (ConfigKeys.Logging.SECTION, ConfigKeys.Logging.MAX_ENTRIES),
+    "indent_json": (ConfigKeys.Logging.SECTION, ConfigKeys.Logging.INDENT_JSON),
+    "compression_codec": (ConfigKeys.Logging.SECTION, ConfigKeys.Logging.COMPRESSION_CODEC),
+    "codec": (ConfigKeys.Encoding.SECTION, ConfigKeys.Encoding.CODEC),
+    "png_compress_level": (ConfigKeys.Encoding.SECTION, ConfigKeys.Encoding.PNG_COMPRESS_LEVEL),
+    "webp_method": (ConfigKeys.Encoding.SECTION, ConfigKeys.Encoding.WEBP_METHOD),
+    "thumbnail_size": (ConfigKeys.Encoding.SECTION, ConfigKeys.Encoding.THUMBNAIL_SIZE),
+    "show_preview": (ConfigKeys.Display.SECTION, ConfigKeys.Display.SHOW_PREVIEW),
+    "max_preview_length": (ConfigKeys.Display.SECTION, ConfigKeys.Display.MAX_PREVIEW_LENGTH),
+    "show_timestamps": (ConfigKeys.Display.SECTION, ConfigKeys.Display.SHOW_TIMESTAMPS),
+    "console_width": (ConfigKeys.Display.SECTION, ConfigKeys.Display.CONSOLE_WIDTH),
+}
+
+# 虽在快照中，但由日志管理器在创建时读取一次的字段，修改后需要重启
+_RESTART_FIELDS = ("base_dir", "compression_codec")
+# 重新加载后立即生效的配置项
+HOT_RELOAD_KEYS = frozenset(
+    location for name, location in SETTINGS_FIELDS.items() if name not in _RESTART_FIELDS
+)
+
+
+def restart_required(old: Mapping[str, Mapping[str, Any]], new: Mapping[str, Mapping[str, Any]]) -> List[str]:
+    """列出两份配置之间发生变化、且需要重启才能生效的配置项。
+
+    Args:
+        old (Mapping[str, Mapping[str, Any]]): 原来的配置
+        new (Mapping[str, Mapping[str, Any]]): 重新加载的配置
+
+    Returns:
+        List[str]: ``section.key`` 形式的配置项名称
+    """
+    changed = []
+    for section in sorted(set(old) | set(new)):
+        old_values, new_values = old.get(section, {}), new.get(section, {})
+        for key in sorted(set(old_values) | set(new_values)):
+            if (section, key) not in HOT_RELOAD_KEYS and old_values.get(key) != new_values.get(key):
+                changed.append(f"{section}.{key}")
+    return changed
+
 
 class Config:
     """配置管理类，负责加载和管理配置。
-    
+
     此类处理配置文件的加载、默认配置的合并，并提供统一的配置访问接口。
-    支持多层级的配置结构，可以通过section和key来访问具体的配置项。
+    支持多层级的配置结构，可以通过section和key来访问具体的配置项，
+    也可以直接读取 settings 快照的属性。
 
     Attributes:
         config_file (str): 配置文件的路径
-        _settings (Dict): 当前生效的配置数据
+        settings (Settings): 当前生效的设置快照，重新加载时整体替换
     """
 
     def __init__(self, config_file: str = Paths.DEFAULT_CONFIG_FILE):
@@ -28,7 +224,15 @@ class Config:
             config_file (str, optional): 配置文件路径。默认为constants.Paths.DEFAULT_CONFIG_FILE
         """
         self.config_file = config_file
-        self._settings = self._load_config()
+        self.settings = Settings.from_sections(self._load_config())
+
+    def _read_config_file(self) -> Dict[str, Any]:
+        """读取配置文件并与默认配置合并，配置文件不存在时返回默认配置"""
+        if not os.path.exists(self.config_file):
+            return DefaultConfig.DEFAULT_CONFIG.copy()
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            user_config = json.load(f)
+        return self._merge_config(DefaultConfig.DEFAULT_CONFIG, user_config)
 
     def _load_config(self) -> Dict[str, Any]:
         """加载配置文件。
@@ -40,10 +244,7 @@ class Config:
             Dict[str, Any]: 合并后的配置字典
         """
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    user_config = json.load(f)
-                    return self._merge_config(DefaultConfig.DEFAULT_CONFIG, user_config)
+            return self._read_config_file()
         except Exception as e:
             print(Messages.Error.CONFIG_LOAD_ERROR.format(str(e)))
             print(Messages.Error.USE_DEFAULT_CONFIG)
@@ -69,6 +270,27 @@ class Config:
                 result[key] = value
         return result
 
+    def reload(self) -> bool:
+        """重新读取配置文件并替换设置快照。
+
+        与首次加载不同，配置文件无法解析时保留当前配置，不会退回默认配置；单个配置项的类型
+        不符时该项使用默认值。只在启动时读取的配置项发生变化时打印提示，仍需重启才能生效。
+
+        Returns:
+            bool: 是否替换了设置快照
+        """
+        try:
+            settings = Settings.from_sections(self._read_config_file())
+        except Exception as e:
+            print(Messages.Error.CONFIG_RELOAD_ERROR.format(str(e)))
+            return False
+        changed = restart_required(self.settings.sections, settings.sections)
+        if changed:
+            print(Messages.Info.CONFIG_RESTART_REQUIRED.format("、".join(changed)))
+        # 单次属性赋值，其他线程读到的要么是旧快照，要么是新快照
+        self.settings = settings
+        return True
+
     def get(self, section: str, key: str) -> Any:
         """获取指定的配置值。
 
@@ -79,4 +301,80 @@ class Config:
         Returns:
             Any: 配置值，如果未找到则返回默认配置中的值
         """
-        return self._settings.get(section, {}).get(key, DefaultConfig.DEFAULT_CONFIG[section][key]) 
\ No newline at end of file
+        return self.settings.sections.get(section, {}).get(key, DefaultConfig.DEFAULT_CONFIG[section][key])
+
+
+class ConfigWatcher:
+    """监视配置文件，修改后重新加载配置的后台线程。
+
+    按 config_reload_interval 比较配置文件的修改时间和大小，不依赖文件系统通知，
+    在各平台上行为一致。间隔本身也可以通过修改配置文件调整，改为 0 后停止监视。
+
+    Attributes:
+        config (Config): 要重新加载的配置
+        on_reload (Optional[Callable[[Settings], None]]): 替换快照后调用的回调
+    """
+
+    def __init__(self, config: Config, on_reload: Optional[Callable[[Settings], None]] = None):
+        """初始化监视器，记录配置文件当前的状态。
+
+        Args:
+            config (Config): 要重新加载的配置
+            on_reload (Optional[Callable[[Settings], None]], optional): 替换快照后调用的回调
+        """
+        self.config = config
+        self.on_reload = on_reload
+        self._stamp = self._stat()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """配置文件的修改时间和大小，文件不存在时返回 None"""
+        try:
+            stat = os.stat(self.config.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """配置文件发生变化时重新加载。
+
+        Returns:
+            bool: 是否替换了设置快照
+        """
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        if not self.config.reload():
+            return False
+        print(Messages.Info.CONFIG_RELOADED.format(self.config.config_file))
+        if self.on_reload is not None:
+            self.on_reload(self.config.settings)
+        return True
+
+    def start(self):
+        """启动后台线程，config_reload_interval 为 0 时不启动"""
+        if self._thread is None and self.config.settings.config_reload_interval > 0:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="clipboard-config-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台线程"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        """后台线程主循环，间隔被改为 0 时退出"""
+        while True:
+            interval = self.config.settings.config_reload_interval
+            if interval <= 0 or self._stop_event.wait(interval):
+                return
+            try:
+                self.check()
+            except Exception as e:
+                print(Messages.Error.CONFIG_RELOAD_ERROR.format(str(e)))
@@ -10,6 +10,16 @@ Classes:
     JsonKeys: JSON键名常量
     ConfigKeys: 配置键名常量
     DefaultConfig: 默认配置常量
+    StorageFormat: 日志存储格式枚举
+    FsyncPolicy: 日志刷盘策略枚举
+    DetectionMode: 剪贴板变化检测方式枚举
+    ImageStorage: 图片存储方式枚举
+    DropPolicy: 写入队列已满时的处理策略枚举
+    CompressionCodec: 压缩算法枚举
+    OversizedText: 超长文本的处理方式枚举
+    NearDuplicateMode: 相似内容的处理方式枚举
+    ProcessMode: 进程运行方式枚举
+    ImageCodec: 图片编码格式枚举
     Messages: 提示信息常量
 """
 from enum import Enum
@@ -30,6 +40,122 @@ class ContentType(Enum):
     IMAGE = "image"
     FILES = "files"
 
+class StorageFormat(Enum):
+    """日志存储格式枚举。
+
+    Attributes:
+        JSON: 每天一个 JSON 数组文件，每次保存整体重写
+        JSONL: 每天一个 JSONL 追加日志文件，每次保存追加一行
+        SQLITE: 只写入 SQLite 历史数据库，不再生成日志文件
+    """
+    JSON = "json"
+    JSONL = "jsonl"
+    SQLITE = "sqlite"
+
+class FsyncPolicy(Enum):
+    """JSONL 日志的刷盘策略枚举。
+
+    Attributes:
+        ALWAYS: 每次追加后立即 fsync
+        INTERVAL: 距上次 fsync 超过指定间隔时才 fsync
+        NEVER: 只 flush，交由操作系统决定何时落盘
+    """
+    ALWAYS = "always"
+    INTERVAL = "interval"
+    NEVER = "never"
+
+class DetectionMode(Enum):
+    """剪贴板变化检测方式枚举。
+
+    Attributes:
+        EVENT: 等待系统的剪贴板变化通知，收到通知后才读取内容
+        POLL: 按固定间隔轮询
+    """
+    EVENT = "event"
+    POLL = "poll"
+
+class ImageStorage(Enum):
+    """图片存储方式枚举。
+
+    Attributes:
+        CONTENT: 按内容哈希去重存储，日志中只记录哈希
+        TIMESTAMPED: 按时间戳命名保存图片文件，可选在日志中内联 base64 数据
+    """
+    CONTENT = "content"
+    TIMESTAMPED = "timestamped"
+
+class DropPolicy(Enum):
+    """写入队列已满时的处理策略枚举。
+
+    Attributes:
+        BLOCK: 捕获线程等待一段时间，仍无空位时丢弃新内容
+        DROP_NEWEST: 立即丢弃新内容
+        DROP_OLDEST: 丢弃队列中最旧的内容
+    """
+    BLOCK = "block"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+
+class CompressionCodec(Enum):
+    """压缩算法枚举。
+
+    Attributes:
+        ZSTD: Zstandard，需要安装 zstandard 包，未安装时退回 zlib
+        ZLIB: 标准库 zlib，封存的日志文件使用 gzip 格式
+    """
+    ZSTD = "zstd"
+    ZLIB = "zlib"
+
+class OversizedText(Enum):
+    """超过 max_text_length 的文本的处理方式枚举。
+
+    Attributes:
+        SKIP: 不记录
+        TRUNCATE: 只记录开头部分作为预览，同时记录完整文本的长度和哈希
+        SPILL: 除预览外，将完整文本流式写入单独的文件
+    """
+    SKIP = "skip"
+    TRUNCATE = "truncate"
+    SPILL = "spill"
+
+class NearDuplicateMode(Enum):
+    """相似内容的处理方式枚举。
+
+    Attributes:
+        OFF: 不计算相似指纹
+        MARK: 完整保存，并在记录中标明最相似的已保存内容及距离
+        REFERENCE: 保存为指向最相似的已保存内容的引用记录，内容以该记录为准
+    """
+    OFF = "off"
+    MARK = "mark"
+    REFERENCE = "reference"
+
+class ProcessMode(Enum):
+    """进程运行方式枚举。
+
+    Attributes:
+        SINGLE: 单个进程完成捕获和存储
+        SPLIT: 启动一个存储子进程，当前进程只负责捕获
+        CAPTURE: 只运行捕获进程，连接到已经运行的存储进程
+        STORE: 只运行存储进程，接收一个或多个捕获进程发送的内容
+    """
+    SINGLE = "single"
+    SPLIT = "split"
+    CAPTURE = "capture"
+    STORE = "store"
+
+class ImageCodec(Enum):
+    """图片编码格式枚举。
+
+    Attributes:
+        AUTO: 按图片内容选择，颜色较少的截图使用无损 WebP，其余使用快速 PNG
+        PNG: 始终使用 PNG
+        WEBP: 使用无损 WebP，Pillow 不支持 WebP 或图片尺寸超出 WebP 限制时退回 PNG
+    """
+    AUTO = "auto"
+    PNG = "png"
+    WEBP = "webp"
+
 class FileFormat:
     """文件格式相关常量。
     
@@ -39,28 +165,60 @@ class FileFormat:
         LOG_FILE_PREFIX: 日志文件名前缀
         LOG_FILE_DATE_FORMAT: 日志文件日期格式
         LOG_FILE_EXTENSION: 日志文件扩展名
+        JOURNAL_FILE_EXTENSION: JSONL 追加日志文件扩展名
         IMAGE_FILE_PREFIX: 图片文件名前缀
         IMAGE_FILE_DATE_FORMAT: 图片文件日期格式
         IMAGE_FILE_EXTENSION: 图片文件扩展名
         IMAGE_FORMAT: 图片保存格式
+        WEBP_FORMAT: WebP 图片格式
+        IMAGE_EXTENSIONS: 图片格式到文件扩展名的映射
         TEMP_FILE_SUFFIX: 临时文件后缀
         BACKUP_FILE_SUFFIX: 备份文件后缀
+        ZSTD_FILE_SUFFIX: zstd 压缩的封存日志文件后缀
+        GZIP_FILE_SUFFIX: gzip 压缩的封存日志文件后缀
+        TEXT_FILE_PREFIX: 单独保存的超长文本文件名前缀
+        TEXT_FILE_EXTENSION: 单独保存的超长文本文件扩展名
+        SEGMENT_RANGE_SEPARATOR: 合并日志文件名中起止日期之间的分隔符
+        SEGMENT_SEQUENCE_SEPARATOR: 分段日志文件名中日期与分段编号之间的分隔符
+        SEGMENT_SEQUENCE_DIGITS: 分段编号的位数
+        TIME_INDEX_SUFFIX: 日志时间索引文件后缀
     """
     # 日志文件格式
     LOG_FILE_PREFIX = "clipboard_"
     LOG_FILE_DATE_FORMAT = "%Y-%m-%d"
     LOG_FILE_EXTENSION = ".json"
+    JOURNAL_FILE_EXTENSION = ".jsonl"
     
     # 图片文件格式
     IMAGE_FILE_PREFIX = "clipboard_image_"
     IMAGE_FILE_DATE_FORMAT = "%Y%m%d_%H%M%S"
     IMAGE_FILE_EXTENSION = ".png"
     IMAGE_FORMAT = "PNG"
+    WEBP_FORMAT = "WEBP"
+    IMAGE_EXTENSIONS = {IMAGE_FORMAT: IMAGE_FILE_EXTENSION, WEBP_FORMAT: ".webp"}
     
     # 临时文件后缀
     TEMP_FILE_SUFFIX = ".temp"
     BACKUP_FILE_SUFFIX = ".backup"
 
+    # 封存日志的压缩文件后缀
+    ZSTD_FILE_SUFFIX = ".zst"
+    GZIP_FILE_SUFFIX = ".gz"
+
+    # 单独保存的超长文本文件格式，文件名中包含内容哈希
+    TEXT_FILE_PREFIX = "clipboard_text_"
+    TEXT_FILE_EXTENSION = ".txt"
+
+    # 合并后的日志文件名记录起止日期，例如 clipboard_2024-01-01_2024-01-07.jsonl
+    SEGMENT_RANGE_SEPARATOR = "_"
+
+    # 同一天的后续分段在日期后加上编号，例如 clipboard_2024-01-01.0001.jsonl
+    SEGMENT_SEQUENCE_SEPARATOR = "."
+    SEGMENT_SEQUENCE_DIGITS = 4
+
+    # 时间索引文件与日志文件同名（不含压缩后缀），例如 clipboard_2024-01-01.jsonl.idx
+    TIME_INDEX_SUFFIX = ".idx"
+
 class Paths:
     """路径相关常量。
     
@@ -70,10 +228,24 @@ class Paths:
         DEFAULT_BASE_DIR: 默认的日志根目录
         DEFAULT_IMAGES_DIR: 默认的图片存储目录
         DEFAULT_CONFIG_FILE: 默认的配置文件路径
+        DEFAULT_DATABASE_FILE: 默认的历史数据库文件名（位于日志根目录下）
+        DEFAULT_DEDUP_INDEX_FILE: 历史去重索引状态文件名（位于日志根目录下）
+        DEFAULT_TEXTS_DIR: 单独保存的超长文本目录（位于日志根目录下）
+        DEFAULT_IPC_PIPE: Windows 下存储进程默认监听的命名管道
+        DEFAULT_IPC_SOCKET_FILE: 其他平台下存储进程默认监听的 Unix 套接字文件名（位于日志根目录下）
+        DEFAULT_IPC_KEY_FILE: 进程间通信认证密钥文件名（位于日志根目录下）
+        DEFAULT_PREVIEW_FILE: 预览缓存打包文件名（位于日志根目录下）
     """
     DEFAULT_BASE_DIR = "logs"
     DEFAULT_IMAGES_DIR = "images"
     DEFAULT_CONFIG_FILE = "config.json"
+    DEFAULT_DATABASE_FILE = "history.db"
+    DEFAULT_DEDUP_INDEX_FILE = "dedup_index.json"
+    DEFAULT_TEXTS_DIR = "texts"
+    DEFAULT_IPC_PIPE = r"\\.\pipe\clipboard_recorder"
+    DEFAULT_IPC_SOCKET_FILE = "recorder.sock"
+    DEFAULT_IPC_KEY_FILE = "ipc.key"
+    DEFAULT_PREVIEW_FILE = "previews.pack"
 
 class JsonKeys:
     """JSON键名常量。
@@ -88,7 +260,27 @@ class JsonKeys:
         IMAGE_DATA: 图片数据键名
         IMAGE_PATH: 图片路径键名
         IMAGE_BASE64: 图片base64键名
+        IMAGE_HASH: 图片内容哈希键名
+        CONTENT_HASH: 内容哈希键名，用于启动时恢复去重状态
+        PIXEL_HASH: 图片原始像素哈希键名
         FILE_PATHS: 文件路径键名
+        DUPLICATE_OF: 引用记录所指向的首次出现记录的时间戳键名
+        TEXT_COMPRESSED: 压缩后的文本内容键名，取代 TEXT_CONTENT
+        TEXT_TRUNCATED: 文本内容只是超长文本的开头部分时为 True
+        TEXT_LENGTH: 超长文本的完整长度（字符）键名
+        TEXT_PATH: 单独保存的完整文本文件路径键名
+        SOURCE: 多个捕获进程共用一个存储进程时，内容来源的名称键名
+        PREVIEW: 历史记录附带的预览键名
+        PREVIEW_TEXT: 预览中文本或文件路径开头部分的键名
+        THUMBNAIL_FORMAT: 预览中缩略图格式的键名
+        THUMBNAIL_BASE64: 预览中 base64 编码的缩略图键名
+        SIMILARITY_HASH: 文本或图片的相似指纹键名
+        SIMILAR_TO: 最相似的已保存内容的时间戳键名
+        SIMILARITY_DISTANCE: 与最相似的已保存内容的指纹距离键名
+        TEXT_DELTA: 相对于基准记录的文本增量键名，取代 TEXT_CONTENT
+        DELTA_BASE: 增量记录的基准记录的时间戳键名
+        DELTA_BASE_HASH: 增量记录的基准记录的内容哈希键名
+        DELTA_DEPTH: 增量链长度（到最近的完整记录需要应用的增量数）键名
     """
     TIMESTAMP = "timestamp"
     CONTENT_TYPE = "content_type"
@@ -97,7 +289,27 @@ class JsonKeys:
     IMAGE_DATA = "image_data"
     IMAGE_PATH = "image_path"
     IMAGE_BASE64 = "image_base64"
+    IMAGE_HASH = "image_hash"
+    CONTENT_HASH = "content_hash"
+    PIXEL_HASH = "pixel_hash"
     FILE_PATHS = "file_paths"
+    DUPLICATE_OF = "duplicate_of"
+    TEXT_COMPRESSED = "text_compressed"
+    TEXT_TRUNCATED = "text_truncated"
+    TEXT_LENGTH = "text_length"
+    TEXT_PATH = "text_path"
+    SOURCE = "source"
+    PREVIEW = "preview"
+    PREVIEW_TEXT = "preview_text"
+    THUMBNAIL_FORMAT = "thumbnail_format"
+    THUMBNAIL_BASE64 = "thumbnail_base64"
+    SIMILARITY_HASH = "similarity_hash"
+    SIMILAR_TO = "similar_to"
+    SIMILARITY_DISTANCE = "similarity_distance"
+    TEXT_DELTA = "text_delta"
+    DELTA_BASE = "delta_base"
+    DELTA_BASE_HASH = "delta_base_hash"
+    DELTA_DEPTH = "delta_depth"
 
 class ConfigKeys:
     """配置键名常量。
@@ -111,6 +323,9 @@ class ConfigKeys:
         MAX_LOG_FILES = "max_log_files"
         BASE_DIR = "base_dir"
         IMAGES_DIR = "images_dir"
+        DETECTION_MODE = "detection_mode"
+        EVENT_TIMEOUT = "event_timeout"
+        CONFIG_RELOAD_INTERVAL = "config_reload_interval"
 
     class Logging:
         """日志设置键名"""
@@ -119,6 +334,16 @@ class ConfigKeys:
         SAVE_IMAGE_BASE64 = "save_image_base64"
         MAX_ENTRIES = "max_entries_per_file"
         INDENT_JSON = "indent_json"
+        STORAGE_FORMAT = "storage_format"
+        FSYNC_POLICY = "fsync_policy"
+        FSYNC_INTERVAL = "fsync_interval"
+        IMAGE_STORAGE = "image_storage"
+        DEDUP_HISTORY = "dedup_history"
+        COMPRESSION_CODEC = "compression_codec"
+        COMPRESS_TEXT_THRESHOLD = "compress_text_threshold"
+        COMPRESS_SEALED_LOGS = "compress_sealed_logs"
+        SEGMENT_KB = "segment_kb"
+        INDEX_INTERVAL_KB = "index_interval_kb"
 
     class ContentTypes:
         """内容类型设置键名"""
@@ -128,6 +353,84 @@ class ConfigKeys:
         ENABLE_FILES = "enable_files"
         MAX_TEXT_LENGTH = "max_text_length"
         MAX_IMAGE_SIZE = "max_image_size"
+        OVERSIZED_TEXT = "oversized_text"
+
+    class Database:
+        """历史数据库设置键名"""
+        SECTION = "database"
+        ENABLE_INDEX = "enable_index"
+        PATH = "path"
+
+    class Retention:
+        """保留策略设置键名"""
+        SECTION = "retention"
+        ENABLE_BACKGROUND = "enable_background"
+        INTERVAL = "interval"
+        MAX_AGE_DAYS = "max_age_days"
+        MAX_TOTAL_MB = "max_total_mb"
+        MAX_TOTAL_ENTRIES = "max_total_entries"
+        MERGE_BELOW_KB = "merge_below_kb"
+        MERGE_TARGET_KB = "merge_target_kb"
+
+    class Pipeline:
+        """写入流水线设置键名"""
+        SECTION = "pipeline"
+        ENABLE_ASYNC = "enable_async"
+        QUEUE_SIZE = "queue_size"
+        BATCH_SIZE = "batch_size"
+        DROP_POLICY = "drop_policy"
+        BLOCK_TIMEOUT = "block_timeout"
+
+    class Ipc:
+        """多进程设置键名"""
+        SECTION = "ipc"
+        MODE = "mode"
+        ADDRESS = "address"
+        SOURCE_NAME = "source_name"
+        CONNECT_TIMEOUT = "connect_timeout"
+        SHARED_MEMORY = "shared_memory"
+        SHARED_BUFFERS = "shared_buffers"
+
+    class Encoding:
+        """图片编码设置键名"""
+        SECTION = "encoding"
+        WORKERS = "workers"
+        CODEC = "codec"
+        PNG_COMPRESS_LEVEL = "png_compress_level"
+        WEBP_METHOD = "webp_method"
+        THUMBNAIL_SIZE = "thumbnail_size"
+
+    class Preview:
+        """预览缓存设置键名"""
+        SECTION = "preview"
+        ENABLE_CACHE = "enable_cache"
+        MEMORY_ENTRIES = "memory_entries"
+        TEXT_CHARS = "text_chars"
+
+    class Metrics:
+        """运行指标设置键名"""
+        SECTION = "metrics"
+        HTTP_HOST = "http_host"
+        HTTP_PORT = "http_port"
+        DUMP_FILE = "dump_file"
+        DUMP_INTERVAL = "dump_interval"
+
+    class Similarity:
+        """相似内容检测设置键名"""
+        SECTION = "similarity"
+        MODE = "mode"
+        TEXT_DISTANCE = "text_distance"
+        IMAGE_DISTANCE = "image_distance"
+        WINDOW = "window"
+
+    class TextDelta:
+        """文本增量保存设置键名"""
+        SECTION = "text_delta"
+        ENABLE = "enable"
+        MIN_CHARS = "min_chars"
+        MAX_RATIO = "max_ratio"
+        MAX_CHAIN = "max_chain"
+        WINDOW = "window"
 
     class Display:
         """显示设置键名"""
@@ -150,20 +453,93 @@ class DefaultConfig:
             ConfigKeys.General.CHECK_INTERVAL: 1.0,
             ConfigKeys.General.MAX_LOG_FILES: 30,
             ConfigKeys.General.BASE_DIR: Paths.DEFAULT_BASE_DIR,
-            ConfigKeys.General.IMAGES_DIR: Paths.DEFAULT_IMAGES_DIR
+            ConfigKeys.General.IMAGES_DIR: Paths.DEFAULT_IMAGES_DIR,
+            ConfigKeys.General.DETECTION_MODE: DetectionMode.EVENT.value,
+            ConfigKeys.General.EVENT_TIMEOUT: 60.0,
+            ConfigKeys.General.CONFIG_RELOAD_INTERVAL: 2.0
         },
         ConfigKeys.Logging.SECTION: {
             ConfigKeys.Logging.SAVE_IMAGE_FILE: True,
             ConfigKeys.Logging.SAVE_IMAGE_BASE64: True,
             ConfigKeys.Logging.MAX_ENTRIES: 1000,
-            ConfigKeys.Logging.INDENT_JSON: True
+            ConfigKeys.Logging.INDENT_JSON: True,
+            ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSON.value,
+            ConfigKeys.Logging.FSYNC_POLICY: FsyncPolicy.INTERVAL.value,
+            ConfigKeys.Logging.FSYNC_INTERVAL: 1.0,
+            ConfigKeys.Logging.IMAGE_STORAGE: ImageStorage.TIMESTAMPED.value,
+            ConfigKeys.Logging.DEDUP_HISTORY: False,
+            ConfigKeys.Logging.COMPRESSION_CODEC: CompressionCodec.ZSTD.value,
+            ConfigKeys.Logging.COMPRESS_TEXT_THRESHOLD: 0,
+            ConfigKeys.Logging.COMPRESS_SEALED_LOGS: False,
+            ConfigKeys.Logging.SEGMENT_KB: 4096,
+            ConfigKeys.Logging.INDEX_INTERVAL_KB: 16
         },
         ConfigKeys.ContentTypes.SECTION: {
             ConfigKeys.ContentTypes.ENABLE_TEXT: True,
             ConfigKeys.ContentTypes.ENABLE_IMAGE: True,
             ConfigKeys.ContentTypes.ENABLE_FILES: True,
             ConfigKeys.ContentTypes.MAX_TEXT_LENGTH: 1000000,
-            ConfigKeys.ContentTypes.MAX_IMAGE_SIZE: 10485760
+            ConfigKeys.ContentTypes.MAX_IMAGE_SIZE: 10485760,
+            ConfigKeys.ContentTypes.OVERSIZED_TEXT: OversizedText.TRUNCATE.value
+        },
+        ConfigKeys.Database.SECTION: {
+            ConfigKeys.Database.ENABLE_INDEX: False,
+            ConfigKeys.Database.PATH: Paths.DEFAULT_DATABASE_FILE
+        },
+        ConfigKeys.Retention.SECTION: {
+            ConfigKeys.Retention.ENABLE_BACKGROUND: True,
+            ConfigKeys.Retention.INTERVAL: 3600.0,
+            ConfigKeys.Retention.MAX_AGE_DAYS: 30,
+            ConfigKeys.Retention.MAX_TOTAL_MB: 0,
+            ConfigKeys.Retention.MAX_TOTAL_ENTRIES: 0,
+            ConfigKeys.Retention.MERGE_BELOW_KB: 256,
+            ConfigKeys.Retention.MERGE_TARGET_KB: 4096
+        },
+        ConfigKeys.Pipeline.SECTION: {
+            ConfigKeys.Pipeline.ENABLE_ASYNC: True,
+            ConfigKeys.Pipeline.QUEUE_SIZE: 256,
+            ConfigKeys.Pipeline.BATCH_SIZE: 32,
+            ConfigKeys.Pipeline.DROP_POLICY: DropPolicy.BLOCK.value,
+            ConfigKeys.Pipeline.BLOCK_TIMEOUT: 1.0
+        },
+        ConfigKeys.Ipc.SECTION: {
+            ConfigKeys.Ipc.MODE: ProcessMode.SINGLE.value,
+            ConfigKeys.Ipc.ADDRESS: "",
+            ConfigKeys.Ipc.SOURCE_NAME: "",
+            ConfigKeys.Ipc.CONNECT_TIMEOUT: 10.0,
+            ConfigKeys.Ipc.SHARED_MEMORY: True,
+            ConfigKeys.Ipc.SHARED_BUFFERS: 4
+        },
+        ConfigKeys.Encoding.SECTION: {
+            ConfigKeys.Encoding.WORKERS: 2,
+            ConfigKeys.Encoding.CODEC: ImageCodec.PNG.value,
+            ConfigKeys.Encoding.PNG_COMPRESS_LEVEL: 1,
+            ConfigKeys.Encoding.WEBP_METHOD: 1,
+            ConfigKeys.Encoding.THUMBNAIL_SIZE: 256
+        },
+        ConfigKeys.Preview.SECTION: {
+            ConfigKeys.Preview.ENABLE_CACHE: True,
+            ConfigKeys.Preview.MEMORY_ENTRIES: 1000,
+            ConfigKeys.Preview.TEXT_CHARS: 200
+        },
+        ConfigKeys.Metrics.SECTION: {
+            ConfigKeys.Metrics.HTTP_HOST: "127.0.0.1",
+            ConfigKeys.Metrics.HTTP_PORT: 0,
+            ConfigKeys.Metrics.DUMP_FILE: "",
+            ConfigKeys.Metrics.DUMP_INTERVAL: 60.0
+        },
+        ConfigKeys.Similarity.SECTION: {
+            ConfigKeys.Similarity.MODE: NearDuplicateMode.OFF.value,
+            ConfigKeys.Similarity.TEXT_DISTANCE: 3,
+            ConfigKeys.Similarity.IMAGE_DISTANCE: 8,
+            ConfigKeys.Similarity.WINDOW: 100000
+        },
+        ConfigKeys.TextDelta.SECTION: {
+            ConfigKeys.TextDelta.ENABLE: False,
+            ConfigKeys.TextDelta.MIN_CHARS: 256,
+            ConfigKeys.TextDelta.MAX_RATIO: 0.5,
+            ConfigKeys.TextDelta.MAX_CHAIN: 8,
+            ConfigKeys.TextDelta.WINDOW: 8
         },
         ConfigKeys.Display.SECTION: {
             ConfigKeys.Display.SHOW_PREVIEW: True,
@@ -182,21 +558,64 @@ class Messages:
         """错误信息常量"""
         CONFIG_LOAD_ERROR = "加载配置文件时发生错误：{}"
         USE_DEFAULT_CONFIG = "使用默认配置"
+        CONFIG_RELOAD_ERROR = "重新加载配置文件时发生错误，继续使用当前配置：{}"
+        CONFIG_VALUE_INVALID = "配置项 {}.{} 的值无效：{!r}，使用默认值 {!r}"
         READ_LOG_ERROR = "读取日志文件时发生错误：{}"
         BACKUP_LOG_MESSAGE = "已将损坏的日志文件备份为：{}"
         SAVE_LOG_ERROR = "保存日志文件时发生错误：{}"
         IMAGE_SIZE_LIMIT = "图片大小超过限制，跳过保存"
         SAVE_IMAGE_ERROR = "保存图片时发生错误：{}"
+        IMAGE_REFS_ERROR = "读取图片引用计数时发生错误，将按日志记录重新统计，重新统计前不清理图片：{}"
         PROCESS_IMAGE_ERROR = "处理图片文件时发生错误：{}"
         GET_CLIPBOARD_IMAGE_ERROR = "获取剪贴板图片时发生错误：{}"
         GET_CLIPBOARD_TEXT_ERROR = "获取剪贴板文本时发生错误：{}"
         GET_CLIPBOARD_FILES_ERROR = "获取剪贴板文件路径时发生错误：{}"
         MONITOR_ERROR = "监控时发生错误：{}"
         LOAD_HISTORY_ERROR = "加载历史记录时发生错误：{}"
+        JOURNAL_TORN_TAIL = "日志文件末尾存在不完整的记录，已截断并备份为：{}"
+        JOURNAL_BAD_LINE = "跳过无法解析的日志行 {}:{}"
+        CONVERT_LOG_ERROR = "转换日志文件时发生错误：{}"
+        CHANGE_LISTENER_ERROR = "无法注册剪贴板变化通知，改为轮询：{}"
+        PIPELINE_DROPPED = "写入队列已满，丢弃了一条剪贴板记录"
+        DATABASE_ERROR = "写入历史数据库时发生错误：{}"
+        DECOMPRESS_ERROR = "解压缩数据时发生错误：{}"
+        DELTA_RESTORE_ERROR = "无法还原增量保存的文本 {}：基准记录 {} 不存在或已损坏"
+        SEAL_LOG_ERROR = "压缩封存日志文件时发生错误：{}"
+        RETENTION_ERROR = "执行保留策略时发生错误：{}"
+        SPILL_TEXT_ERROR = "保存超长文本时发生错误：{}"
+        IPC_ERROR = "进程间通信时发生错误：{}"
+        IPC_CONNECT_ERROR = "无法连接存储进程 {}：{}"
+        SHARED_MEMORY_ERROR = "分配共享内存时发生错误：{}"
+        ENCODE_IMAGE_ERROR = "编码图片时发生错误：{}"
+        PREVIEW_CACHE_ERROR = "读写预览缓存时发生错误：{}"
+        METRICS_ERROR = "导出运行指标时发生错误：{}"
 
     class Info:
         """提示信息常量"""
         MONITOR_START = "剪贴板监控已启动..."
         MONITOR_STOP = "\n程序已停止"
         CONTENT_SAVED = "内容已保存到日志文件中"
-        CLIPBOARD_CONTENT_HEADER = "\n剪贴板内容和元数据：" 
\ No newline at end of file
+        CLIPBOARD_CONTENT_HEADER = "\n剪贴板内容和元数据："
+        LOG_CONVERTED = "已转换日志文件：{} -> {}"
+        IMAGE_REFS_REBUILT = "已按日志记录重新统计 {} 张图片的引用计数，原文件备份为：{}"
+        DATABASE_IMPORTED = "已导入 {} 条记录到 {}"
+        DATABASE_STATS = "数据库：{}\n记录数：{}\n全文索引：{}"
+        DUPLICATE_ENTRY = "（重复内容，首次出现于 {}）"
+        TEXT_TRUNCATED = "（超长文本，共 {} 个字符，只记录了开头部分）"
+        STORE_START = "存储进程已启动，监听 {}"
+        STORE_STOP = "存储进程已停止"
+        SOURCE_CONNECTED = "捕获进程已连接：{}"
+        SOURCE_DISCONNECTED = "捕获进程已断开：{}"
+        CONFIG_RELOADED = "配置文件已更新，新配置已生效：{}"
+        CONFIG_RESTART_REQUIRED = "以下配置项需要重启后生效：{}"
+        METRICS_SERVER_START = "运行指标：http://{}:{}{}"
+        RETENTION_STATS = (
+            "保留策略：删除日志 {removed_files} 个，删除记录 {removed_entries} 条，"
+            "合并日志 {merged_files} 个，删除图片 {removed_images} 张，删除超长文本 {removed_texts} 个，"
+            "删除预览 {removed_previews} 条"
+        )
+        PIPELINE_STATS = (
+            "写入流水线统计：已提交 {submitted}，已写入 {written}，丢弃 {dropped}，"
+            "批次 {batches}，最大队列深度 {max_queue_depth}，"
+            "平均写入耗时 {avg_write_latency_ms:.1f} ms，最大写入耗时 {max_write_latency_ms:.1f} ms"
+        ) 
\ No newline at end of file
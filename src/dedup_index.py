@@ -0,0 +1,279 @@
+"""历史去重索引模块
+
+此模块维护保留期内全部日志记录的内容哈希索引，用于识别整个历史范围内的重复内容。
+重复复制的内容只写入一条引用记录，记录时间戳、内容哈希以及首次出现的时间，
+不再重复保存完整内容。
+
+索引按日志文件分组保存在一个小的状态文件中，同时记录每个日志文件的修改时间和大小。
+启动时只重新扫描发生过变化的日志文件；日志文件被清理后，其中的哈希随之从索引中移除。
+
+Classes:
+    DedupIndex: 按日志文件分组的内容哈希索引
+
+Functions:
+    is_reference: 判断一条记录是否为引用记录
+    promote_reference: 用首次出现的完整记录还原一条引用记录
+"""
+import os
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .constants import FileFormat, JsonKeys, Messages
+
+# 状态文件格式版本，格式不兼容时整体重建
+INDEX_VERSION = 1
+
+
+def is_reference(record: dict) -> bool:
+    """判断一条记录是否为指向首次出现记录的引用记录"""
+    return JsonKeys.DUPLICATE_OF in record
+
+
+def promote_reference(reference: dict, original: dict) -> dict:
+    """用首次出现的完整记录还原一条引用记录。
+
+    还原后的记录保留引用记录自己的时间戳、图片引用和相似指纹，内容取自完整记录。
+
+    Args:
+        reference (dict): 引用记录
+        original (dict): 首次出现的完整记录
+
+    Returns:
+        dict: 还原后的完整记录
+    """
+    promoted = dict(original)
+    promoted[JsonKeys.TIMESTAMP] = reference[JsonKeys.TIMESTAMP]
+    promoted.pop(JsonKeys.DUPLICATE_OF, None)
+    if JsonKeys.IMAGE_HASH in reference:
+        promoted[JsonKeys.IMAGE_HASH] = reference[JsonKeys.IMAGE_HASH]
+    else:
+        promoted.pop(JsonKeys.IMAGE_HASH, None)
+    # 相似内容的引用记录还原后仍带有自身的指纹和距离，表明内容取自相似的那条记录
+    for key in (JsonKeys.SIMILARITY_HASH, JsonKeys.SIMILARITY_DISTANCE):
+        if key in reference:
+            promoted[key] = reference[key]
+    return promoted
+
+
+class DedupIndex:
+    """按日志文件分组的内容哈希索引。
+
+    每个日志文件记录两类信息：文件中完整记录的哈希及其最早时间戳，以及文件中
+    引用记录所指向的哈希。全局索引由各文件按日期顺序合并得到，同一哈希以最早
+    出现的完整记录为准。
+
+    Attributes:
+        path (str): 索引状态文件路径
+    """
+
+    def __init__(self, path: str):
+        """加载索引状态文件。
+
+        Args:
+            path (str): 索引状态文件路径，日志文件位于同一目录下
+        """
+        self.path = path
+        self._base_dir = os.path.dirname(path)
+        self._files: Dict[str, dict] = {}
+        self._first: Dict[str, Tuple[str, str]] = {}
+        self._dirty: Set[str] = set()
+        self._changed = False
+        self._load()
+
+    def __len__(self) -> int:
+        """索引中完整记录的哈希数量"""
+        return len(self._first)
+
+    def _load(self):
+        """读取索引状态文件，文件损坏或版本不符时从空索引开始"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+            return
+        if not isinstance(state, dict) or state.get("version") != INDEX_VERSION:
+            return
+        for name, entry in state.get("files", {}).items():
+            self._files[name] = {
+                "mtime": entry.get("mtime"),
+                "size": entry.get("size"),
+                "full": dict(entry.get("full", {})),
+                "refs": set(entry.get("refs", [])),
+            }
+        self._rebuild()
+
+    def _rebuild(self):
+        """按日期顺序合并各日志文件，重建全局哈希索引"""
+        self._first = {}
+        for name in sorted(self._files):
+            for content_hash, timestamp in self._files[name]["full"].items():
+                first = self._first.get(content_hash)
+                if first is None or timestamp < first[0]:
+                    self._first[content_hash] = (timestamp, name)
+
+    @staticmethod
+    def _stat(log_file: str) -> Tuple[Optional[int], Optional[int]]:
+        """获取日志文件的修改时间和大小"""
+        try:
+            stat = os.stat(log_file)
+        except OSError:
+            return None, None
+        return stat.st_mtime_ns, stat.st_size
+
+    def sync(self, log_files: Iterable[str], reader: Callable[[str], List[dict]], save: bool = True) -> int:
+        """使索引与磁盘上的日志文件保持一致。
+
+        修改时间或大小发生变化的日志文件会被重新扫描，已不存在的日志文件会被移除。
+
+        Args:
+            log_files (Iterable[str]): 当前保留的全部日志文件路径
+            reader (Callable[[str], List[dict]]): 读取日志文件记录的函数
+            save (bool, optional): 是否将更新后的索引写回状态文件，只读时只更新内存中的索引。默认为 True
+
+        Returns:
+            int: 重新扫描的日志文件数量
+        """
+        rescanned = 0
+        present = set()
+        for log_file in log_files:
+            name = os.path.basename(log_file)
+            present.add(name)
+            entry = self._files.get(name)
+            mtime, size = self._stat(log_file)
+            if entry is not None and entry["mtime"] == mtime and entry["size"] == size:
+                continue
+            self._scan(name, reader(log_file))
+            rescanned += 1
+        for name in set(self._files) - present:
+            del self._files[name]
+            self._changed = True
+        self._rebuild()
+        if save:
+            self.save()
+        return rescanned
+
+    def _scan(self, name: str, records: Iterable[dict]):
+        """根据日志文件中的记录重建该文件的索引信息"""
+        entry = {"mtime": None, "size": None, "full": {}, "refs": set()}
+        for record in records:
+            self._add_to_entry(entry, record)
+        self._files[name] = entry
+        self._dirty.add(name)
+        self._changed = True
+
+    @staticmethod
+    def _add_to_entry(entry: dict, record: dict):
+        """将一条记录加入某个日志文件的索引信息"""
+        content_hash = record.get(JsonKeys.CONTENT_HASH)
+        if not content_hash:
+            return
+        if is_reference(record):
+            entry["refs"].add(content_hash)
+            return
+        timestamp = record.get(JsonKeys.TIMESTAMP, "")
+        known = entry["full"].get(content_hash)
+        if known is None or timestamp < known:
+            entry["full"][content_hash] = timestamp
+
+    def scan(self, log_file: str, records: Iterable[dict]):
+        """日志文件被重写后，用其中的全部记录替换该文件的索引信息。
+
+        Args:
+            log_file (str): 日志文件路径
+            records (Iterable[dict]): 日志文件中的全部记录
+        """
+        self._scan(os.path.basename(log_file), records)
+        self._rebuild()
+
+    def add(self, log_file: str, records: Iterable[dict]):
+        """记录新写入日志文件的记录。
+
+        Args:
+            log_file (str): 日志文件路径
+            records (Iterable[dict]): 新写入的记录
+        """
+        name = os.path.basename(log_file)
+        entry = self._files.setdefault(name, {"mtime": None, "size": None, "full": {}, "refs": set()})
+        for record in records:
+            self._add_to_entry(entry, record)
+            content_hash = record.get(JsonKeys.CONTENT_HASH)
+            if content_hash and not is_reference(record) and content_hash not in self._first:
+                self._first[content_hash] = (record.get(JsonKeys.TIMESTAMP, ""), name)
+        self._dirty.add(name)
+        self._changed = True
+
+    def remove(self, log_file: str):
+        """日志文件被删除后，从索引中移除其中的全部哈希"""
+        if self._files.pop(os.path.basename(log_file), None) is not None:
+            self._changed = True
+            self._rebuild()
+
+    def rename(self, old_file: str, new_file: str):
+        """日志文件改名（例如被压缩封存）后更新索引，不需要重新扫描"""
+        entry = self._files.pop(os.path.basename(old_file), None)
+        if entry is None:
+            return
+        name = os.path.basename(new_file)
+        self._files[name] = entry
+        self._dirty.add(name)
+        self._changed = True
+        self._rebuild()
+
+    def lookup(self, content_hash: str) -> Optional[Tuple[str, str]]:
+        """查找内容首次出现的位置。
+
+        Args:
+            content_hash (str): 内容哈希
+
+        Returns:
+            Optional[Tuple[str, str]]: 首次出现的时间戳和日志文件路径，不存在时返回 None
+        """
+        first = self._first.get(content_hash)
+        if first is None:
+            return None
+        return first[0], os.path.join(self._base_dir, first[1])
+
+    def hashes(self) -> Set[str]:
+        """索引中全部完整记录的哈希"""
+        return set(self._first)
+
+    def referencing_files(self, content_hash: str) -> List[str]:
+        """按日期顺序列出包含指定哈希引用记录的日志文件路径"""
+        return [
+            os.path.join(self._base_dir, name) for name in sorted(self._files)
+            if content_hash in self._files[name]["refs"]
+        ]
+
+    def save(self):
+        """将索引写入状态文件，只在内容发生变化时写入"""
+        if not self._changed:
+            return
+        for name in self._dirty:
+            if name in self._files:
+                self._files[name]["mtime"], self._files[name]["size"] = self._stat(
+                    os.path.join(self._base_dir, name)
+                )
+        state = {
+            "version": INDEX_VERSION,
+            "files": {
+                name: {
+                    "mtime": entry["mtime"],
+                    "size": entry["size"],
+                    "full": entry["full"],
+                    "refs": sorted(entry["refs"]),
+                }
+                for name, entry in self._files.items()
+            },
+        }
+        temp_file = f"{self.path}{FileFormat.TEMP_FILE_SUFFIX}"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, separators=(',', ':'))
+            os.replace(temp_file, self.path)
+        except (IOError, OSError) as e:
+            print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+            return
+        self._dirty.clear()
+        self._changed = False
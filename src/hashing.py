@@ -0,0 +1,102 @@
+"""快速哈希模块
+
+此模块提供在 PNG 编码之前判断图片是否变化所用的像素哈希。
+安装了 xxhash 时使用 XXH3-128，否则使用标准库中的 SHA-1（多数 CPU 上有硬件加速，
+这里只用于判断变化，不涉及安全性）。像素数据由 PIL 的 raw 编码器分块输出后直接送入哈希，
+不生成整张图片的副本，也不为每个条带裁剪出新的图片。
+哈希值带有算法前缀，切换算法后不会与旧值误判为相同。
+
+Functions:
+    iter_raw_chunks: 分块输出图片的原始像素数据
+    pixel_hash: 计算图片原始像素数据的哈希
+    buffer_hash: 计算已复制到缓冲区中的原始像素数据的哈希
+"""
+import hashlib
+from typing import Iterator, Tuple, Union
+from PIL import Image, ImageFile
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def iter_raw_chunks(image: Image.Image) -> Iterator[bytes]:
+    """分块输出图片的原始像素数据，拼接后与 image.tobytes() 相同。
+
+    与 tobytes 使用同一个 raw 编码器，但每块输出后立即交给调用方，不拼接成整张图片的副本。
+
+    Args:
+        image (Image.Image): 图片
+
+    Yields:
+        bytes: 按行排列的一段像素数据，每块约 64 KB
+    """
+    image.load()
+    width, height = image.size
+    if not width or not height:
+        return
+    encoder = Image._getencoder(image.mode, "raw", image.mode)
+    encoder.setimage(image.im, (0, 0, width, height))
+    # 与 tobytes 相同的块大小，每块至少包含一整行
+    block_size = max(ImageFile.MAXBLOCK, width * 4)
+    while True:
+        _, status, data = encoder.encode(block_size)
+        yield data
+        if status:
+            break
+    if status < 0:
+        raise RuntimeError(f"encoder error {status} while reading pixels")
+
+
+def _new_hasher(mode: str, size: Tuple[int, int]):
+    """创建以图片模式和尺寸开头的哈希对象，返回哈希对象和算法前缀"""
+    width, height = size
+    header = f"{mode}:{width}x{height}:".encode('ascii')
+    if xxhash is not None:
+        return xxhash.xxh3_128(header), "xxh3"
+    return hashlib.sha1(header), "sha1"
+
+
+def pixel_hash(image: Image.Image) -> str:
+    """计算图片原始像素数据的哈希。
+
+    哈希覆盖图片模式、尺寸和像素数据，不需要先进行 PNG 编码。P 和 PA 模式的像素只是
+    调色板索引，哈希同时覆盖调色板和透明色，只换了调色板的两张图片不会被判为相同。
+
+    Args:
+        image (Image.Image): 要计算哈希的图片
+
+    Returns:
+        str: 带算法前缀的十六进制哈希值
+    """
+    hasher, prefix = _new_hasher(image.mode, image.size)
+    if image.palette is not None:
+        palette = bytes(image.getpalette(image.palette.mode) or [])
+        transparency = image.info.get("transparency")
+        if not isinstance(transparency, bytes):
+            transparency = repr(transparency).encode('ascii')
+        hasher.update(f"{image.palette.mode}:{len(palette)}:{len(transparency)}:".encode('ascii'))
+        hasher.update(palette)
+        hasher.update(transparency)
+    for chunk in iter_raw_chunks(image):
+        hasher.update(chunk)
+    return f"{prefix}:{hasher.hexdigest()}"
+
+
+def buffer_hash(mode: str, size: Tuple[int, int], pixels: Union[bytes, memoryview]) -> str:
+    """计算已复制到缓冲区中的原始像素数据的哈希。
+
+    与 pixel_hash 对同一张图片的结果相同，直接读取缓冲区，不再从图片复制像素。
+
+    Args:
+        mode (str): PIL 图片模式
+        size (Tuple[int, int]): 图片宽高
+        pixels (Union[bytes, memoryview]): 按行排列的原始像素数据
+
+    Returns:
+        str: 带算法前缀的十六进制哈希值
+    """
+    hasher, prefix = _new_hasher(mode, size)
+    hasher.update(pixels)
+    return f"{prefix}:{hasher.hexdigest()}"
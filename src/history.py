@@ -0,0 +1,422 @@
+"""历史记录查询模块
+
+此模块提供按需读取全部保留历史的公开接口。日志文件逐条流式解析：JSON 数组日志使用
+增量解析器，JSONL 日志逐行读取，压缩封存的日志边解压边读取，因此无论日志中有多少
+记录、内联了多大的图片，内存中同一时间只保留少量记录。
+
+支持按时间范围、内容类型和子串过滤，按从新到旧或从旧到新的顺序返回，并可以通过
+游标分页。按时间范围读取 JSONL 日志时借助各分段的时间索引直接定位，不必解析整个文件。引用记录和增量保存的文本会还原为完整内容，压缩保存的文本会自动解压。导出、搜索等工具
+可以直接建立在 HistoryReader 之上。
+
+列出历史时可以只取每条记录的预览：预览从预览缓存中按内容哈希批量读取，
+不必解码完整的图片或还原引用记录。
+
+Classes:
+    HistoryReader: 流式历史记录读取器
+
+Functions:
+    iter_json_array: 流式读取 JSON 数组日志
+    iter_file_records: 按指定顺序流式读取单个日志文件
+    main: 命令行入口，按条件将历史记录导出为 JSONL
+"""
+import sys
+import json
+import heapq
+import argparse
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from .constants import ContentType, JsonKeys, Messages, StorageFormat
+from .compression import decode_record, is_compressed_file, open_log
+from .journal import iter_journal_range, iter_journal_reversed
+from .logger import ClipboardLogger
+from .preview_cache import Preview
+from .retention import parse_segment_dates
+from .text_delta import is_delta
+
+# 增量解析 JSON 数组时每次读取的字符数
+READ_CHUNK_SIZE = 65536
+# 无法从末尾读取的文件倒序读取时，每一轮在内存中保留的记录数
+REVERSE_WINDOW = 1000
+# 游标中时间戳与跳过条数之间的分隔符
+CURSOR_SEPARATOR = "#"
+# 列出预览时每批从预览缓存读取的条数
+PREVIEW_BATCH_SIZE = 500
+
+
+def iter_json_array(log_file: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[dict]:
+    """流式读取 JSON 数组日志，按文件中的顺序逐条返回记录。
+
+    使用 JSONDecoder.raw_decode 从缓冲区中逐个解析数组元素，缓冲区只保存尚未解析的
+    部分；遇到比缓冲区更大的记录时读取量成倍增加，解析总耗时仍与文件大小成正比。
+
+    Args:
+        log_file (str): JSON 日志文件路径，压缩的封存日志会流式解压
+        chunk_size (int, optional): 每次读取的字符数。默认为 64K
+
+    Yields:
+        dict: 日志记录
+
+    Raises:
+        ValueError: 文件内容不是 JSON 数组或已损坏
+    """
+    decoder = json.JSONDecoder()
+    with open_log(log_file) as f:
+        buffer = ""
+        position = 0
+        started = False
+        eof = False
+        read_size = chunk_size
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                if eof:
+                    if started:
+                        raise ValueError(f"unterminated JSON array in {log_file}")
+                    return
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer, position = chunk, 0
+                continue
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"{log_file} is not a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f"corrupted JSON array in {log_file}")
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                read_size = max(read_size, len(buffer))
+                continue
+            read_size = chunk_size
+            if isinstance(record, dict):
+                yield record
+
+
+def _iter_reversed(open_records: Callable[[], Iterator[dict]], window: int) -> Iterator[dict]:
+    """倒序返回只能顺序读取的记录流。
+
+    先统计记录数，再从末尾开始每轮重新读取一遍、只保留一个窗口的记录，
+    用多次读取换取有界的内存占用。
+    """
+    total = sum(1 for _ in open_records())
+    for stop in range(total, 0, -window):
+        records = list(islice(open_records(), max(0, stop - window), stop))
+        yield from reversed(records)
+
+
+def iter_file_records(log_file: str, newest_first: bool = True, window: int = REVERSE_WINDOW,
+                      since: Optional[str] = None, until: Optional[str] = None) -> Iterator[dict]:
+    """按指定顺序流式读取单个日志文件，不还原压缩的文本。
+
+    JSON 日志按从新到旧保存，JSONL 日志按从旧到新保存。与保存顺序相同时直接顺序读取；
+    相反时未压缩的 JSONL 从文件末尾向前读取，其他文件按窗口分轮倒序读取。
+
+    JSONL 日志只返回时间戳在 [since, until) 内的记录，并借助时间索引跳过范围之外的部分；
+    JSON 日志没有索引，会返回全部记录，由调用方过滤。
+
+    Args:
+        log_file (str): 日志文件路径
+        newest_first (bool, optional): 是否从新到旧返回。默认为 True
+        window (int, optional): 分轮倒序读取时每轮保留的记录数
+        since (Optional[str], optional): 起始时间（包含），ISO 格式
+        until (Optional[str], optional): 结束时间（不包含），ISO 格式
+
+    Yields:
+        dict: 日志记录
+    """
+    if ClipboardLogger._is_journal(log_file):
+        if not newest_first:
+            yield from iter_journal_range(log_file, since, until)
+        elif not is_compressed_file(log_file):
+            yield from iter_journal_reversed(log_file, since=since, until=until)
+        else:
+            yield from _iter_reversed(lambda: iter_journal_range(log_file, since, until), window)
+    elif newest_first:
+        yield from iter_json_array(log_file)
+    else:
+        yield from _iter_reversed(lambda: iter_json_array(log_file), window)
+
+
+def _encode_cursor(timestamp: str, skip: int) -> str:
+    """生成游标：最后返回的记录的时间戳，以及该时间戳已返回的条数"""
+    return f"{timestamp}{CURSOR_SEPARATOR}{skip}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    """解析游标
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    timestamp, separator, skip = cursor.rpartition(CURSOR_SEPARATOR)
+    if not separator or not skip.isdigit():
+        raise ValueError(f"invalid cursor: {cursor}")
+    return timestamp, int(skip)
+
+
+class HistoryReader:
+    """流式历史记录读取器。
+
+    文件存储时读取全部保留的日志文件，sqlite 存储时从历史数据库中逐批读取。
+    读取不持有日志管理器的锁，可以在监控运行时使用；迭代期间同一时间只打开少量日志文件，
+    应尽快消费完毕或关闭生成器。
+
+    Attributes:
+        logger (ClipboardLogger): 日志管理器
+    """
+
+    def __init__(self, logger: ClipboardLogger):
+        """初始化读取器。
+
+        Args:
+            logger (ClipboardLogger): 日志管理器
+        """
+        self.logger = logger
+
+    def _file_groups(self, since: Optional[str], until: Optional[str]) -> List[List[str]]:
+        """按日期顺序将日志文件分组，日期范围重叠的文件（例如同一天的多个分段，或 JSON 与 JSONL）归为一组。
+
+        日期范围完全落在查询范围之外的文件不会被打开。
+        """
+        # 文件名中没有日期的日志无法判断范围，单独成组并排在最前面
+        groups: List[List[str]] = []
+        ranged = []
+        for log_file in self.logger._list_log_files():
+            dates = parse_segment_dates(log_file)
+            if dates is None:
+                groups.append([log_file])
+                continue
+            if since and dates[1] < since[:10]:
+                continue
+            if until and dates[0] > until[:10]:
+                continue
+            ranged.append((dates, log_file))
+        ranged.sort()
+        group_end = None
+        for (start, end), log_file in ranged:
+            if group_end is not None and start <= group_end:
+                groups[-1].append(log_file)
+                group_end = max(group_end, end)
+            else:
+                groups.append([log_file])
+                group_end = end
+        return groups
+
+    def _iter_file(self, log_file: str, newest_first: bool, since: Optional[str],
+                   until: Optional[str]) -> Iterator[dict]:
+        """读取单个日志文件，文件被清理或损坏时打印错误并跳过"""
+        try:
+            yield from iter_file_records(log_file, newest_first, since=since, until=until)
+        except (ValueError, IOError, OSError, EOFError) as e:
+            print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+
+    def _iter_raw(self, since: Optional[str], until: Optional[str], content_type: Optional[str],
+                  newest_first: bool) -> Iterator[dict]:
+        """按时间顺序返回满足时间和类型条件的原始记录"""
+        if self.logger.storage_format == StorageFormat.SQLITE.value:
+            yield from self.logger.history_db.iter_records(since, until, content_type, newest_first)
+            return
+
+        groups = self._file_groups(since, until)
+        if newest_first:
+            groups.reverse()
+        key = lambda record: record.get(JsonKeys.TIMESTAMP, "")
+        for group in groups:
+            if len(group) == 1:
+                records = self._iter_file(group[0], newest_first, since, until)
+            else:
+                records = heapq.merge(
+                    *(self._iter_file(log_file, newest_first, since, until) for log_file in group),
+                    key=key, reverse=newest_first
+                )
+            for record in records:
+                timestamp = key(record)
+                # 文件内的记录按时间有序，越过查询范围后不必再读取该组剩余的记录
+                if newest_first and since and timestamp < since:
+                    break
+                if not newest_first and until and timestamp >= until:
+                    break
+                if (since and timestamp < since) or (until and timestamp >= until):
+                    continue
+                if content_type and record.get(JsonKeys.CONTENT_TYPE) != content_type:
+                    continue
+                yield record
+
+    @staticmethod
+    def _matches(record: dict, needle: str) -> bool:
+        """判断记录的文本内容或文件路径中是否包含关键词（不区分大小写）"""
+        text = record.get(JsonKeys.TEXT_CONTENT)
+        if isinstance(text, str) and needle in text.casefold():
+            return True
+        return any(needle in str(path).casefold() for path in record.get(JsonKeys.FILE_PATHS, []))
+
+    def iter_entries(self, since: Optional[str] = None, until: Optional[str] = None,
+                     content_type: Optional[str] = None, contains: Optional[str] = None,
+                     newest_first: bool = True, cursor: Optional[str] = None,
+                     resolve: bool = True) -> Iterator[dict]:
+        """逐条返回满足条件的历史记录。
+
+        Args:
+            since (Optional[str], optional): 起始时间（包含），ISO 格式，也可以只写日期
+            until (Optional[str], optional): 结束时间（不包含），ISO 格式，也可以只写日期
+            content_type (Optional[str], optional): 内容类型，取值见 constants.ContentType
+            contains (Optional[str], optional): 文本内容或文件路径中包含的关键词，不区分大小写
+            newest_first (bool, optional): 是否从新到旧返回。默认为 True
+            cursor (Optional[str], optional): 上一页返回的游标，从其后继续读取
+            resolve (bool, optional): 是否将引用记录还原为完整内容。默认为 True
+
+        Yields:
+            dict: 历史记录，压缩保存的文本已还原
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        cursor_timestamp, skip = _decode_cursor(cursor) if cursor else (None, 0)
+        if cursor_timestamp is not None:
+            # 游标所在时间戳的记录仍需读取，以便跳过其中已经返回过的部分
+            # 在游标时间戳后追加 \0 得到紧随其后的字符串，作为不包含的上界
+            if newest_first and (until is None or cursor_timestamp < until):
+                until = cursor_timestamp + "\0"
+            if not newest_first and (since is None or cursor_timestamp > since):
+                since = cursor_timestamp
+        needle = contains.casefold() if contains else None
+
+        for record in self._iter_raw(since, until, content_type, newest_first):
+            if cursor_timestamp is not None:
+                timestamp = record.get(JsonKeys.TIMESTAMP, "")
+                if timestamp == cursor_timestamp and skip:
+                    if needle is None or self._matches(self._prepare(record, resolve), needle):
+                        skip -= 1
+                    continue
+            record = self._prepare(record, resolve)
+            if needle is not None and not self._matches(record, needle):
+                continue
+            yield record
+
+    def _prepare(self, record: dict, resolve: bool) -> dict:
+        """还原压缩的文本，并按需还原引用记录"""
+        decode_record(record)
+        return self.logger.resolve_entry(record) if resolve else record
+
+    def with_previews(self, entries: Iterable[dict], batch_size: int = PREVIEW_BATCH_SIZE) -> Iterator[dict]:
+        """将记录转换为带预览的摘要。
+
+        预览按批从预览缓存读取；缓存中没有的文本和文件路径记录由记录内容生成预览，
+        没有缩略图的图片预览为 None。
+
+        Args:
+            entries (Iterable[dict]): 历史记录，引用记录不必还原
+            batch_size (int, optional): 每批读取的条数。默认为 500
+
+        Yields:
+            dict: 包含时间戳、内容类型、内容哈希和预览的摘要
+        """
+        cache = self.logger.preview_cache
+        iterator = iter(entries)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            hashes = [entry.get(JsonKeys.CONTENT_HASH) for entry in batch]
+            previews = cache.get_many(h for h in hashes if h) if cache is not None else {}
+            for entry, content_hash in zip(batch, hashes):
+                preview = previews.get(content_hash)
+                if preview is None:
+                    # 增量保存的文本没有完整内容，预览缓存中没有时先还原
+                    record = self.logger.resolve_entry(entry) if is_delta(entry) else entry
+                    preview = Preview.from_record(record, self.logger.preview_text_chars)
+                yield {
+                    JsonKeys.TIMESTAMP: entry.get(JsonKeys.TIMESTAMP),
+                    JsonKeys.CONTENT_TYPE: entry.get(JsonKeys.CONTENT_TYPE),
+                    JsonKeys.CONTENT_HASH: content_hash,
+                    JsonKeys.PREVIEW: preview.to_dict() if preview is not None else None,
+                }
+
+    def iter_previews(self, batch_size: int = PREVIEW_BATCH_SIZE, **filters) -> Iterator[dict]:
+        """逐条返回满足条件的历史记录的预览摘要。
+
+        只按关键词过滤时才还原引用记录，其余情况下预览只需要记录的内容哈希。
+
+        Args:
+            batch_size (int, optional): 每批从预览缓存读取的条数。默认为 500
+            **filters: 传给 iter_entries 的过滤和排序参数
+
+        Yields:
+            dict: 包含时间戳、内容类型、内容哈希和预览的摘要
+        """
+        filters.setdefault("resolve", filters.get("contains") is not None)
+        return self.with_previews(self.iter_entries(**filters), batch_size)
+
+    def page(self, limit: int, cursor: Optional[str] = None,
+             **filters) -> Tuple[List[dict], Optional[str]]:
+        """读取一页历史记录。
+
+        Args:
+            limit (int): 每页最多返回的条数
+            cursor (Optional[str], optional): 上一页返回的游标，为 None 时从头读取
+            **filters: 传给 iter_entries 的过滤和排序参数
+
+        Returns:
+            Tuple[List[dict], Optional[str]]: 本页记录和下一页的游标，已读完时游标为 None
+        """
+        entries = list(islice(self.iter_entries(cursor=cursor, **filters), limit))
+        if len(entries) < limit:
+            return entries, None
+        last_timestamp = entries[-1].get(JsonKeys.TIMESTAMP, "")
+        skip = sum(1 for entry in entries if entry.get(JsonKeys.TIMESTAMP, "") == last_timestamp)
+        if cursor:
+            cursor_timestamp, cursor_skip = _decode_cursor(cursor)
+            if cursor_timestamp == last_timestamp:
+                skip += cursor_skip
+        return entries, _encode_cursor(last_timestamp, skip)
+
+
+def main():
+    """命令行入口"""
+    from .config import Config
+
+    parser = argparse.ArgumentParser(description="按条件导出剪贴板历史记录（JSONL）")
+    parser.add_argument("--since", default=None, help="起始时间（包含），ISO 格式")
+    parser.add_argument("--until", default=None, help="结束时间（不包含），ISO 格式")
+    parser.add_argument("--type", dest="content_type", default=None,
+                        choices=[t.value for t in ContentType], help="内容类型")
+    parser.add_argument("--contains", default=None, help="文本或文件路径中包含的关键词")
+    parser.add_argument("--oldest-first", action="store_true", help="从旧到新输出")
+    parser.add_argument("--limit", type=int, default=None, help="最多输出的条数，同时在标准错误输出下一页游标")
+    parser.add_argument("--cursor", default=None, help="上一页的游标")
+    parser.add_argument("--previews", action="store_true", help="只输出每条记录的预览")
+    args = parser.parse_args()
+
+    # 只读打开：导出不应重写去重索引、预览缓存或数据库
+    logger = ClipboardLogger(Config(), read_only=True)
+    reader = HistoryReader(logger)
+    filters = dict(since=args.since, until=args.until, content_type=args.content_type,
+                   contains=args.contains, newest_first=not args.oldest_first)
+    if args.previews:
+        filters["resolve"] = args.contains is not None
+    try:
+        if args.limit is None:
+            entries, next_cursor = reader.iter_entries(cursor=args.cursor, **filters), None
+        else:
+            entries, next_cursor = reader.page(args.limit, args.cursor, **filters)
+        if args.previews:
+            entries = reader.with_previews(entries)
+        for entry in entries:
+            sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if next_cursor:
+            print(next_cursor, file=sys.stderr)
+    finally:
+        logger.close()
+
+
+if __name__ == '__main__':
+    main()
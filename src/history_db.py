@@ -0,0 +1,444 @@
+"""历史记录数据库模块
+
+此模块提供基于 SQLite 的剪贴板历史存储。数据库使用 WAL 模式，写入线程与查询进程
+可以并发访问；时间戳、内容类型和内容哈希建有索引，文本内容建有 FTS5 全文索引，
+查询时不需要解析任何 JSON 日志文件。全文索引优先使用 trigram 分词器，中文等没有
+空格分隔的文本也能按子串搜索；不足三个字符的关键词和不支持 FTS5 的 SQLite 退化为 LIKE 查询。
+
+既可以与 JSON 日志并存作为索引，也可以通过 ``storage_format = "sqlite"``
+完全取代 JSON 日志。
+
+Classes:
+    HistoryDatabase: SQLite 历史记录数据库
+
+Functions:
+    main: 命令行入口，支持搜索、导入已有日志和查看统计信息
+"""
+import os
+import sqlite3
+import argparse
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from urllib.request import pathname2url
+from .constants import ContentType, JsonKeys, Messages
+from .dedup_index import is_reference, promote_reference
+from .serialization import dumps, loads
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    content_hash TEXT,
+    text_content TEXT,
+    duplicate_of TEXT,
+    record TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp, content_type);
+CREATE INDEX IF NOT EXISTS idx_entries_type_timestamp ON entries(content_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_entries_hash ON entries(content_hash);
+"""
+
+# trigram 分词器可以匹配任意长度不少于 3 的子串
+FTS_MIN_TERM_LENGTH = 3
+# 逐批读取记录时每批的条数
+ITER_BATCH_SIZE = 500
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    text_content, content='entries', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries
+WHEN new.text_content IS NOT NULL BEGIN
+    INSERT INTO entries_fts(rowid, text_content) VALUES (new.id, new.text_content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries
+WHEN old.text_content IS NOT NULL BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text_content) VALUES ('delete', old.id, old.text_content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF text_content ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text_content)
+        SELECT 'delete', old.id, old.text_content WHERE old.text_content IS NOT NULL;
+    INSERT INTO entries_fts(rowid, text_content)
+        SELECT new.id, new.text_content WHERE new.text_content IS NOT NULL;
+END;
+"""
+
+
+class HistoryDatabase:
+    """SQLite 历史记录数据库。
+
+    每条日志记录保存为一行，完整记录以 JSON 形式存放在 record 列中
+    （不包含内联的图片 base64 数据），常用查询字段单独成列并建立索引。
+
+    Attributes:
+        path (str): 数据库文件路径
+        has_fts (bool): 当前 SQLite 是否支持 FTS5 全文索引
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        """打开或创建数据库。
+
+        Args:
+            path (str): 数据库文件路径
+            read_only (bool, optional): 是否以只读方式打开已有的数据库，不创建表和索引。
+                数据库不存在时视为空库，不会创建文件。默认为 False
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if read_only and not os.path.exists(path):
+            # 尚未写入过记录，使用内存中的空库，查询结果均为空
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self.has_fts = False
+            return
+        if read_only:
+            uri = "file:{}?mode=ro".format(pathname2url(os.path.abspath(path)))
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self.has_fts = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'"
+            ).fetchone() is not None
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self.has_fts = False
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                self._conn.executescript(_FTS_SCHEMA.format(tokenizer=tokenizer))
+                self.has_fts = True
+                break
+            except sqlite3.OperationalError:
+                continue
+        self._conn.commit()
+
+    def _migrate(self):
+        """为旧版本创建的数据库补充新增的列"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if "duplicate_of" not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN duplicate_of TEXT")
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> tuple:
+        """将日志记录转换为数据库行"""
+        stored = {k: v for k, v in record.items() if k != JsonKeys.IMAGE_BASE64}
+        return (
+            record.get(JsonKeys.TIMESTAMP, ""),
+            record.get(JsonKeys.CONTENT_TYPE, ContentType.UNKNOWN.value),
+            record.get(JsonKeys.CONTENT_HASH),
+            record.get(JsonKeys.TEXT_CONTENT),
+            record.get(JsonKeys.DUPLICATE_OF),
+            dumps(stored).decode('utf-8'),
+        )
+
+    def insert_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """在一个事务中插入多条日志记录。
+
+        时间戳和内容类型都相同的记录视为已存在，会被忽略，因此重复导入是安全的。
+
+        Args:
+            records (Iterable[Dict[str, Any]]): 日志记录
+
+        Returns:
+            int: 实际插入的条数
+        """
+        rows = [self._to_row(record) for record in records]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            # rowcount 只统计 entries 表的插入，total_changes 还包含全文索引触发器的写入
+            return self._conn.executemany(
+                "INSERT OR IGNORE INTO entries"
+                "(timestamp, content_type, content_hash, text_content, duplicate_of, record) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            ).rowcount
+
+    @staticmethod
+    def _fts_query(terms: List[str]) -> str:
+        """将关键词转换为安全的 FTS5 查询，每个词都作为短语匹配"""
+        return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+    def search(self, query: Optional[str] = None, content_type: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """按条件搜索历史记录，结果按时间从新到旧排列。
+
+        Args:
+            query (Optional[str], optional): 文本关键词，多个词之间为“与”关系
+            content_type (Optional[str], optional): 内容类型
+            since (Optional[str], optional): 起始时间（ISO 格式，包含）
+            until (Optional[str], optional): 结束时间（ISO 格式，不包含）
+            limit (int, optional): 最多返回的条数。默认为 50
+            offset (int, optional): 跳过的条数，用于分页。默认为 0
+
+        Returns:
+            List[Dict[str, Any]]: 匹配的日志记录
+        """
+        conditions = []
+        params: List[Any] = []
+        terms = query.split() if query else []
+        fts_terms = [t for t in terms if self.has_fts and len(t) >= FTS_MIN_TERM_LENGTH]
+        if fts_terms:
+            conditions.append("e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)")
+            params.append(self._fts_query(fts_terms))
+        for term in terms:
+            if term not in fts_terms:
+                conditions.append("e.text_content LIKE ?")
+                params.append(f"%{term}%")
+        if content_type:
+            conditions.append("e.content_type = ?")
+            params.append(content_type)
+        if since:
+            conditions.append("e.timestamp >= ?")
+            params.append(since)
+        if until:
+            conditions.append("e.timestamp < ?")
+            params.append(until)
+
+        sql = "SELECT e.record FROM entries e"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY e.timestamp DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [loads(row[0]) for row in rows]
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """获取最新的一条记录"""
+        results = self.search(limit=1)
+        return results[0] if results else None
+
+    def first_occurrence(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """查找内容哈希对应的最早一条完整记录（不包括引用记录）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM entries WHERE content_hash = ? AND duplicate_of IS NULL "
+                "ORDER BY timestamp LIMIT 1", (content_hash,)
+            ).fetchone()
+        return loads(row[0]) if row else None
+
+    def promote_references(self, removed: Iterable[Dict[str, Any]]) -> int:
+        """被删除的完整记录仍被引用时，将最早的引用记录还原为完整记录。
+
+        其余引用记录改为指向还原后的记录。
+
+        Args:
+            removed (Iterable[Dict[str, Any]]): 已删除的记录
+
+        Returns:
+            int: 还原的记录条数
+        """
+        promoted_count = 0
+        with self._lock, self._conn:
+            for original in removed:
+                content_hash = original.get(JsonKeys.CONTENT_HASH)
+                if not content_hash or is_reference(original):
+                    continue
+                if self._conn.execute(
+                    "SELECT 1 FROM entries WHERE content_hash = ? AND duplicate_of IS NULL",
+                    (content_hash,)
+                ).fetchone():
+                    continue
+                row = self._conn.execute(
+                    "SELECT id, record FROM entries WHERE content_hash = ? AND duplicate_of IS NOT NULL "
+                    "ORDER BY timestamp LIMIT 1", (content_hash,)
+                ).fetchone()
+                if row is None:
+                    continue
+                promoted = promote_reference(loads(row[1]), original)
+                _, _, _, text_content, _, record = self._to_row(promoted)
+                self._conn.execute(
+                    "UPDATE entries SET duplicate_of = NULL, text_content = ?, record = ? WHERE id = ?",
+                    (text_content, record, row[0])
+                )
+                first_timestamp = promoted[JsonKeys.TIMESTAMP]
+                self._conn.execute(
+                    "UPDATE entries SET duplicate_of = ?, record = json_set(record, '$.{}', ?) "
+                    "WHERE content_hash = ? AND duplicate_of IS NOT NULL".format(JsonKeys.DUPLICATE_OF),
+                    (first_timestamp, first_timestamp, content_hash)
+                )
+                promoted_count += 1
+        return promoted_count
+
+    def delete_before(self, timestamp: str) -> List[Dict[str, Any]]:
+        """删除早于指定时间的记录。
+
+        Args:
+            timestamp (str): ISO 格式的时间，早于此时间的记录会被删除
+
+        Returns:
+            List[Dict[str, Any]]: 被删除的记录
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT record FROM entries WHERE timestamp < ?", (timestamp,)
+            ).fetchall()
+            self._conn.execute("DELETE FROM entries WHERE timestamp < ?", (timestamp,))
+        return [loads(row[0]) for row in rows]
+
+    def delete_oldest(self, count: int) -> List[Dict[str, Any]]:
+        """删除最早的若干条记录。
+
+        Args:
+            count (int): 要删除的条数
+
+        Returns:
+            List[Dict[str, Any]]: 被删除的记录
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, record FROM entries ORDER BY timestamp LIMIT ?", (count,)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM entries WHERE id = ?", [(row[0],) for row in rows])
+        return [loads(row[1]) for row in rows]
+
+    def iter_records(self, since: Optional[str] = None, until: Optional[str] = None,
+                     content_type: Optional[str] = None, newest_first: bool = True,
+                     batch_size: int = ITER_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """按时间顺序逐批读取记录，每批单独查询，迭代期间不占用数据库连接。
+
+        Args:
+            since (Optional[str], optional): 起始时间（包含），ISO 格式
+            until (Optional[str], optional): 结束时间（不包含），ISO 格式
+            content_type (Optional[str], optional): 内容类型
+            newest_first (bool, optional): 是否从新到旧返回。默认为 True
+            batch_size (int, optional): 每批读取的条数
+
+        Yields:
+            Dict[str, Any]: 日志记录
+        """
+        conditions, params = [], []
+        if since:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        if content_type:
+            conditions.append("content_type = ?")
+            params.append(content_type)
+        # 按 (timestamp, id) 翻页，时间戳相同的记录也不会重复或遗漏
+        comparison, order = ("<", "DESC") if newest_first else (">", "ASC")
+        last = None
+        while True:
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if last is not None:
+                page_conditions.append(f"(timestamp, id) {comparison} (?, ?)")
+                page_params.extend(last)
+            where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT timestamp, id, record FROM entries {where} "
+                    f"ORDER BY timestamp {order}, id {order} LIMIT ?",
+                    page_params + [batch_size]
+                ).fetchall()
+            for row in rows:
+                yield loads(row[2])
+            if len(rows) < batch_size:
+                return
+            last = (rows[-1][0], rows[-1][1])
+
+    def referenced_paths(self, keys: Iterable[str]) -> List[str]:
+        """列出全部记录中指定字段引用的文件路径，例如图片路径和超长文本路径"""
+        paths = []
+        with self._lock:
+            for key in keys:
+                rows = self._conn.execute(
+                    f"SELECT json_extract(record, '$.{key}') FROM entries "
+                    f"WHERE json_extract(record, '$.{key}') IS NOT NULL"
+                ).fetchall()
+                paths.extend(row[0] for row in rows)
+        return paths
+
+    def content_hashes(self) -> Set[str]:
+        """获取全部记录的内容哈希"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT content_hash FROM entries WHERE content_hash IS NOT NULL"
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def count(self) -> int:
+        """获取记录总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def _print_results(results: List[Dict[str, Any]], preview_length: int):
+    """在控制台打印搜索结果"""
+    for record in results:
+        content_type = record.get(JsonKeys.CONTENT_TYPE)
+        if is_reference(record):
+            summary = Messages.Info.DUPLICATE_ENTRY.format(record[JsonKeys.DUPLICATE_OF])
+        elif content_type == ContentType.TEXT.value:
+            summary = record.get(JsonKeys.TEXT_CONTENT, "").replace("\n", " ")
+            if len(summary) > preview_length:
+                summary = summary[:preview_length] + "..."
+        elif content_type == ContentType.FILES.value:
+            summary = ", ".join(record.get(JsonKeys.FILE_PATHS, []))
+        else:
+            summary = record.get(JsonKeys.IMAGE_HASH) or record.get(JsonKeys.IMAGE_PATH, "")
+        print(f"{record.get(JsonKeys.TIMESTAMP)}  [{content_type}]  {summary}")
+
+
+def main():
+    """命令行入口"""
+    from .config import Config
+    from .constants import ConfigKeys
+    from .logger import ClipboardLogger
+
+    parser = argparse.ArgumentParser(description="剪贴板历史数据库")
+    parser.add_argument("--db", default=None, help="数据库文件路径，默认读取配置文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="搜索历史记录")
+    search_parser.add_argument("query", nargs="?", default=None, help="文本关键词")
+    search_parser.add_argument("--type", dest="content_type", default=None,
+                               choices=[t.value for t in ContentType], help="内容类型")
+    search_parser.add_argument("--since", default=None, help="起始时间，ISO 格式")
+    search_parser.add_argument("--until", default=None, help="结束时间，ISO 格式")
+    search_parser.add_argument("--limit", type=int, default=20, help="最多返回的条数")
+    search_parser.add_argument("--offset", type=int, default=0, help="跳过的条数")
+
+    subparsers.add_parser("import", help="将已有的日志文件导入数据库")
+    subparsers.add_parser("stats", help="显示数据库统计信息")
+    args = parser.parse_args()
+
+    config = Config()
+    db_path = args.db or ClipboardLogger.database_path(config)
+    database = HistoryDatabase(db_path)
+    try:
+        if args.command == "search":
+            results = database.search(
+                args.query, args.content_type, args.since, args.until, args.limit, args.offset
+            )
+            _print_results(results, config.get(ConfigKeys.Display.SECTION, ConfigKeys.Display.MAX_PREVIEW_LENGTH))
+        elif args.command == "import":
+            # 只读打开日志，导入不应重写去重索引、预览缓存或打开另一个数据库写入连接
+            logger = ClipboardLogger(config, read_only=True)
+            try:
+                imported = sum(database.insert_records(records) for records in logger.iter_log_files())
+            finally:
+                logger.close()
+            print(Messages.Info.DATABASE_IMPORTED.format(imported, db_path))
+        elif args.command == "stats":
+            print(Messages.Info.DATABASE_STATS.format(db_path, database.count(), database.has_fts))
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""图片编码模块
+
+此模块负责将剪贴板图片编码为要保存的格式，并同时生成用于预览的缩略图。
+
+编码格式可以配置，默认按图片内容自动选择：颜色较少的截图使用无损 WebP，
+文件通常只有 PNG 的几分之一；照片等颜色丰富的图片和 1440p 以上的大截图使用压缩级别较低的快速 PNG，
+大截图不再尝试 WebP，编码耗时和内存占用不随分辨率成倍增长。
+
+编码可以交给后台线程池完成。编码主要在释放了 GIL 的 C 代码中进行，多核时多张图片可以并行编码，
+监控线程只需提交图片即可继续检查剪贴板。缩略图由另一个编码线程与图片编码同时生成，
+写入预览缓存时才等待结果；未启用预览缓存时不生成缩略图。
+
+Classes:
+    EncodedImage: 编码后的图片数据及其缩略图
+    ImageEncoder: 按配置选择格式的图片编码器，可使用后台线程池编码
+
+Functions:
+    webp_supported: 判断 Pillow 是否支持 WebP
+"""
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Union
+from PIL import Image, features
+from .config import Config
+from .constants import ConfigKeys, FileFormat, ImageCodec, Messages
+
+# WebP 支持的最大宽高
+WEBP_MAX_DIMENSION = 16383
+# 判断是否为截图时，按最近邻将图片缩小到长边约为此像素数后统计颜色
+SAMPLE_EDGE = 128
+# 缩小后的颜色数不超过此值时视为截图
+SCREENSHOT_MAX_COLORS = 1024
+# auto 模式下像素数达到此值的图片直接使用快速 PNG，不尝试 WebP
+PNG_FIRST_PIXELS = 2560 * 1440
+# 无损 WebP 的压缩力度（0-100），与 webp_method 一起决定编码速度
+WEBP_LOSSLESS_EFFORT = 25
+# 缩略图使用有损 WebP 时的质量
+THUMBNAIL_QUALITY = 80
+# 每个编码线程最多排队的图片数，超出后在调用线程中直接编码
+PENDING_PER_WORKER = 2
+
+
+def webp_supported() -> bool:
+    """判断 Pillow 是否支持 WebP"""
+    return bool(features.check("webp"))
+
+
+class EncodedImage:
+    """编码后的图片数据及其缩略图。
+
+    Attributes:
+        data (Union[bytes, memoryview]): 编码后的图片数据
+        format (str): 图片格式，取值见 FileFormat.IMAGE_EXTENSIONS
+        thumbnail (Optional[Future]): 正在生成的缩略图，结果为 Optional[EncodedImage]；
+            不生成缩略图时为 None
+    """
+
+    def __init__(self, data: Union[bytes, memoryview], image_format: str, thumbnail: Optional[Future] = None):
+        """初始化编码结果。
+
+        Args:
+            data (Union[bytes, memoryview]): 编码后的图片数据
+            image_format (str): 图片格式
+            thumbnail (Optional[Future], optional): 正在生成的缩略图
+        """
+        self.data = data
+        self.format = image_format
+        self.thumbnail = thumbnail
+
+
+class ImageEncoder:
+    """按配置选择格式的图片编码器。
+
+    workers 大于 0 时 submit 将图片交给后台线程池编码；排队的图片过多时改为在调用线程中
+    直接编码，避免大量未编码的图片占用内存。
+
+    编码格式、压缩参数、缩略图尺寸和图片大小上限每次编码时从配置的设置快照读取，
+    修改配置文件后无需重启；编码线程数和是否生成缩略图（即是否启用预览缓存）在创建时确定。
+
+    Attributes:
+        workers (int): 编码线程数，为 0 时在调用线程中编码
+    """
+
+    def __init__(self, config: Config):
+        """根据配置初始化编码器，线程池在第一次提交时才创建。
+
+        Args:
+            config (Config): 配置对象
+        """
+        self._config = config
+        self.workers = max(0, config.get(ConfigKeys.Encoding.SECTION, ConfigKeys.Encoding.WORKERS))
+        self._webp = webp_supported()
+        # 缩略图只保存在预览缓存中，未启用预览缓存时不生成
+        self._thumbnails = bool(config.get(ConfigKeys.Preview.SECTION, ConfigKeys.Preview.ENABLE_CACHE))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = threading.BoundedSemaphore(max(1, self.workers * PENDING_PER_WORKER))
+
+    def _fits_webp(self, image: Image.Image) -> bool:
+        """判断图片能否编码为 WebP"""
+        return self._webp and max(image.size) <= WEBP_MAX_DIMENSION
+
+    @staticmethod
+    def _looks_like_screenshot(image: Image.Image) -> bool:
+        """抽样统计颜色数，颜色较少的视为截图。
+
+        最近邻抽样不会像平均缩小那样抹平照片中的细节，只读取抽中的像素。
+        """
+        if image.mode not in ("RGB", "RGBA"):
+            return False
+        width, height = image.size
+        factor = max(1, max(width, height) // SAMPLE_EDGE)
+        sample = image.resize((max(1, width // factor), max(1, height // factor)), Image.NEAREST)
+        return sample.getcolors(SCREENSHOT_MAX_COLORS) is not None
+
+    def choose_format(self, image: Image.Image) -> str:
+        """按配置和图片内容选择编码格式。
+
+        Args:
+            image (Image.Image): 要编码的图片
+
+        Returns:
+            str: FileFormat.IMAGE_FORMAT 或 FileFormat.WEBP_FORMAT
+        """
+        codec = self._config.settings.codec
+        if codec == ImageCodec.PNG.value or not self._fits_webp(image):
+            return FileFormat.IMAGE_FORMAT
+        if codec == ImageCodec.WEBP.value:
+            return FileFormat.WEBP_FORMAT
+        # 大截图直接使用快速 PNG：无损 WebP 的耗时和内存随像素数增长得更快，会拖慢监控线程
+        width, height = image.size
+        if width * height < PNG_FIRST_PIXELS and self._looks_like_screenshot(image):
+            return FileFormat.WEBP_FORMAT
+        return FileFormat.IMAGE_FORMAT
+
+    def _save(self, image: Image.Image, image_format: str) -> memoryview:
+        """按指定格式无损编码图片"""
+        settings = self._config.settings
+        buffer = io.BytesIO()
+        if image_format == FileFormat.WEBP_FORMAT:
+            image.save(buffer, format=image_format, lossless=True, exact=True,
+                       method=settings.webp_method, quality=WEBP_LOSSLESS_EFFORT)
+        else:
+            image.save(buffer, format=image_format, compress_level=settings.png_compress_level)
+        # getbuffer 返回内存视图，避免再复制一份编码后的数据
+        return buffer.getbuffer()
+
+    def make_thumbnail(self, image: Image.Image) -> Optional[EncodedImage]:
+        """生成缩略图，直接从原图缩小，不复制整张图片。
+
+        Args:
+            image (Image.Image): 原图
+
+        Returns:
+            Optional[EncodedImage]: 缩略图，未启用缩略图时返回 None
+        """
+        thumbnail_size = self._config.settings.thumbnail_size
+        if thumbnail_size <= 0:
+            return None
+        width, height = image.size
+        scale = min(1.0, thumbnail_size / max(width, height, 1))
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        thumbnail = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        buffer = io.BytesIO()
+        if self._webp:
+            thumbnail.save(buffer, format=FileFormat.WEBP_FORMAT, quality=THUMBNAIL_QUALITY)
+            return EncodedImage(buffer.getvalue(), FileFormat.WEBP_FORMAT)
+        thumbnail.save(buffer, format=FileFormat.IMAGE_FORMAT)
+        return EncodedImage(buffer.getvalue(), FileFormat.IMAGE_FORMAT)
+
+    def _make_thumbnail_safely(self, image: Image.Image) -> Optional[EncodedImage]:
+        """生成缩略图，出错时打印错误并返回 None，不影响原图的保存"""
+        try:
+            return self.make_thumbnail(image)
+        except Exception as e:
+            print(Messages.Error.ENCODE_IMAGE_ERROR.format(str(e)))
+            return None
+
+    def _start_executor(self) -> ThreadPoolExecutor:
+        """返回编码线程池，第一次调用时创建"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="clipboard-encoder")
+        return self._executor
+
+    def _submit_thumbnail(self, image: Image.Image) -> Optional[Future]:
+        """开始生成缩略图，有线程池时交给另一个线程与图片编码同时进行。
+
+        Returns:
+            Optional[Future]: 结果为 Optional[EncodedImage]，不生成缩略图时返回 None
+        """
+        if not self._thumbnails or self._config.settings.thumbnail_size <= 0:
+            return None
+        if self.workers:
+            try:
+                return self._start_executor().submit(self._make_thumbnail_safely, image)
+            except RuntimeError:
+                # 线程池已经关闭，关闭前排队的图片仍在编码，缩略图改为在当前线程中生成
+                pass
+        future: Future = Future()
+        future.set_result(self._make_thumbnail_safely(image))
+        return future
+
+    def encode(self, image: Image.Image) -> Optional[EncodedImage]:
+        """在当前线程中编码图片，缩略图由编码线程同时生成。
+
+        Args:
+            image (Image.Image): 要编码的图片
+
+        Returns:
+            Optional[EncodedImage]: 编码结果，编码后超过 max_image_size 时返回 None
+        """
+        # 先读入像素，两个线程不会同时从文件加载同一张图片
+        image.load()
+        thumbnail = self._submit_thumbnail(image)
+        image_format = self.choose_format(image)
+        data = self._save(image, image_format)
+        if len(data) > self._config.settings.max_image_size:
+            if thumbnail is not None:
+                thumbnail.cancel()
+            print(Messages.Error.IMAGE_SIZE_LIMIT)
+            return None
+        return EncodedImage(data, image_format, thumbnail)
+
+    def _encode_safely(self, image: Image.Image) -> Optional[EncodedImage]:
+        """编码图片，出错时打印错误并返回 None"""
+        try:
+            return self.encode(image)
+        except Exception as e:
+            print(Messages.Error.ENCODE_IMAGE_ERROR.format(str(e)))
+            return None
+
+    def _run(self, image: Image.Image) -> Optional[EncodedImage]:
+        """线程池中执行的编码任务，完成后归还排队名额"""
+        try:
+            return self._encode_safely(image)
+        finally:
+            self._pending.release()
+
+    def submit(self, image: Image.Image) -> Future:
+        """提交图片进行编码。
+
+        图片在编码完成之前不能被修改。未启用线程池或排队的图片已满时在当前线程中编码，
+        返回已完成的 Future。
+
+        Args:
+            image (Image.Image): 要编码的图片
+
+        Returns:
+            Future: 结果为 Optional[EncodedImage]，编码失败或图片过大时为 None
+        """
+        if self.workers and self._pending.acquire(blocking=False):
+            return self._start_executor().submit(self._run, image)
+        future: Future = Future()
+        future.set_result(self._encode_safely(image))
+        return future
+
+    def close(self):
+        """等待正在编码的图片完成并关闭线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,256 @@
+"""图片内容寻址存储模块
+
+此模块按内容哈希存储图片文件。相同的图片只保存一份，文件按哈希前缀分目录存放，
+并通过引用计数记录有多少条日志记录引用了该图片。图片可以是 PNG 或 WebP。日志被清理后引用计数随之减少，
+引用计数归零的图片会在垃圾回收时删除。
+
+引用计数在内存中修改，由调用方通过 flush 每批写入一次，而不是每张图片重写一次引用计数文件。
+日志管理器在写入新记录之前、删除记录之后刷写，崩溃时引用计数只会多于实际引用，
+图片最多残留而不会在仍被引用时被删除。引用计数文件损坏或无法读取时不清理任何图片，
+也不覆盖该文件，直到调用方按日志记录通过 rebuild 重新统计。
+
+Classes:
+    ImageStore: 内容寻址的图片存储
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional
+from .constants import FileFormat, Messages
+from .metrics import REGISTRY
+
+# 引用计数文件名
+REFS_FILE_NAME = "refs.json"
+# 分目录的层数和每层使用的哈希字符数
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+_IMAGE_BYTES = REGISTRY.counter("clipboard_bytes_written_total", "写入磁盘的字节数", target="image")
+_IMAGE_DEDUP_HITS = REGISTRY.counter("clipboard_dedup_hits_total", "判定为重复内容的次数", scope="image")
+
+
+class ImageStore:
+    """内容寻址的图片存储。
+
+    图片以 SHA-256 哈希为键保存到 ``root/ab/cd/<hash>.png``（或 ``.webp``），
+    引用计数保存在 ``root/refs.json`` 中。
+
+    Attributes:
+        root (str): 存储根目录
+        refs_valid (bool): 引用计数是否可信，引用计数文件无法读取时为 False，此时 gc 和 flush 不执行
+    """
+
+    def __init__(self, root: str):
+        """初始化图片存储。
+
+        Args:
+            root (str): 存储根目录
+        """
+        self.root = root
+        self._refs_file = os.path.join(root, REFS_FILE_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.refs_valid = True
+        self._refs: Dict[str, int] = self._load_refs()
+        # 内存中的引用计数是否有尚未写入文件的修改
+        self._dirty = False
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """计算图片数据的内容哈希"""
+        return hashlib.sha256(data).hexdigest()
+
+    def _load_refs(self) -> Dict[str, int]:
+        """加载引用计数，文件损坏或无法读取时将 refs_valid 置为 False"""
+        if not os.path.exists(self._refs_file):
+            return {}
+        try:
+            with open(self._refs_file, 'r', encoding='utf-8') as f:
+                refs = json.load(f)
+            if not isinstance(refs, dict):
+                raise ValueError(f"{self._refs_file} is not a JSON object")
+            return {k: int(v) for k, v in refs.items()}
+        except (json.JSONDecodeError, IOError, ValueError, TypeError, AttributeError) as e:
+            print(Messages.Error.IMAGE_REFS_ERROR.format(str(e)))
+            self.refs_valid = False
+            return {}
+
+    def _save_refs(self):
+        """通过临时文件写入引用计数，落盘后再原子替换原文件"""
+        temp_file = f"{self._refs_file}{FileFormat.TEMP_FILE_SUFFIX}"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._refs, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self._refs_file)
+        self._dirty = False
+
+    def flush(self):
+        """将引用计数的修改写入文件，没有修改或引用计数不可信时不写入"""
+        with self._lock:
+            if self._dirty and self.refs_valid:
+                self._save_refs()
+
+    def rebuild(self, image_hashes: Iterable[str]) -> int:
+        """按日志记录重新统计引用计数，替换无法读取的引用计数文件。
+
+        原文件备份后再写入新的引用计数，之后 gc 和 flush 恢复正常。
+
+        Args:
+            image_hashes (Iterable[str]): 全部日志记录引用的图片哈希，每条记录一次
+
+        Returns:
+            int: 被引用的图片数量
+        """
+        refs: Dict[str, int] = {}
+        for image_hash in image_hashes:
+            refs[image_hash] = refs.get(image_hash, 0) + 1
+        backup_file = f"{self._refs_file}{FileFormat.BACKUP_FILE_SUFFIX}"
+        with self._lock:
+            if os.path.exists(self._refs_file):
+                os.replace(self._refs_file, backup_file)
+            self._refs = refs
+            self.refs_valid = True
+            self._save_refs()
+        print(Messages.Info.IMAGE_REFS_REBUILT.format(len(refs), backup_file))
+        return len(refs)
+
+    def relative_path(self, image_hash: str, extension: str = FileFormat.IMAGE_FILE_EXTENSION) -> str:
+        """获取图片相对于存储根目录的路径"""
+        shards = [image_hash[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+        return os.path.join(*shards, f"{image_hash}{extension}")
+
+    def path_for(self, image_hash: str, extension: str = FileFormat.IMAGE_FILE_EXTENSION) -> str:
+        """获取图片的完整路径"""
+        return os.path.join(self.root, self.relative_path(image_hash, extension))
+
+    def find(self, image_hash: str) -> Optional[str]:
+        """查找已存储的图片文件，不论其格式，图片不存在时返回 None"""
+        for extension in FileFormat.IMAGE_EXTENSIONS.values():
+            path = self.path_for(image_hash, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def contains(self, image_hash: str) -> bool:
+        """判断图片是否已存储"""
+        return self.find(image_hash) is not None
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        """通过临时文件写入图片"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_file = f"{path}{FileFormat.TEMP_FILE_SUFFIX}"
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        os.replace(temp_file, path)
+
+    def put(self, data: bytes, image_hash: Optional[str] = None,
+            image_format: str = FileFormat.IMAGE_FORMAT) -> str:
+        """存储图片并增加一次引用。
+
+        相同内容的图片只会写入一次。引用计数的修改在 flush 时才写入文件。
+
+        Args:
+            data (bytes): 编码后的图片数据，也可以是内存视图
+            image_hash (Optional[str], optional): 已经计算好的 SHA-256 哈希，避免重复计算
+            image_format (str, optional): 图片的编码格式。默认为 PNG
+
+        Returns:
+            str: 图片的内容哈希
+        """
+        image_hash = image_hash or self.hash_bytes(data)
+        with self._lock:
+            if self.find(image_hash) is None:
+                self._write(self.path_for(image_hash, FileFormat.IMAGE_EXTENSIONS[image_format]), data)
+                _IMAGE_BYTES.inc(len(data))
+            else:
+                _IMAGE_DEDUP_HITS.inc()
+            self._refs[image_hash] = self._refs.get(image_hash, 0) + 1
+            self._dirty = True
+        return image_hash
+
+    def acquire(self, image_hash: str) -> bool:
+        """为已存储的图片增加一次引用，不需要图片数据。
+
+        Args:
+            image_hash (str): 图片的内容哈希
+
+        Returns:
+            bool: 图片存在且引用成功时返回 True
+        """
+        with self._lock:
+            if self.find(image_hash) is None:
+                return False
+            self._refs[image_hash] = self._refs.get(image_hash, 0) + 1
+            self._dirty = True
+        return True
+
+    def get(self, image_hash: str) -> Optional[bytes]:
+        """读取图片数据，图片不存在时返回 None"""
+        path = self.find(image_hash)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def release(self, image_hashes: Iterable[str]):
+        """减少一组图片的引用计数。
+
+        Args:
+            image_hashes (Iterable[str]): 不再被引用的图片哈希，可以重复
+        """
+        with self._lock:
+            for image_hash in image_hashes:
+                if image_hash in self._refs:
+                    self._refs[image_hash] -= 1
+                    self._dirty = True
+
+    def gc(self) -> int:
+        """删除引用计数归零的图片以及没有引用记录的孤立文件。
+
+        引用计数不可信时不删除任何图片，避免把仍被引用的图片当作孤立文件。
+
+        Returns:
+            int: 删除的图片数量
+        """
+        removed = 0
+        with self._lock:
+            if not self.refs_valid:
+                return 0
+            for image_hash in [h for h, count in self._refs.items() if count <= 0]:
+                del self._refs[image_hash]
+                removed += self._remove(image_hash)
+
+            extensions = tuple(FileFormat.IMAGE_EXTENSIONS.values())
+            for dirpath, _, filenames in os.walk(self.root):
+                if dirpath == self.root:
+                    continue
+                for name in filenames:
+                    image_hash, extension = os.path.splitext(name)
+                    if extension in extensions and image_hash not in self._refs:
+                        removed += self._remove(image_hash)
+            self._save_refs()
+        return removed
+
+    def _remove(self, image_hash: str) -> int:
+        """删除图片文件及空的分片目录"""
+        path = self.find(image_hash)
+        if path is None:
+            return 0
+        try:
+            os.remove(path)
+        except OSError:
+            return 0
+        directory = os.path.dirname(path)
+        for _ in range(SHARD_DEPTH):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+        return 1
@@ -0,0 +1,615 @@
+"""进程间通信模块
+
+拆分进程模式下，捕获进程只负责读取剪贴板、去掉与上一条重复的内容，图片只读取原始像素；
+存储进程独占 ClipboardLogger，负责图片编码、写入日志、建立索引和执行保留策略。
+两者通过 multiprocessing.connection 建立的本地连接通信：Windows 下默认使用命名管道，
+其他平台默认使用日志根目录下的 Unix 套接字，也可以配置为 ``host:port`` 使用 TCP。
+连接使用日志根目录下随机生成的密钥认证，只有能读取该密钥的进程才能连接。
+
+一个存储进程可以同时接收多个捕获进程（例如多个用户会话）的内容，每个连接由单独的线程
+处理，多个来源的图片编码可以并行进行，但仍按接收顺序写入日志。每条记录中的 ``source``
+字段标明其来源。
+
+每条消息是一个字典；图片数据（原始像素或编码后的图片）紧随其后通过 send_bytes
+单独发送，不经过 pickle 复制。本机连接默认将原始像素放在共享内存缓冲池中
+（见 shared_buffer 模块），消息中只携带缓冲区的编号和名称，存储进程编码完成后
+回复 release 消息归还缓冲区。
+
+Classes:
+    RemoteStore: 捕获进程一侧的存储进程客户端
+    StorageServer: 存储进程
+
+Functions:
+    resolve_address: 根据配置确定监听地址和地址族
+    load_authkey: 读取或生成连接认证密钥
+    run_store: 在当前进程中运行存储进程
+    run_capture: 运行捕获进程，可选地同时启动存储子进程
+"""
+import os
+import sys
+import time
+import getpass
+import threading
+import multiprocessing
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from PIL import Image
+from .config import Config, ConfigWatcher
+from .constants import ConfigKeys, FileFormat, JsonKeys, Messages, Paths
+from .image_codec import ImageEncoder
+from .logger import ClipboardLogger
+from .metrics import MetricsExporter
+from .models import ClipboardContent, RawImage
+from .monitor import ClipboardMonitor
+from .pipeline import PersistencePipeline
+from .retention import RetentionEngine
+from .shared_buffer import SharedBuffer, SharedBufferPool, SharedBufferReader, copy_pixels, raw_size, tracker_id
+
+# 监听地址：命名管道或 Unix 套接字路径，或 TCP 的 (host, port)
+Address = Union[str, Tuple[str, int]]
+
+# 消息类型
+MSG_HELLO = "hello"
+MSG_CONTENT = "content"
+MSG_LAST_ENTRY = "last_entry"
+MSG_SHUTDOWN = "shutdown"
+MSG_RELEASE = "release"
+# 消息字典中的字段
+FIELD_TYPE = "type"
+FIELD_DATA = "data"
+FIELD_PAYLOAD = "payload"
+FIELD_MODE = "mode"
+FIELD_SIZE = "size"
+FIELD_BUFFER = "buffer"
+FIELD_TRACKER = "tracker"
+FIELD_FORMAT = "format"
+# 消息之后附带的图片数据类型
+PAYLOAD_RAW = "raw"
+PAYLOAD_ENCODED = "encoded"
+PAYLOAD_SHARED = "shared"
+# 连接存储进程失败后重试的间隔（秒）
+RETRY_INTERVAL = 0.2
+
+
+def resolve_address(config: Config) -> Tuple[Address, str]:
+    """根据配置确定存储进程的监听地址。
+
+    Args:
+        config (Config): 配置对象
+
+    Returns:
+        Tuple[Address, str]: 地址和 multiprocessing.connection 使用的地址族
+    """
+    address = config.get(ConfigKeys.Ipc.SECTION, ConfigKeys.Ipc.ADDRESS)
+    if not address:
+        if sys.platform == 'win32':
+            return Paths.DEFAULT_IPC_PIPE, 'AF_PIPE'
+        base_dir = config.get(ConfigKeys.General.SECTION, ConfigKeys.General.BASE_DIR)
+        return os.path.join(base_dir, Paths.DEFAULT_IPC_SOCKET_FILE), 'AF_UNIX'
+    if address.startswith('\\\\'):
+        return address, 'AF_PIPE'
+    host, separator, port = address.rpartition(':')
+    if separator and host and port.isdigit() and os.sep not in host:
+        return (host, int(port)), 'AF_INET'
+    return address, 'AF_UNIX'
+
+
+def load_authkey(config: Config, create: bool = False) -> Optional[bytes]:
+    """读取连接认证密钥，密钥保存在日志根目录下，只有当前用户可读。
+
+    Args:
+        config (Config): 配置对象
+        create (bool, optional): 密钥文件不存在时是否生成。默认为 False
+
+    Returns:
+        Optional[bytes]: 认证密钥，文件不存在且未要求生成时返回 None
+    """
+    base_dir = config.get(ConfigKeys.General.SECTION, ConfigKeys.General.BASE_DIR)
+    path = os.path.join(base_dir, Paths.DEFAULT_IPC_KEY_FILE)
+    if create and not os.path.exists(path):
+        os.makedirs(base_dir, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(os.urandom(32).hex())
+        except FileExistsError:
+            pass
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip().encode('ascii')
+    except (IOError, OSError):
+        return None
+
+
+class RemoteStore:
+    """捕获进程一侧的存储进程客户端。
+
+    ClipboardMonitor 传入此对象后不再创建日志管理器，新内容通过 submit 发送给存储进程。
+
+    Attributes:
+        address (Address): 存储进程的监听地址
+        source (str): 内容来源的名称，写入每条记录的 source 字段
+        connect_timeout (float): 连接存储进程的最长等待时间（秒）
+    """
+
+    def __init__(self, config: Config, source: Optional[str] = None):
+        """初始化客户端，不立即连接。
+
+        Args:
+            config (Config): 配置对象，与存储进程使用相同的日志根目录
+            source (Optional[str], optional): 内容来源的名称，默认取配置中的 source_name，
+                未配置时使用“用户名:进程号”
+        """
+        self._config = config
+        self.address, self._family = resolve_address(config)
+        self.source = (
+            source or config.get(ConfigKeys.Ipc.SECTION, ConfigKeys.Ipc.SOURCE_NAME) or
+            f"{getpass.getuser()}:{os.getpid()}"
+        )
+        self.connect_timeout = config.get(ConfigKeys.Ipc.SECTION, ConfigKeys.Ipc.CONNECT_TIMEOUT)
+        self._conn: Optional[Connection] = None
+        # TCP 连接的对端可能在另一台机器上，不使用共享内存
+        self._pool: Optional[SharedBufferPool] = None
+        if self._family != 'AF_INET' and config.get(ConfigKeys.Ipc.SECTION, ConfigKeys.Ipc.SHARED_MEMORY):
+            self._pool = SharedBufferPool(config.get(ConfigKeys.Ipc.SECTION, ConfigKeys.Ipc.SHARED_BUFFERS))
+
+    def connect(self, timeout: Optional[float] = None) -> bool:
+        """连接存储进程，存储进程尚未启动时在超时前不断重试。
+
+        Args:
+            timeout (Optional[float], optional): 最长等待时间（秒），默认为 connect_timeout
+
+        Returns:
+            bool: 是否连接成功
+        """
+        if self._conn is not None:
+            return True
+        deadline = time.monotonic() + (self.connect_timeout if timeout is None else timeout)
+        error: Any = None
+        while True:
+            authkey = load_authkey(self._config)
+            if authkey is not None:
+                try:
+                    self._conn = Client(self.address, self._family, authkey=authkey)
+                    self._conn.send({
+                        FIELD_TYPE: MSG_HELLO, JsonKeys.SOURCE: self.source, FIELD_TRACKER: tracker_id()
+                    })
+                    return True
+                except (OSError, EOFError, AuthenticationError) as e:
+                    error = e
+                    self._conn = None
+            else:
+                error = Paths.DEFAULT_IPC_KEY_FILE
+            if time.monotonic() >= deadline:
+                print(Messages.Error.IPC_CONNECT_ERROR.format(self.address, error))
+                return False
+            time.sleep(RETRY_INTERVAL)
+
+    def _drop(self, keep: Optional[SharedBuffer] = None):
+        """关闭已断开的连接，下次发送时重新连接。
+
+        已发送但未被归还的缓冲区不会再收到 release 消息，一并归还，keep 指定的除外。
+        """
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+        if self._pool is not None:
+            self._pool.release_all(keep)
+
+    def _dispatch(self, message: Dict[str, Any]) -> bool:
+        """处理存储进程主动发来的消息，返回是否已处理"""
+        if message.get(FIELD_TYPE) == MSG_RELEASE:
+            if self._pool is not None:
+                self._pool.release(message[FIELD_BUFFER])
+            return True
+        return False
+
+    def _collect_releases(self, timeout: float = 0.0):
+        """读取存储进程已归还的缓冲区，timeout 大于 0 时等待全部缓冲区归还"""
+        if self._conn is None or self._pool is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if timeout and not self._pool.in_use:
+                    return
+                if not self._conn.poll(max(remaining, 0.0)):
+                    return
+                self._dispatch(self._conn.recv())
+        except (OSError, EOFError):
+            self._drop()
+
+    def _recv_reply(self) -> Any:
+        """读取对请求的回复，跳过期间到达的 release 消息"""
+        while True:
+            message = self._conn.recv()
+            if not (isinstance(message, dict) and self._dispatch(message)):
+                return message
+
+    def stage_image(self, image: Image.Image) -> Optional[RawImage]:
+        """将图片的原始像素复制到共享内存缓冲区中。
+
+        Args:
+            image (Image.Image): 剪贴板中的图片
+
+        Returns:
+            Optional[RawImage]: 像素数据，未启用共享内存或没有空闲缓冲区时返回 None，
+                此时应改为通过连接直接发送像素
+        """
+        if self._pool is None:
+            return None
+        self._collect_releases()
+        buffer = self._pool.acquire(raw_size(image))
+        if buffer is None:
+            return None
+        copy_pixels(image, buffer.view)
+        return RawImage(image.mode, image.size, buffer.view, buffer)
+
+    def discard(self, raw_image: Optional[RawImage]):
+        """归还未发送的像素数据占用的缓冲区，例如图片与上一条重复时"""
+        if raw_image is not None and raw_image.handle is not None and self._pool is not None:
+            self._pool.release(raw_image.handle.index)
+
+    def _send_content(self, content: ClipboardContent):
+        """发送一条内容，图片数据在消息之后单独发送"""
+        header = {
+            FIELD_TYPE: MSG_CONTENT,
+            JsonKeys.TIMESTAMP: content.timestamp,
+            JsonKeys.CONTENT_TYPE: content.content_type,
+            JsonKeys.AVAILABLE_FORMATS: content.formats,
+            JsonKeys.PIXEL_HASH: content.pixel_hash,
+            JsonKeys.SIMILARITY_HASH: content.similarity_hash,
+            JsonKeys.SOURCE: self.source,
+            FIELD_DATA: content.data,
+            FIELD_PAYLOAD: None,
+        }
+        payload = None
+        if content.data.get(JsonKeys.TEXT_TRUNCATED):
+            # 超长文本只发送预览，完整文本的哈希无法由预览重新计算
+            header[JsonKeys.CONTENT_HASH] = content.get_hash()
+        if content.raw_image is not None and content.raw_image.handle is not None:
+            handle = content.raw_image.handle
+            header[FIELD_PAYLOAD] = PAYLOAD_SHARED
+            header[FIELD_MODE] = content.raw_image.mode
+            header[FIELD_SIZE] = content.raw_image.size
+            header[FIELD_BUFFER] = (handle.index, handle.name, handle.size)
+        elif content.raw_image is not None:
+            header[FIELD_PAYLOAD] = PAYLOAD_RAW
+            header[FIELD_MODE] = content.raw_image.mode
+            header[FIELD_SIZE] = content.raw_image.size
+            payload = content.raw_image.pixels
+        elif content.image_bytes is not None:
+            header[FIELD_PAYLOAD] = PAYLOAD_ENCODED
+            header[FIELD_FORMAT] = content.image_format
+            payload = content.image_bytes
+        self._conn.send(header)
+        if payload is not None:
+            self._conn.send_bytes(payload)
+
+    def submit(self, content: ClipboardContent) -> bool:
+        """将内容发送给存储进程，连接断开时重新连接并重试一次。
+
+        Args:
+            content (ClipboardContent): 要保存的剪贴板内容
+
+        Returns:
+            bool: 是否发送成功
+        """
+        content.source = self.source
+        handle = content.raw_image.handle if content.raw_image is not None else None
+        for _ in range(2):
+            if not self.connect():
+                break
+            try:
+                self._send_content(content)
+                return True
+            except (OSError, EOFError, ValueError) as e:
+                print(Messages.Error.IPC_ERROR.format(str(e)))
+                self._drop(keep=handle)
+        self.discard(content.raw_image)
+        return False
+
+    def get_last_entry(self) -> Optional[dict]:
+        """向存储进程查询最新的一条记录，用于启动时恢复去重状态"""
+        if not self.connect():
+            return None
+        try:
+            self._conn.send({FIELD_TYPE: MSG_LAST_ENTRY})
+            return self._recv_reply()
+        except (OSError, EOFError) as e:
+            print(Messages.Error.IPC_ERROR.format(str(e)))
+            self._drop()
+            return None
+
+    def shutdown(self):
+        """请求存储进程写完已收到的内容后退出"""
+        if not self.connect(timeout=0):
+            return
+        try:
+            self._conn.send({FIELD_TYPE: MSG_SHUTDOWN})
+        except (OSError, EOFError):
+            pass
+        self._drop()
+
+    def close(self):
+        """等待存储进程读取完共享内存中的图片，然后断开连接并释放共享内存"""
+        self._collect_releases(self.connect_timeout)
+        self._drop()
+        if self._pool is not None:
+            self._pool.close()
+
+
+class StorageServer:
+    """存储进程。
+
+    独占日志管理器，接收捕获进程发送的内容，完成图片编码后交给写入流水线，
+    并在后台执行保留策略。
+
+    Attributes:
+        logger (ClipboardLogger): 日志管理器
+        encoder (ImageEncoder): 图片编码器，在接收内容的线程中编码
+        pipeline (Optional[PersistencePipeline]): 写入流水线，未启用异步写入时为 None
+        retention (RetentionEngine): 保留策略执行器
+        address (Address): 监听地址
+        config_watcher (ConfigWatcher): 配置文件监视器，修改配置后无需重启
+        metrics_exporter (MetricsExporter): 运行指标导出器，端口为捕获进程的端口加一
+    """
+
+    def __init__(self, config: Optional[Config] = None):
+        """初始化存储进程，不立即开始监听。
+
+        Args:
+            config (Optional[Config], optional): 配置对象
+        """
+        self._config = config or Config()
+        self.logger = ClipboardLogger(self._config)
+        self.encoder = ImageEncoder(self._config)
+        self.pipeline: Optional[PersistencePipeline] = None
+        if self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.ENABLE_ASYNC):
+            self.pipeline = PersistencePipeline(
+                self.logger,
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.QUEUE_SIZE),
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.BATCH_SIZE),
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.DROP_POLICY),
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.BLOCK_TIMEOUT)
+            )
+        self.retention = RetentionEngine(self.logger, self._config)
+        self.address, self._family = resolve_address(self._config)
+        self._authkey = load_authkey(self._config, create=True)
+        self.config_watcher = ConfigWatcher(self._config)
+        self.metrics_exporter = MetricsExporter(self._config, port_offset=1, role="store")
+        self._listener: Optional[Listener] = None
+        self._stop_event = threading.Event()
+        self._handlers: List[threading.Thread] = []
+        # 按接收顺序为每条内容编号，编码完成后按编号依次写入
+        self._order = threading.Condition()
+        self._next_ticket = 0
+        self._persist_ticket = 0
+
+    def _decode_content(self, header: Dict[str, Any], payload: Optional[bytes]) -> Optional[ClipboardContent]:
+        """由消息还原剪贴板内容，原始像素在此按配置的格式编码并生成缩略图"""
+        content = ClipboardContent()
+        content.timestamp = header[JsonKeys.TIMESTAMP]
+        content.content_type = header[JsonKeys.CONTENT_TYPE]
+        content.formats = header[JsonKeys.AVAILABLE_FORMATS]
+        content.source = header.get(JsonKeys.SOURCE)
+        data = header[FIELD_DATA]
+        if header.get(JsonKeys.CONTENT_HASH):
+            content.set_truncated_text(data, header[JsonKeys.CONTENT_HASH])
+        else:
+            content.data = data
+
+        if header[FIELD_PAYLOAD] in (PAYLOAD_RAW, PAYLOAD_SHARED):
+            # frombuffer 直接引用像素数据，不再复制
+            mode = header[FIELD_MODE]
+            image = Image.frombuffer(mode, tuple(header[FIELD_SIZE]), payload, "raw", mode, 0, 1)
+            encoded = self.encoder.encode(image)
+            if encoded is None:
+                return None
+            content.set_encoded_image(encoded)
+            # 缩略图同样读取 payload，返回前等待生成完成，之后才能归还共享内存缓冲区
+            content.resolve_thumbnail()
+        elif payload is not None:
+            if len(payload) > self._config.settings.max_image_size:
+                print(Messages.Error.IMAGE_SIZE_LIMIT)
+                return None
+            content.set_image_bytes(payload, header.get(FIELD_FORMAT, FileFormat.IMAGE_FORMAT))
+        content.pixel_hash = header.get(JsonKeys.PIXEL_HASH)
+        content.set_similarity_hash(header.get(JsonKeys.SIMILARITY_HASH))
+        return content
+
+    def _receive(self, header: Dict[str, Any], payload: Optional[bytes],
+                 on_decoded: Optional[Callable[[], None]] = None):
+        """编码收到的内容并按接收顺序保存，不同连接的编码可以并行进行。
+
+        Args:
+            header (Dict[str, Any]): 消息
+            payload (Optional[bytes]): 图片数据
+            on_decoded (Optional[Callable[[], None]], optional): 图片数据使用完毕后的回调，
+                用于尽早归还共享内存缓冲区
+        """
+        with self._order:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+        content = None
+        try:
+            content = self._decode_content(header, payload)
+        except Exception as e:
+            print(Messages.Error.PROCESS_IMAGE_ERROR.format(str(e)))
+        if on_decoded is not None:
+            on_decoded()
+        with self._order:
+            while self._persist_ticket != ticket:
+                self._order.wait()
+            try:
+                if content is not None:
+                    self._persist(content)
+            finally:
+                self._persist_ticket += 1
+                self._order.notify_all()
+
+    def _receive_shared(self, conn: Connection, reader: SharedBufferReader, header: Dict[str, Any]):
+        """读取共享内存中的像素，编码完成后回复 release 消息归还缓冲区"""
+        index, name, size = header[FIELD_BUFFER]
+        try:
+            view = reader.view(index, name, size)
+        except (OSError, ValueError) as e:
+            print(Messages.Error.IPC_ERROR.format(str(e)))
+            conn.send({FIELD_TYPE: MSG_RELEASE, FIELD_BUFFER: index})
+            return
+
+        def release():
+            try:
+                view.release()
+            except BufferError:
+                pass
+            conn.send({FIELD_TYPE: MSG_RELEASE, FIELD_BUFFER: index})
+
+        self._receive(header, view, release)
+
+    def _persist(self, content: ClipboardContent):
+        """保存内容：启用异步流水线时放入写入队列，否则同步写入"""
+        if self.pipeline is None:
+            self.logger.save(content)
+            return
+        self.pipeline.start()
+        self.pipeline.submit(content)
+
+    def _last_entry(self) -> Optional[dict]:
+        """获取最新的一条记录，已有内容哈希时去掉内联的图片数据"""
+        entry = self.logger.get_last_entry()
+        if entry and JsonKeys.CONTENT_HASH in entry:
+            entry.pop(JsonKeys.IMAGE_BASE64, None)
+        return entry
+
+    def _handle(self, conn: Connection):
+        """处理一个捕获进程的连接，直到对方断开"""
+        source = None
+        reader = SharedBufferReader()
+        try:
+            # 停止后仍读完对方已发送的内容，直到对方断开
+            while True:
+                header = conn.recv()
+                message_type = header.get(FIELD_TYPE)
+                if message_type == MSG_HELLO:
+                    source = header.get(JsonKeys.SOURCE)
+                    reader = SharedBufferReader(header.get(FIELD_TRACKER))
+                    print(Messages.Info.SOURCE_CONNECTED.format(source))
+                elif message_type == MSG_CONTENT and header.get(FIELD_PAYLOAD) == PAYLOAD_SHARED:
+                    self._receive_shared(conn, reader, header)
+                elif message_type == MSG_CONTENT:
+                    payload = conn.recv_bytes() if header.get(FIELD_PAYLOAD) else None
+                    self._receive(header, payload)
+                elif message_type == MSG_LAST_ENTRY:
+                    conn.send(self._last_entry())
+                elif message_type == MSG_SHUTDOWN:
+                    self.stop()
+                    break
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            print(Messages.Error.IPC_ERROR.format(str(e)))
+        finally:
+            reader.close()
+            conn.close()
+            if source is not None:
+                print(Messages.Info.SOURCE_DISCONNECTED.format(source))
+
+    def serve_forever(self):
+        """开始监听并处理连接，直到 stop 被调用或收到 Ctrl+C"""
+        if self._family == 'AF_UNIX' and os.path.exists(self.address):
+            # 上次异常退出时残留的套接字文件
+            os.remove(self.address)
+        self._listener = Listener(self.address, self._family, authkey=self._authkey)
+        print(Messages.Info.STORE_START.format(self.address))
+        self.config_watcher.start()
+        self.metrics_exporter.start()
+        if self._config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.ENABLE_BACKGROUND):
+            self.retention.start()
+        else:
+            self.retention.run_once()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    conn = self._listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    if not self._stop_event.is_set():
+                        print(Messages.Error.IPC_ERROR.format(str(e)))
+                    continue
+                if self._stop_event.is_set():
+                    conn.close()
+                    break
+                handler = threading.Thread(target=self._handle, args=(conn,), daemon=True)
+                handler.start()
+                self._handlers = [h for h in self._handlers if h.is_alive()] + [handler]
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def stop(self):
+        """请求存储进程停止，可以在任意线程中调用"""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        # 建立一个连接唤醒阻塞在 accept 中的主线程
+        try:
+            Client(self.address, self._family, authkey=self._authkey).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+
+    def close(self):
+        """停止监听，写完已收到的内容并释放资源"""
+        self._stop_event.set()
+        self.config_watcher.stop()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        current = threading.current_thread()
+        for handler in self._handlers:
+            if handler is not current:
+                handler.join(timeout=1.0)
+        self.retention.stop()
+        if self.pipeline is not None:
+            self.pipeline.close()
+        self.logger.close()
+        self.metrics_exporter.stop()
+        print(Messages.Info.STORE_STOP)
+
+
+def run_store(config_file: str = Paths.DEFAULT_CONFIG_FILE):
+    """在当前进程中运行存储进程，也是拆分模式下存储子进程的入口。
+
+    Args:
+        config_file (str, optional): 配置文件路径
+    """
+    StorageServer(Config(config_file)).serve_forever()
+
+
+def run_capture(config: Config, spawn_store: bool = False):
+    """运行捕获进程。
+
+    Args:
+        config (Config): 配置对象
+        spawn_store (bool, optional): 是否同时启动存储子进程，退出时一并停止。默认为 False
+    """
+    process = None
+    if spawn_store:
+        load_authkey(config, create=True)
+        process = multiprocessing.Process(
+            target=run_store, args=(config.config_file,), name="clipboard-store"
+        )
+        process.start()
+    store = RemoteStore(config)
+    try:
+        if store.connect():
+            ClipboardMonitor(config, store=store).run()
+    finally:
+        store.close()
+        if process is not None:
+            RemoteStore(config).shutdown()
+            process.join()
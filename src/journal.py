@@ -0,0 +1,622 @@
+"""JSONL 追加日志模块
+
+此模块实现按行追加的 JSONL 日志存储。每条记录占一行，保存时只追加一次写入，
+不再读取和重写整个日志文件。写入的同时维护日志的稀疏时间索引（见 segments 模块），
+按时间范围读取时直接定位到范围附近。同时提供末尾残缺记录的恢复，以及 JSON 数组日志与
+JSONL 日志之间的一次性转换工具。
+
+Classes:
+    JournalWriter: JSONL 日志追加写入器
+
+Functions:
+    read_journal: 读取 JSONL 日志文件
+    iter_journal: 按写入顺序逐条读取 JSONL 日志
+    iter_journal_range: 借助时间索引按写入顺序读取一段时间内的记录
+    iter_journal_reversed: 从文件末尾开始按从新到旧的顺序逐条读取 JSONL 日志
+    read_last_record: 只读取 JSONL 日志中最新的一条记录
+    recover_journal: 截断日志文件末尾不完整的记录
+    seal_log_file: 压缩封存日志文件并在时间索引中记录封存标记
+    convert_log_file: 在 JSON 数组与 JSONL 格式之间转换单个日志文件
+    convert_logs: 转换目录中的全部日志文件
+"""
+import os
+import json
+import time
+import argparse
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, IO
+from .constants import CompressionCodec, FileFormat, StorageFormat, FsyncPolicy, JsonKeys, Messages
+from .compression import (
+    COPY_BLOCK_SIZE, compress_file, is_compressed_file, open_log, open_log_binary, strip_compression_suffix
+)
+from .segments import DEFAULT_INDEX_INTERVAL, TimeIndex, read_timestamp, remove_index
+from .metrics import REGISTRY
+from .serialization import dumps, loads
+
+_LOG_BYTES = REGISTRY.counter("clipboard_bytes_written_total", "写入磁盘的字节数", target="log")
+
+def _encode_record(record: dict) -> bytes:
+    """将一条记录编码为一行 JSONL 数据"""
+    return dumps(record) + b'\n'
+
+
+def _index_lines(index: TimeIndex, records: List[dict], lines: List[bytes], offset: int):
+    """将从 offset 开始依次写入的记录加入时间索引"""
+    for record, line in zip(records, lines):
+        if index.due(offset):
+            timestamp = record.get(JsonKeys.TIMESTAMP)
+            if isinstance(timestamp, str):
+                index.add(timestamp, offset)
+        offset += len(line)
+
+
+def recover_journal(log_file: str) -> bool:
+    """截断日志文件末尾不完整的记录。
+
+    进程在写入过程中崩溃时，文件最后一行可能不完整。此函数将最后一个换行符之后的
+    内容移到备份文件中，并把日志截断到最后一条完整记录。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+
+    Returns:
+        bool: 如果进行了截断则返回 True
+    """
+    if not os.path.exists(log_file):
+        return False
+
+    with open(log_file, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return False
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return False
+
+        # 从末尾向前查找最后一个换行符
+        position = size
+        block_size = 4096
+        last_newline = -1
+        while position > 0 and last_newline < 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            index = block.rfind(b'\n')
+            if index >= 0:
+                last_newline = position + index
+
+        keep = last_newline + 1
+        f.seek(keep)
+        torn_tail = f.read()
+        backup_file = f"{log_file}{FileFormat.BACKUP_FILE_SUFFIX}"
+        with open(backup_file, 'ab') as backup:
+            backup.write(torn_tail)
+        f.truncate(keep)
+
+    print(Messages.Error.JOURNAL_TORN_TAIL.format(backup_file))
+    return True
+
+
+def read_journal(log_file: str) -> List[dict]:
+    """读取 JSONL 日志文件。
+
+    无法解析的行会被跳过，因此末尾残缺的记录不会影响其余记录的读取。
+    压缩的封存日志会在读取时流式解压。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+
+    Returns:
+        List[dict]: 按写入顺序（从旧到新）排列的记录列表
+    """
+    return list(iter_journal(log_file))
+
+
+def iter_journal(log_file: str) -> Iterator[dict]:
+    """按写入顺序（从旧到新）逐条读取 JSONL 日志，同一时间只在内存中保留一行。
+
+    文件以二进制方式读取，每行单独解码，崩溃后末尾残缺的多字节 UTF-8 字符只影响最后一行。
+    没有换行符结尾的最后一行是尚未写完的记录，即使能够解析也直接跳过，与倒序读取和
+    recover_journal 的处理一致；其余无法解析的行跳过并提示。
+    压缩的封存日志会在读取时流式解压。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+
+    Yields:
+        dict: 日志记录
+    """
+    if not os.path.exists(log_file):
+        return
+
+    with open_log_binary(log_file) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.endswith(b'\n') or not line.strip():
+                continue
+            try:
+                record = loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                print(Messages.Error.JOURNAL_BAD_LINE.format(log_file, line_number))
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def _iter_lines(log_file: str, offset: int) -> Iterator[bytes]:
+    """从未压缩数据中的 offset 处开始逐行读取日志文件，压缩文件边解压边跳过"""
+    with open_log_binary(log_file) as f:
+        if offset:
+            if f.seekable():
+                f.seek(offset)
+            else:
+                while offset > 0:
+                    skipped = len(f.read(min(offset, COPY_BLOCK_SIZE)))
+                    if not skipped:
+                        break
+                    offset -= skipped
+        yield from f
+
+
+def _read_timestamp_at(log_file: str, offset: int) -> Optional[str]:
+    """读取未压缩日志文件中位于 offset 的记录的时间戳"""
+    with open(log_file, 'rb') as f:
+        f.seek(offset)
+        return read_timestamp(f.readline())
+
+
+def iter_journal_range(log_file: str, since: Optional[str] = None,
+                       until: Optional[str] = None) -> Iterator[dict]:
+    """按写入顺序（从旧到新）读取时间戳在 [since, until) 内的记录。
+
+    日志有时间索引时从索引中 since 之前最近的一条记录开始读取，遇到不早于 until 的记录即停止，
+    只解析范围附近的记录。索引缺失或与日志内容不一致时从文件开头读取。
+    压缩的封存日志边解压边跳过范围之前的数据。无法解析的行和没有换行符结尾的最后一行会被跳过。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+        since (Optional[str], optional): 起始时间（包含），ISO 格式
+        until (Optional[str], optional): 结束时间（不包含），ISO 格式
+
+    Yields:
+        dict: 日志记录
+    """
+    if not os.path.exists(log_file):
+        return
+    entry = None
+    if since:
+        index = TimeIndex.load(log_file)
+        if index is not None and index.last is not None and index.last < since:
+            return
+        entry = index.floor(since) if index is not None else None
+    source = _iter_lines(log_file, entry[0] if entry else 0)
+    lines: Iterator[bytes] = source
+    try:
+        if entry is not None:
+            # 定位后的第一行必须是索引项对应的记录，否则索引已过期，从文件开头读取
+            first = next(source, b'')
+            if read_timestamp(first) == entry[1]:
+                lines = chain((first,), source)
+            else:
+                source.close()
+                source = lines = _iter_lines(log_file, 0)
+        for line in lines:
+            if not line.endswith(b'\n'):
+                break
+            record = _decode_line(line)
+            if record is None:
+                continue
+            timestamp = record.get(JsonKeys.TIMESTAMP, "")
+            if until and timestamp >= until:
+                break
+            if since and timestamp < since:
+                continue
+            yield record
+    finally:
+        source.close()
+
+
+def iter_journal_reversed(log_file: str, block_size: int = 65536, since: Optional[str] = None,
+                          until: Optional[str] = None) -> Iterator[dict]:
+    """从文件末尾开始按从新到旧的顺序逐条读取 JSONL 日志。
+
+    文件按块从后向前读取，只读取实际用到的部分。末尾不完整的行和无法解析的行会被跳过。
+    给定 until 且日志有时间索引时，从索引中 until 之后第一条记录处开始向前读取；
+    遇到早于 since 的记录即停止。压缩的封存日志无法从末尾读取，会解压范围内的记录后倒序返回。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+        block_size (int, optional): 每次读取的字节数。默认为 64KB
+        since (Optional[str], optional): 起始时间（包含），ISO 格式
+        until (Optional[str], optional): 结束时间（不包含），ISO 格式
+
+    Yields:
+        dict: 日志记录，最新的记录最先返回
+    """
+    if not os.path.exists(log_file):
+        return
+    if is_compressed_file(log_file):
+        yield from reversed(list(iter_journal_range(log_file, since, until)))
+        return
+
+    end = None
+    if until:
+        index = TimeIndex.load(log_file)
+        entry = index.ceiling(until) if index is not None else None
+        if entry is not None and _read_timestamp_at(log_file, entry[0]) == entry[1]:
+            end = entry[0]
+    for record in _iter_block_reversed(log_file, block_size, end):
+        timestamp = record.get(JsonKeys.TIMESTAMP, "")
+        if since and timestamp < since:
+            break
+        if until and timestamp >= until:
+            continue
+        yield record
+
+
+def _iter_block_reversed(log_file: str, block_size: int, end: Optional[int]) -> Iterator[dict]:
+    """从 end（默认为文件末尾）开始按块向前读取未压缩的 JSONL 日志"""
+    with open(log_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell() if end is None else min(end, f.tell())
+        # 最后一个换行符之后的内容是尚未写完的记录，不参与读取
+        pending = b''
+        complete = False
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            pending = f.read(read_size) + pending
+            if not complete:
+                index = pending.rfind(b'\n')
+                if index < 0:
+                    continue
+                pending = pending[:index]
+                complete = True
+            lines = pending.split(b'\n')
+            # 第一段可能只是某一行的后半部分，留到下一轮与前面的数据拼接
+            pending = lines[0] if position > 0 else b''
+            for line in reversed(lines[1:] if position > 0 else lines):
+                record = _decode_line(line)
+                if record is not None:
+                    yield record
+
+
+def _decode_line(line: bytes) -> Optional[dict]:
+    """解析一行 JSONL 数据，空行或无法解析时返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def read_last_record(log_file: str) -> Optional[dict]:
+    """只读取 JSONL 日志中最新的一条完整记录。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+
+    Returns:
+        Optional[dict]: 最新的记录，日志为空或不存在时返回 None
+    """
+    return next(iter_journal_reversed(log_file), None)
+
+
+def write_journal(log_file: str, records: List[dict], index_interval: int = DEFAULT_INDEX_INTERVAL):
+    """通过临时文件完整写入 JSONL 日志文件，并重新生成其时间索引。
+
+    Args:
+        log_file (str): JSONL 日志文件路径
+        records (List[dict]): 按从旧到新顺序排列的记录列表
+        index_interval (int, optional): 时间索引相邻两项之间的最小字节数，0 表示不生成索引。默认为 16KB
+    """
+    lines = [_encode_record(record) for record in records]
+    temp_file = f"{log_file}{FileFormat.TEMP_FILE_SUFFIX}"
+    with open(temp_file, 'wb') as f:
+        f.write(b''.join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, log_file)
+    if index_interval > 0:
+        index = TimeIndex(log_file, index_interval)
+        _index_lines(index, records, lines, 0)
+        index.save()
+    else:
+        remove_index(log_file)
+
+
+def seal_log_file(plain_file: str, codec: str) -> Optional[str]:
+    """压缩封存日志文件，JSONL 日志同时在时间索引中记录最后一条记录的时间戳。
+
+    Args:
+        plain_file (str): 未压缩的日志文件路径
+        codec (str): 压缩算法
+
+    Returns:
+        Optional[str]: 压缩后的文件路径，失败时返回 None
+    """
+    is_journal = plain_file.endswith(FileFormat.JOURNAL_FILE_EXTENSION)
+    last = read_last_record(plain_file) if is_journal else None
+    sealed = compress_file(plain_file, codec)
+    timestamp = last.get(JsonKeys.TIMESTAMP) if last is not None else None
+    if sealed and isinstance(timestamp, str):
+        index = TimeIndex.load(plain_file)
+        try:
+            if index is not None:
+                index.seal(timestamp)
+        except (IOError, OSError):
+            # 索引只用于加速查询，写入失败时查询退回解压读取
+            pass
+    return sealed
+
+
+class JournalWriter:
+    """JSONL 日志追加写入器。
+
+    为当前日志文件保持一个打开的文件句柄，每次追加只进行一次写入，
+    并根据刷盘策略决定是否调用 fsync。切换到新的日志文件（例如跨天）时
+    会自动关闭旧句柄。追加的记录同时写入日志的时间索引，打开日志时索引缺失或与日志
+    不一致则重新生成。
+
+    Attributes:
+        fsync_policy (str): 刷盘策略，取值见 constants.FsyncPolicy
+        fsync_interval (float): INTERVAL 策略下两次 fsync 的最小间隔（秒）
+        index_interval (int): 时间索引相邻两项之间的最小字节数，0 表示不维护索引
+    """
+
+    def __init__(self, fsync_policy: str = FsyncPolicy.INTERVAL.value, fsync_interval: float = 1.0,
+                 index_interval: int = DEFAULT_INDEX_INTERVAL):
+        """初始化写入器。
+
+        Args:
+            fsync_policy (str, optional): 刷盘策略。默认为 interval
+            fsync_interval (float, optional): fsync 的最小间隔（秒）。默认为 1.0
+            index_interval (int, optional): 时间索引相邻两项之间的最小字节数。默认为 16KB
+        """
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.index_interval = index_interval
+        self._path: Optional[str] = None
+        self._file: Optional[IO[bytes]] = None
+        self._index: Optional[TimeIndex] = None
+        self._last_fsync = 0.0
+        self._line_counts: Dict[str, int] = {}
+
+    def _open(self, log_file: str):
+        """打开日志文件用于追加，必要时先进行残缺记录恢复"""
+        if self._path == log_file and self._file is not None:
+            return
+        self.close()
+        recover_journal(log_file)
+        if log_file not in self._line_counts:
+            self._line_counts[log_file] = self._count_lines(log_file)
+        if self.index_interval > 0:
+            self._index = self._open_index(log_file)
+        self._file = open(log_file, 'ab')
+        self._path = log_file
+
+    def _open_index(self, log_file: str) -> TimeIndex:
+        """读取日志的时间索引，索引缺失或与日志不一致时重新生成"""
+        index = TimeIndex.load(log_file, self.index_interval)
+        size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        if index is None or not index.verify(size):
+            index = TimeIndex.build(log_file, self.index_interval)
+        return index
+
+    def entries(self, log_file: str) -> int:
+        """获取日志文件中的记录行数，未打开过的文件会先统计一次"""
+        if log_file not in self._line_counts:
+            self._line_counts[log_file] = self._count_lines(log_file)
+        return self._line_counts[log_file]
+
+    @staticmethod
+    def _count_lines(log_file: str) -> int:
+        """统计日志文件中的记录行数"""
+        if not os.path.exists(log_file):
+            return 0
+        count = 0
+        with open(log_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                count += block.count(b'\n')
+        return count
+
+    def _sync(self):
+        """根据刷盘策略同步文件"""
+        self._file.flush()
+        if self.fsync_policy == FsyncPolicy.ALWAYS.value:
+            os.fsync(self._file.fileno())
+        elif self.fsync_policy == FsyncPolicy.INTERVAL.value:
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+    def append(self, log_file: str, records: List[dict]) -> int:
+        """向日志文件追加记录。
+
+        Args:
+            log_file (str): JSONL 日志文件路径
+            records (List[dict]): 要追加的记录，按从旧到新顺序排列
+
+        Returns:
+            int: 追加后日志文件中的记录总数
+        """
+        self._open(log_file)
+        lines = [_encode_record(record) for record in records]
+        if self._index is not None:
+            _index_lines(self._index, records, lines, self._file.tell())
+        data = b''.join(lines)
+        self._file.write(data)
+        _LOG_BYTES.inc(len(data))
+        self._sync()
+        if self._index is not None:
+            # 索引项在日志数据写入后才追加，索引不会指向尚未写入的记录
+            self._index.flush()
+        self._line_counts[log_file] += len(records)
+        return self._line_counts[log_file]
+
+    def compact(self, log_file: str, max_entries: int) -> List[dict]:
+        """只保留日志文件中最新的若干条记录。
+
+        Args:
+            log_file (str): JSONL 日志文件路径
+            max_entries (int): 保留的最大记录数
+
+        Returns:
+            List[dict]: 被移除的记录
+        """
+        records = read_journal(log_file)
+        dropped = records[:-max_entries] if max_entries > 0 else records
+        self.rewrite(log_file, records[len(dropped):])
+        return dropped
+
+    def rewrite(self, log_file: str, records: List[dict]):
+        """用给定的记录完整重写日志文件，必要时先关闭打开的句柄。
+
+        Args:
+            log_file (str): JSONL 日志文件路径
+            records (List[dict]): 按从旧到新顺序排列的记录列表
+        """
+        if self._path == log_file:
+            self.close()
+        write_journal(log_file, records, self.index_interval)
+        self._line_counts[log_file] = len(records)
+
+    def release(self, log_file: str):
+        """日志文件即将被移走（例如压缩封存）时关闭其句柄并清除缓存的行数"""
+        if self._path == log_file:
+            self.close()
+        self._line_counts.pop(log_file, None)
+
+    def close(self):
+        """刷盘并关闭当前打开的日志文件"""
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            if self.fsync_policy != FsyncPolicy.NEVER.value:
+                os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._file = None
+            self._path = None
+            self._index = None
+
+
+def _read_json_array(log_file: str) -> List[dict]:
+    """读取 JSON 数组日志，文件不存在时返回空列表，压缩的封存日志会在读取时解压"""
+    if not os.path.exists(log_file):
+        return []
+    with open_log(log_file) as f:
+        content = f.read().strip()
+    data = loads(content) if content else []
+    return data if isinstance(data, list) else []
+
+
+def convert_log_file(log_file: str, target_format: str, indent: bool = True,
+                     index_interval: int = DEFAULT_INDEX_INTERVAL) -> Optional[str]:
+    """在 JSON 数组与 JSONL 格式之间转换单个日志文件。
+
+    JSON 数组日志按时间从新到旧排列，JSONL 日志按时间从旧到新追加，
+    转换时会相应地调整记录顺序。压缩的封存日志转换后以同样的算法重新封存。
+    转换成功后删除源文件及其时间索引，转换为 JSONL 时重新生成时间索引。
+
+    Args:
+        log_file (str): 源日志文件路径
+        target_format (str): 目标格式，取值见 constants.StorageFormat
+        indent (bool, optional): 转换为 JSON 数组时是否格式化，对应配置项 indent_json。默认为 True
+        index_interval (int, optional): 转换为 JSONL 时时间索引相邻两项之间的最小字节数。默认为 16KB
+
+    Returns:
+        Optional[str]: 转换后的文件路径，如果无需转换或转换失败则返回 None
+    """
+    plain_file = strip_compression_suffix(log_file)
+    suffix = log_file[len(plain_file):]
+    codec = CompressionCodec.ZSTD.value if suffix == FileFormat.ZSTD_FILE_SUFFIX else CompressionCodec.ZLIB.value
+    root, extension = os.path.splitext(plain_file)
+    try:
+        if target_format == StorageFormat.JSONL.value and extension == FileFormat.LOG_FILE_EXTENSION:
+            records = _read_json_array(log_file)
+            records.sort(key=lambda x: x.get(JsonKeys.TIMESTAMP, ""))
+            target_file = f"{root}{FileFormat.JOURNAL_FILE_EXTENSION}"
+            write_journal(target_file, records + read_journal(f"{target_file}{suffix}"), index_interval)
+        elif target_format == StorageFormat.JSON.value and extension == FileFormat.JOURNAL_FILE_EXTENSION:
+            if not suffix:
+                recover_journal(log_file)
+            records = read_journal(log_file)
+            target_file = f"{root}{FileFormat.LOG_FILE_EXTENSION}"
+            records.extend(_read_json_array(f"{target_file}{suffix}"))
+            records.sort(key=lambda x: x.get(JsonKeys.TIMESTAMP, ""), reverse=True)
+            temp_file = f"{target_file}{FileFormat.TEMP_FILE_SUFFIX}"
+            with open(temp_file, 'wb') as f:
+                f.write(dumps(records, indent=indent))
+            os.replace(temp_file, target_file)
+        else:
+            return None
+        if suffix:
+            sealed = seal_log_file(target_file, codec)
+            if sealed is None:
+                return None
+            target_file = sealed
+        os.remove(log_file)
+        if extension == FileFormat.JOURNAL_FILE_EXTENSION:
+            remove_index(plain_file)
+        print(Messages.Info.LOG_CONVERTED.format(log_file, target_file))
+        return target_file
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        print(Messages.Error.CONVERT_LOG_ERROR.format(str(e)))
+        return None
+
+
+def convert_logs(base_dir: str, target_format: str, indent: bool = True,
+                 index_interval: int = DEFAULT_INDEX_INTERVAL) -> List[str]:
+    """转换目录中的全部日志文件。
+
+    Args:
+        base_dir (str): 日志根目录
+        target_format (str): 目标格式，取值见 constants.StorageFormat
+        indent (bool, optional): 转换为 JSON 数组时是否格式化。默认为 True
+        index_interval (int, optional): 转换为 JSONL 时时间索引相邻两项之间的最小字节数。默认为 16KB
+
+    Returns:
+        List[str]: 转换后的文件路径列表
+    """
+    converted = []
+    for name in sorted(os.listdir(base_dir)):
+        if not name.startswith(FileFormat.LOG_FILE_PREFIX):
+            continue
+        target_file = convert_log_file(os.path.join(base_dir, name), target_format, indent, index_interval)
+        if target_file:
+            converted.append(target_file)
+    return converted
+
+
+def main():
+    """命令行入口：一次性转换日志目录中的所有日志文件"""
+    parser = argparse.ArgumentParser(description="在 JSON 数组与 JSONL 日志格式之间转换")
+    parser.add_argument(
+        "target_format",
+        choices=[StorageFormat.JSON.value, StorageFormat.JSONL.value],
+        help="目标日志格式"
+    )
+    parser.add_argument("--base-dir", default=None, help="日志根目录，默认读取配置文件")
+    args = parser.parse_args()
+
+    from .config import Config
+    from .constants import ConfigKeys
+    config = Config()
+    base_dir = args.base_dir or config.get(ConfigKeys.General.SECTION, ConfigKeys.General.BASE_DIR)
+    convert_logs(
+        base_dir, args.target_format,
+        config.settings.indent_json,
+        config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.INDEX_INTERVAL_KB) << 10
+    )
+
+
+if __name__ == '__main__':
+    main()
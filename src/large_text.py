@@ -0,0 +1,162 @@
+"""超长文本捕获模块
+
+超过 max_text_length 的剪贴板文本不再完整读入内存：后端按块读取文本，本模块对每一块
+依次计算哈希、保留开头部分作为预览，并可选地将全部内容边压缩边写入单独的文件。
+内存中同一时间只保留一块文本和预览，峰值内存与文本总长度无关。
+
+单独保存的文本文件以内容哈希命名，例如 ``texts/clipboard_text_<md5>.txt.zst``，
+相同的文本只保存一份。
+
+Classes:
+    LargeText: 流式捕获的超长文本摘要
+
+Functions:
+    capture_text: 流式捕获超长文本
+    read_spilled_text: 读取单独保存的完整文本
+"""
+import os
+import uuid
+import hashlib
+from typing import Iterable, Optional
+from .constants import FileFormat, JsonKeys, Messages, Paths
+from .compression import codec_suffix, open_log, open_writer
+
+# 后端每次读取的字符数
+TEXT_CHUNK_SIZE = 1 << 20
+
+
+class LargeText:
+    """流式捕获的超长文本摘要。
+
+    Attributes:
+        content_hash (str): 完整文本 UTF-8 编码的 MD5，与普通文本记录的内容哈希一致
+        length (int): 完整文本的长度（字符）
+        preview (str): 文本开头部分
+        path (Optional[str]): 单独保存的完整文本相对于日志根目录的路径，未保存时为 None
+    """
+
+    def __init__(self, content_hash: str, length: int, preview: str, path: Optional[str] = None):
+        """初始化摘要。
+
+        Args:
+            content_hash (str): 完整文本的哈希
+            length (int): 完整文本的长度（字符）
+            preview (str): 文本开头部分
+            path (Optional[str], optional): 完整文本文件的相对路径
+        """
+        self.content_hash = content_hash
+        self.length = length
+        self.preview = preview
+        self.path = path
+
+    def to_dict(self) -> dict:
+        """转换为日志记录中的字段，预览作为 text_content 保存"""
+        data = {
+            JsonKeys.TEXT_CONTENT: self.preview,
+            JsonKeys.TEXT_TRUNCATED: True,
+            JsonKeys.TEXT_LENGTH: self.length,
+        }
+        if self.path:
+            data[JsonKeys.TEXT_PATH] = self.path
+        return data
+
+
+def capture_text(chunks: Iterable[str], preview_length: int, spill_dir: Optional[str] = None,
+                 codec: Optional[str] = None) -> Optional[LargeText]:
+    """流式捕获超长文本。
+
+    Args:
+        chunks (Iterable[str]): 按顺序排列的文本块
+        preview_length (int): 预览保留的字符数
+        spill_dir (Optional[str], optional): 保存完整文本的目录，为 None 时只记录预览和哈希
+        codec (Optional[str], optional): 保存完整文本时使用的压缩算法，为 None 时不压缩
+
+    Returns:
+        Optional[LargeText]: 文本摘要，文本为空或保存失败时返回 None
+    """
+    digest = hashlib.md5()
+    length = 0
+    preview = []
+    preview_size = 0
+    temp_file = None
+    raw = writer = None
+    try:
+        if spill_dir is not None:
+            temp_file = os.path.join(spill_dir, f"{uuid.uuid4().hex}{FileFormat.TEMP_FILE_SUFFIX}")
+            raw = open(temp_file, 'wb')
+            writer = open_writer(raw, codec) if codec else raw
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            digest.update(data)
+            if writer is not None:
+                writer.write(data)
+            length += len(chunk)
+            if preview_size < preview_length:
+                preview.append(chunk[:preview_length - preview_size])
+                preview_size += len(preview[-1])
+        if writer is not None and writer is not raw:
+            writer.close()
+        if raw is not None:
+            raw.flush()
+            os.fsync(raw.fileno())
+            raw.close()
+    except (IOError, OSError) as e:
+        print(Messages.Error.SPILL_TEXT_ERROR.format(str(e)))
+        if raw is not None:
+            raw.close()
+        _remove_quietly(temp_file)
+        return None
+
+    if not length:
+        _remove_quietly(temp_file)
+        return None
+    content_hash = digest.hexdigest()
+    path = None
+    if temp_file is not None:
+        filename = f"{FileFormat.TEXT_FILE_PREFIX}{content_hash}{FileFormat.TEXT_FILE_EXTENSION}"
+        if codec:
+            filename += codec_suffix(codec)
+        target = os.path.join(spill_dir, filename)
+        # 相同的文本已经保存过时直接复用
+        if os.path.exists(target):
+            _remove_quietly(temp_file)
+        else:
+            try:
+                os.replace(temp_file, target)
+            except OSError as e:
+                print(Messages.Error.SPILL_TEXT_ERROR.format(str(e)))
+                _remove_quietly(temp_file)
+                return None
+        path = os.path.join(Paths.DEFAULT_TEXTS_DIR, filename)
+    return LargeText(content_hash, length, "".join(preview), path)
+
+
+def _remove_quietly(path: Optional[str]):
+    """删除临时文件，文件不存在时忽略"""
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def read_spilled_text(base_dir: str, record: dict) -> Optional[str]:
+    """读取记录对应的单独保存的完整文本。
+
+    Args:
+        base_dir (str): 日志根目录
+        record (dict): 日志记录
+
+    Returns:
+        Optional[str]: 完整文本，记录没有单独保存的文本或文件已被删除时返回 None
+    """
+    path = record.get(JsonKeys.TEXT_PATH)
+    if not path:
+        return None
+    try:
+        with open_log(os.path.join(base_dir, path)) as f:
+            return f.read()
+    except (IOError, OSError, EOFError) as e:
+        print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+        return None
@@ -1,61 +1,431 @@
 """日志管理模块"""
 import os
 import json
+import time
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-import base64
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from .constants import (
     ContentType, FileFormat, Paths, JsonKeys,
-    ConfigKeys, Messages
+    ConfigKeys, Messages, StorageFormat, ImageStorage, CompressionCodec, NearDuplicateMode
 )
 from .models import ClipboardContent
 from .config import Config
+from .journal import JournalWriter, iter_journal_range, read_journal, read_last_record, seal_log_file
+from .image_store import ImageStore
+from .history_db import HistoryDatabase
+from .preview_cache import PreviewCache
+from .metrics import REGISTRY
+from .serialization import dumps, loads
+from .dedup_index import DedupIndex, is_reference, promote_reference
+from .similarity import SIMILARITY_SECONDS, SimilarityDetector, normalized_text_hash, text_fingerprint
+from .text_delta import (
+    RecordKey, delta_base_key, delta_size, delta_text, diff_text, is_delta,
+    materialize_deltas, record_key, shared_affix
+)
+from .segments import (
+    index_path, parse_segment_name, remove_index, segment_file_name, segment_sort_key
+)
+from .compression import (
+    compress_record, decode_record, is_compressed_file,
+    open_log, strip_compression_suffix
+)
+
+# JSONL 日志超出记录上限的比例达到此值时才进行一次压缩重写
+JOURNAL_COMPACT_RATIO = 0.1
+# 读取 JSON 日志第一条记录时的初始读取字节数，记录较大时逐步加倍
+HEAD_READ_SIZE = 65536
+# 还原增量记录时在内存中保留的最近还原的文本条数
+DELTA_TEXT_CACHE_SIZE = 64
+
+_SAVE_SECONDS = REGISTRY.histogram("clipboard_save_seconds", "ClipboardLogger 保存一批内容的耗时（秒）")
+_SAVED_ENTRIES = REGISTRY.counter("clipboard_saved_entries_total", "ClipboardLogger 保存的内容条数")
+_LOG_BYTES = REGISTRY.counter("clipboard_bytes_written_total", "写入磁盘的字节数", target="log")
+_IMAGE_BYTES = REGISTRY.counter("clipboard_bytes_written_total", "写入磁盘的字节数", target="image")
+_HISTORY_DEDUP_HITS = REGISTRY.counter("clipboard_dedup_hits_total", "判定为重复内容的次数", scope="history")
+_NEAR_DEDUP_HITS = REGISTRY.counter("clipboard_dedup_hits_total", "判定为重复内容的次数", scope="near")
+_DELTA_ENTRIES = REGISTRY.counter("clipboard_delta_entries_total", "以增量保存的文本条数")
+_DELTA_ENCODE_SECONDS = REGISTRY.histogram("clipboard_delta_seconds", "文本增量编码与还原的耗时（秒）", op="encode")
+_DELTA_RESTORE_SECONDS = REGISTRY.histogram("clipboard_delta_seconds", "文本增量编码与还原的耗时（秒）", op="restore")
 
 class ClipboardLogger:
-    """负责日志和文件的管理，处理内容的持久化存储"""
-    def __init__(self, config: Config):
+    """负责日志和文件的管理，处理内容的持久化存储。
+
+    以只读方式打开时只用于读取历史：不创建目录，不打开图片存储和历史数据库的写入连接，
+    预览缓存和 sqlite 历史数据库以只读方式打开，去重索引只在内存中同步，关闭时不写回任何状态文件。
+    """
+    def __init__(self, config: Config, read_only: bool = False):
         self._config = config
+        self.read_only = read_only
         self.base_dir = config.get(ConfigKeys.General.SECTION, ConfigKeys.General.BASE_DIR)
         self.images_dir = os.path.join(
             self.base_dir,
             config.get(ConfigKeys.General.SECTION, ConfigKeys.General.IMAGES_DIR)
         )
-        self._ensure_directories()
-        self._cleanup_old_logs()
+        self.texts_dir = os.path.join(self.base_dir, Paths.DEFAULT_TEXTS_DIR)
+        self.storage_format = config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.STORAGE_FORMAT)
+        self._journal = JournalWriter(
+            config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.FSYNC_POLICY),
+            config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.FSYNC_INTERVAL),
+            config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.INDEX_INTERVAL_KB) << 10
+        )
+        # JSONL 日志写满此大小后换用下一个分段，0 表示每天一个文件
+        self.segment_bytes = config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.SEGMENT_KB) << 10
+        # 日期 -> 当天正在写入的分段编号
+        self._segment_sequences: Dict[str, int] = {}
+        self.compression_codec = config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.COMPRESSION_CODEC)
+        self.compress_text_threshold = config.get(
+            ConfigKeys.Logging.SECTION, ConfigKeys.Logging.COMPRESS_TEXT_THRESHOLD
+        )
+        self.compress_sealed_logs = config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.COMPRESS_SEALED_LOGS)
+        self._current_day: Optional[str] = None
+        # 写入线程与后台保留策略线程共用，保证日志文件、去重索引和图片引用计数的一致
+        self.lock = threading.RLock()
+        if not read_only:
+            self._ensure_directories()
+        self.history_db: Optional[HistoryDatabase] = None
+        # 只读时历史数据库只在 sqlite 存储格式下用于读取历史，全文索引无需打开
+        if self.storage_format == StorageFormat.SQLITE.value or (
+                not read_only and config.get(ConfigKeys.Database.SECTION, ConfigKeys.Database.ENABLE_INDEX)):
+            self.history_db = HistoryDatabase(self.database_path(config), read_only)
+        self.image_store: Optional[ImageStore] = None
+        if (not read_only and config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.IMAGE_STORAGE)
+                == ImageStorage.CONTENT.value):
+            self.image_store = ImageStore(self.images_dir)
+            if not self.image_store.refs_valid:
+                self._rebuild_image_refs()
+        self.preview_text_chars = config.get(ConfigKeys.Preview.SECTION, ConfigKeys.Preview.TEXT_CHARS)
+        self.preview_cache: Optional[PreviewCache] = None
+        preview_file = os.path.join(self.base_dir, Paths.DEFAULT_PREVIEW_FILE)
+        if (config.get(ConfigKeys.Preview.SECTION, ConfigKeys.Preview.ENABLE_CACHE)
+                and (not read_only or os.path.exists(preview_file))):
+            self.preview_cache = PreviewCache(
+                preview_file,
+                config.get(ConfigKeys.Preview.SECTION, ConfigKeys.Preview.MEMORY_ENTRIES),
+                self.preview_text_chars,
+                read_only
+            )
+        self.dedup_history = config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.DEDUP_HISTORY)
+        self.dedup_index: Optional[DedupIndex] = None
+        if self.dedup_history and self.storage_format != StorageFormat.SQLITE.value:
+            self.dedup_index = DedupIndex(os.path.join(self.base_dir, Paths.DEFAULT_DEDUP_INDEX_FILE))
+            self.dedup_index.sync(
+                self._list_log_files(),
+                lambda log_file: self._read_log_file(log_file, decode=False),
+                save=not read_only
+            )
+        self.near_duplicates = config.get(ConfigKeys.Similarity.SECTION, ConfigKeys.Similarity.MODE)
+        self.similarity: Optional[SimilarityDetector] = None
+        if self.near_duplicates != NearDuplicateMode.OFF.value and not read_only:
+            window = config.get(ConfigKeys.Similarity.SECTION, ConfigKeys.Similarity.WINDOW)
+            self.similarity = SimilarityDetector(
+                config.get(ConfigKeys.Similarity.SECTION, ConfigKeys.Similarity.TEXT_DISTANCE),
+                config.get(ConfigKeys.Similarity.SECTION, ConfigKeys.Similarity.IMAGE_DISTANCE),
+                window
+            )
+            self._load_similarity(window)
+        # 文本增量只在同一个日志文件内引用基准记录，文件被删除时不会留下无法还原的记录
+        self.delta_text = (
+            config.get(ConfigKeys.TextDelta.SECTION, ConfigKeys.TextDelta.ENABLE)
+            and self.storage_format != StorageFormat.SQLITE.value
+        )
+        self.delta_min_chars = config.get(ConfigKeys.TextDelta.SECTION, ConfigKeys.TextDelta.MIN_CHARS)
+        self.delta_max_ratio = config.get(ConfigKeys.TextDelta.SECTION, ConfigKeys.TextDelta.MAX_RATIO)
+        self.delta_max_chain = config.get(ConfigKeys.TextDelta.SECTION, ConfigKeys.TextDelta.MAX_CHAIN)
+        # 当前写入的日志文件中最近保存的文本：(时间戳, 内容哈希, 文本, 增量链长度)
+        self._delta_file: Optional[str] = None
+        self._delta_bases: deque = deque(
+            maxlen=max(1, config.get(ConfigKeys.TextDelta.SECTION, ConfigKeys.TextDelta.WINDOW))
+        )
+        # 最近还原的增量记录和基准记录的文本，按时间从新到旧读取同一条增量链时不必重复查找
+        self._delta_texts: OrderedDict = OrderedDict()
+
+    def _rebuild_image_refs(self):
+        """引用计数文件无法读取时，按全部日志记录重新统计图片引用，每条带图片哈希的记录一次"""
+        if self.storage_format == StorageFormat.SQLITE.value:
+            records = self.history_db.iter_records(content_type=ContentType.IMAGE.value)
+        else:
+            records = (
+                record for log_file in self._list_log_files()
+                for record in self._read_log_file(log_file, decode=False)
+            )
+        self.image_store.rebuild(record[JsonKeys.IMAGE_HASH] for record in records if JsonKeys.IMAGE_HASH in record)
+
+    def _load_similarity(self, window: int):
+        """从最新的日志中读取最近 window 条完整记录的相似指纹，重建内存索引。
+
+        引用记录和标记为相似内容的记录不加入索引，它们以所指向的记录为准。
+        """
+        entries = []
+        for log_file in reversed(self._list_log_files()):
+            for record in self._read_log_file(log_file):
+                if (JsonKeys.SIMILARITY_HASH in record and JsonKeys.CONTENT_HASH in record
+                        and not is_reference(record) and JsonKeys.SIMILAR_TO not in record):
+                    entries.append(record)
+            if len(entries) >= window:
+                break
+        # 记录按时间从新到旧读取，从旧到新加入，超出窗口时淘汰的是最早的记录
+        for record in reversed(entries[:window]):
+            self.similarity.add(
+                record[JsonKeys.SIMILARITY_HASH], record[JsonKeys.TIMESTAMP], record[JsonKeys.CONTENT_HASH],
+                self._text_hash(record)
+            )
+
+    @staticmethod
+    def _text_hash(record: dict) -> Optional[str]:
+        """完整文本记录合并空白后的哈希，其他记录返回 None"""
+        if (record.get(JsonKeys.CONTENT_TYPE) != ContentType.TEXT.value or JsonKeys.TEXT_CONTENT not in record
+                or record.get(JsonKeys.TEXT_TRUNCATED)):
+            return None
+        return normalized_text_hash(record[JsonKeys.TEXT_CONTENT])
+
+    @staticmethod
+    def database_path(config: Config) -> str:
+        """获取历史数据库文件路径"""
+        return os.path.join(
+            config.get(ConfigKeys.General.SECTION, ConfigKeys.General.BASE_DIR),
+            config.get(ConfigKeys.Database.SECTION, ConfigKeys.Database.PATH)
+        )
 
     def _ensure_directories(self):
         """确保必要的目录存在"""
         os.makedirs(self.base_dir, exist_ok=True)
         os.makedirs(self.images_dir, exist_ok=True)
 
-    def _cleanup_old_logs(self):
-        """清理旧的日志文件"""
-        try:
-            log_files = sorted([
-                f for f in os.listdir(self.base_dir)
-                if f.startswith(FileFormat.LOG_FILE_PREFIX)
-            ])
-            max_files = self._config.get(
-                ConfigKeys.General.SECTION,
-                ConfigKeys.General.MAX_LOG_FILES
-            )
-            if len(log_files) > max_files:
-                for f in log_files[:-max_files]:
-                    os.remove(os.path.join(self.base_dir, f))
-        except Exception as e:
-            print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+    def remove_log_file(self, log_file: str) -> int:
+        """删除整个日志文件，释放其中记录的图片引用并更新去重索引。
+
+        Args:
+            log_file (str): 日志文件路径
+
+        Returns:
+            int: 被删除的记录条数
+        """
+        with self.lock:
+            dropped = self._read_log_file(log_file, decode=False)
+            try:
+                os.remove(log_file)
+            except OSError as e:
+                print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+                return 0
+            remove_index(log_file)
+            self._retire_entries(log_file, dropped)
+            return len(dropped)
+
+    def trim_log_file(self, log_file: str, keep: Callable[[dict], bool]) -> int:
+        """删除日志文件中不满足条件的记录，记录全部被删除时删除整个文件。
+
+        Args:
+            log_file (str): 日志文件路径
+            keep (Callable[[dict], bool]): 返回 True 的记录会被保留
+
+        Returns:
+            int: 被删除的记录条数
+        """
+        with self.lock:
+            records = self._read_log_file(log_file, decode=False)
+            remaining = [record for record in records if keep(record)]
+            if len(remaining) == len(records):
+                return 0
+            if not remaining:
+                return self.remove_log_file(log_file)
+            dropped = [record for record in records if not keep(record)]
+            self._rewrite_log_file(log_file, remaining)
+            self._retire_entries(log_file, dropped, remaining)
+            return len(dropped)
+
+    def merge_log_files(self, log_files: List[str], target: str):
+        """将多个日志文件合并为一个文件。
+
+        先写入合并后的文件，再删除原文件，记录本身不变，因此不会释放任何图片引用。
+
+        Args:
+            log_files (List[str]): 要合并的日志文件路径
+            target (str): 合并后的文件路径，后缀决定文件格式和压缩方式
+        """
+        with self.lock:
+            records = []
+            for log_file in log_files:
+                records.extend(self._read_log_file(log_file, decode=False))
+            records.sort(key=lambda x: x.get(JsonKeys.TIMESTAMP, ""), reverse=True)
+            if not self._rewrite_log_file(target, records):
+                return
+            for log_file in log_files:
+                if log_file == target:
+                    continue
+                try:
+                    os.remove(log_file)
+                except OSError as e:
+                    print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+                if index_path(log_file) != index_path(target):
+                    remove_index(log_file)
+                if self.dedup_index is not None:
+                    self.dedup_index.remove(log_file)
+
+    def delete_database_before(self, timestamp: str) -> int:
+        """删除历史数据库中早于指定时间的记录，并释放其图片引用。
+
+        Args:
+            timestamp (str): ISO 格式的时间
 
-    def _get_log_file(self) -> str:
-        """获取当天的日志文件路径"""
+        Returns:
+            int: 被删除的记录条数
+        """
+        with self.lock:
+            dropped = self.history_db.delete_before(timestamp)
+            self._release_images(dropped)
+            if self.dedup_history:
+                self.history_db.promote_references(dropped)
+            return len(dropped)
+
+    def delete_oldest_database_entries(self, count: int) -> int:
+        """删除历史数据库中最早的若干条记录，并释放其图片引用"""
+        with self.lock:
+            dropped = self.history_db.delete_oldest(count)
+            self._release_images(dropped)
+            if self.dedup_history:
+                self.history_db.promote_references(dropped)
+            return len(dropped)
+
+    def _list_log_files(self) -> List[str]:
+        """按日期和分段顺序列出全部日志文件（JSON 与 JSONL，包括压缩封存的文件）的路径"""
+        if not os.path.isdir(self.base_dir):
+            # 只读时不创建日志目录，尚未记录过内容时没有日志
+            return []
+        extensions = (FileFormat.LOG_FILE_EXTENSION, FileFormat.JOURNAL_FILE_EXTENSION)
+        names = [
+            f for f in os.listdir(self.base_dir)
+            if f.startswith(FileFormat.LOG_FILE_PREFIX) and strip_compression_suffix(f).endswith(extensions)
+        ]
+        return [os.path.join(self.base_dir, f) for f in sorted(names, key=segment_sort_key)]
+
+    @property
+    def segmented(self) -> bool:
+        """JSONL 日志是否按大小分段保存"""
+        return self.storage_format == StorageFormat.JSONL.value and self.segment_bytes > 0
+
+    @staticmethod
+    def _is_journal(log_file: str) -> bool:
+        """判断日志文件是否为 JSONL 格式（不区分是否压缩）"""
+        return strip_compression_suffix(log_file).endswith(FileFormat.JOURNAL_FILE_EXTENSION)
+
+    def seal_old_logs(self):
+        """将往日不再写入的日志文件压缩封存"""
+        if not self.compress_sealed_logs:
+            return
         today = datetime.now().strftime(FileFormat.LOG_FILE_DATE_FORMAT)
-        return os.path.join(
-            self.base_dir,
-            f'{FileFormat.LOG_FILE_PREFIX}{today}{FileFormat.LOG_FILE_EXTENSION}'
+        with self.lock:
+            for log_file in self._list_log_files():
+                if is_compressed_file(log_file) or today in os.path.basename(log_file):
+                    continue
+                self._journal.release(log_file)
+                sealed = seal_log_file(log_file, self.compression_codec)
+                if sealed and self.dedup_index is not None:
+                    self.dedup_index.rename(log_file, sealed)
+            # 往日的分段已被封存，之后迟到的记录需要重新确定写入的分段
+            self._segment_sequences = {
+                day: sequence for day, sequence in self._segment_sequences.items() if day == today
+            }
+            if self.dedup_index is not None:
+                self.dedup_index.save()
+
+    def iter_log_files(self) -> Iterator[List[dict]]:
+        """按日期从旧到新逐个读取日志文件。
+
+        增量记录的基准记录总在同一个文件中，整个文件一次还原；引用记录按首次出现的记录还原。
+
+        Yields:
+            List[dict]: 一个日志文件中的记录，按时间从新到旧排列，引用记录和增量记录
+                已还原为完整内容
+        """
+        for log_file in self._list_log_files():
+            records = self._read_log_file(log_file)
+            deltas = [record_key(record) for record in records if is_delta(record)]
+            if deltas:
+                materialize_deltas(records, deltas)
+            yield [
+                self.resolve_entry(record) if is_reference(record) or is_delta(record) else record
+                for record in records
+            ]
+
+    def _get_log_file(self, day: Optional[str] = None) -> str:
+        """获取某天（默认为当天）的日志文件路径，JSONL 日志分段保存时为当天最新的分段"""
+        day = day or datetime.now().strftime(FileFormat.LOG_FILE_DATE_FORMAT)
+        extension = (
+            FileFormat.JOURNAL_FILE_EXTENSION
+            if self.storage_format == StorageFormat.JSONL.value
+            else FileFormat.LOG_FILE_EXTENSION
         )
+        sequence = 0
+        if self.segmented:
+            sequence = self._segment_sequences.get(day)
+            if sequence is None:
+                sequence = self._segment_sequences[day] = self._last_sequence(day)
+        return os.path.join(self.base_dir, segment_file_name(day, sequence, extension))
+
+    def _last_sequence(self, day: str) -> int:
+        """查找某天已有的最大分段编号，没有分段时为 0"""
+        sequences = [0]
+        if not os.path.isdir(self.base_dir):
+            return 0
+        for name in os.listdir(self.base_dir):
+            parsed = parse_segment_name(name) if name.startswith(FileFormat.LOG_FILE_PREFIX) else None
+            if parsed is not None and parsed[0] == day and parsed[1] == day:
+                sequences.append(parsed[2])
+        return max(sequences)
+
+    @staticmethod
+    def _is_sealed(log_file: str) -> bool:
+        """判断日志文件是否已被压缩封存，封存后不能再向原文件名写入"""
+        return not os.path.exists(log_file) and any(
+            os.path.exists(f"{log_file}{suffix}")
+            for suffix in (FileFormat.ZSTD_FILE_SUFFIX, FileFormat.GZIP_FILE_SUFFIX)
+        )
+
+    def _segment_full(self, log_file: str) -> bool:
+        """判断 JSONL 分段是否已达到大小或记录数上限"""
+        try:
+            size = os.path.getsize(log_file)
+        except OSError:
+            return False
+        return size >= self.segment_bytes or (
+            self._journal.entries(log_file) >= self._config.settings.max_entries_per_file
+        )
+
+    def _writable_log_file(self, day: str, today: str) -> str:
+        """获取某天的记录应写入的日志文件路径。
+
+        分段保存时当天最新的分段写满或已被封存则换用下一个分段；不分段时往日的日志
+        已被封存则写入当天的日志，避免之后再次封存时覆盖已封存的文件。
+        """
+        log_file = self._get_log_file(day)
+        if not self.segmented:
+            if day != today and self._is_sealed(log_file):
+                return self._get_log_file(today)
+            return log_file
+        while self._is_sealed(log_file) or self._segment_full(log_file):
+            self._segment_sequences[day] += 1
+            log_file = self._get_log_file(day)
+        return log_file
+
+    @staticmethod
+    def _record_day(record: dict, today: str) -> str:
+        """获取记录按其时间戳应归属的日期，时间戳无法识别时归入当天"""
+        timestamp = record.get(JsonKeys.TIMESTAMP)
+        if not isinstance(timestamp, str) or timestamp.startswith(today):
+            return today
+        day = timestamp[:10]
+        try:
+            datetime.strptime(day, FileFormat.LOG_FILE_DATE_FORMAT)
+        except ValueError:
+            return today
+        return day
 
     def _save_image(self, content: ClipboardContent) -> Optional[str]:
         """保存图片并返回保存路径"""
-        if not self._config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.SAVE_IMAGE_FILE):
+        settings = self._config.settings
+        if not settings.save_image_file:
             return None
 
         try:
@@ -63,42 +433,420 @@ class ClipboardLogger:
             image_filename = (
                 f"{FileFormat.IMAGE_FILE_PREFIX}"
                 f"{image_time.strftime(FileFormat.IMAGE_FILE_DATE_FORMAT)}"
-                f"{FileFormat.IMAGE_FILE_EXTENSION}"
+                f"{FileFormat.IMAGE_EXTENSIONS[content.image_format]}"
             )
             image_path = os.path.join(self.images_dir, image_filename)
             
-            image_data = base64.b64decode(content.data[JsonKeys.IMAGE_DATA])
-            if len(image_data) > self._config.get(
-                ConfigKeys.ContentTypes.SECTION,
-                ConfigKeys.ContentTypes.MAX_IMAGE_SIZE
-            ):
+            image_data = content.image_bytes
+            if len(image_data) > settings.max_image_size:
                 print(Messages.Error.IMAGE_SIZE_LIMIT)
                 return None
 
             with open(image_path, 'wb') as f:
                 f.write(image_data)
+            _IMAGE_BYTES.inc(len(image_data))
             
             return os.path.join(Paths.DEFAULT_IMAGES_DIR, image_filename)
         except Exception as e:
             print(Messages.Error.SAVE_IMAGE_ERROR.format(str(e)))
             return None
 
-    def _read_log_file(self, log_file: str) -> List[dict]:
-        """读取日志文件内容"""
+    def _store_image(self, content: ClipboardContent) -> Optional[str]:
+        """将图片存入内容寻址存储并返回内容哈希"""
+        try:
+            if len(content.image_bytes) > self._config.settings.max_image_size:
+                print(Messages.Error.IMAGE_SIZE_LIMIT)
+                return None
+            return self.image_store.put(content.image_bytes, content.get_hash(), content.image_format)
+        except Exception as e:
+            print(Messages.Error.SAVE_IMAGE_ERROR.format(str(e)))
+            return None
+
+    def _release_images(self, entries: Iterable[dict]):
+        """释放被删除的日志记录对图片的引用"""
+        if self.image_store is None:
+            return
+        image_hashes = [
+            entry[JsonKeys.IMAGE_HASH] for entry in entries
+            if JsonKeys.IMAGE_HASH in entry
+        ]
+        if image_hashes:
+            self.image_store.release(image_hashes)
+            # 记录已从日志中删除后才减少引用计数，崩溃时图片只会残留
+            self.image_store.flush()
+
+    def _retire_entries(self, log_file: str, dropped: List[dict], remaining: Optional[List[dict]] = None):
+        """日志记录被删除后释放其图片引用并更新去重索引。
+
+        被删除的完整记录如果仍被其他日志中的引用记录指向，会把最早的引用记录还原为完整记录；
+        剩余记录中以被删除的记录为基准的增量记录会还原为完整记录。
+
+        Args:
+            log_file (str): 记录所在的日志文件
+            dropped (List[dict]): 被删除的记录
+            remaining (Optional[List[dict]], optional): 日志文件中剩余的记录，为 None 表示整个文件已被删除
+        """
+        self._release_images(dropped)
+        if remaining is not None:
+            self._materialize_orphan_deltas(log_file, dropped, remaining)
+        if self._delta_file == log_file:
+            dropped_keys = {record_key(record) for record in dropped}
+            self._delta_bases = deque(
+                (base for base in self._delta_bases if base[:2] not in dropped_keys), self._delta_bases.maxlen
+            )
+        if self.dedup_index is None:
+            return
+        if remaining is None:
+            self.dedup_index.remove(log_file)
+        else:
+            self.dedup_index.scan(log_file, remaining)
+        orphans = {
+            record[JsonKeys.CONTENT_HASH]: record for record in dropped
+            if record.get(JsonKeys.CONTENT_HASH) and not is_reference(record)
+            and self.dedup_index.lookup(record[JsonKeys.CONTENT_HASH]) is None
+        }
+        if orphans:
+            # 引用记录还原后位于其他日志文件，不能再依赖被删除的基准记录
+            materialize_deltas(dropped + (remaining or []), [record_key(record) for record in orphans.values()])
+            self._promote_references(orphans)
+
+    def _materialize_orphan_deltas(self, log_file: str, dropped: List[dict], remaining: List[dict]):
+        """将剩余记录中增量链上有被删除记录的增量记录还原为完整记录，并重写日志文件"""
+        dropped_keys = {record_key(record) for record in dropped}
+        orphaned = set()
+        # 记录按时间从新到旧排列，倒序遍历时基准记录总是先于依赖它的增量记录
+        for record in reversed(remaining):
+            if is_delta(record) and (delta_base_key(record) in dropped_keys or delta_base_key(record) in orphaned):
+                orphaned.add(record_key(record))
+        if not orphaned or not materialize_deltas(dropped + remaining, orphaned):
+            return
+        self._rewrite_log_file(log_file, [
+            compress_record(record, self.compress_text_threshold, self.compression_codec)
+            if record_key(record) in orphaned else record
+            for record in remaining
+        ])
+
+    def _promote_references(self, orphans: Dict[str, dict]):
+        """将指向已删除记录的最早一条引用记录还原为完整记录，其余引用改为指向它。
+
+        Args:
+            orphans (Dict[str, dict]): 内容哈希到已删除的完整记录的映射
+        """
+        referencing = sorted({
+            log_file for content_hash in orphans
+            for log_file in self.dedup_index.referencing_files(content_hash)
+        })
+        first_timestamps: Dict[str, str] = {}
+        for log_file in referencing:
+            records = self._read_log_file(log_file, decode=False)
+            changed = False
+            # 记录按时间从新到旧排列，倒序遍历才能先遇到最早的引用
+            for position in range(len(records) - 1, -1, -1):
+                record = records[position]
+                content_hash = record.get(JsonKeys.CONTENT_HASH)
+                if content_hash not in orphans or not is_reference(record):
+                    continue
+                if content_hash not in first_timestamps:
+                    records[position] = promote_reference(record, orphans[content_hash])
+                    first_timestamps[content_hash] = record[JsonKeys.TIMESTAMP]
+                else:
+                    record[JsonKeys.DUPLICATE_OF] = first_timestamps[content_hash]
+                changed = True
+            if changed:
+                self._rewrite_log_file(log_file, records)
+
+    def _rewrite_log_file(self, log_file: str, records: List[dict]) -> bool:
+        """用按时间从新到旧排列的记录完整重写日志文件，并同步去重索引。
+
+        压缩封存的日志先写出未压缩的文件，再用原来的压缩算法重新封存。
+        返回是否写入成功。
+        """
+        plain_file = strip_compression_suffix(log_file)
+        if self._is_journal(log_file):
+            try:
+                self._journal.rewrite(plain_file, records[::-1])
+            except (IOError, OSError) as e:
+                print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+                return False
+        elif not self._write_log_file(plain_file, records):
+            return False
+        if plain_file != log_file:
+            codec = (
+                CompressionCodec.ZSTD.value if log_file.endswith(FileFormat.ZSTD_FILE_SUFFIX)
+                else CompressionCodec.ZLIB.value
+            )
+            self._journal.release(plain_file)
+            if seal_log_file(plain_file, codec) is None:
+                return False
+        if self.dedup_index is not None:
+            self.dedup_index.scan(log_file, records)
+        return True
+
+    def _find_original(self, content_hash: str) -> Optional[dict]:
+        """查找内容哈希在保留期内首次出现的完整记录"""
+        if self.storage_format == StorageFormat.SQLITE.value:
+            return self.history_db.first_occurrence(content_hash)
+        if self.dedup_index is None:
+            return None
+        first = self.dedup_index.lookup(content_hash)
+        if first is None:
+            return None
+        timestamp, log_file = first
+        for record in self._read_log_file(log_file):
+            if (record.get(JsonKeys.TIMESTAMP) == timestamp and
+                    record.get(JsonKeys.CONTENT_HASH) == content_hash and not is_reference(record)):
+                return record
+        return None
+
+    def resolve_entry(self, entry: dict) -> dict:
+        """将引用记录和增量记录还原为包含完整内容的记录，普通记录原样返回。
+
+        Args:
+            entry (dict): 日志记录
+
+        Returns:
+            dict: 包含完整内容的记录；首次出现的记录或增量的基准记录已不存在时返回原记录
+        """
+        if is_reference(entry):
+            original = self._find_original(entry[JsonKeys.CONTENT_HASH])
+            if original is None:
+                return entry
+            entry = promote_reference(entry, original)
+        if not is_delta(entry):
+            return entry
+        start = time.perf_counter()
+        with self.lock:
+            loaded: Dict[str, List[dict]] = {}
+            text = delta_text(entry, lambda key: self._find_delta_base(key, loaded), self._delta_texts)
+            while len(self._delta_texts) > DELTA_TEXT_CACHE_SIZE:
+                self._delta_texts.popitem(last=False)
+        _DELTA_RESTORE_SECONDS.observe(time.perf_counter() - start)
+        if text is None:
+            print(Messages.Error.DELTA_RESTORE_ERROR.format(
+                entry.get(JsonKeys.TIMESTAMP), entry.get(JsonKeys.DELTA_BASE)
+            ))
+            return entry
+        resolved = {
+            k: v for k, v in entry.items()
+            if k not in (JsonKeys.TEXT_DELTA, JsonKeys.DELTA_BASE, JsonKeys.DELTA_BASE_HASH, JsonKeys.DELTA_DEPTH)
+        }
+        resolved[JsonKeys.TEXT_CONTENT] = text
+        return resolved
+
+    def _find_delta_base(self, key: RecordKey, loaded: Dict[str, List[dict]]) -> Optional[dict]:
+        """在覆盖基准记录日期的日志文件中查找增量的基准记录。
+
+        JSONL 日志借助时间索引只读取时间戳附近的记录；JSON 日志整体读取一次后保存在 loaded 中，
+        同一条增量链上的其他基准记录不必重复读取。
+        """
+        timestamp, content_hash = key
+        day = timestamp[:10]
+        for log_file in self._list_log_files():
+            dates = parse_segment_name(log_file)
+            if dates is None or not dates[0] <= day <= dates[1]:
+                continue
+            if self._is_journal(log_file):
+                # 范围的结束时间是时间戳后紧跟最小的字符，只包含时间戳完全相同的记录
+                records: Iterable[dict] = iter_journal_range(log_file, timestamp, timestamp + "\0")
+            else:
+                if log_file not in loaded:
+                    loaded[log_file] = self._read_log_file(log_file, decode=False)
+                records = loaded[log_file]
+            for record in records:
+                if record_key(record) == key and not is_reference(record):
+                    return decode_record(record)
+        return None
+
+    def _first_occurrence(self, content_hash: Optional[str]) -> Optional[str]:
+        """获取内容在保留期内首次出现的时间戳，未出现过时返回 None"""
+        if not content_hash or not self.dedup_history:
+            return None
+        if self.storage_format == StorageFormat.SQLITE.value:
+            original = self.history_db.first_occurrence(content_hash)
+            return original[JsonKeys.TIMESTAMP] if original else None
+        first = self.dedup_index.lookup(content_hash) if self.dedup_index is not None else None
+        return first[0] if first else None
+
+    def _reference_record(self, content: ClipboardContent, first_timestamp: str,
+                          content_hash: Optional[str] = None) -> dict:
+        """为重复出现的内容生成只包含时间戳和哈希的引用记录。
+
+        content_hash 为所指向记录的内容哈希，默认为内容自身的哈希；相似内容的引用记录
+        指向另一条内容，还原后的内容以那条记录为准。
+        """
+        content_hash = content_hash or content.get_hash()
+        record = {
+            JsonKeys.TIMESTAMP: content.timestamp,
+            JsonKeys.CONTENT_TYPE: content.content_type,
+            JsonKeys.CONTENT_HASH: content_hash,
+            JsonKeys.DUPLICATE_OF: first_timestamp
+        }
+        if content.pixel_hash:
+            record[JsonKeys.PIXEL_HASH] = content.pixel_hash
+        # 引用记录同样持有一次图片引用，首次出现的记录被清理后图片仍然保留
+        if (content.content_type == ContentType.IMAGE.value and self.image_store is not None
+                and self.image_store.acquire(content_hash)):
+            record[JsonKeys.IMAGE_HASH] = content_hash
+        return record
+
+    def _similarity_hash(self, content: ClipboardContent) -> Optional[str]:
+        """获取内容的相似指纹。图片的指纹在读取剪贴板时计算，文本的指纹在此按需计算"""
+        if (content.similarity_hash is None and content.content_type == ContentType.TEXT.value
+                and JsonKeys.TEXT_CONTENT in content.data and not content.data.get(JsonKeys.TEXT_TRUNCATED)):
+            start = time.perf_counter()
+            content.set_similarity_hash(text_fingerprint(content.data[JsonKeys.TEXT_CONTENT]))
+            SIMILARITY_SECONDS.observe(time.perf_counter() - start)
+        return content.similarity_hash
+
+    def _reference_target(self, content: ClipboardContent, similar: Optional[tuple],
+                          text_hash: Optional[str]) -> Optional[tuple]:
+        """确定相似内容引用记录所指向的内容，返回指纹距离和内容哈希，不生成引用记录时返回 None。
+
+        图片与最相似的内容距离在阈值内即可引用；文本只有合并空白后与已保存的文本完全相同时
+        才引用，其余相似文本只做标记，不丢失其中的修改。
+        """
+        if similar is None or self.near_duplicates != NearDuplicateMode.REFERENCE.value:
+            return None
+        if content.content_type != ContentType.TEXT.value:
+            return similar[0], similar[2]
+        same = self.similarity.find_text(text_hash) if text_hash else None
+        return (0, same[1]) if same else None
+
+    def _build_records(self, contents: List[ClipboardContent]) -> List[dict]:
+        """生成要写入的记录。
+
+        保留期内已出现过的内容生成引用记录；启用相似内容检测时，与最近保存的内容足够相似的
+        内容按配置标记相似来源，或生成指向该内容的引用记录。
+        """
+        records = []
+        batch_first: Dict[str, str] = {}
+        for content in contents:
+            content_hash = content.get_hash()
+            first_timestamp = batch_first.get(content_hash) or self._first_occurrence(content_hash)
+            if first_timestamp:
+                _HISTORY_DEDUP_HITS.inc()
+                records.append(self._reference_record(content, first_timestamp))
+                continue
+            fingerprint = self._similarity_hash(content) if self.similarity is not None else None
+            similar = self.similarity.lookup(fingerprint) if fingerprint else None
+            text_hash = (
+                normalized_text_hash(content.data[JsonKeys.TEXT_CONTENT])
+                if fingerprint and content.content_type == ContentType.TEXT.value else None
+            )
+            target = self._reference_target(content, similar, text_hash)
+            if target is not None:
+                distance, similar_hash = target
+                similar_first = batch_first.get(similar_hash) or self._first_occurrence(similar_hash)
+                if similar_first:
+                    _NEAR_DEDUP_HITS.inc()
+                    record = self._reference_record(content, similar_first, similar_hash)
+                    record[JsonKeys.SIMILARITY_HASH] = fingerprint
+                    record[JsonKeys.SIMILARITY_DISTANCE] = distance
+                    records.append(record)
+                    continue
+            record = self._process_image_data(content, content.to_dict())
+            if similar is not None:
+                _NEAR_DEDUP_HITS.inc()
+                record[JsonKeys.SIMILAR_TO] = similar[1]
+                record[JsonKeys.SIMILARITY_DISTANCE] = similar[0]
+            elif fingerprint:
+                self.similarity.add(fingerprint, content.timestamp, content_hash, text_hash)
+            records.append(record)
+            if content_hash and self.dedup_history:
+                batch_first[content_hash] = content.timestamp
+        return records
+
+    def _delta_base(self, text: str) -> Optional[tuple]:
+        """为文本选择基准并生成增量，返回基准和增量，没有合适的基准时返回 None。
+
+        在当前日志文件最近保存的文本中选择与 text 相同的开头和结尾最长的一条（都没有时选择最新的一条），
+        增量链已达上限的文本不参与选择；增量超过 max_ratio 时不采用。
+        """
+        best, best_shared = None, -1
+        for base in reversed(self._delta_bases):
+            if base[3] >= self.delta_max_chain:
+                continue
+            shared = shared_affix(base[2], text)
+            if shared > best_shared:
+                best, best_shared = base, shared
+        if best is None:
+            return None
+        ops = diff_text(best[2], text, int(self.delta_max_ratio * len(text)))
+        if ops is None or delta_size(ops) > self.delta_max_ratio * len(dumps(text)):
+            return None
+        return best, ops
+
+    def _encode_deltas(self, log_file: str, records: List[dict]) -> List[dict]:
+        """将文本记录编码为相对于同一日志文件中最近保存的相近文本的增量。
+
+        增量链长度达到 max_chain 的文本不再作为基准，下一个版本完整保存，还原任何一条记录
+        最多只需应用 max_chain 次增量。
+        """
+        if log_file != self._delta_file:
+            self._delta_file = log_file
+            self._delta_bases.clear()
+        encoded = []
+        for record in records:
+            text = record.get(JsonKeys.TEXT_CONTENT)
+            if (record.get(JsonKeys.CONTENT_TYPE) != ContentType.TEXT.value or not isinstance(text, str)
+                    or len(text) < self.delta_min_chars or record.get(JsonKeys.TEXT_TRUNCATED)
+                    or not record.get(JsonKeys.CONTENT_HASH) or is_reference(record)):
+                encoded.append(record)
+                continue
+            start = time.perf_counter()
+            delta = self._delta_base(text)
+            _DELTA_ENCODE_SECONDS.observe(time.perf_counter() - start)
+            depth = 0
+            if delta is not None:
+                base, ops = delta
+                depth = base[3] + 1
+                record = {k: v for k, v in record.items() if k != JsonKeys.TEXT_CONTENT}
+                record[JsonKeys.TEXT_DELTA] = ops
+                record[JsonKeys.DELTA_BASE] = base[0]
+                record[JsonKeys.DELTA_BASE_HASH] = base[1]
+                record[JsonKeys.DELTA_DEPTH] = depth
+                _DELTA_ENTRIES.inc()
+            self._delta_bases.append((record[JsonKeys.TIMESTAMP], record[JsonKeys.CONTENT_HASH], text, depth))
+            encoded.append(record)
+        return encoded
+
+    def _read_log_file(self, log_file: str, decode: bool = True) -> List[dict]:
+        """读取日志文件内容，按时间从新到旧返回。
+
+        压缩封存的日志文件会自动解压。
+
+        Args:
+            log_file (str): 日志文件路径
+            decode (bool, optional): 是否还原被压缩的文本内容。只需要哈希等元数据、
+                或要原样写回文件时传入 False。默认为 True
+        """
         if not os.path.exists(log_file):
             return []
-            
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+
+        if self._is_journal(log_file):
+            try:
+                records = read_journal(log_file)
+            except IOError as e:
+                print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+                return []
+            records.reverse()
+        else:
+            try:
+                with open_log(log_file) as f:
+                    content = f.read().strip()
                 if not content:
                     return []
-                data = json.loads(content)
-                return data if isinstance(data, list) else []
-        except (json.JSONDecodeError, IOError) as e:
-            print(Messages.Error.READ_LOG_ERROR.format(str(e)))
-            self._backup_log_file(log_file)
-            return []
+                data = loads(content)
+                records = data if isinstance(data, list) else []
+            except (json.JSONDecodeError, UnicodeDecodeError, IOError, EOFError) as e:
+                print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+                if not self.read_only:
+                    self._backup_log_file(log_file)
+                return []
+        if decode:
+            for record in records:
+                decode_record(record)
+        return records
 
     def _backup_log_file(self, log_file: str):
         """备份损坏的日志文件"""
@@ -112,19 +860,17 @@ class ClipboardLogger:
         except OSError:
             pass
 
-    def _write_log_file(self, log_file: str, data: List[dict]):
-        """写入日志文件"""
+    def _write_log_file(self, log_file: str, data: List[dict]) -> bool:
+        """写入日志文件，返回是否写入成功"""
         temp_file = f"{log_file}{FileFormat.TEMP_FILE_SUFFIX}"
         try:
-            indent = 2 if self._config.get(
-                ConfigKeys.Logging.SECTION,
-                ConfigKeys.Logging.INDENT_JSON
-            ) else None
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=indent)
+            encoded = dumps(data, indent=self._config.settings.indent_json)
+            with open(temp_file, 'wb') as f:
+                f.write(encoded)
+            _LOG_BYTES.inc(len(encoded))
             
             os.replace(temp_file, log_file) if os.path.exists(log_file) else os.rename(temp_file, log_file)
+            return True
         except (IOError, OSError) as e:
             print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
             if os.path.exists(temp_file):
@@ -132,44 +878,198 @@ class ClipboardLogger:
                     os.remove(temp_file)
                 except OSError:
                     pass
+            return False
 
     def _process_image_data(self, content: ClipboardContent, data_dict: dict) -> dict:
         """处理图片数据"""
         if (content.content_type != ContentType.IMAGE.value or
-            JsonKeys.IMAGE_DATA not in content.data):
+            content.image_bytes is None):
             return data_dict
-            
+
+        if self.image_store is not None:
+            image_hash = self._store_image(content)
+            if image_hash:
+                data_dict[JsonKeys.IMAGE_HASH] = image_hash
+            return data_dict
+
         image_path = self._save_image(content)
         if image_path:
             data_dict[JsonKeys.IMAGE_PATH] = image_path
             
-        if self._config.get(ConfigKeys.Logging.SECTION, ConfigKeys.Logging.SAVE_IMAGE_BASE64):
-            data_dict[JsonKeys.IMAGE_BASE64] = content.data[JsonKeys.IMAGE_DATA]
+        if self._config.settings.save_image_base64:
+            data_dict[JsonKeys.IMAGE_BASE64] = content.image_base64()
             
-        del data_dict[JsonKeys.IMAGE_DATA]
         return data_dict
 
+    def _append_journal(self, log_file: str, records: List[dict]):
+        """以追加方式写入 JSONL 日志。不分段时超出上限较多则压缩重写，分段时写满后由下一个分段接替"""
+        max_entries = self._config.settings.max_entries_per_file
+        try:
+            count = self._journal.append(log_file, records)
+            if self.dedup_index is not None:
+                self.dedup_index.add(log_file, records)
+            if not self.segmented and count - max_entries > max(1, int(max_entries * JOURNAL_COMPACT_RATIO)):
+                dropped = self._journal.compact(log_file, max_entries)
+                remaining = (
+                    self._read_log_file(log_file, decode=False)
+                    if self.dedup_index is not None or self.delta_text else None
+                )
+                self._retire_entries(log_file, dropped, remaining)
+        except (IOError, OSError) as e:
+            print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+
+    def _read_newest_entry(self, log_file: str) -> Optional[dict]:
+        """只读取日志文件中最新的一条记录，不解析整个文件。
+
+        JSONL 日志从文件末尾读取最后一行；JSON 日志按时间从新到旧排列，
+        从文件开头增量读取并只解析数组中的第一个元素。
+        """
+        if self._is_journal(log_file):
+            try:
+                entry = read_last_record(log_file)
+                return decode_record(entry) if entry is not None else None
+            except IOError as e:
+                print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+                return None
+        if not os.path.exists(log_file):
+            return None
+
+        decoder = json.JSONDecoder()
+        read_size = HEAD_READ_SIZE
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                head = ""
+                while True:
+                    chunk = f.read(read_size)
+                    head += chunk
+                    stripped = head.lstrip()
+                    if stripped[:1] not in ('', '['):
+                        break
+                    body = stripped[1:].lstrip()
+                    if body[:1] == ']':
+                        return None
+                    if body:
+                        try:
+                            entry, _ = decoder.raw_decode(body)
+                            return decode_record(entry) if isinstance(entry, dict) else None
+                        except json.JSONDecodeError:
+                            pass
+                    if not chunk:
+                        break
+                    read_size *= 2
+        except IOError as e:
+            print(Messages.Error.READ_LOG_ERROR.format(str(e)))
+            return None
+        # 文件格式异常时退回完整读取，由其负责备份损坏的日志
+        data = self._read_log_file(log_file)
+        return data[0] if data else None
+
+    def get_last_entry(self) -> Optional[dict]:
+        """获取当天日志中最新的一条记录"""
+        if self.storage_format == StorageFormat.SQLITE.value:
+            return self.history_db.latest()
+        return self._read_newest_entry(self._get_log_file())
+
+    def close(self):
+        """关闭日志，确保已追加的数据落盘"""
+        with self.lock:
+            if self.read_only:
+                for reader in (self.history_db, self.preview_cache):
+                    if reader is not None:
+                        reader.close()
+                return
+            try:
+                self._journal.close()
+            except (IOError, OSError) as e:
+                print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+            if self.dedup_index is not None:
+                self.dedup_index.save()
+            if self.image_store is not None:
+                self.image_store.flush()
+            if self.history_db is not None:
+                self.history_db.close()
+            if self.preview_cache is not None:
+                self.preview_cache.close()
+
     def save(self, content: ClipboardContent):
         """保存剪贴板内容到日志"""
-        data_dict = content.to_dict()
-        data_dict = self._process_image_data(content, data_dict)
-        
-        log_file = self._get_log_file()
-        existing_data = self._read_log_file(log_file)
-        
+        self.save_batch([content])
+
+    def save_batch(self, contents: List[ClipboardContent]):
+        """一次性保存多条剪贴板内容，日志文件只写入一次。
+
+        Args:
+            contents (List[ClipboardContent]): 按捕获顺序排列的剪贴板内容
+        """
+        # 先在锁外等待后台编码的图片完成，编码失败或过大的图片不保存
+        contents = [content for content in contents if content.resolve_image()]
+        if not contents:
+            return
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                self._write_batch(contents)
+        finally:
+            _SAVE_SECONDS.observe(time.perf_counter() - start)
+        _SAVED_ENTRIES.inc(len(contents))
+
+    def _write_batch(self, contents: List[ClipboardContent]):
+        """写入一批已编码的内容，调用方需持有锁"""
+        records = self._build_records(contents)
+        if self.image_store is not None:
+            # 引用计数先于日志记录落盘，崩溃时图片只会残留，不会在仍被引用时被删除
+            self.image_store.flush()
+        if self.preview_cache is not None:
+            for content in contents:
+                self.preview_cache.put_content(content)
+
+        if self.history_db is not None:
+            try:
+                self.history_db.insert_records(records)
+            except Exception as e:
+                print(Messages.Error.DATABASE_ERROR.format(str(e)))
+            if self.storage_format == StorageFormat.SQLITE.value:
+                return
+
+        # 按记录自身的时间戳分日写入，跨过午夜的一批记录会分别写入前后两天的日志
+        today = datetime.now().strftime(FileFormat.LOG_FILE_DATE_FORMAT)
+        days: Dict[str, List[dict]] = {}
+        for record in records:
+            days.setdefault(self._record_day(record, today), []).append(record)
+        for day in sorted(days):
+            log_file = self._writable_log_file(day, today)
+            day_records = self._encode_deltas(log_file, days[day]) if self.delta_text else days[day]
+            day_records = [
+                compress_record(record, self.compress_text_threshold, self.compression_codec)
+                for record in day_records
+            ]
+            if self.storage_format == StorageFormat.JSONL.value:
+                self._append_journal(log_file, day_records)
+            else:
+                self._merge_into_log_file(log_file, day_records)
+        if self._current_day is not None and today != self._current_day:
+            # 跨天后上一天的日志不会再写入，可以封存
+            self.seal_old_logs()
+        self._current_day = today
+
+    def _merge_into_log_file(self, log_file: str, records: List[dict]):
+        """将记录并入 JSON 数组日志，超出记录上限时删除最旧的记录"""
+        existing_data = self._read_log_file(log_file, decode=False)
+
         # 添加新数据并排序
-        existing_data.append(data_dict)
+        existing_data.extend(records)
         existing_data.sort(
             key=lambda x: x.get(JsonKeys.TIMESTAMP, ""),
             reverse=True
         )
-        
+
         # 限制记录数量
-        max_entries = self._config.get(
-            ConfigKeys.Logging.SECTION,
-            ConfigKeys.Logging.MAX_ENTRIES
-        )
-        if len(existing_data) > max_entries:
-            existing_data = existing_data[:max_entries]
-        
-        self._write_log_file(log_file, existing_data) 
\ No newline at end of file
+        max_entries = self._config.settings.max_entries_per_file
+        dropped = existing_data[max_entries:]
+        existing_data = existing_data[:max_entries]
+
+        self._write_log_file(log_file, existing_data)
+        if dropped:
+            self._retire_entries(log_file, dropped, existing_data)
+        elif self.dedup_index is not None:
+            self.dedup_index.add(log_file, records)
@@ -0,0 +1,345 @@
+"""运行指标模块
+
+此模块提供进程内的计数器和耗时直方图，用于观察监控循环各环节的耗时、写入量和去重命中情况。
+各模块在导入时向全局的 REGISTRY 注册自己的指标，在热路径上只做一次加锁累加，
+不分配对象、不做格式化，开销远小于一次剪贴板读取。
+
+指标可以通过本机 HTTP 端点以 Prometheus 文本格式或 JSON 读取，也可以定期写入 JSON 文件。
+
+Classes:
+    Counter: 单调递增的计数器
+    Histogram: 固定分桶的耗时直方图
+    MetricsRegistry: 指标注册表，负责生成 Prometheus 文本和 JSON
+    MetricsExporter: 按配置启动 HTTP 端点和定期写入 JSON 文件的导出器
+
+Attributes:
+    REGISTRY (MetricsRegistry): 全局指标注册表
+"""
+import os
+import json
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .config import Config
+from .constants import ConfigKeys, FileFormat, Messages
+
+# 耗时直方图的分桶上限（秒），覆盖 10 微秒到 10 秒
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Prometheus 文本格式的 Content-Type
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# HTTP 端点路径
+METRICS_PATH = "/metrics"
+METRICS_JSON_PATH = "/metrics.json"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """单调递增的计数器。
+
+    Attributes:
+        value (float): 当前计数
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: Union[int, float] = 1):
+        """增加计数"""
+        with self._lock:
+            self.value += amount
+
+    def sample(self) -> Dict[str, Any]:
+        """当前取值，用于 JSON 导出"""
+        return {"value": self.value}
+
+
+class Histogram:
+    """固定分桶的耗时直方图。
+
+    每个桶只记录落在该区间内的次数，导出时再累加为 Prometheus 要求的累计计数。
+
+    Attributes:
+        buckets (Tuple[float, ...]): 各桶的上限（秒）
+        count (int): 观测次数
+        total (float): 观测值之和（秒）
+        max (float): 最大观测值（秒）
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        # 最后一个桶对应 +Inf
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """记录一次观测值"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """各桶上限及小于等于该上限的累计次数，最后一项为 +Inf"""
+        with self._lock:
+            counts = list(self._counts)
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """按分桶估算分位数，返回所在桶的上限（秒），没有观测值时返回 0"""
+        buckets = self.cumulative()
+        total = buckets[-1][1]
+        if not total:
+            return 0.0
+        for bound, running in buckets:
+            if running >= q * total:
+                return self.max if bound == float("inf") else min(bound, self.max)
+        return self.max
+
+    def sample(self) -> Dict[str, Any]:
+        """汇总值，用于 JSON 导出，耗时单位为毫秒"""
+        count = self.count
+        return {
+            "count": count,
+            "avg_ms": self.total / count * 1000 if count else 0.0,
+            "p50_ms": self.quantile(0.5) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class MetricsRegistry:
+    """指标注册表。
+
+    同名指标按标签区分，例如 clipboard_read_seconds{step="text"} 与
+    clipboard_read_seconds{step="image"} 属于同一个指标族。同名同标签的指标只创建一次，
+    重复注册返回已有的实例。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 指标名 -> (类型, 说明, {标签: 指标})
+        self._families: Dict[str, Tuple[str, str, Dict[Labels, Union[Counter, Histogram]]]] = {}
+        self.started = time.time()
+
+    def _register(self, kind: str, name: str, help_text: str, labels: Dict[str, str], factory):
+        """注册指标，已存在时返回已有的实例"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help_text, {}))
+            if family[0] != kind:
+                raise ValueError(f"metric {name} already registered as {family[0]}")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = factory()
+            return metric
+
+    def counter(self, name: str, help_text: str, **labels: str) -> Counter:
+        """注册计数器。
+
+        Args:
+            name (str): 指标名，按 Prometheus 习惯以 _total 结尾
+            help_text (str): 指标说明
+            **labels (str): 标签
+
+        Returns:
+            Counter: 计数器
+        """
+        return self._register("counter", name, help_text, labels, Counter)
+
+    def histogram(self, name: str, help_text: str, **labels: str) -> Histogram:
+        """注册耗时直方图。
+
+        Args:
+            name (str): 指标名，按 Prometheus 习惯以 _seconds 结尾
+            help_text (str): 指标说明
+            **labels (str): 标签
+
+        Returns:
+            Histogram: 直方图
+        """
+        return self._register("histogram", name, help_text, labels, Histogram)
+
+    def _items(self) -> List[Tuple[str, str, str, List[Tuple[Labels, Union[Counter, Histogram]]]]]:
+        """按名称排序的指标族"""
+        with self._lock:
+            return [
+                (name, kind, help_text, sorted(metrics.items()))
+                for name, (kind, help_text, metrics) in sorted(self._families.items())
+            ]
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+        """生成 Prometheus 标签字符串"""
+        pairs = list(labels) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def to_prometheus(self) -> str:
+        """生成 Prometheus 文本格式的全部指标"""
+        lines = []
+        for name, kind, help_text, metrics in self._items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in metrics:
+                if isinstance(metric, Counter):
+                    lines.append(f"{name}{self._format_labels(labels)} {metric.value}")
+                    continue
+                for bound, running in metric.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{self._format_labels(labels, ('le', le))} {running}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {metric.total}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """生成便于阅读的 JSON 汇总，直方图只包含次数、平均值、分位数和最大值"""
+        result: Dict[str, Any] = {"timestamp": time.time(), "uptime_seconds": time.time() - self.started}
+        for name, kind, _, metrics in self._items():
+            result[name] = [dict(labels, **metric.sample()) for labels, metric in metrics]
+        return result
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """返回指标的 HTTP 请求处理器"""
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == METRICS_PATH:
+            body, content_type = self.registry.to_prometheus().encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+        elif path == METRICS_JSON_PATH:
+            body = json.dumps(self.registry.to_dict(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """不打印每次请求的访问日志"""
+
+
+class MetricsExporter:
+    """按配置导出运行指标。
+
+    http_port 大于 0 时在 http_host 上提供 /metrics（Prometheus 文本格式）和 /metrics.json；
+    dump_file 不为空时每隔 dump_interval 秒将 JSON 汇总写入该文件，退出时再写一次。
+    拆分模式下存储进程传入 port_offset=1 和 role="store"，与捕获进程使用不同的端口和文件。
+
+    Attributes:
+        registry (MetricsRegistry): 要导出的指标注册表
+        address (Optional[Tuple[str, int]]): HTTP 端点实际监听的地址，未启动时为 None
+    """
+
+    def __init__(self, config: Config, registry: MetricsRegistry = REGISTRY,
+                 port_offset: int = 0, role: str = ""):
+        """根据配置初始化导出器，不立即启动。
+
+        Args:
+            config (Config): 配置对象
+            registry (MetricsRegistry, optional): 要导出的指标注册表。默认为全局注册表
+            port_offset (int, optional): 在配置的端口上增加的偏移。默认为 0
+            role (str, optional): 进程角色，不为空时写入文件名中扩展名之前。默认为空
+        """
+        self.registry = registry
+        self.host = config.get(ConfigKeys.Metrics.SECTION, ConfigKeys.Metrics.HTTP_HOST)
+        port = config.get(ConfigKeys.Metrics.SECTION, ConfigKeys.Metrics.HTTP_PORT)
+        self.port = port + port_offset if port > 0 else 0
+        self.dump_file = config.get(ConfigKeys.Metrics.SECTION, ConfigKeys.Metrics.DUMP_FILE)
+        if self.dump_file and role:
+            root, extension = os.path.splitext(self.dump_file)
+            self.dump_file = f"{root}.{role}{extension}"
+        self.dump_interval = config.get(ConfigKeys.Metrics.SECTION, ConfigKeys.Metrics.DUMP_INTERVAL)
+        self.address: Optional[Tuple[str, int]] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """启动 HTTP 端点和定期写入线程，端口被占用时打印错误并继续运行"""
+        if self._threads:
+            return
+        self._stop_event.clear()
+        if self.port > 0:
+            try:
+                handler = type("MetricsHandler", (_MetricsHandler,), {"registry": self.registry})
+                self._server = ThreadingHTTPServer((self.host, self.port), handler)
+                self._server.daemon_threads = True
+                self.address = self._server.server_address[:2]
+                self._spawn(self._server.serve_forever, "clipboard-metrics-http")
+                print(Messages.Info.METRICS_SERVER_START.format(self.address[0], self.address[1], METRICS_PATH))
+            except OSError as e:
+                print(Messages.Error.METRICS_ERROR.format(str(e)))
+                self._server = None
+        if self.dump_file and self.dump_interval > 0:
+            self._spawn(self._dump_loop, "clipboard-metrics-dump")
+
+    def _spawn(self, target, name: str):
+        """启动一个后台线程"""
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _dump_loop(self):
+        """定期写入 JSON 汇总"""
+        while not self._stop_event.wait(self.dump_interval):
+            self.dump()
+
+    def dump(self) -> bool:
+        """将 JSON 汇总写入 dump_file，先写临时文件再替换，读取方不会读到写了一半的文件"""
+        if not self.dump_file:
+            return False
+        temp_file = f"{self.dump_file}{FileFormat.TEMP_FILE_SUFFIX}"
+        try:
+            directory = os.path.dirname(self.dump_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.registry.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.dump_file)
+            return True
+        except OSError as e:
+            print(Messages.Error.METRICS_ERROR.format(str(e)))
+            return False
+
+    def stop(self):
+        """停止 HTTP 端点和写入线程，并最后写入一次 JSON 汇总"""
+        if not self._threads:
+            return
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.dump_file:
+            self.dump()
@@ -3,13 +3,50 @@
 此模块包含剪贴板内容的数据模型类，用于存储和处理剪贴板数据。
 
 Classes:
+    RawImage: 未编码的图片像素数据
     ClipboardContent: 剪贴板内容的数据模型类
 """
-from typing import Dict, Any, Optional
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Tuple, Union
 from datetime import datetime
+import time
 import hashlib
 import base64
-from .constants import ContentType, JsonKeys
+from .constants import ContentType, FileFormat, JsonKeys
+from .metrics import REGISTRY
+
+_HASH_SECONDS = REGISTRY.histogram("clipboard_hash_seconds", "计算内容哈希的耗时（秒）", kind="content")
+
+class RawImage:
+    """未编码的图片像素数据。
+
+    拆分进程模式下捕获进程只读取像素，图片编码交给存储进程完成。
+
+    Attributes:
+        mode (str): PIL 图片模式，例如 RGB
+        size (Tuple[int, int]): 图片宽高
+        pixels (Union[bytes, memoryview]): 原始像素数据，放在共享内存中时为共享内存的视图
+        handle (Optional[Any]): 像素所在的共享内存缓冲区（shared_buffer.SharedBuffer），
+            不使用共享内存时为 None
+    """
+
+    __slots__ = ("mode", "size", "pixels", "handle")
+
+    def __init__(self, mode: str, size: Tuple[int, int], pixels: Union[bytes, memoryview],
+                 handle: Optional[Any] = None):
+        """初始化像素数据。
+
+        Args:
+            mode (str): PIL 图片模式
+            size (Tuple[int, int]): 图片宽高
+            pixels (Union[bytes, memoryview]): 原始像素数据
+            handle (Optional[Any], optional): 像素所在的共享内存缓冲区
+        """
+        self.mode = mode
+        self.size = tuple(size)
+        self.pixels = pixels
+        self.handle = handle
+
 
 class ClipboardContent:
     """剪贴板内容的数据模型类，负责内容的存储和处理。
@@ -17,13 +54,35 @@ class ClipboardContent:
     此类用于存储从剪贴板读取的各种类型的内容（文本、图片、文件路径等），
     并提供将内容转换为可序列化格式的方法。
 
+    每秒可能创建大量实例，因此使用 __slots__ 减少内存占用。内容哈希和 to_dict 生成的记录
+    都只计算一次并缓存，set_* 方法会清除缓存；内容交给日志管理器保存之后不应再直接修改属性。
+
     Attributes:
         timestamp (str): 内容的时间戳，ISO格式
         content_type (str): 内容类型，可以是 text、image 或 files
         formats (Dict[str, int]): 剪贴板中可用的格式信息
         data (Dict[str, Any]): 实际的内容数据，根据类型不同而不同
+        image_bytes (Optional[Union[bytes, memoryview]]): 编码后的原始图片数据，
+            不放入 data 中，也不做 base64 编码，直到确实需要时才转换
+        image_format (str): 图片的编码格式，取值见 FileFormat.IMAGE_EXTENSIONS
+        thumbnail_bytes (Optional[bytes]): 编码后的缩略图，未生成时为 None
+        thumbnail_format (Optional[str]): 缩略图的编码格式
+        pending_thumbnail (Optional[Future]): 正在后台生成的缩略图，结果为 image_codec.EncodedImage，
+            写入预览时通过 resolve_thumbnail 取得
+        pending_image (Optional[Future]): 尚未完成的图片编码任务，
+            结果为 image_codec.EncodedImage，保存前通过 resolve_image 取得
+        pixel_hash (Optional[str]): 图片原始像素数据的哈希，在编码之前计算
+        raw_image (Optional[RawImage]): 尚未编码的图片像素数据，只在拆分进程模式下使用
+        source (Optional[str]): 内容来源的名称，多个捕获进程共用一个存储进程时使用
+        similarity_hash (Optional[str]): 相似指纹，启用相似内容检测时计算，见 similarity 模块
     """
 
+    __slots__ = (
+        "timestamp", "content_type", "formats", "data", "image_bytes", "image_format",
+        "thumbnail_bytes", "thumbnail_format", "pending_thumbnail", "pending_image", "pixel_hash", "raw_image", "source",
+        "similarity_hash", "_hash", "_record",
+    )
+
     def __init__(self):
         """初始化一个新的剪贴板内容对象。
         
@@ -33,31 +92,202 @@ class ClipboardContent:
         self.content_type: str = ContentType.UNKNOWN.value
         self.formats: Dict[str, int] = {}
         self.data: Dict[str, Any] = {}
+        self.image_bytes: Optional[Union[bytes, memoryview]] = None
+        self.image_format: str = FileFormat.IMAGE_FORMAT
+        self.thumbnail_bytes: Optional[bytes] = None
+        self.thumbnail_format: Optional[str] = None
+        self.pending_thumbnail: Optional[Future] = None
+        self.pending_image: Optional[Future] = None
+        self.pixel_hash: Optional[str] = None
+        self.raw_image: Optional[RawImage] = None
+        self.source: Optional[str] = None
+        self.similarity_hash: Optional[str] = None
+        self._hash: Optional[str] = None
+        self._record: Optional[Dict[str, Any]] = None
+
+    def set_image_bytes(self, image_bytes: Union[bytes, memoryview], image_format: str = FileFormat.IMAGE_FORMAT,
+                        thumbnail: Optional[bytes] = None, thumbnail_format: Optional[str] = None):
+        """设置编码后的图片数据。
+
+        Args:
+            image_bytes (Union[bytes, memoryview]): 编码后的图片数据，可以是内存视图以避免复制
+            image_format (str, optional): 图片的编码格式。默认为 PNG
+            thumbnail (Optional[bytes], optional): 编码后的缩略图
+            thumbnail_format (Optional[str], optional): 缩略图的编码格式
+        """
+        self.image_bytes = image_bytes
+        self.image_format = image_format
+        self.thumbnail_bytes = thumbnail
+        self.thumbnail_format = thumbnail_format
+        self.pending_thumbnail = None
+        self.raw_image = None
+        self.pending_image = None
+        self.content_type = ContentType.IMAGE.value
+        self._hash = None
+        self._record = None
+
+    def reuse_hash(self, content_hash: str):
+        """沿用已知的内容哈希，不再根据内容计算。
+
+        图片像素与上一条记录相同时使用，从而跳过图片编码。
+
+        Args:
+            content_hash (str): 已知的内容哈希
+        """
+        self.content_type = ContentType.IMAGE.value
+        self._hash = content_hash
+        self._record = None
+
+    def set_raw_image(self, raw_image: RawImage, pixel_hash: str):
+        """设置尚未编码的图片像素数据。
+
+        编码完成之前没有编码后的数据，以像素哈希作为内容哈希判断是否与上一条重复；
+        存储进程编码后调用 set_image_bytes，内容哈希随之改为编码后数据的 SHA-256。
+
+        Args:
+            raw_image (RawImage): 图片像素数据
+            pixel_hash (str): 像素哈希
+        """
+        self.raw_image = raw_image
+        self.pixel_hash = pixel_hash
+        self.content_type = ContentType.IMAGE.value
+        self._hash = pixel_hash
+        self._record = None
+
+    def set_encoded_image(self, encoded: Any):
+        """设置图片编码器的编码结果。
+
+        Args:
+            encoded (image_codec.EncodedImage): 编码后的图片及其缩略图
+        """
+        self.set_image_bytes(encoded.data, encoded.format)
+        self.pending_thumbnail = encoded.thumbnail
+
+    def resolve_thumbnail(self):
+        """等待后台生成的缩略图完成并设置缩略图数据，生成失败时没有缩略图"""
+        if self.pending_thumbnail is None:
+            return
+        thumbnail = self.pending_thumbnail.result()
+        self.pending_thumbnail = None
+        if thumbnail is not None:
+            self.thumbnail_bytes = thumbnail.data
+            self.thumbnail_format = thumbnail.format
+
+    def set_pending_image(self, pending: Future, pixel_hash: str):
+        """设置正在后台编码的图片。
+
+        编码完成之前与 set_raw_image 相同，以像素哈希作为内容哈希判断是否与上一条重复。
+
+        Args:
+            pending (Future): 图片编码任务，结果为 Optional[image_codec.EncodedImage]
+            pixel_hash (str): 像素哈希
+        """
+        self.pending_image = pending
+        self.pixel_hash = pixel_hash
+        self.content_type = ContentType.IMAGE.value
+        self._hash = pixel_hash
+        self._record = None
+
+    def resolve_image(self) -> bool:
+        """等待后台编码完成并设置编码后的图片数据，内容哈希随之改为编码数据的 SHA-256。
+
+        Returns:
+            bool: 内容是否可以保存，编码失败或图片过大时返回 False
+        """
+        if self.pending_image is None:
+            return True
+        encoded = self.pending_image.result()
+        self.pending_image = None
+        if encoded is None:
+            return False
+        self.set_encoded_image(encoded)
+        return True
+
+    def set_truncated_text(self, data: Dict[str, Any], content_hash: str):
+        """设置只记录了开头部分的超长文本。
+
+        完整文本没有读入内存，其哈希在流式读取时计算，不能再由预览重新计算。
+
+        Args:
+            data (Dict[str, Any]): 预览、完整长度等日志字段
+            content_hash (str): 完整文本的哈希
+        """
+        self.data.update(data)
+        self.content_type = ContentType.TEXT.value
+        self._hash = content_hash
+        self._record = None
+
+    def set_similarity_hash(self, fingerprint: Optional[str]):
+        """设置相似指纹。
+
+        Args:
+            fingerprint (Optional[str]): 带算法前缀的相似指纹
+        """
+        self.similarity_hash = fingerprint
+        self._record = None
+
+    def image_base64(self) -> Optional[str]:
+        """按需生成图片数据的 base64 编码。
+
+        Returns:
+            Optional[str]: base64 编码的图片数据，没有图片时返回 None
+        """
+        if self.image_bytes is None:
+            return None
+        return base64.b64encode(self.image_bytes).decode('ascii')
 
     def to_dict(self) -> Dict[str, Any]:
         """将对象转换为可序列化的字典格式。
 
+        记录在第一次调用时生成并缓存，之后返回缓存的浅拷贝，
+        控制台预览和日志管理器各自增删顶层字段时互不影响。
+
         Returns:
             Dict[str, Any]: 包含所有属性的字典，可以直接序列化为JSON
         """
+        if self._record is None:
+            self._record = self._build_record()
+        return dict(self._record)
+
+    def _build_record(self) -> Dict[str, Any]:
+        """生成日志记录的字典"""
         result = {
             JsonKeys.TIMESTAMP: self.timestamp,
             JsonKeys.CONTENT_TYPE: self.content_type,
             JsonKeys.AVAILABLE_FORMATS: self.formats
         }
         result.update(self.data)
+        content_hash = self.get_hash()
+        if content_hash:
+            result[JsonKeys.CONTENT_HASH] = content_hash
+        if self.pixel_hash:
+            result[JsonKeys.PIXEL_HASH] = self.pixel_hash
+        if self.source:
+            result[JsonKeys.SOURCE] = self.source
+        if self.similarity_hash:
+            result[JsonKeys.SIMILARITY_HASH] = self.similarity_hash
         return result
 
     def get_hash(self) -> Optional[str]:
-        """获取内容的MD5哈希值。
+        """获取内容的哈希值。
 
-        根据内容类型计算相应内容的MD5哈希值，用于判断内容是否发生变化。
+        根据内容类型计算相应内容的哈希值，用于判断内容是否发生变化。
+        图片使用 SHA-256，直接作为图片存储的内容哈希；文本和文件路径使用 MD5。
+        哈希值只计算一次，之后直接返回缓存结果。
 
         Returns:
-            Optional[str]: 内容的MD5哈希值，如果无法计算则返回None
+            Optional[str]: 内容的哈希值，如果无法计算则返回None
         """
-        if self.content_type == ContentType.IMAGE.value and JsonKeys.IMAGE_DATA in self.data:
-            return hashlib.md5(base64.b64decode(self.data[JsonKeys.IMAGE_DATA])).hexdigest()
+        if self._hash is None:
+            start = time.perf_counter()
+            self._hash = self._compute_hash()
+            _HASH_SECONDS.observe(time.perf_counter() - start)
+        return self._hash
+
+    def _compute_hash(self) -> Optional[str]:
+        """计算内容的哈希值"""
+        if self.content_type == ContentType.IMAGE.value and self.image_bytes is not None:
+            return hashlib.sha256(self.image_bytes).hexdigest()
         elif self.content_type == ContentType.TEXT.value and JsonKeys.TEXT_CONTENT in self.data:
             return hashlib.md5(self.data[JsonKeys.TEXT_CONTENT].encode('utf-8')).hexdigest()
         elif self.content_type == ContentType.FILES.value and JsonKeys.FILE_PATHS in self.data:
@@ -3,117 +3,196 @@ import os
 import json
 import time
 import hashlib
-import win32clipboard
-import win32con
-import pyperclip
-from PIL import ImageGrab, Image
-import io
+import threading
+from PIL import Image
 import base64
-from typing import Dict, Optional, Any
+from typing import Dict, Iterable, Optional, Any
 from .constants import (
-    ContentType, FileFormat, JsonKeys,
-    ConfigKeys, Messages
+    ContentType, JsonKeys,
+    ConfigKeys, Messages, DetectionMode, OversizedText, Paths, NearDuplicateMode
 )
-from .models import ClipboardContent
-from .config import Config
+from .models import ClipboardContent, RawImage
+from .config import Config, ConfigWatcher, Settings
 from .logger import ClipboardLogger
+from .pipeline import PersistencePipeline
+from .retention import RetentionEngine
+from .backends import ClipboardBackend, Win32ClipboardBackend
+from .hashing import buffer_hash, pixel_hash
+from .similarity import SIMILARITY_SECONDS, image_fingerprint
+from .image_codec import ImageEncoder
+from .large_text import TEXT_CHUNK_SIZE, capture_text
+from .metrics import REGISTRY, Histogram, MetricsExporter
+
+_READ_HELP = "读取剪贴板内容各环节的耗时（秒）"
+_FORMATS_SECONDS = REGISTRY.histogram("clipboard_read_seconds", _READ_HELP, step="formats")
+_IMAGE_SECONDS = REGISTRY.histogram("clipboard_read_seconds", _READ_HELP, step="image")
+_TEXT_SECONDS = REGISTRY.histogram("clipboard_read_seconds", _READ_HELP, step="text")
+_FILES_SECONDS = REGISTRY.histogram("clipboard_read_seconds", _READ_HELP, step="files")
+_PIXEL_HASH_SECONDS = REGISTRY.histogram("clipboard_hash_seconds", "计算内容哈希的耗时（秒）", kind="pixel")
+_CHECK_SECONDS = REGISTRY.histogram(
+    "clipboard_check_seconds", "剪贴板变更序号变化后一次检查并提交保存的耗时（秒）"
+)
+_CHANGES = REGISTRY.counter("clipboard_changes_total", "剪贴板变更序号发生变化的次数")
+_CAPTURED = {
+    content_type.value: REGISTRY.counter("clipboard_captured_total", "提交保存的内容条数", type=content_type.value)
+    for content_type in ContentType
+}
+_LAST_DEDUP_HITS = REGISTRY.counter("clipboard_dedup_hits_total", "判定为重复内容的次数", scope="last")
+_PIXEL_DEDUP_HITS = REGISTRY.counter("clipboard_dedup_hits_total", "判定为重复内容的次数", scope="pixel")
+_ERRORS_HELP = "监控循环中捕获到的错误次数"
+_READ_ERRORS = REGISTRY.counter("clipboard_errors_total", _ERRORS_HELP, where="read")
+_LOOP_ERRORS = REGISTRY.counter("clipboard_errors_total", _ERRORS_HELP, where="loop")
+
+# 读取剪贴板失败（例如剪贴板被其他进程占用）后，同一变更序号最多重新读取的次数
+READ_RETRIES = 3
 
 
 class ClipboardMonitor:
-    """程序的核心类，负责监控和处理剪贴板变化"""
-    def __init__(self):
-        self._config = Config()
-        self.logger = ClipboardLogger(self._config)
+    """程序的核心类，负责监控和处理剪贴板变化
+
+    传入 store（ipc.RemoteStore）时作为拆分模式下的捕获进程运行：不创建日志管理器，
+    图片只读取原始像素，编码和写入都交给存储进程完成。
+    """
+    def __init__(self, config: Optional[Config] = None, backend: Optional[ClipboardBackend] = None,
+                 store=None):
+        self._config = config or Config()
+        self.backend = backend or Win32ClipboardBackend()
+        self.store = store
+        self.logger: Optional[ClipboardLogger] = None
+        self.pipeline: Optional[PersistencePipeline] = None
+        self.retention: Optional[RetentionEngine] = None
+        self.encoder: Optional[ImageEncoder] = None
         self.last_hash: Optional[str] = None
+        self.last_pixel_hash: Optional[str] = None
+        self.last_sequence: Optional[int] = None
+        # 本次读取剪贴板时是否出错，以及连续读取失败的变更序号和次数
+        self._read_failed = False
+        self._failed_sequence: Optional[int] = None
+        self._failed_reads = 0
+        # 启用相似内容检测时，图片的相似指纹在读取剪贴板时由像素计算
+        self.image_fingerprints = (
+            self._config.get(ConfigKeys.Similarity.SECTION, ConfigKeys.Similarity.MODE) != NearDuplicateMode.OFF.value
+        )
+        self._stop_event = threading.Event()
+        self.config_watcher = ConfigWatcher(self._config, self._on_settings_reloaded)
+        self.metrics_exporter = MetricsExporter(self._config)
+        if store is None:
+            self._init_storage()
         self._load_last_hash()
 
+    def _init_storage(self):
+        """单进程模式下创建日志管理器、图片编码器、写入流水线和保留策略执行器"""
+        self.logger = ClipboardLogger(self._config)
+        self.encoder = ImageEncoder(self._config)
+        if self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.ENABLE_ASYNC):
+            self.pipeline = PersistencePipeline(
+                self.logger,
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.QUEUE_SIZE),
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.BATCH_SIZE),
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.DROP_POLICY),
+                self._config.get(ConfigKeys.Pipeline.SECTION, ConfigKeys.Pipeline.BLOCK_TIMEOUT)
+            )
+        self.retention = RetentionEngine(self.logger, self._config)
+
     def _get_last_entry_hash(self, last_entry: Dict[str, Any]) -> Optional[str]:
         """计算最后一条记录的哈希值"""
+        if JsonKeys.CONTENT_HASH in last_entry:
+            return last_entry[JsonKeys.CONTENT_HASH]
+
+        # 兼容没有记录内容哈希的旧日志
         content_type = last_entry.get(JsonKeys.CONTENT_TYPE)
         if content_type == ContentType.TEXT.value and JsonKeys.TEXT_CONTENT in last_entry:
             return hashlib.md5(last_entry[JsonKeys.TEXT_CONTENT].encode('utf-8')).hexdigest()
+        if content_type == ContentType.IMAGE.value and JsonKeys.IMAGE_HASH in last_entry:
+            return last_entry[JsonKeys.IMAGE_HASH]
         if content_type == ContentType.IMAGE.value and JsonKeys.IMAGE_BASE64 in last_entry:
-            return hashlib.md5(base64.b64decode(last_entry[JsonKeys.IMAGE_BASE64])).hexdigest()
+            return hashlib.sha256(base64.b64decode(last_entry[JsonKeys.IMAGE_BASE64])).hexdigest()
         if content_type == ContentType.FILES.value and JsonKeys.FILE_PATHS in last_entry:
             return hashlib.md5(str(last_entry[JsonKeys.FILE_PATHS]).encode('utf-8')).hexdigest()
         return None
 
     def _load_last_hash(self):
         """从日志文件中加载最后一条记录的哈希值"""
-        log_file = self.logger._get_log_file()
-        if not os.path.exists(log_file):
-            return
-
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:
-                    return
-                
-                data = json.loads(content)
-                if not isinstance(data, list) or not data:
-                    return
-                
-                self.last_hash = self._get_last_entry_hash(data[0])
-        except (json.JSONDecodeError, IOError) as e:
+            if self.store is not None:
+                last_entry = self.store.get_last_entry()
+            else:
+                last_entry = self.logger.get_last_entry()
+            if last_entry:
+                self.last_hash = self._get_last_entry_hash(last_entry)
+                self.last_pixel_hash = last_entry.get(JsonKeys.PIXEL_HASH)
+        except Exception as e:
             print(Messages.Error.LOAD_HISTORY_ERROR.format(str(e)))
 
-    def _get_clipboard_format_name(self, format_id: int) -> str:
-        """获取剪贴板格式名称"""
-        try:
-            return win32clipboard.GetClipboardFormatName(format_id)
-        except win32clipboard.error:
-            return f"Unknown Format ({format_id})"
-
     def _get_clipboard_formats(self) -> Dict[str, int]:
         """获取剪贴板格式信息"""
-        formats = {}
-        clipboard_opened = False
         try:
-            win32clipboard.OpenClipboard()
-            clipboard_opened = True
-            format_id = 0
-            while format_id := win32clipboard.EnumClipboardFormats(format_id):
-                format_name = self._get_clipboard_format_name(format_id)
-                formats[format_name] = format_id
-        except win32clipboard.error:
-            pass
-        finally:
-            if clipboard_opened:
-                try:
-                    win32clipboard.CloseClipboard()
-                except win32clipboard.error:
-                    pass
-        return formats
+            return self.backend.get_formats()
+        except Exception as e:
+            self._read_error(Messages.Error.MONITOR_ERROR, e)
+            return {}
 
     def _read_image_content(self, content: ClipboardContent) -> Optional[ClipboardContent]:
         """读取剪贴板中的图片内容"""
-        if not self._config.get(ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.ENABLE_IMAGE):
+        if not self._config.settings.enable_image:
             return None
             
         try:
-            image = ImageGrab.grabclipboard()
+            image = self.backend.get_image()
             if isinstance(image, Image.Image):
                 return self._process_pil_image(content, image)
             if isinstance(image, list) and len(image) > 0 and os.path.isfile(image[0]):
                 return self._process_image_file(content, image[0])
         except Exception as e:
-            print(Messages.Error.GET_CLIPBOARD_IMAGE_ERROR.format(str(e)))
+            self._read_error(Messages.Error.GET_CLIPBOARD_IMAGE_ERROR, e)
         return None
 
     def _process_pil_image(self, content: ClipboardContent, image: Image.Image) -> Optional[ClipboardContent]:
         """处理 PIL Image 对象"""
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format=FileFormat.IMAGE_FORMAT)
-        img_byte_arr = img_byte_arr.getvalue()
-        if len(img_byte_arr) <= self._config.get(
-            ConfigKeys.ContentTypes.SECTION,
-            ConfigKeys.ContentTypes.MAX_IMAGE_SIZE
-        ):
-            content.data[JsonKeys.IMAGE_DATA] = base64.b64encode(img_byte_arr).decode('utf-8')
-            content.content_type = ContentType.IMAGE.value
+        raw_image = None
+        if self.store is not None:
+            # 拆分模式下只复制原始像素，图片编码由存储进程完成；调色板图片先转换，避免丢失调色板
+            if image.palette is not None:
+                image = image.convert("RGBA")
+            # 像素复制到共享内存后，哈希直接在共享内存上计算，不再从图片读取一遍
+            raw_image = self.store.stage_image(image)
+
+        # 先用像素哈希判断图片是否与上一条记录相同，相同则跳过图片编码
+        start = time.perf_counter()
+        if raw_image is not None:
+            content.pixel_hash = buffer_hash(raw_image.mode, raw_image.size, raw_image.pixels)
+        else:
+            content.pixel_hash = pixel_hash(image)
+        _PIXEL_HASH_SECONDS.observe(time.perf_counter() - start)
+        if content.pixel_hash == self.last_pixel_hash and self.last_hash:
+            _PIXEL_DEDUP_HITS.inc()
+            if raw_image is not None:
+                self.store.discard(raw_image)
+            content.reuse_hash(self.last_hash)
+            return content
+
+        if self.image_fingerprints:
+            start = time.perf_counter()
+            content.set_similarity_hash(image_fingerprint(image))
+            SIMILARITY_SECONDS.observe(time.perf_counter() - start)
+
+        if self.store is not None:
+            if raw_image is None:
+                raw_image = RawImage(image.mode, image.size, image.tobytes())
+            content.set_raw_image(raw_image, content.pixel_hash)
+            return content
+
+        if self.pipeline is not None:
+            # 交给编码线程池，写入线程保存前等待编码完成，监控线程不再等待编码
+            image.load()
+            content.set_pending_image(self.encoder.submit(image), content.pixel_hash)
             return content
-        return None
+
+        encoded = self.encoder.encode(image)
+        if encoded is None:
+            return None
+        content.set_encoded_image(encoded)
+        return content
 
     def _process_image_file(self, content: ClipboardContent, file_path: str) -> Optional[ClipboardContent]:
         """处理图片文件"""
@@ -121,71 +200,113 @@ class ClipboardMonitor:
             with Image.open(file_path) as img:
                 return self._process_pil_image(content, img)
         except Exception as e:
-            print(Messages.Error.PROCESS_IMAGE_ERROR.format(str(e)))
+            self._read_error(Messages.Error.PROCESS_IMAGE_ERROR, e)
         return None
 
     def _read_text_content(self, content: ClipboardContent) -> Optional[ClipboardContent]:
         """读取剪贴板中的文本内容"""
-        if not self._config.get(ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.ENABLE_TEXT):
+        settings = self._config.settings
+        if not settings.enable_text:
             return None
             
+        max_length = settings.max_text_length
         try:
-            text = pyperclip.paste()
-            if text and len(text) <= self._config.get(
-                ConfigKeys.ContentTypes.SECTION,
-                ConfigKeys.ContentTypes.MAX_TEXT_LENGTH
-            ):
-                content.data[JsonKeys.TEXT_CONTENT] = text
-                content.content_type = ContentType.TEXT.value
-                return content
+            # 先获取长度，超长文本不完整复制，改为按块流式读取
+            length = self.backend.get_text_length()
+            if length is not None and length > max_length:
+                return self._read_large_text(content, self.backend.iter_text_chunks(TEXT_CHUNK_SIZE), settings)
+            text = self.backend.get_text()
+            if not text:
+                return None
+            if len(text) > max_length:
+                return self._read_large_text(
+                    content, (text[i:i + TEXT_CHUNK_SIZE] for i in range(0, len(text), TEXT_CHUNK_SIZE)), settings
+                )
+            content.data[JsonKeys.TEXT_CONTENT] = text
+            content.content_type = ContentType.TEXT.value
+            return content
         except Exception as e:
-            print(Messages.Error.GET_CLIPBOARD_TEXT_ERROR.format(str(e)))
+            self._read_error(Messages.Error.GET_CLIPBOARD_TEXT_ERROR, e)
         return None
 
+    def _read_large_text(self, content: ClipboardContent, chunks: Iterable[str],
+                         settings: Settings) -> Optional[ClipboardContent]:
+        """按配置处理超过 max_text_length 的文本：跳过、只记录开头部分，或将完整文本单独保存"""
+        if settings.oversized_text == OversizedText.SKIP.value:
+            return None
+        spill_dir = None
+        if settings.oversized_text == OversizedText.SPILL.value:
+            spill_dir = os.path.join(settings.base_dir, Paths.DEFAULT_TEXTS_DIR)
+            os.makedirs(spill_dir, exist_ok=True)
+        large_text = capture_text(chunks, settings.max_text_length, spill_dir, settings.compression_codec)
+        if large_text is None:
+            return None
+        content.set_truncated_text(large_text.to_dict(), large_text.content_hash)
+        return content
+
     def _read_file_paths(self, content: ClipboardContent) -> Optional[ClipboardContent]:
         """读取剪贴板中的文件路径"""
-        if not self._config.get(ConfigKeys.ContentTypes.SECTION, ConfigKeys.ContentTypes.ENABLE_FILES):
+        if not self._config.settings.enable_files:
             return None
             
-        clipboard_opened = False
         try:
-            win32clipboard.OpenClipboard()
-            clipboard_opened = True
-            if win32clipboard.IsClipboardFormatAvailable(win32con.CF_HDROP):
-                content.data[JsonKeys.FILE_PATHS] = win32clipboard.GetClipboardData(win32con.CF_HDROP)
+            file_paths = self.backend.get_file_paths()
+            if file_paths is not None:
+                content.data[JsonKeys.FILE_PATHS] = file_paths
                 content.content_type = ContentType.FILES.value
                 return content
         except Exception as e:
-            print(Messages.Error.GET_CLIPBOARD_FILES_ERROR.format(str(e)))
-        finally:
-            if clipboard_opened:
-                try:
-                    win32clipboard.CloseClipboard()
-                except win32clipboard.error:
-                    pass
+            self._read_error(Messages.Error.GET_CLIPBOARD_FILES_ERROR, e)
         return None
 
+    @staticmethod
+    def _timed_read(histogram: Histogram, reader, content: ClipboardContent) -> Optional[ClipboardContent]:
+        """调用一个读取方法并记录耗时"""
+        start = time.perf_counter()
+        try:
+            return reader(content)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
     def _read_clipboard(self) -> Optional[ClipboardContent]:
         """读取剪贴板内容"""
         try:
             content = ClipboardContent()
+            start = time.perf_counter()
             content.formats = self._get_clipboard_formats()
+            _FORMATS_SECONDS.observe(time.perf_counter() - start)
             
             # 按优先级尝试读取不同类型的内容
-            return (self._read_image_content(content) or
-                    self._read_text_content(content) or
-                    self._read_file_paths(content))
+            return (self._timed_read(_IMAGE_SECONDS, self._read_image_content, content) or
+                    self._timed_read(_TEXT_SECONDS, self._read_text_content, content) or
+                    self._timed_read(_FILES_SECONDS, self._read_file_paths, content))
         except Exception as e:
-            print(Messages.Error.MONITOR_ERROR.format(str(e)))
+            self._read_error(Messages.Error.MONITOR_ERROR, e)
             return None
 
+    def _read_error(self, message: str, error: Exception):
+        """记录一次读取剪贴板时的错误，本次读取不到内容时按读取失败处理"""
+        _READ_ERRORS.inc()
+        self._read_failed = True
+        print(message.format(str(error)))
+
+    def _retry_failed_read(self):
+        """读取失败时不记录这次变更序号，下一次检查时重新读取；同一序号最多重新读取 READ_RETRIES 次"""
+        if self.last_sequence != self._failed_sequence:
+            self._failed_sequence = self.last_sequence
+            self._failed_reads = 0
+        self._failed_reads += 1
+        if self._failed_reads <= READ_RETRIES:
+            self.last_sequence = None
+
     def _print_content(self, content: ClipboardContent):
         """打印剪贴板内容信息"""
-        if not self._config.get(ConfigKeys.Display.SECTION, ConfigKeys.Display.SHOW_PREVIEW):
+        settings = self._config.settings
+        if not settings.show_preview:
             return
 
         print(Messages.Info.CLIPBOARD_CONTENT_HEADER)
-        print("-" * self._config.get(ConfigKeys.Display.SECTION, ConfigKeys.Display.CONSOLE_WIDTH))
+        print("-" * settings.console_width)
         print(f"内容类型: {content.content_type}")
         
         display_data = content.to_dict()
@@ -194,50 +315,137 @@ class ClipboardMonitor:
         if JsonKeys.IMAGE_BASE64 in display_data:
             del display_data[JsonKeys.IMAGE_BASE64]
         
-        if self._config.get(ConfigKeys.Display.SECTION, ConfigKeys.Display.SHOW_TIMESTAMPS):
+        if settings.show_timestamps:
             print(f"时间: {content.timestamp}")
         
         # 截断预览内容
-        max_length = self._config.get(ConfigKeys.Display.SECTION, ConfigKeys.Display.MAX_PREVIEW_LENGTH)
+        max_length = settings.max_preview_length
         if JsonKeys.TEXT_CONTENT in display_data and len(display_data[JsonKeys.TEXT_CONTENT]) > max_length:
             display_data[JsonKeys.TEXT_CONTENT] = display_data[JsonKeys.TEXT_CONTENT][:max_length] + "..."
+        if display_data.get(JsonKeys.TEXT_TRUNCATED):
+            print(Messages.Info.TEXT_TRUNCATED.format(display_data[JsonKeys.TEXT_LENGTH]))
         
         print(json.dumps(display_data, indent=2, ensure_ascii=False))
-        print("-" * self._config.get(ConfigKeys.Display.SECTION, ConfigKeys.Display.CONSOLE_WIDTH))
+        print("-" * settings.console_width)
         print(Messages.Info.CONTENT_SAVED)
 
+    def _clipboard_changed(self) -> bool:
+        """通过剪贴板变更序号判断内容是否可能发生了变化"""
+        try:
+            sequence = self.backend.get_sequence_number()
+        except Exception:
+            return True
+        if sequence == self.last_sequence:
+            return False
+        self.last_sequence = sequence
+        return True
+
+    def _persist(self, content: ClipboardContent) -> bool:
+        """保存内容：拆分模式下发送给存储进程；启用异步流水线时放入写入队列，否则同步写入"""
+        if self.store is not None:
+            return self.store.submit(content)
+        if self.pipeline is None:
+            self.logger.save(content)
+            return True
+        self.pipeline.start()
+        return self.pipeline.submit(content)
+
+    def close(self):
+        """写完待保存的内容并释放资源"""
+        self.config_watcher.stop()
+        if self.retention is not None:
+            self.retention.stop()
+        if self.pipeline is not None:
+            self.pipeline.close()
+        if self.encoder is not None:
+            self.encoder.close()
+        self.backend.close()
+        if self.store is not None:
+            self.store.close()
+        if self.logger is not None:
+            self.logger.close()
+        # 最后停止，最后一次写入的 JSON 汇总包含关闭前写完的内容
+        self.metrics_exporter.stop()
+
     def check_and_save(self) -> bool:
         """检查剪贴板并保存新内容"""
+        # 剪贴板没有变化时不记录任何指标，空闲检查没有额外开销
+        if not self._clipboard_changed():
+            return False
+        _CHANGES.inc()
+        start = time.perf_counter()
+        try:
+            return self._capture()
+        finally:
+            _CHECK_SECONDS.observe(time.perf_counter() - start)
+
+    def _capture(self) -> bool:
+        """读取剪贴板，与上一条记录不同时提交保存"""
+        self._read_failed = False
         content = self._read_clipboard()
         if not content:
+            if self._read_failed:
+                self._retry_failed_read()
             return False
         
         content_hash = content.get_hash()
-        if not content_hash or content_hash == self.last_hash:
+        if not content_hash:
+            return False
+        if content_hash == self.last_hash:
+            _LAST_DEDUP_HITS.inc()
             return False
         
-        self.logger.save(content)
+        if not self._persist(content):
+            # 内容没有进入队列：不记录这次变更序号，下一次检查时重新读取剪贴板再提交
+            self.last_sequence = None
+            return False
         self._print_content(content)
         self.last_hash = content_hash
+        self.last_pixel_hash = content.pixel_hash
+        _CAPTURED[content.content_type].inc()
         return True
 
+    def _wait_for_next_check(self):
+        """等待下一次检查的时机，每次都读取当前的设置快照，修改配置后无需重启"""
+        settings = self._config.settings
+        # 需要重新读取同一变更序号时（读取或提交失败）不等待变化通知，按轮询间隔重试
+        if settings.detection_mode == DetectionMode.EVENT.value and self.last_sequence is not None:
+            self.backend.wait_for_change(settings.event_timeout)
+        else:
+            self._stop_event.wait(settings.check_interval)
+
+    def _on_settings_reloaded(self, settings: Settings):
+        """配置重新加载后唤醒正在等待剪贴板通知的监控循环，使新的检测方式和超时立即生效"""
+        self.backend.wake()
+
+    def stop(self):
+        """请求监控循环退出"""
+        self._stop_event.set()
+        self.backend.wake()
+
     def run(self):
         """运行监控程序"""
         print(Messages.Info.MONITOR_START)
-        check_interval = self._config.get(
-            ConfigKeys.General.SECTION,
-            ConfigKeys.General.CHECK_INTERVAL
-        )
+        self.config_watcher.start()
+        self.metrics_exporter.start()
+        if self.retention is not None:
+            if self._config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.ENABLE_BACKGROUND):
+                self.retention.start()
+            else:
+                self.retention.run_once()
         
         try:
-            while True:
+            while not self._stop_event.is_set():
                 try:
                     self.check_and_save()
                 except Exception as e:
+                    _LOOP_ERRORS.inc()
                     print(Messages.Error.MONITOR_ERROR.format(str(e)))
-                time.sleep(check_interval)
+                self._wait_for_next_check()
         except KeyboardInterrupt:
-            print(Messages.Info.MONITOR_STOP) 
+            print(Messages.Info.MONITOR_STOP)
+        finally:
+            self.close()
 
 if __name__ == '__main__':
     monitor = ClipboardMonitor()
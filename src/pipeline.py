@@ -0,0 +1,220 @@
+"""异步持久化流水线模块
+
+此模块将剪贴板内容的捕获与持久化拆分为两个阶段，中间通过有界队列连接。
+监控线程只负责把新内容放入队列，后台写入线程批量取出并一次性写入日志，
+慢速磁盘或较大的日志文件不会再拖慢下一次捕获。
+
+Classes:
+    PipelineMetrics: 流水线运行指标
+    PersistencePipeline: 有界队列加后台写入线程的持久化流水线
+"""
+import time
+import queue
+import threading
+from typing import Dict, List, Optional
+from .constants import DropPolicy, Messages
+from .models import ClipboardContent
+from .logger import ClipboardLogger
+
+# 通知写入线程退出的哨兵对象
+_STOP = object()
+
+
+class PipelineMetrics:
+    """流水线运行指标。
+
+    所有计数在写入线程与监控线程之间共享，通过锁保护。
+
+    Attributes:
+        submitted (int): 成功放入队列的条数
+        dropped (int): 因队列已满被丢弃的条数
+        written (int): 已写入日志的条数
+        batches (int): 写入批次数
+        max_queue_depth (int): 观察到的最大队列深度
+        last_write_latency (float): 最近一次批量写入耗时（秒）
+        max_write_latency (float): 最大批量写入耗时（秒）
+        total_write_latency (float): 累计批量写入耗时（秒）
+    """
+
+    def __init__(self):
+        """初始化全部指标为零"""
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.last_write_latency = 0.0
+        self.max_write_latency = 0.0
+        self.total_write_latency = 0.0
+
+    def record_submit(self, queue_depth: int):
+        """记录一次入队"""
+        with self._lock:
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def record_drop(self):
+        """记录一次丢弃"""
+        with self._lock:
+            self.dropped += 1
+
+    def record_write(self, count: int, latency: float):
+        """记录一次批量写入"""
+        with self._lock:
+            self.written += count
+            self.batches += 1
+            self.last_write_latency = latency
+            self.max_write_latency = max(self.max_write_latency, latency)
+            self.total_write_latency += latency
+
+    def snapshot(self, queue_depth: int) -> Dict[str, float]:
+        """获取指标快照。
+
+        Args:
+            queue_depth (int): 当前队列深度
+
+        Returns:
+            Dict[str, float]: 指标名称到数值的映射
+        """
+        with self._lock:
+            return {
+                "queue_depth": queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "written": self.written,
+                "batches": self.batches,
+                "last_write_latency_ms": self.last_write_latency * 1000,
+                "max_write_latency_ms": self.max_write_latency * 1000,
+                "avg_write_latency_ms": (
+                    self.total_write_latency / self.batches * 1000 if self.batches else 0.0
+                ),
+            }
+
+
+class PersistencePipeline:
+    """有界队列加后台写入线程的持久化流水线。
+
+    队列已满时按丢弃策略处理：
+
+    * block：监控线程最多等待 block_timeout 秒，仍无空位时丢弃新内容
+    * drop_newest：立即丢弃新内容
+    * drop_oldest：丢弃队列中最旧的内容，为新内容腾出位置
+
+    关闭时会先写完队列中剩余的全部内容再退出。
+
+    Attributes:
+        logger (ClipboardLogger): 负责实际写入的日志管理器
+        batch_size (int): 每批最多写入的条数
+        drop_policy (str): 队列已满时的处理策略，取值见 constants.DropPolicy
+        block_timeout (float): block 策略下的最长等待时间（秒）
+        metrics (PipelineMetrics): 运行指标
+    """
+
+    def __init__(self, logger: ClipboardLogger, queue_size: int = 256, batch_size: int = 32,
+                 drop_policy: str = DropPolicy.BLOCK.value, block_timeout: float = 1.0):
+        """初始化流水线。
+
+        Args:
+            logger (ClipboardLogger): 负责实际写入的日志管理器
+            queue_size (int, optional): 队列容量。默认为 256
+            batch_size (int, optional): 每批最多写入的条数。默认为 32
+            drop_policy (str, optional): 队列已满时的处理策略。默认为 block
+            block_timeout (float, optional): block 策略下的最长等待时间（秒）。默认为 1.0
+        """
+        self.logger = logger
+        self.batch_size = max(1, batch_size)
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.metrics = PipelineMetrics()
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def queue_depth(self) -> int:
+        """当前队列深度"""
+        return self._queue.qsize()
+
+    def start(self):
+        """启动后台写入线程"""
+        if self._worker is None:
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name="clipboard-writer", daemon=True)
+            self._worker.start()
+
+    def submit(self, content: ClipboardContent) -> bool:
+        """将内容放入写入队列。
+
+        Args:
+            content (ClipboardContent): 要保存的剪贴板内容
+
+        Returns:
+            bool: 内容是否进入了队列
+        """
+        try:
+            if self.drop_policy == DropPolicy.BLOCK.value:
+                self._queue.put(content, timeout=self.block_timeout)
+            elif self.drop_policy == DropPolicy.DROP_OLDEST.value:
+                while True:
+                    try:
+                        self._queue.put_nowait(content)
+                        break
+                    except queue.Full:
+                        try:
+                            self._queue.get_nowait()
+                            self.metrics.record_drop()
+                            print(Messages.Error.PIPELINE_DROPPED)
+                        except queue.Empty:
+                            pass
+            else:
+                self._queue.put_nowait(content)
+        except queue.Full:
+            self.metrics.record_drop()
+            print(Messages.Error.PIPELINE_DROPPED)
+            return False
+        self.metrics.record_submit(self._queue.qsize())
+        return True
+
+    def _next_batch(self) -> Optional[List[ClipboardContent]]:
+        """阻塞等待下一批内容，收到退出信号后返回 None"""
+        if self._stopping:
+            return None
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # 先写完当前批次，下一轮再退出
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            start = time.perf_counter()
+            try:
+                self.logger.save_batch(batch)
+            except Exception as e:
+                print(Messages.Error.SAVE_LOG_ERROR.format(str(e)))
+            self.metrics.record_write(len(batch), time.perf_counter() - start)
+
+    def close(self):
+        """写完队列中剩余的内容并停止写入线程"""
+        if self._worker is None:
+            return
+        self._queue.put(_STOP)
+        self._worker.join()
+        self._worker = None
+        print(Messages.Info.PIPELINE_STATS.format(**self.metrics.snapshot(self.queue_depth)))
@@ -0,0 +1,357 @@
+"""预览缓存模块
+
+此模块保存每条内容的紧凑预览：文本的开头部分、文件路径列表的开头部分，以及图片的缩略图。
+预览在保存内容时生成，按内容哈希索引，浏览历史时不必读取完整的图片或长文本。
+
+预览保存在日志根目录下的追加式打包文件中，每条预览依次写入::
+
+    魔数 "PV" | 哈希长度 (uint16) | 数据长度 (uint32) | 哈希 | 元数据长度 (uint32) | 元数据 JSON | 缩略图
+
+打开时只读取每条预览的头部建立哈希到文件偏移的索引，读取预览时按偏移读取；
+最近使用的预览同时保存在内存中的 LRU 缓存里。其他进程追加的预览在查找不到时按需读入索引。
+
+Classes:
+    Preview: 一条内容的预览
+    PreviewCache: 内存 LRU 加磁盘打包文件的预览缓存
+"""
+import os
+import base64
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .constants import ContentType, FileFormat, JsonKeys, Messages
+from .models import ClipboardContent
+from .metrics import REGISTRY
+from .serialization import dumps, loads
+
+# 每条预览的头部：魔数、哈希长度、数据长度
+RECORD_HEADER = struct.Struct("<2sHI")
+RECORD_MAGIC = b"PV"
+# 数据开头的元数据长度
+META_HEADER = struct.Struct("<I")
+# 文件路径预览中最多包含的路径数
+MAX_PREVIEW_PATHS = 20
+# 已不再被引用的预览占比达到此值时才重写打包文件
+COMPACT_RATIO = 0.1
+
+_PREVIEW_BYTES = REGISTRY.counter("clipboard_bytes_written_total", "写入磁盘的字节数", target="preview")
+
+
+class Preview:
+    """一条内容的预览。
+
+    Attributes:
+        content_type (str): 内容类型，取值见 constants.ContentType
+        text (Optional[str]): 文本或文件路径的开头部分，图片为 None
+        thumbnail (Optional[bytes]): 编码后的缩略图，没有缩略图时为 None
+        thumbnail_format (Optional[str]): 缩略图格式
+    """
+
+    def __init__(self, content_type: str, text: Optional[str] = None,
+                 thumbnail: Optional[bytes] = None, thumbnail_format: Optional[str] = None):
+        """初始化预览。
+
+        Args:
+            content_type (str): 内容类型
+            text (Optional[str], optional): 文本预览
+            thumbnail (Optional[bytes], optional): 编码后的缩略图
+            thumbnail_format (Optional[str], optional): 缩略图格式
+        """
+        self.content_type = content_type
+        self.text = text
+        self.thumbnail = thumbnail
+        self.thumbnail_format = thumbnail_format
+
+    @classmethod
+    def from_record(cls, record: dict, text_chars: int) -> Optional['Preview']:
+        """由日志记录或内容数据生成文本预览，图片和没有文本的记录返回 None。
+
+        Args:
+            record (dict): 日志记录，或 ClipboardContent.data
+            text_chars (int): 文本预览的最大字符数
+        """
+        content_type = record.get(JsonKeys.CONTENT_TYPE)
+        if content_type == ContentType.TEXT.value:
+            text = record.get(JsonKeys.TEXT_CONTENT)
+            return cls(content_type, text[:text_chars]) if isinstance(text, str) else None
+        if content_type == ContentType.FILES.value and JsonKeys.FILE_PATHS in record:
+            paths = record[JsonKeys.FILE_PATHS] or []
+            text = "\n".join(str(path) for path in paths[:MAX_PREVIEW_PATHS])
+            return cls(content_type, text[:text_chars])
+        return None
+
+    @classmethod
+    def from_content(cls, content: ClipboardContent, text_chars: int) -> Optional['Preview']:
+        """由剪贴板内容生成预览，没有可预览的内容时返回 None。
+
+        Args:
+            content (ClipboardContent): 剪贴板内容，图片应已编码完成
+            text_chars (int): 文本预览的最大字符数
+        """
+        if content.content_type in (ContentType.TEXT.value, ContentType.FILES.value):
+            return cls.from_record({JsonKeys.CONTENT_TYPE: content.content_type, **content.data}, text_chars)
+        if content.content_type != ContentType.IMAGE.value:
+            return None
+        # 缩略图与图片编码同时生成，写入预览时才等待
+        content.resolve_thumbnail()
+        if content.thumbnail_bytes is None:
+            return None
+        return cls(content.content_type, thumbnail=bytes(content.thumbnail_bytes),
+                   thumbnail_format=content.thumbnail_format)
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典，缩略图以 base64 编码"""
+        result = {JsonKeys.CONTENT_TYPE: self.content_type}
+        if self.text is not None:
+            result[JsonKeys.PREVIEW_TEXT] = self.text
+        if self.thumbnail is not None:
+            result[JsonKeys.THUMBNAIL_FORMAT] = self.thumbnail_format
+            result[JsonKeys.THUMBNAIL_BASE64] = base64.b64encode(self.thumbnail).decode('ascii')
+        return result
+
+    def pack(self) -> bytes:
+        """编码为打包文件中的数据部分"""
+        meta = {JsonKeys.CONTENT_TYPE: self.content_type}
+        if self.text is not None:
+            meta[JsonKeys.PREVIEW_TEXT] = self.text
+        if self.thumbnail_format is not None:
+            meta[JsonKeys.THUMBNAIL_FORMAT] = self.thumbnail_format
+        meta_bytes = dumps(meta)
+        return META_HEADER.pack(len(meta_bytes)) + meta_bytes + (self.thumbnail or b"")
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'Preview':
+        """由打包文件中的数据部分还原预览"""
+        (meta_length,) = META_HEADER.unpack_from(data)
+        start = META_HEADER.size
+        meta = loads(data[start:start + meta_length])
+        thumbnail = data[start + meta_length:] or None
+        return cls(meta[JsonKeys.CONTENT_TYPE], meta.get(JsonKeys.PREVIEW_TEXT),
+                   thumbnail, meta.get(JsonKeys.THUMBNAIL_FORMAT))
+
+
+class PreviewCache:
+    """内存 LRU 加磁盘打包文件的预览缓存。
+
+    写入线程、保留策略线程和读取方可以共用一个实例；其他进程可以同时打开同一个文件读取。
+
+    Attributes:
+        path (str): 打包文件路径
+        memory_entries (int): 内存中最多缓存的预览数
+        text_chars (int): 文本预览的最大字符数
+        read_only (bool): 是否只读打开
+    """
+
+    def __init__(self, path: str, memory_entries: int = 1000, text_chars: int = 200, read_only: bool = False):
+        """打开打包文件并建立索引。
+
+        Args:
+            path (str): 打包文件路径，不存在时创建
+            memory_entries (int, optional): 内存中最多缓存的预览数。默认为 1000
+            text_chars (int, optional): 文本预览的最大字符数。默认为 200
+            read_only (bool, optional): 是否只读打开，文件必须已存在，不能写入或压缩。默认为 False
+        """
+        self.path = path
+        self.memory_entries = max(0, memory_entries)
+        self.text_chars = text_chars
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Preview]" = OrderedDict()
+        # 内容哈希 -> (数据偏移, 数据长度)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        # 索引已覆盖到的文件位置，之后是其他进程追加的或不完整的内容
+        self._end = 0
+        self.read_only = read_only
+        if read_only:
+            self._file = open(path, 'rb')
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, 'a+b')
+        self._scan()
+
+    def __len__(self) -> int:
+        """缓存中的预览数"""
+        with self._lock:
+            return len(self._index)
+
+    def __contains__(self, content_hash: str) -> bool:
+        with self._lock:
+            return content_hash in self._index
+
+    def _scan(self) -> bool:
+        """从已索引的位置继续读取预览头部，返回是否读到了新的预览"""
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        found = False
+        while self._end + RECORD_HEADER.size <= size:
+            self._file.seek(self._end)
+            magic, key_length, data_length = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+            data_offset = self._end + RECORD_HEADER.size + key_length
+            if magic != RECORD_MAGIC or data_offset + data_length > size:
+                # 不完整的预览：可能是其他进程正在写入，也可能是上次写入中断，追加时再截断
+                break
+            key = self._file.read(key_length).decode('utf-8', errors='replace')
+            self._index[key] = (data_offset, data_length)
+            self._end = data_offset + data_length
+            found = True
+        return found
+
+    def _remember(self, content_hash: str, preview: Preview):
+        """将预览放入内存 LRU 缓存"""
+        if self.memory_entries <= 0:
+            return
+        self._memory[content_hash] = preview
+        self._memory.move_to_end(content_hash)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, content_hash: str, preview: Preview) -> bool:
+        """追加一条预览，已存在的哈希不会重复写入。
+
+        Args:
+            content_hash (str): 内容哈希
+            preview (Preview): 预览
+
+        Returns:
+            bool: 是否写入了新的预览
+        """
+        key = content_hash.encode('utf-8')
+        data = preview.pack()
+        with self._lock:
+            if content_hash in self._index:
+                return False
+            self._scan()
+            if content_hash in self._index:
+                return False
+            try:
+                # 截断上次中断写入留下的不完整内容
+                self._file.truncate(self._end)
+                record = RECORD_HEADER.pack(RECORD_MAGIC, len(key), len(data)) + key + data
+                self._file.write(record)
+                self._file.flush()
+                _PREVIEW_BYTES.inc(len(record))
+            except OSError as e:
+                print(Messages.Error.PREVIEW_CACHE_ERROR.format(str(e)))
+                return False
+            data_offset = self._end + RECORD_HEADER.size + len(key)
+            self._index[content_hash] = (data_offset, len(data))
+            self._end = data_offset + len(data)
+            self._remember(content_hash, preview)
+        return True
+
+    def put_content(self, content: ClipboardContent) -> bool:
+        """为剪贴板内容生成并保存预览，没有可预览的内容时不写入"""
+        content_hash = content.get_hash()
+        if not content_hash or content_hash in self:
+            return False
+        preview = Preview.from_content(content, self.text_chars)
+        return preview is not None and self.put(content_hash, preview)
+
+    def _read(self, content_hash: str) -> Optional[Preview]:
+        """从打包文件读取预览，调用方需持有锁"""
+        location = self._index.get(content_hash)
+        if location is None and self._scan():
+            location = self._index.get(content_hash)
+        if location is None:
+            return None
+        offset, length = location
+        try:
+            self._file.seek(offset)
+            preview = Preview.unpack(self._file.read(length))
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            print(Messages.Error.PREVIEW_CACHE_ERROR.format(str(e)))
+            return None
+        self._remember(content_hash, preview)
+        return preview
+
+    def get(self, content_hash: str) -> Optional[Preview]:
+        """获取一条预览，没有预览时返回 None"""
+        with self._lock:
+            preview = self._memory.get(content_hash)
+            if preview is not None:
+                self._memory.move_to_end(content_hash)
+                return preview
+            return self._read(content_hash)
+
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, Preview]:
+        """批量获取预览，未命中内存缓存的按文件偏移顺序读取。
+
+        Args:
+            content_hashes (Iterable[str]): 内容哈希
+
+        Returns:
+            Dict[str, Preview]: 内容哈希到预览的映射，不包含没有预览的哈希
+        """
+        result: Dict[str, Preview] = {}
+        with self._lock:
+            missing = []
+            for content_hash in dict.fromkeys(content_hashes):
+                preview = self._memory.get(content_hash)
+                if preview is not None:
+                    self._memory.move_to_end(content_hash)
+                    result[content_hash] = preview
+                else:
+                    missing.append(content_hash)
+            if any(content_hash not in self._index for content_hash in missing):
+                self._scan()
+            missing.sort(key=lambda content_hash: self._index.get(content_hash, (0, 0)))
+            for content_hash in missing:
+                preview = self._read(content_hash)
+                if preview is not None:
+                    result[content_hash] = preview
+        return result
+
+    def compact(self, live_hashes: Set[str]) -> int:
+        """删除不再被任何记录引用的预览，失效的预览较少时不重写文件。
+
+        Args:
+            live_hashes (Set[str]): 仍被记录引用的内容哈希
+
+        Returns:
+            int: 删除的预览数
+        """
+        with self._lock:
+            self._scan()
+            keep: List[Tuple[str, int, int]] = [
+                (content_hash, offset, length) for content_hash, (offset, length) in self._index.items()
+                if content_hash in live_hashes
+            ]
+            removed = len(self._index) - len(keep)
+            if not removed or removed < len(self._index) * COMPACT_RATIO:
+                return 0
+            keep.sort(key=lambda item: item[1])
+            temp_file = f"{self.path}{FileFormat.TEMP_FILE_SUFFIX}"
+            index: Dict[str, Tuple[int, int]] = {}
+            try:
+                with open(temp_file, 'wb') as f:
+                    for content_hash, offset, length in keep:
+                        self._file.seek(offset)
+                        data = self._file.read(length)
+                        key = content_hash.encode('utf-8')
+                        f.write(RECORD_HEADER.pack(RECORD_MAGIC, len(key), length) + key)
+                        index[content_hash] = (f.tell(), length)
+                        f.write(data)
+                    end = f.tell()
+                self._file.close()
+                os.replace(temp_file, self.path)
+            except OSError as e:
+                # Windows 下其他进程打开了打包文件时无法替换，下一轮再试
+                print(Messages.Error.PREVIEW_CACHE_ERROR.format(str(e)))
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+                if self._file.closed:
+                    self._file = open(self.path, 'a+b')
+                return 0
+            self._file = open(self.path, 'a+b')
+            self._index = index
+            self._end = end
+            for content_hash in [h for h in self._memory if h not in index]:
+                del self._memory[content_hash]
+            return removed
+
+    def close(self):
+        """关闭打包文件"""
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,414 @@
+"""保留策略模块
+
+此模块在后台线程中定期执行日志和图片的保留策略，取代只在启动时按文件名删除
+多余日志的做法。每一轮依次执行：
+
+1. 压缩封存往日日志
+2. 删除或裁剪超出保留天数的日志记录
+3. 按日志文件数、记录总数和总字节数（日志加图片）删除最旧的记录
+4. 将较小的往日日志合并为较大的封存日志，文件名记录其覆盖的日期范围，
+   例如 ``clipboard_2024-01-01_2024-01-07.jsonl.zst``
+5. 删除不再被引用的图片、单独保存的超长文本、过期的备份文件和日志已不存在的时间索引
+
+所有修改日志的操作都在 ClipboardLogger.lock 保护下逐个文件进行，写入线程最多只会
+等待一个文件的处理时间，监控线程则完全不受影响。
+
+Classes:
+    RetentionEngine: 后台保留策略执行器
+
+Functions:
+    parse_segment_dates: 从日志文件名中解析其覆盖的日期范围
+"""
+import os
+import time
+import threading
+from itertools import groupby
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from .constants import ConfigKeys, FileFormat, JsonKeys, Messages, StorageFormat
+from .config import Config
+from .logger import ClipboardLogger
+from .compression import codec_suffix
+from .segments import parse_segment_name, segment_file_name
+
+# 未被引用的按时间戳命名的图片至少存在这么久（秒）才会被删除，
+# 避免删除刚保存、日志记录尚未写入的图片
+ORPHAN_GRACE_SECONDS = 600
+
+
+def parse_segment_dates(log_file: str) -> Optional[Tuple[str, str]]:
+    """从日志文件名中解析其覆盖的日期范围。
+
+    Args:
+        log_file (str): 日志文件路径，例如 ``clipboard_2024-01-01.json``、
+            ``clipboard_2024-01-01.0001.jsonl`` 或 ``clipboard_2024-01-01_2024-01-07.jsonl.zst``
+
+    Returns:
+        Optional[Tuple[str, str]]: 起始日期和结束日期，文件名不符合格式时返回 None
+    """
+    parsed = parse_segment_name(log_file)
+    return parsed[:2] if parsed is not None else None
+
+
+class RetentionEngine:
+    """后台保留策略执行器。
+
+    Attributes:
+        logger (ClipboardLogger): 日志管理器
+        interval (float): 两轮执行之间的间隔（秒）
+        max_age_days (int): 保留天数，0 表示不限制
+        max_log_files (int): 最多保留的日志文件数，0 表示不限制
+        max_total_bytes (int): 日志与图片的总字节数上限，0 表示不限制
+        max_total_entries (int): 记录总数上限，0 表示不限制
+        merge_below_bytes (int): 小于此大小的往日日志会被合并，0 表示不合并
+        merge_target_bytes (int): 合并后日志的目标大小
+    """
+
+    def __init__(self, logger: ClipboardLogger, config: Config):
+        """根据配置初始化保留策略。
+
+        Args:
+            logger (ClipboardLogger): 日志管理器
+            config (Config): 配置对象
+        """
+        self.logger = logger
+        self.interval = config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.INTERVAL)
+        self.max_age_days = config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.MAX_AGE_DAYS)
+        self.max_log_files = config.get(ConfigKeys.General.SECTION, ConfigKeys.General.MAX_LOG_FILES)
+        self.max_total_bytes = config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.MAX_TOTAL_MB) << 20
+        self.max_total_entries = config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.MAX_TOTAL_ENTRIES)
+        self.merge_below_bytes = config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.MERGE_BELOW_KB) << 10
+        self.merge_target_bytes = config.get(ConfigKeys.Retention.SECTION, ConfigKeys.Retention.MERGE_TARGET_KB) << 10
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 日志文件名 -> (修改时间, 大小, 记录数)，避免每轮都重新统计未变化的文件
+        self._entry_counts: Dict[str, Tuple[int, int, int]] = {}
+
+    def start(self):
+        """启动后台线程，启动后立即执行一轮"""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="clipboard-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台线程，正在执行的一轮会先完成"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        """后台线程主循环"""
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(self.interval)
+
+    def run_once(self) -> Dict[str, int]:
+        """执行一轮保留策略。
+
+        Returns:
+            Dict[str, int]: 本轮删除的日志文件数、记录数、合并的日志文件数，以及删除的图片、超长文本文件和预览数
+        """
+        stats = {
+            "removed_files": 0, "removed_entries": 0, "merged_files": 0, "removed_images": 0, "removed_texts": 0,
+            "removed_previews": 0
+        }
+        try:
+            if self.logger.storage_format == StorageFormat.SQLITE.value:
+                self._enforce_database(stats)
+            else:
+                self.logger.seal_old_logs()
+                self._enforce_age(stats)
+                self._enforce_file_count(stats)
+                self._enforce_entry_count(stats)
+                self._merge_segments(stats)
+                self._enforce_size(stats)
+                self._remove_stale_indexes()
+            self._collect_images(stats)
+            self._compact_previews(stats)
+            self._remove_old_backups(stats)
+            if self.logger.dedup_index is not None:
+                with self.logger.lock:
+                    self.logger.dedup_index.save()
+        except Exception as e:
+            print(Messages.Error.RETENTION_ERROR.format(str(e)))
+        if any(stats.values()):
+            print(Messages.Info.RETENTION_STATS.format(**stats))
+        return stats
+
+    def _cutoff(self) -> Optional[str]:
+        """早于此日期的记录超出保留天数，不限制时返回 None"""
+        if self.max_age_days <= 0:
+            return None
+        cutoff = datetime.now() - timedelta(days=self.max_age_days - 1)
+        return cutoff.strftime(FileFormat.LOG_FILE_DATE_FORMAT)
+
+    def _segments(self) -> List[str]:
+        """按日期从旧到新列出除当天日志（包括当天的全部分段）以外的全部日志文件"""
+        today = datetime.now().strftime(FileFormat.LOG_FILE_DATE_FORMAT)
+        return [
+            log_file for log_file in self.logger._list_log_files()
+            if (parse_segment_dates(log_file) or ("", ""))[1] < today
+        ]
+
+    def _remove(self, log_file: str, stats: Dict[str, int]):
+        """删除整个日志文件并记入统计"""
+        stats["removed_entries"] += self.logger.remove_log_file(log_file)
+        stats["removed_files"] += 1
+
+    def _enforce_age(self, stats: Dict[str, int]):
+        """删除超出保留天数的日志；合并过的日志只删除其中过期的记录"""
+        cutoff = self._cutoff()
+        if cutoff is None:
+            return
+        for log_file in self._segments():
+            dates = parse_segment_dates(log_file)
+            if dates is None:
+                continue
+            start, end = dates
+            if end < cutoff:
+                self._remove(log_file, stats)
+            elif start < cutoff:
+                stats["removed_entries"] += self.logger.trim_log_file(
+                    log_file, lambda record: record.get(JsonKeys.TIMESTAMP, "") >= cutoff
+                )
+
+    def _enforce_file_count(self, stats: Dict[str, int]):
+        """日志文件数超出上限时删除最旧的日志，同一天的多个分段计为一个文件"""
+        if self.max_log_files <= 0:
+            return
+        groups = [
+            list(group) for _, group in groupby(self._segments(), key=lambda f: parse_segment_dates(f) or f)
+        ]
+        # 当天的日志也计入文件数
+        excess = len(groups) + 1 - self.max_log_files
+        for group in groups[:max(0, excess)]:
+            for log_file in group:
+                self._remove(log_file, stats)
+
+    def _count_entries(self, log_file: str) -> int:
+        """统计日志文件中的记录数，文件未变化时使用缓存"""
+        stat = os.stat(log_file)
+        name = os.path.basename(log_file)
+        cached = self._entry_counts.get(name)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        with self.logger.lock:
+            count = len(self.logger._read_log_file(log_file, decode=False))
+        self._entry_counts[name] = (stat.st_mtime_ns, stat.st_size, count)
+        return count
+
+    def _enforce_entry_count(self, stats: Dict[str, int]):
+        """记录总数超出上限时从最旧的记录开始删除"""
+        if self.max_total_entries <= 0:
+            return
+        log_files = self.logger._list_log_files()
+        counts = [self._count_entries(log_file) for log_file in log_files]
+        excess = sum(counts) - self.max_total_entries
+        for log_file, count in zip(log_files, counts):
+            if excess <= 0:
+                break
+            if count <= excess:
+                self._remove(log_file, stats)
+                excess -= count
+                continue
+            with self.logger.lock:
+                timestamps = sorted(
+                    record.get(JsonKeys.TIMESTAMP, "")
+                    for record in self.logger._read_log_file(log_file, decode=False)
+                )
+            threshold = timestamps[excess - 1]
+            removed = self.logger.trim_log_file(
+                log_file, lambda record: record.get(JsonKeys.TIMESTAMP, "") > threshold
+            )
+            stats["removed_entries"] += removed
+            excess -= removed
+
+    def _merged_name(self, group: List[str]) -> str:
+        """生成合并后日志的文件路径，文件名记录覆盖的日期范围。
+
+        同名文件已存在且不在本组中（例如同一天较大的第一个分段未参与合并）时递增分段编号，
+        避免覆盖。
+        """
+        start, _, sequence = parse_segment_name(group[0])
+        end = parse_segment_dates(group[-1])[1]
+        dates = start if start == end else f"{start}{FileFormat.SEGMENT_RANGE_SEPARATOR}{end}"
+        extension = (
+            FileFormat.JOURNAL_FILE_EXTENSION
+            if self.logger.storage_format == StorageFormat.JSONL.value
+            else FileFormat.LOG_FILE_EXTENSION
+        )
+        suffix = codec_suffix(self.logger.compression_codec) if self.logger.compress_sealed_logs else ""
+        while True:
+            target = os.path.join(self.logger.base_dir, segment_file_name(dates, sequence, extension + suffix))
+            if target in group or not any(
+                os.path.exists(f"{target[:len(target) - len(suffix)]}{candidate}")
+                for candidate in ("", FileFormat.ZSTD_FILE_SUFFIX, FileFormat.GZIP_FILE_SUFFIX)
+            ):
+                return target
+            sequence += 1
+
+    def _merge_segments(self, stats: Dict[str, int]):
+        """将相邻的较小往日日志合并为接近目标大小的封存日志"""
+        if self.merge_below_bytes <= 0:
+            return
+        groups: List[List[str]] = []
+        group: List[str] = []
+        group_size = 0
+        for log_file in self._segments():
+            size = os.path.getsize(log_file)
+            mergeable = size < self.merge_below_bytes and parse_segment_dates(log_file) is not None
+            if not mergeable or (group and group_size + size > self.merge_target_bytes):
+                if len(group) > 1:
+                    groups.append(group)
+                group, group_size = [], 0
+            if mergeable:
+                group.append(log_file)
+                group_size += size
+        if len(group) > 1:
+            groups.append(group)
+
+        for group in groups:
+            self.logger.merge_log_files(group, self._merged_name(group))
+            stats["merged_files"] += len(group)
+
+    @staticmethod
+    def _directory_bytes(directory: str) -> int:
+        """统计目录下全部文件的总字节数"""
+        total = 0
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+
+    def _enforce_size(self, stats: Dict[str, int]):
+        """日志与图片的总字节数超出上限时删除最旧的日志"""
+        if self.max_total_bytes <= 0:
+            return
+        while True:
+            segments = self._segments()
+            total = (
+                sum(os.path.getsize(log_file) for log_file in self.logger._list_log_files()) +
+                self._directory_bytes(self.logger.images_dir)
+            )
+            if total <= self.max_total_bytes or not segments:
+                break
+            self._remove(segments[0], stats)
+            if self.logger.image_store is not None:
+                stats["removed_images"] += self.logger.image_store.gc()
+
+    def _enforce_database(self, stats: Dict[str, int]):
+        """数据库存储时按保留天数和记录总数删除最旧的记录"""
+        cutoff = self._cutoff()
+        if cutoff is not None:
+            stats["removed_entries"] += self.logger.delete_database_before(cutoff)
+        if self.max_total_entries > 0:
+            excess = self.logger.history_db.count() - self.max_total_entries
+            if excess > 0:
+                stats["removed_entries"] += self.logger.delete_oldest_database_entries(excess)
+
+    def _referenced_files(self) -> set:
+        """收集全部日志记录引用的按时间戳命名的图片和单独保存的超长文本的文件名"""
+        keys = (JsonKeys.IMAGE_PATH, JsonKeys.TEXT_PATH)
+        if self.logger.storage_format == StorageFormat.SQLITE.value:
+            paths = self.logger.history_db.referenced_paths(keys)
+        else:
+            paths = []
+            for log_file in self.logger._list_log_files():
+                with self.logger.lock:
+                    records = self.logger._read_log_file(log_file, decode=False)
+                paths.extend(record[key] for record in records for key in keys if record.get(key))
+        return {os.path.basename(path) for path in paths}
+
+    @staticmethod
+    def _list_files(directory: str, prefix: str) -> List[str]:
+        """列出目录中以指定前缀开头的文件路径，目录不存在时返回空列表"""
+        try:
+            return [os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(prefix)]
+        except OSError:
+            return []
+
+    def _collect_images(self, stats: Dict[str, int]):
+        """删除引用计数归零的图片，以及不再被任何日志引用的按时间戳命名的图片和超长文本文件"""
+        if self.logger.image_store is not None:
+            stats["removed_images"] += self.logger.image_store.gc()
+
+        images = [
+            path for path in self._list_files(self.logger.images_dir, FileFormat.IMAGE_FILE_PREFIX)
+            if path.endswith(tuple(FileFormat.IMAGE_EXTENSIONS.values()))
+        ]
+        # 超长文本目录中残留的临时文件来自中途失败的写入，同样按孤立文件处理
+        texts = self._list_files(self.logger.texts_dir, "")
+        if not images and not texts:
+            return
+        referenced = self._referenced_files()
+        deadline = time.time() - ORPHAN_GRACE_SECONDS
+        for paths, key in ((images, "removed_images"), (texts, "removed_texts")):
+            for path in paths:
+                if os.path.basename(path) in referenced:
+                    continue
+                try:
+                    if os.path.getmtime(path) < deadline:
+                        os.remove(path)
+                        stats[key] += 1
+                except OSError:
+                    pass
+
+    def _live_hashes(self) -> set:
+        """收集全部日志记录的内容哈希"""
+        if self.logger.storage_format == StorageFormat.SQLITE.value:
+            return self.logger.history_db.content_hashes()
+        if self.logger.dedup_index is not None:
+            # 引用记录的原始记录被删除时会提升为完整记录，完整记录的哈希即全部哈希
+            with self.logger.lock:
+                return self.logger.dedup_index.hashes()
+        hashes = set()
+        for log_file in self.logger._list_log_files():
+            with self.logger.lock:
+                records = self.logger._read_log_file(log_file, decode=False)
+            hashes.update(record[JsonKeys.CONTENT_HASH] for record in records if record.get(JsonKeys.CONTENT_HASH))
+        return hashes
+
+    def _compact_previews(self, stats: Dict[str, int]):
+        """本轮删除了记录时，从预览缓存中删除不再被引用的预览"""
+        if self.logger.preview_cache is None or not (stats["removed_files"] or stats["removed_entries"]):
+            return
+        stats["removed_previews"] += self.logger.preview_cache.compact(self._live_hashes())
+
+    def _remove_stale_indexes(self):
+        """删除对应的日志（包括压缩封存的日志）已不存在的时间索引"""
+        suffixes = ("", FileFormat.ZSTD_FILE_SUFFIX, FileFormat.GZIP_FILE_SUFFIX)
+        # 写入线程先生成新分段的索引再创建日志文件，持有锁避免误删
+        with self.logger.lock:
+            for name in os.listdir(self.logger.base_dir):
+                if not (name.startswith(FileFormat.LOG_FILE_PREFIX) and
+                        name.endswith(FileFormat.TIME_INDEX_SUFFIX)):
+                    continue
+                log_file = os.path.join(self.logger.base_dir, name[:-len(FileFormat.TIME_INDEX_SUFFIX)])
+                if any(os.path.exists(f"{log_file}{suffix}") for suffix in suffixes):
+                    continue
+                try:
+                    os.remove(os.path.join(self.logger.base_dir, name))
+                except OSError:
+                    pass
+
+    def _remove_old_backups(self, stats: Dict[str, int]):
+        """删除超出保留天数的损坏日志备份文件"""
+        if self.max_age_days <= 0:
+            return
+        deadline = time.time() - self.max_age_days * 86400
+        for name in os.listdir(self.logger.base_dir):
+            if not (name.startswith(FileFormat.LOG_FILE_PREFIX) and name.endswith(FileFormat.BACKUP_FILE_SUFFIX)):
+                continue
+            path = os.path.join(self.logger.base_dir, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+                    stats["removed_files"] += 1
+            except OSError:
+                pass
@@ -0,0 +1,300 @@
+"""分段日志与时间索引模块
+
+JSONL 日志按天分段保存：当天的第一个分段沿用 ``clipboard_2024-01-01.jsonl``，写满后依次写入
+``clipboard_2024-01-01.0001.jsonl``、``clipboard_2024-01-01.0002.jsonl`` ……，单个文件的大小
+有上限，封存、合并和清理都以分段为单位进行。
+
+每个 JSONL 日志旁有一个稀疏时间索引文件，例如 ``clipboard_2024-01-01.jsonl.idx``，每一行是
+``<时间戳> <字节偏移>``，每隔约 ``index_interval_kb`` 字节记录一条。按时间范围读取时先在索引中
+二分查找，从起始时间之前最近的一条记录开始读取，只解析范围附近的记录。日志压缩封存后索引
+中的偏移是解压后的偏移，读取时边解压边跳过；封存时在索引末尾追加一行 ``<时间戳> end``，
+记录最后一条记录的时间戳，查询范围在此之后的封存日志不必解压。
+
+索引只用于加速：索引缺失、过期或与日志内容不一致时，写入方重新生成，读取方从文件开头读取。
+
+Classes:
+    TimeIndex: 日志文件的稀疏时间索引
+
+Functions:
+    parse_segment_name: 从日志文件名中解析日期范围和分段编号
+    segment_file_name: 生成分段日志的文件名
+    segment_sort_key: 日志文件按日期和分段编号排序的键
+    index_path: 获取日志文件对应的时间索引文件路径
+    remove_index: 删除日志文件对应的时间索引文件
+    read_timestamp: 解析一行 JSONL 数据中的时间戳
+"""
+import os
+import json
+import bisect
+from datetime import datetime
+from typing import List, Optional, Tuple
+from .constants import FileFormat, JsonKeys
+from .compression import strip_compression_suffix
+from .serialization import loads
+
+# 默认每隔多少字节在索引中记录一条
+DEFAULT_INDEX_INTERVAL = 16 << 10
+# 封存日志的索引最后一行中代替偏移的标记
+END_MARKER = "end"
+
+
+def parse_segment_name(log_file: str) -> Optional[Tuple[str, str, int]]:
+    """从日志文件名中解析其覆盖的日期范围和分段编号。
+
+    Args:
+        log_file (str): 日志文件路径，例如 ``clipboard_2024-01-01.jsonl``、
+            ``clipboard_2024-01-01.0002.jsonl`` 或 ``clipboard_2024-01-01_2024-01-07.jsonl.zst``
+
+    Returns:
+        Optional[Tuple[str, str, int]]: 起始日期、结束日期和分段编号（第一个分段为 0），
+        文件名不符合格式时返回 None
+    """
+    name = os.path.splitext(strip_compression_suffix(os.path.basename(log_file)))[0]
+    if not name.startswith(FileFormat.LOG_FILE_PREFIX):
+        return None
+    name = name[len(FileFormat.LOG_FILE_PREFIX):]
+    sequence = 0
+    root, separator, suffix = name.rpartition(FileFormat.SEGMENT_SEQUENCE_SEPARATOR)
+    if separator and suffix.isdigit():
+        name, sequence = root, int(suffix)
+    dates = name.split(FileFormat.SEGMENT_RANGE_SEPARATOR)
+    try:
+        for date in dates:
+            datetime.strptime(date, FileFormat.LOG_FILE_DATE_FORMAT)
+    except ValueError:
+        return None
+    return dates[0], dates[-1], sequence
+
+
+def segment_file_name(dates: str, sequence: int, extension: str) -> str:
+    """生成分段日志的文件名。
+
+    Args:
+        dates (str): 日期，合并的日志为 ``起始日期_结束日期``
+        sequence (int): 分段编号，第一个分段为 0，文件名中不带编号
+        extension (str): 日志文件扩展名（可以带压缩后缀）
+
+    Returns:
+        str: 文件名，不含目录
+    """
+    if sequence <= 0:
+        return f"{FileFormat.LOG_FILE_PREFIX}{dates}{extension}"
+    return (
+        f"{FileFormat.LOG_FILE_PREFIX}{dates}{FileFormat.SEGMENT_SEQUENCE_SEPARATOR}"
+        f"{sequence:0{FileFormat.SEGMENT_SEQUENCE_DIGITS}d}{extension}"
+    )
+
+
+def segment_sort_key(log_file: str) -> Tuple[str, str, int, str]:
+    """日志文件按起始日期、结束日期和分段编号排序的键。
+
+    只按文件名排序时 ``clipboard_2024-01-01.0001.jsonl`` 会排在 ``clipboard_2024-01-01.jsonl``
+    之前。文件名中没有日期的日志按文件名排序。
+    """
+    name = os.path.basename(log_file)
+    parsed = parse_segment_name(name)
+    if parsed is None:
+        return name, name, 0, name
+    return parsed + (name,)
+
+
+def index_path(log_file: str) -> str:
+    """获取日志文件对应的时间索引文件路径，压缩封存前后相同"""
+    return f"{strip_compression_suffix(log_file)}{FileFormat.TIME_INDEX_SUFFIX}"
+
+
+def remove_index(log_file: str):
+    """删除日志文件对应的时间索引文件，不存在时忽略"""
+    try:
+        os.remove(index_path(log_file))
+    except OSError:
+        pass
+
+
+def read_timestamp(line: bytes) -> Optional[str]:
+    """解析一行 JSONL 数据中的时间戳，无法解析时返回 None"""
+    try:
+        record = loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    timestamp = record.get(JsonKeys.TIMESTAMP) if isinstance(record, dict) else None
+    return timestamp if isinstance(timestamp, str) else None
+
+
+class TimeIndex:
+    """日志文件的稀疏时间索引。
+
+    索引项按字节偏移递增排列，相邻两项至少间隔 interval 字节。JSONL 日志按时间从旧到新追加，
+    因此索引项的时间戳同样递增，可以二分查找。
+
+    Attributes:
+        log_file (str): 日志文件路径
+        path (str): 索引文件路径
+        interval (int): 相邻两个索引项之间的最小字节数
+        timestamps (List[str]): 各索引项对应记录的时间戳
+        offsets (List[int]): 各索引项对应记录在未压缩日志中的字节偏移
+        last (Optional[str]): 日志封存时最后一条记录的时间戳，未封存时为 None
+    """
+
+    def __init__(self, log_file: str, interval: int = DEFAULT_INDEX_INTERVAL):
+        """创建空索引。
+
+        Args:
+            log_file (str): 日志文件路径
+            interval (int, optional): 相邻两个索引项之间的最小字节数。默认为 16KB
+        """
+        self.log_file = log_file
+        self.path = index_path(log_file)
+        self.interval = interval
+        self.timestamps: List[str] = []
+        self.offsets: List[int] = []
+        self.last: Optional[str] = None
+        # 已加入但尚未追加到索引文件的行
+        self._pending: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def load(cls, log_file: str, interval: int = DEFAULT_INDEX_INTERVAL) -> Optional['TimeIndex']:
+        """读取日志文件的索引。
+
+        末尾写了一半的行和偏移不递增的行会被忽略。
+
+        Args:
+            log_file (str): 日志文件路径
+            interval (int, optional): 之后追加索引项时使用的间隔
+
+        Returns:
+            Optional[TimeIndex]: 索引，索引文件不存在或无法读取时返回 None
+        """
+        index = cls(log_file, interval)
+        try:
+            with open(index.path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except (IOError, OSError, UnicodeDecodeError):
+            return None
+        # 最后一段是换行符之后的内容，完整写入的文件中为空
+        for line in lines[:-1]:
+            timestamp, _, offset = line.partition(' ')
+            if timestamp and offset == END_MARKER:
+                index.last = timestamp
+                break
+            if not timestamp or not offset.isdigit():
+                break
+            offset = int(offset)
+            if index.offsets and offset <= index.offsets[-1]:
+                break
+            index.timestamps.append(timestamp)
+            index.offsets.append(offset)
+        return index
+
+    @classmethod
+    def build(cls, log_file: str, interval: int = DEFAULT_INDEX_INTERVAL) -> 'TimeIndex':
+        """扫描未压缩的日志文件重新生成索引并保存。
+
+        只解析需要记录到索引中的行，其余行只统计长度。
+
+        Args:
+            log_file (str): 未压缩的 JSONL 日志文件路径
+            interval (int, optional): 相邻两个索引项之间的最小字节数
+
+        Returns:
+            TimeIndex: 新的索引
+        """
+        index = cls(log_file, interval)
+        if os.path.exists(log_file):
+            with open(log_file, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if index.due(offset) and line.endswith(b'\n'):
+                        timestamp = read_timestamp(line)
+                        if timestamp is not None:
+                            index.add(timestamp, offset)
+                    offset += len(line)
+        index.save()
+        return index
+
+    def due(self, offset: int) -> bool:
+        """判断位于此偏移的记录是否需要加入索引"""
+        return not self.offsets or offset - self.offsets[-1] >= self.interval
+
+    def add(self, timestamp: str, offset: int):
+        """记录一条位于 offset 的记录，与上一个索引项间隔不足 interval 字节时忽略"""
+        if not self.due(offset):
+            return
+        self.timestamps.append(timestamp)
+        self.offsets.append(offset)
+        self._pending.append(f"{timestamp} {offset}\n")
+
+    def flush(self):
+        """将新加入的索引项追加到索引文件"""
+        if not self._pending:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(self._pending))
+        self._pending.clear()
+
+    def save(self):
+        """通过临时文件完整写入索引文件"""
+        temp_file = f"{self.path}{FileFormat.TEMP_FILE_SUFFIX}"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{timestamp} {offset}\n" for timestamp, offset in zip(self.timestamps, self.offsets)))
+        os.replace(temp_file, self.path)
+        self._pending.clear()
+
+    def seal(self, timestamp: str):
+        """日志封存后记录其最后一条记录的时间戳，之后不再向该日志追加记录"""
+        self.last = timestamp
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{timestamp} {END_MARKER}\n")
+
+    def verify(self, size: int) -> bool:
+        """检查索引是否与未压缩的日志文件一致，可以继续追加。
+
+        索引不能带有封存标记，最后一个索引项必须落在文件范围内，且该位置的记录时间戳与索引项相同。
+
+        Args:
+            size (int): 日志文件当前的大小
+
+        Returns:
+            bool: 索引可以继续使用时返回 True
+        """
+        if self.last is not None:
+            return False
+        if not self.offsets:
+            return size == 0
+        if self.offsets[-1] >= size:
+            return False
+        try:
+            with open(self.log_file, 'rb') as f:
+                f.seek(self.offsets[-1])
+                return read_timestamp(f.readline()) == self.timestamps[-1]
+        except (IOError, OSError):
+            return False
+
+    def floor(self, timestamp: str) -> Optional[Tuple[int, str]]:
+        """查找时间戳早于 timestamp 的最后一个索引项。
+
+        该项之前的记录都早于 timestamp，从该项开始读取即可找到全部不早于 timestamp 的记录。
+
+        Returns:
+            Optional[Tuple[int, str]]: 索引项的偏移和时间戳，没有更早的索引项时返回 None
+        """
+        position = bisect.bisect_left(self.timestamps, timestamp)
+        if position == 0:
+            return None
+        return self.offsets[position - 1], self.timestamps[position - 1]
+
+    def ceiling(self, timestamp: str) -> Optional[Tuple[int, str]]:
+        """查找时间戳不早于 timestamp 的第一个索引项。
+
+        该项及之后的记录都不早于 timestamp，读取早于 timestamp 的记录时可以在此处停止。
+
+        Returns:
+            Optional[Tuple[int, str]]: 索引项的偏移和时间戳，没有这样的索引项时返回 None
+        """
+        position = bisect.bisect_left(self.timestamps, timestamp)
+        if position == len(self.timestamps):
+            return None
+        return self.offsets[position], self.timestamps[position]
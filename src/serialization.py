@@ -0,0 +1,103 @@
+"""JSON 序列化模块
+
+日志记录写入前编码为 JSON，读取时再解析。安装了 orjson 或 msgspec 时由它们完成，
+速度是标准库 json 的数倍；都未安装时使用标准库。各实现输出的都是 UTF-8 编码的 JSON，
+非 ASCII 字符不转义，读取方不需要区分是由哪个实现写入的。
+
+第三方实现无法处理的值（例如超出 64 位的整数）交给标准库重新处理，
+结果和抛出的异常都与只使用标准库时相同，解析错误仍然是 json.JSONDecodeError。
+
+Functions:
+    dumps: 将对象编码为 JSON 字节串
+    loads: 解析 JSON 文本或字节串
+
+Attributes:
+    BACKEND (str): 当前使用的实现，orjson、msgspec 或 json
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """使用标准库编码"""
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    # orjson.JSONEncodeError 是 TypeError 的子类，orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+    _ENCODE_ERRORS: tuple = (TypeError,)
+    _DECODE_ERRORS: tuple = (ValueError,)
+
+    def _fast_dumps(obj: Any, indent: bool) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    _fast_loads = orjson.loads
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    _ENCODE_ERRORS = (TypeError, ValueError, msgspec.EncodeError)
+    _DECODE_ERRORS = (ValueError, msgspec.DecodeError)
+    _encoder = msgspec.json.Encoder()
+
+    def _fast_dumps(obj: Any, indent: bool) -> bytes:
+        data = _encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    _fast_loads = msgspec.json.decode
+else:
+    BACKEND = "json"
+    _fast_dumps = None
+    _fast_loads = None
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """将对象编码为 UTF-8 JSON 字节串。
+
+    Args:
+        obj (Any): 要编码的对象，由字典、列表、字符串、数字、布尔值和 None 组成
+        indent (bool, optional): 是否以 2 个空格缩进格式化。默认为 False，输出不含多余空白的紧凑格式
+
+    Returns:
+        bytes: 编码后的 JSON
+    """
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(obj, indent)
+        except _ENCODE_ERRORS:
+            pass
+    return _json_dumps(obj, indent)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """解析 JSON 文本或 UTF-8 字节串。
+
+    Args:
+        data (Union[str, bytes]): JSON 文本
+
+    Returns:
+        Any: 解析结果
+
+    Raises:
+        json.JSONDecodeError: JSON 格式错误
+    """
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(data)
+        except _DECODE_ERRORS:
+            pass
+    return json.loads(data)
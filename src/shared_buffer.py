@@ -0,0 +1,243 @@
+"""共享内存缓冲池模块
+
+拆分进程模式下，捕获进程将图片的原始像素分块直接复制到共享内存中，之后的像素哈希、
+发送和存储进程中的 图片编码都读取同一块内存，消息中只传递缓冲区的编号和名称，
+像素数据在两个进程之间不再复制。
+
+缓冲池由捕获进程创建并拥有，包含固定数量的缓冲区。存储进程编码完成后通知捕获进程
+释放缓冲区；缓冲区全部被占用时，捕获进程退回到通过连接直接发送像素。
+缓冲区不够大时按新图片的大小重新分配，此后同样大小的图片可以直接复用。
+
+Classes:
+    SharedBuffer: 缓冲池中的一个缓冲区
+    SharedBufferPool: 捕获进程一侧的共享内存缓冲池
+    SharedBufferReader: 存储进程一侧，按名称附加缓冲区并读取像素
+
+Functions:
+    copy_pixels: 分块将图片像素复制到缓冲区
+    raw_size: 计算图片原始像素数据的字节数
+    tracker_id: 获取当前进程使用的资源跟踪器的标识
+"""
+import os
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from .constants import Messages
+from .hashing import iter_raw_chunks
+
+# 分配缓冲区时按此粒度向上取整，尺寸相近的图片可以复用同一个缓冲区
+ALLOCATION_GRANULARITY = 1 << 20
+
+
+def tracker_id() -> Optional[Tuple[int, int]]:
+    """获取当前进程使用的资源跟踪器的标识，Windows 上没有资源跟踪器，返回 None。
+
+    子进程继承父进程与资源跟踪器之间的管道，由同一进程启动的进程共用一个资源跟踪器，
+    因此以管道的设备号和 inode 作为标识；存储进程据此判断附加共享内存时是否需要撤销登记。
+    """
+    if os.name == 'nt':
+        return None
+    try:
+        stat = os.fstat(resource_tracker.getfd())
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def raw_size(image: Image.Image) -> int:
+    """计算图片原始像素数据的字节数"""
+    width, height = image.size
+    if not width or not height:
+        return 0
+    return len(image.crop((0, 0, width, 1)).tobytes()) * height
+
+
+def copy_pixels(image: Image.Image, buffer: memoryview) -> int:
+    """分块将图片像素复制到缓冲区，不生成整张图片的临时副本。
+
+    Args:
+        image (Image.Image): 图片
+        buffer (memoryview): 目标缓冲区，大小不小于 raw_size(image)
+
+    Returns:
+        int: 复制的字节数
+    """
+    offset = 0
+    for chunk in iter_raw_chunks(image):
+        buffer[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return offset
+
+
+class SharedBuffer:
+    """缓冲池中的一个缓冲区。
+
+    Attributes:
+        index (int): 缓冲区在池中的编号
+        name (str): 共享内存段的名称
+        size (int): 当前数据的字节数
+        view (memoryview): 当前数据所在的内存视图
+    """
+
+    def __init__(self, index: int, name: str, size: int, view: memoryview):
+        """初始化缓冲区。
+
+        Args:
+            index (int): 缓冲区编号
+            name (str): 共享内存段的名称
+            size (int): 当前数据的字节数
+            view (memoryview): 当前数据所在的内存视图
+        """
+        self.index = index
+        self.name = name
+        self.size = size
+        self.view = view
+
+
+class SharedBufferPool:
+    """捕获进程一侧的共享内存缓冲池。
+
+    不是线程安全的，只应在监控线程中使用。
+    """
+
+    def __init__(self, slots: int):
+        """初始化缓冲池，共享内存在第一次使用时才分配。
+
+        Args:
+            slots (int): 缓冲区数量，即最多同时等待存储进程编码的图片数
+        """
+        self._segments: List[Optional[SharedMemory]] = [None] * slots
+        self._free = list(range(slots))
+        self._in_use: Dict[int, SharedBuffer] = {}
+
+    def acquire(self, size: int) -> Optional[SharedBuffer]:
+        """取出一个至少能容纳 size 字节的空闲缓冲区。
+
+        Args:
+            size (int): 需要的字节数
+
+        Returns:
+            Optional[SharedBuffer]: 缓冲区，没有空闲缓冲区或分配失败时返回 None
+        """
+        if not self._free or size <= 0:
+            return None
+        index = self._free.pop()
+        segment = self._segments[index]
+        if segment is None or segment.size < size:
+            try:
+                if segment is not None:
+                    self._destroy(segment)
+                allocation = -(-size // ALLOCATION_GRANULARITY) * ALLOCATION_GRANULARITY
+                segment = SharedMemory(create=True, size=allocation)
+            except (OSError, ValueError) as e:
+                print(Messages.Error.SHARED_MEMORY_ERROR.format(str(e)))
+                self._segments[index] = None
+                self._free.append(index)
+                return None
+            self._segments[index] = segment
+        buffer = SharedBuffer(index, segment.name, size, segment.buf[:size])
+        self._in_use[index] = buffer
+        return buffer
+
+    def release(self, index: int):
+        """归还缓冲区，存储进程读取完毕或内容被丢弃时调用"""
+        buffer = self._in_use.pop(index, None)
+        if buffer is None:
+            return
+        buffer.view.release()
+        self._free.append(index)
+
+    def release_all(self, keep: Optional[SharedBuffer] = None):
+        """归还全部缓冲区，与存储进程的连接断开后调用。
+
+        Args:
+            keep (Optional[SharedBuffer], optional): 仍要继续使用、不归还的缓冲区
+        """
+        for index in list(self._in_use):
+            if keep is None or index != keep.index:
+                self.release(index)
+
+    @property
+    def in_use(self) -> int:
+        """尚未归还的缓冲区数量"""
+        return len(self._in_use)
+
+    @staticmethod
+    def _destroy(segment: SharedMemory):
+        """关闭并删除共享内存段"""
+        try:
+            segment.close()
+            segment.unlink()
+        except (OSError, BufferError):
+            pass
+
+    def close(self):
+        """释放全部共享内存"""
+        self.release_all()
+        for segment in self._segments:
+            if segment is not None:
+                self._destroy(segment)
+        self._segments = [None] * len(self._segments)
+
+
+class SharedBufferReader:
+    """存储进程一侧，按名称附加捕获进程的缓冲区并读取像素。
+
+    每个连接使用一个实例；同一编号的缓冲区重新分配后名称改变，届时关闭旧的附加。
+    """
+
+    def __init__(self, owner_tracker: Optional[Tuple[int, int]] = None):
+        """初始化读取器。
+
+        Args:
+            owner_tracker (Optional[Tuple[int, int]], optional): 捕获进程的资源跟踪器标识（见 tracker_id），
+                用于判断两者是否共用同一个资源跟踪器
+        """
+        self._segments: Dict[int, SharedMemory] = {}
+        self._shared_tracker = owner_tracker is not None and tuple(owner_tracker) == tracker_id()
+
+    def _attach(self, name: str) -> SharedMemory:
+        """附加已存在的共享内存段，删除工作仍由创建它的捕获进程负责"""
+        try:
+            return SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python 3.13 之前附加时也会登记到资源跟踪器，进程退出时会误删共享内存；
+            # 与捕获进程共用跟踪器时（拆分模式下的存储子进程）登记会在捕获进程删除时一并撤销
+            segment = SharedMemory(name=name)
+            if os.name != 'nt' and not self._shared_tracker:
+                resource_tracker.unregister(segment._name, "shared_memory")
+            return segment
+
+    def view(self, index: int, name: str, size: int) -> memoryview:
+        """获取缓冲区中数据的内存视图，使用完毕后应调用其 release 方法。
+
+        Args:
+            index (int): 缓冲区编号
+            name (str): 共享内存段的名称
+            size (int): 数据的字节数
+
+        Returns:
+            memoryview: 数据所在的内存视图
+        """
+        segment = self._segments.get(index)
+        if segment is None or segment.name != name:
+            if segment is not None:
+                self._close(segment)
+            segment = self._attach(name)
+            self._segments[index] = segment
+        return segment.buf[:size]
+
+    @staticmethod
+    def _close(segment: SharedMemory):
+        """关闭附加的共享内存段"""
+        try:
+            segment.close()
+        except BufferError:
+            pass
+
+    def close(self):
+        """关闭全部附加的共享内存段"""
+        for segment in self._segments.values():
+            self._close(segment)
+        self._segments.clear()
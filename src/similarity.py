@@ -0,0 +1,323 @@
+"""相似内容检测模块
+
+精确去重只能识别内容哈希完全相同的内容：只多了一个闪烁光标的截图、只差行尾空白的文本
+都会被当作新内容完整保存。此模块为文本和图片计算相似指纹，指纹之间的汉明距离越小，
+内容越相似：
+
+* 文本：64 位 SimHash。文本先合并连续空白并去掉首尾空白，再以每 4 个字符为一个片段
+  （对中文同样适用）计算各片段的哈希，按位投票得到指纹。
+* 图片：256 位 dHash（差值哈希）。图片缩小为 17x16 的灰度图，逐行比较相邻像素的亮度，
+  左侧较亮记为 1。只与缩小后的整体明暗分布有关，不受编码格式和细小局部变化影响。
+
+指纹以 ``<算法>:<十六进制>`` 的形式保存在日志记录中，算法前缀同时表明指纹的位数。
+
+SimilarityIndex 在内存中按汉明距离查找相似指纹。指纹被切分为若干段，按鸽巢原理，
+距离不超过 d 的两个指纹至少有一段的差异不超过 d // 段数，查找时只需检查这些段
+在该差异范围内的取值所对应的桶，每次查找只比较少量候选。
+
+Classes:
+    SimilarityIndex: 按汉明距离查找相似指纹的内存索引
+    SimilarityDetector: 分别为文本和图片指纹维护索引，查找最相似的已保存内容
+
+Functions:
+    text_fingerprint: 计算文本的 SimHash 指纹
+    normalized_text_hash: 计算合并空白后的文本的哈希
+    image_fingerprint: 计算图片的 dHash 指纹
+    parse_fingerprint: 解析带算法前缀的指纹
+    hamming_distance: 计算两个指纹的汉明距离
+"""
+import re
+import hashlib
+from collections import OrderedDict
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from .metrics import REGISTRY
+
+# 文本指纹的算法前缀和位数
+TEXT_ALGORITHM = "simhash64"
+TEXT_BITS = 64
+# 图片指纹的算法前缀和位数
+IMAGE_ALGORITHM = "dhash256"
+IMAGE_BITS = 256
+# 算法前缀 -> 指纹位数
+FINGERPRINT_BITS = {TEXT_ALGORITHM: TEXT_BITS, IMAGE_ALGORITHM: IMAGE_BITS}
+# 文本片段的长度（字符）
+SHINGLE_CHARS = 4
+# 超过此长度（字符）的文本不计算指纹，计算耗时与长度成正比
+MAX_FINGERPRINT_CHARS = 1 << 14
+# dHash 缩小后的宽高，每行 DHASH_WIDTH - 1 次比较
+DHASH_WIDTH = 17
+DHASH_HEIGHT = 16
+# 每段至少的位数，段太短时每个桶中的候选过多
+MIN_BAND_BITS = 16
+
+# 监控线程计算图片指纹、写入线程计算文本指纹的耗时共用一个直方图
+SIMILARITY_SECONDS = REGISTRY.histogram("clipboard_hash_seconds", "计算内容哈希的耗时（秒）", kind="similarity")
+
+_WHITESPACE = re.compile(r"\s+")
+# 第 bit 位的转换表：字节值中该位为 1 时转换为 1，否则为 0
+_BIT_TABLES = [bytes(value >> bit & 1 for value in range(256)) for bit in range(8)]
+
+
+def _normalize_text(text: str) -> str:
+    """合并连续空白并去掉首尾空白"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def normalized_text_hash(text: str) -> str:
+    """计算合并连续空白并去掉首尾空白后的文本的 MD5，只差空白的文本结果相同"""
+    return hashlib.md5(_normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def text_fingerprint(text: str) -> Optional[str]:
+    """计算文本的 64 位 SimHash 指纹。
+
+    每个片段取 BLAKE2b 的 8 字节摘要，片段摘要的每一位为 1 时该位得一票，
+    得票超过片段数一半的位在指纹中为 1。计票时把全部摘要中同一字节位置的字节取出，
+    按位转换为 0 和 1 后统计 1 的个数，不必在 Python 中逐个片段逐位循环。
+
+    Args:
+        text (str): 文本内容
+
+    Returns:
+        Optional[str]: 带算法前缀的指纹；文本为空或超过 MAX_FINGERPRINT_CHARS 时返回 None
+    """
+    if len(text) > MAX_FINGERPRINT_CHARS:
+        return None
+    text = _normalize_text(text)
+    if not text:
+        return None
+    data = text.encode('utf-8')
+    if len(text) <= SHINGLE_CHARS:
+        shingles = [data]
+    else:
+        shingles = [text[i:i + SHINGLE_CHARS].encode('utf-8') for i in range(len(text) - SHINGLE_CHARS + 1)]
+    digests = b"".join(hashlib.blake2b(shingle, digest_size=8).digest() for shingle in shingles)
+    threshold = len(shingles) / 2
+    fingerprint = 0
+    for position in range(8):
+        column = digests[position::8]
+        for bit in range(8):
+            if column.translate(_BIT_TABLES[bit]).count(1) > threshold:
+                fingerprint |= 1 << (position * 8 + bit)
+    return f"{TEXT_ALGORITHM}:{fingerprint:0{TEXT_BITS // 4}x}"
+
+
+def image_fingerprint(image: Image.Image) -> str:
+    """计算图片的 256 位 dHash 指纹。
+
+    缩小时借助 reducing_gap 先按整数倍快速缩小，大尺寸截图也只需数毫秒。
+
+    Args:
+        image (Image.Image): 图片
+
+    Returns:
+        str: 带算法前缀的指纹
+    """
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGBA" if "A" in image.getbands() or image.palette is not None else "RGB")
+    small = image.resize((DHASH_WIDTH, DHASH_HEIGHT), Image.BILINEAR, reducing_gap=2.0).convert("L")
+    pixels = small.tobytes()
+    fingerprint = 0
+    for row in range(DHASH_HEIGHT):
+        start = row * DHASH_WIDTH
+        for column in range(DHASH_WIDTH - 1):
+            fingerprint = fingerprint << 1 | (pixels[start + column] > pixels[start + column + 1])
+    return f"{IMAGE_ALGORITHM}:{fingerprint:0{IMAGE_BITS // 4}x}"
+
+
+def parse_fingerprint(fingerprint: str) -> Optional[Tuple[str, int]]:
+    """解析带算法前缀的指纹。
+
+    Args:
+        fingerprint (str): 指纹，例如 ``simhash64:0123456789abcdef``
+
+    Returns:
+        Optional[Tuple[str, int]]: 算法前缀和指纹的整数值，格式不正确或算法未知时返回 None
+    """
+    if not isinstance(fingerprint, str):
+        return None
+    algorithm, _, value = fingerprint.partition(":")
+    bits = FINGERPRINT_BITS.get(algorithm)
+    if bits is None or len(value) != bits // 4:
+        return None
+    try:
+        return algorithm, int(value, 16)
+    except ValueError:
+        return None
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """计算两个指纹的汉明距离"""
+    return (a ^ b).bit_count()
+
+
+class SimilarityIndex:
+    """按汉明距离查找相似指纹的内存索引。
+
+    每种算法的指纹单独建立索引，互不比较。指纹切分为 bands 段，每段一个哈希表，
+    从段的取值映射到包含该取值的条目。查找距离不超过 max_distance 的指纹时，
+    对每一段枚举与之相差不超过 max_distance // bands 位的取值，合并各桶中的候选
+    后逐个计算完整的汉明距离。
+
+    条目按加入顺序保留最近的 capacity 条，超出后淘汰最早加入的条目。
+
+    Attributes:
+        max_distance (int): 判定为相似的最大汉明距离
+        capacity (int): 最多保留的条目数
+    """
+
+    def __init__(self, bits: int, max_distance: int, capacity: int):
+        """创建空索引。
+
+        Args:
+            bits (int): 指纹位数
+            max_distance (int): 判定为相似的最大汉明距离
+            capacity (int): 最多保留的条目数，超出后淘汰最早加入的条目
+        """
+        self.max_distance = max(0, max_distance)
+        self.capacity = max(1, capacity)
+        bands = max(1, min(self.max_distance + 1, bits // MIN_BAND_BITS))
+        self._band_bits = -(-bits // bands)
+        self._band_mask = (1 << self._band_bits) - 1
+        self._bands = bands
+        self._radius = self.max_distance // bands
+        # 与段的取值相差不超过 radius 位的全部异或掩码
+        self._flips = [0] + [
+            sum(1 << bit for bit in positions)
+            for count in range(1, self._radius + 1)
+            for positions in combinations(range(self._band_bits), count)
+        ]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        # 条目编号 -> (指纹, 时间戳, 内容哈希)，按加入顺序排列
+        self._entries: "OrderedDict[int, Tuple[int, str, str]]" = OrderedDict()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_values(self, fingerprint: int):
+        """依次返回指纹每一段的取值"""
+        for band in range(self._bands):
+            yield band, fingerprint >> (band * self._band_bits) & self._band_mask
+
+    def add(self, fingerprint: int, timestamp: str, content_hash: str):
+        """加入一条内容的指纹。
+
+        Args:
+            fingerprint (int): 指纹的整数值
+            timestamp (str): 内容的时间戳
+            content_hash (str): 内容哈希
+        """
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (fingerprint, timestamp, content_hash)
+        for band, value in self._band_values(fingerprint):
+            self._tables[band].setdefault(value, []).append(entry_id)
+        while len(self._entries) > self.capacity:
+            self._evict()
+
+    def _evict(self):
+        """淘汰最早加入的条目"""
+        entry_id, (fingerprint, _, _) = self._entries.popitem(last=False)
+        for band, value in self._band_values(fingerprint):
+            bucket = self._tables[band][value]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._tables[band][value]
+
+    def lookup(self, fingerprint: int) -> Optional[Tuple[int, str, str]]:
+        """查找与指纹距离不超过 max_distance 的最相似条目。
+
+        距离相同时取最早加入的条目。
+
+        Args:
+            fingerprint (int): 指纹的整数值
+
+        Returns:
+            Optional[Tuple[int, str, str]]: 汉明距离、条目的时间戳和内容哈希，没有相似条目时返回 None
+        """
+        candidates = set()
+        for band, value in self._band_values(fingerprint):
+            table = self._tables[band]
+            for flip in self._flips:
+                bucket = table.get(value ^ flip)
+                if bucket:
+                    candidates.update(bucket)
+        best = None
+        for entry_id in sorted(candidates):
+            other, timestamp, content_hash = self._entries[entry_id]
+            distance = (fingerprint ^ other).bit_count()
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, timestamp, content_hash)
+                if distance == 0:
+                    break
+        return best
+
+
+class SimilarityDetector:
+    """分别为文本和图片指纹维护 SimilarityIndex，查找最相似的已保存内容。
+
+    文本另外按合并空白后的哈希保存一份映射，用于判断两段文本是否只差空白：
+    SimHash 距离很小的文本仍可能有少量实质修改，不能直接以另一条记录代替。
+
+    Attributes:
+        indexes (Dict[str, SimilarityIndex]): 算法前缀 -> 该算法指纹的索引
+    """
+
+    def __init__(self, text_distance: int, image_distance: int, capacity: int):
+        """创建空的文本和图片指纹索引。
+
+        Args:
+            text_distance (int): 文本判定为相似的最大汉明距离
+            image_distance (int): 图片判定为相似的最大汉明距离
+            capacity (int): 每种指纹最多保留的条目数
+        """
+        self.indexes: Dict[str, SimilarityIndex] = {
+            TEXT_ALGORITHM: SimilarityIndex(TEXT_BITS, text_distance, capacity),
+            IMAGE_ALGORITHM: SimilarityIndex(IMAGE_BITS, image_distance, capacity),
+        }
+        self._capacity = max(1, capacity)
+        # 合并空白后的文本哈希 -> (时间戳, 内容哈希)，按加入顺序排列
+        self._texts: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.indexes.values())
+
+    def add(self, fingerprint: str, timestamp: str, content_hash: str, text_hash: Optional[str] = None):
+        """加入一条已保存内容的指纹，指纹格式不正确时忽略。
+
+        Args:
+            fingerprint (str): 带算法前缀的指纹
+            timestamp (str): 内容的时间戳
+            content_hash (str): 内容哈希
+            text_hash (Optional[str], optional): 文本合并空白后的哈希，见 normalized_text_hash
+        """
+        parsed = parse_fingerprint(fingerprint)
+        if parsed is None:
+            return
+        self.indexes[parsed[0]].add(parsed[1], timestamp, content_hash)
+        if text_hash is not None and text_hash not in self._texts:
+            self._texts[text_hash] = (timestamp, content_hash)
+            if len(self._texts) > self._capacity:
+                self._texts.popitem(last=False)
+
+    def lookup(self, fingerprint: str) -> Optional[Tuple[int, str, str]]:
+        """查找与指纹最相似的已保存内容。
+
+        Args:
+            fingerprint (str): 带算法前缀的指纹
+
+        Returns:
+            Optional[Tuple[int, str, str]]: 汉明距离、该内容的时间戳和内容哈希，
+            没有足够相似的内容或指纹格式不正确时返回 None
+        """
+        parsed = parse_fingerprint(fingerprint)
+        if parsed is None:
+            return None
+        return self.indexes[parsed[0]].lookup(parsed[1])
+
+    def find_text(self, text_hash: str) -> Optional[Tuple[str, str]]:
+        """查找合并空白后完全相同的已保存文本，返回其时间戳和内容哈希"""
+        return self._texts.get(text_hash)
@@ -0,0 +1,291 @@
+"""文本增量编码模块
+
+复制一段文本、修改后再次复制时，新旧两个版本的大部分内容相同。此模块把新版本编码为
+相对于旧版本（基准）的增量：一组操作，每个操作要么是 ``[起始位置, 长度]``，表示复制基准
+文本中的一段，要么是字符串，表示插入的新内容。例如::
+
+    [[0, 5120], "修改后的一句话", [5136, 2048]]
+
+生成增量时先去掉两个版本相同的开头和结尾，再对中间部分做贪心的块匹配：基准文本每隔
+ANCHOR_CHARS 个字符取一段作为锚点放入字典，逐个位置用新文本中同样长度的一段查找锚点，
+命中后向前后两个方向扩展出最长的相同片段作为复制操作，其余字符作为插入内容。字典查找和
+片段比较都在 C 层完成，耗时与文本长度成线性关系，不会因为重复的空白或行而退化；
+长度不少于 2 * ANCHOR_CHARS - 1 个字符的相同片段一定能找到。
+
+插入的内容超过上限时提前放弃。中间部分较长时先在新文本中均匀抽取 SAMPLE_BLOCKS 段，
+用 str.find 检查其中有多少段在基准文本中不存在，据此估计的插入内容已超过上限时直接放弃，
+两段不相近的长文本不必建立锚点和逐个位置扫描。
+
+日志中的增量记录用 ``text_delta`` 字段代替 ``text_content``，并记录基准记录的时间戳、
+内容哈希和增量链的长度；基准记录本身也可以是增量记录。还原时沿增量链找到完整记录，
+再依次应用各级增量，每一级的结果都用内容哈希校验。
+
+Constants:
+    ANCHOR_CHARS: 锚点的字符数
+    SAMPLE_BLOCKS: 估计插入内容时抽取的片段数
+    SAMPLE_MIN_CHARS: 中间部分达到此长度时才抽样估计
+
+Functions:
+    diff_text: 生成新文本相对于基准文本的增量
+    apply_delta: 对基准文本应用增量
+    shared_affix: 两段文本相同的开头与结尾的总长度
+    delta_size: 增量序列化后的字节数
+    is_delta: 判断记录是否为增量记录
+    record_key: 记录的时间戳和内容哈希
+    delta_base_key: 增量记录的基准记录的时间戳和内容哈希
+    delta_text: 沿增量链还原记录的完整文本
+    materialize_deltas: 将一组记录中的增量记录就地还原为完整记录
+"""
+import zlib
+import hashlib
+from typing import Callable, Collection, Dict, List, MutableMapping, Optional, Tuple, Union
+from .constants import JsonKeys
+from .compression import decompress_text
+from .dedup_index import is_reference
+from .serialization import dumps
+
+ANCHOR_CHARS = 8
+SAMPLE_BLOCKS = 32
+SAMPLE_MIN_CHARS = 4096
+# 向后扩展相同片段时第一次比较的字符数，之后逐次加倍
+_EXTEND_WINDOW = 256
+
+DeltaOp = Union[List[int], str]
+RecordKey = Tuple[str, str]
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """二分查找两段文本相同开头的长度，比较由字符串切片在 C 层完成"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    """二分查找两段文本相同结尾的长度，最多 limit 个字符"""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def shared_affix(a: str, b: str) -> int:
+    """两段文本相同的开头与结尾的总长度（不重叠），用于从多个候选中选择基准"""
+    prefix = _common_prefix(a, b)
+    return prefix + _common_suffix(a, b, min(len(a), len(b)) - prefix)
+
+
+def _copy(ops: List[DeltaOp], start: int, length: int):
+    """追加一个复制操作，与前一个复制操作相连时合并"""
+    if length <= 0:
+        return
+    if ops and isinstance(ops[-1], list) and ops[-1][0] + ops[-1][1] == start:
+        ops[-1][1] += length
+    else:
+        ops.append([start, length])
+
+
+def _insert(ops: List[DeltaOp], text: str):
+    """追加一个插入操作，与前一个插入操作相连时合并"""
+    if not text:
+        return
+    if ops and isinstance(ops[-1], str):
+        ops[-1] += text
+    else:
+        ops.append(text)
+
+
+def _match_length(a: str, i: int, b: str, j: int, b_end: int) -> int:
+    """a[i:] 与 b[j:b_end] 相同开头的长度，比较窗口逐次加倍，不复制整个剩余部分"""
+    limit = min(len(a) - i, b_end - j)
+    length, window = 0, _EXTEND_WINDOW
+    while length < limit:
+        size = min(window, limit - length)
+        matched = _common_prefix(a[i + length:i + length + size], b[j + length:j + length + size])
+        length += matched
+        if matched < size:
+            break
+        window *= 2
+    return length
+
+
+def diff_text(base: str, text: str, max_insert: Optional[int] = None) -> Optional[List[DeltaOp]]:
+    """生成新文本相对于基准文本的增量。
+
+    Args:
+        base (str): 基准文本
+        text (str): 新文本
+        max_insert (Optional[int], optional): 插入内容的最大字符数，超过时放弃并返回 None。
+            默认不限制
+
+    Returns:
+        Optional[List[DeltaOp]]: 增量操作，apply_delta(base, ops) == text
+    """
+    prefix = _common_prefix(base, text)
+    suffix = _common_suffix(base, text, min(len(base), len(text)) - prefix)
+    end = len(text) - suffix
+    if max_insert is not None and end - prefix >= SAMPLE_MIN_CHARS:
+        step = (end - prefix) // SAMPLE_BLOCKS
+        block = 2 * ANCHOR_CHARS
+        missing = sum(
+            base.find(text[position:position + block]) < 0
+            for position in range(prefix, end - block + 1, step)
+        )
+        if missing * step > max_insert:
+            return None
+    ops: List[DeltaOp] = []
+    _copy(ops, 0, prefix)
+    anchors: Dict[str, int] = {}
+    for position in range(prefix, len(base) - suffix - ANCHOR_CHARS + 1, ANCHOR_CHARS):
+        anchors.setdefault(base[position:position + ANCHOR_CHARS], position)
+    inserted = 0
+    # pending 为尚未输出的插入内容的起点，expected 为紧接上一个复制操作的基准位置
+    pending = position = prefix
+    expected = prefix
+    while position + ANCHOR_CHARS <= end:
+        key = text[position:position + ANCHOR_CHARS]
+        source = expected if base.startswith(key, expected) else anchors.get(key)
+        if source is None:
+            position += 1
+            continue
+        # 向前扩展到尚未输出的插入内容中，再向后扩展到不同之处
+        reach = min(source, position - pending)
+        back = _common_suffix(base[source - reach:source], text[position - reach:position], reach)
+        length = back + _match_length(base, source, text, position, end)
+        source -= back
+        position -= back
+        inserted += position - pending
+        if max_insert is not None and inserted > max_insert:
+            return None
+        _insert(ops, text[pending:position])
+        _copy(ops, source, length)
+        position += length
+        pending = position
+        expected = source + length
+    inserted += end - pending
+    if max_insert is not None and inserted > max_insert:
+        return None
+    _insert(ops, text[pending:end])
+    _copy(ops, len(base) - suffix, suffix)
+    return ops
+
+
+def apply_delta(base: str, ops: List[DeltaOp]) -> str:
+    """对基准文本应用 diff_text 生成的增量，返回新文本"""
+    return "".join(
+        op if isinstance(op, str) else base[op[0]:op[0] + op[1]]
+        for op in ops
+    )
+
+
+def delta_size(ops: List[DeltaOp]) -> int:
+    """增量序列化后的字节数"""
+    return len(dumps(ops))
+
+
+def is_delta(record: dict) -> bool:
+    """判断记录是否为增量记录"""
+    return JsonKeys.TEXT_DELTA in record
+
+
+def record_key(record: dict) -> RecordKey:
+    """记录的时间戳和内容哈希，增量记录以此指向基准记录"""
+    return record.get(JsonKeys.TIMESTAMP, ""), record.get(JsonKeys.CONTENT_HASH, "")
+
+
+def delta_base_key(record: dict) -> RecordKey:
+    """增量记录的基准记录的时间戳和内容哈希"""
+    return record.get(JsonKeys.DELTA_BASE, ""), record.get(JsonKeys.DELTA_BASE_HASH, "")
+
+
+def _full_text(record: dict) -> Optional[str]:
+    """完整记录的文本，被压缩的文本自动解压，解压失败时返回 None"""
+    text = record.get(JsonKeys.TEXT_CONTENT)
+    if isinstance(text, str):
+        return text
+    value = record.get(JsonKeys.TEXT_COMPRESSED)
+    if value is None:
+        return None
+    try:
+        return decompress_text(value)
+    except (ValueError, zlib.error):
+        return None
+
+
+def delta_text(record: dict, find_base: Callable[[RecordKey], Optional[dict]],
+               texts: MutableMapping[RecordKey, str]) -> Optional[str]:
+    """沿增量链还原记录的完整文本。
+
+    Args:
+        record (dict): 增量记录
+        find_base (Callable[[RecordKey], Optional[dict]]): 按时间戳和内容哈希查找基准记录，
+            找不到时返回 None
+        texts (MutableMapping[RecordKey, str]): 已还原的文本，命中时不再向前查找；
+            还原过程中得到的每一级文本都会写入其中
+
+    Returns:
+        Optional[str]: 完整文本；基准记录不存在或还原结果与内容哈希不符时返回 None
+    """
+    chain = [record]
+    while True:
+        key = delta_base_key(chain[-1])
+        text = texts.get(key)
+        if text is not None:
+            break
+        base = find_base(key)
+        if base is None:
+            return None
+        if not is_delta(base):
+            text = _full_text(base)
+            if text is None:
+                return None
+            texts[key] = text
+            break
+        # 基准记录总是早于增量记录，时间戳不递减说明数据已损坏
+        if base.get(JsonKeys.TIMESTAMP, "") >= chain[-1].get(JsonKeys.TIMESTAMP, ""):
+            return None
+        chain.append(base)
+    for link in reversed(chain):
+        text = apply_delta(text, link[JsonKeys.TEXT_DELTA])
+        if hashlib.md5(text.encode('utf-8')).hexdigest() != link.get(JsonKeys.CONTENT_HASH):
+            return None
+        texts[record_key(link)] = text
+    return text
+
+
+def materialize_deltas(records: List[dict], targets: Collection[RecordKey]) -> int:
+    """将 records 中属于 targets 的增量记录就地还原为完整记录。
+
+    基准记录必须同样在 records 中，用于日志记录被删除前把依赖它们的增量记录还原。
+
+    Args:
+        records (List[dict]): 日志记录，文本可以是压缩的
+        targets (Collection[RecordKey]): 要还原的记录的时间戳和内容哈希
+
+    Returns:
+        int: 成功还原的记录条数
+    """
+    by_key = {record_key(record): record for record in records if not is_reference(record)}
+    texts: dict = {}
+    restored = 0
+    for key in targets:
+        record = by_key.get(key)
+        if record is None or not is_delta(record):
+            continue
+        text = delta_text(record, by_key.get, texts)
+        if text is None:
+            continue
+        for name in (JsonKeys.TEXT_DELTA, JsonKeys.DELTA_BASE, JsonKeys.DELTA_BASE_HASH, JsonKeys.DELTA_DEPTH):
+            record.pop(name, None)
+        record[JsonKeys.TEXT_CONTENT] = text
+        restored += 1
+    return restored
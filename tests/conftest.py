@@ -0,0 +1,142 @@
+"""测试的公共夹具
+
+在临时目录中创建配置、日志管理器和剪贴板内容，测试之间互不影响。
+"""
+import io
+import os
+import sys
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.logger import ClipboardLogger
+from src.models import ClipboardContent
+from src.history import HistoryReader
+from src.ipc import RemoteStore, StorageServer
+from src.constants import ConfigKeys, ContentType, FileFormat, JsonKeys, StorageFormat
+
+
+def write_config(base_dir: str, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """在 base_dir 中写入配置文件，日志目录为 base_dir/logs，控制台预览关闭，返回配置文件路径"""
+    settings: Dict[str, Dict[str, Any]] = {
+        ConfigKeys.General.SECTION: {ConfigKeys.General.BASE_DIR: os.path.join(base_dir, "logs")},
+        ConfigKeys.Display.SECTION: {ConfigKeys.Display.SHOW_PREVIEW: False},
+    }
+    for section, values in (overrides or {}).items():
+        settings.setdefault(section, {}).update(values)
+    config_file = os.path.join(base_dir, "config.json")
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump(settings, f)
+    return config_file
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """按区段覆盖配置项，返回使用临时目录的配置对象"""
+    def factory(overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Config:
+        return Config(write_config(str(tmp_path), overrides))
+    return factory
+
+
+@pytest.fixture
+def make_logger(make_config):
+    """创建日志管理器，测试结束时关闭"""
+    loggers = []
+
+    def factory(overrides: Optional[Dict[str, Dict[str, Any]]] = None, read_only: bool = False) -> ClipboardLogger:
+        logger = ClipboardLogger(make_config(overrides), read_only)
+        loggers.append(logger)
+        return logger
+
+    yield factory
+    for logger in loggers:
+        logger.close()
+
+
+def timestamp_at(seconds: float) -> str:
+    """当天零点之后若干秒的时间戳，按写入顺序递增且落在同一个日志文件中"""
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return (start + timedelta(seconds=seconds)).isoformat()
+
+
+def text_content(text: str, seconds: float) -> ClipboardContent:
+    """生成一条文本内容"""
+    content = ClipboardContent()
+    content.content_type = ContentType.TEXT.value
+    content.data[JsonKeys.TEXT_CONTENT] = text
+    content.timestamp = timestamp_at(seconds)
+    return content
+
+
+def files_content(paths, seconds: float) -> ClipboardContent:
+    """生成一条文件路径内容"""
+    content = ClipboardContent()
+    content.content_type = ContentType.FILES.value
+    content.data[JsonKeys.FILE_PATHS] = paths
+    content.timestamp = timestamp_at(seconds)
+    return content
+
+
+def png_bytes(color) -> memoryview:
+    """编码一张 8x8 的纯色 PNG"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format=FileFormat.IMAGE_FORMAT)
+    return buffer.getbuffer()
+
+
+def make_image(size, seed: int = 0) -> Image.Image:
+    """生成一张带有少量色块的图片"""
+    image = Image.new("RGB", size, (255, 255, 255))
+    image.paste((seed % 256, 80, 160), (10, 10, size[0] // 3, size[1] // 3))
+    return image
+
+
+def ipc_overrides(shared_memory: bool = True, buffers: int = 4, async_write: bool = True):
+    """拆分进程模式的配置：JSONL 存储，保留策略只在启动时执行一次"""
+    return {
+        ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSONL.value},
+        ConfigKeys.Ipc.SECTION: {ConfigKeys.Ipc.SHARED_MEMORY: shared_memory, ConfigKeys.Ipc.SHARED_BUFFERS: buffers},
+        ConfigKeys.Pipeline.SECTION: {ConfigKeys.Pipeline.ENABLE_ASYNC: async_write},
+        ConfigKeys.Retention.SECTION: {ConfigKeys.Retention.ENABLE_BACKGROUND: False},
+    }
+
+
+def read_history(config: Config):
+    """以只读方式读出全部记录，按时间从旧到新"""
+    logger = ClipboardLogger(config, read_only=True)
+    try:
+        return list(HistoryReader(logger).iter_entries(newest_first=False))
+    finally:
+        logger.close()
+
+
+class RunningStore:
+    """在后台线程中运行的存储进程"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._thread = threading.Thread(target=StorageServer(config).serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """请求存储进程写完已收到的内容后退出"""
+        if self._thread.is_alive():
+            RemoteStore(self.config).shutdown()
+            self._thread.join(timeout=10)
+        assert not self._thread.is_alive()
+
+
+@pytest.fixture
+def store(tmp_path, request):
+    """运行存储进程，间接参数为 ipc_overrides 的关键字参数"""
+    config = Config(write_config(str(tmp_path), ipc_overrides(**getattr(request, "param", {}))))
+    running = RunningStore(config)
+    yield running
+    running.stop()
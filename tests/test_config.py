@@ -0,0 +1,104 @@
+"""配置的类型校验与重新加载"""
+import os
+import json
+
+import pytest
+
+from conftest import write_config
+from src.config import Config, ConfigWatcher, restart_required
+from src.constants import ConfigKeys, DefaultConfig
+
+GENERAL = ConfigKeys.General.SECTION
+CONTENT = ConfigKeys.ContentTypes.SECTION
+LOGGING = ConfigKeys.Logging.SECTION
+
+
+def rewrite(config: Config, overrides):
+    """改写配置文件，并保证修改时间与上一次不同"""
+    stat = os.stat(config.config_file)
+    write_config(os.path.dirname(config.config_file), overrides)
+    os.utime(config.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.mark.parametrize("section, key, value, field, expected", [
+    (GENERAL, ConfigKeys.General.CHECK_INTERVAL, 2, "check_interval", 2.0),
+    (CONTENT, ConfigKeys.ContentTypes.MAX_TEXT_LENGTH, 500.0, "max_text_length", 500),
+    (CONTENT, ConfigKeys.ContentTypes.ENABLE_TEXT, False, "enable_text", False),
+])
+def test_compatible_values_are_converted(make_config, section, key, value, field, expected):
+    settings = make_config({section: {key: value}}).settings
+    assert getattr(settings, field) == expected
+    assert type(getattr(settings, field)) is type(expected)
+
+
+@pytest.mark.parametrize("section, key, value", [
+    (CONTENT, ConfigKeys.ContentTypes.ENABLE_TEXT, "false"),
+    (CONTENT, ConfigKeys.ContentTypes.MAX_TEXT_LENGTH, True),
+    (CONTENT, ConfigKeys.ContentTypes.MAX_TEXT_LENGTH, 1.5),
+    (GENERAL, ConfigKeys.General.CHECK_INTERVAL, "fast"),
+    (LOGGING, ConfigKeys.Logging.STORAGE_FORMAT, 3),
+])
+def test_invalid_values_fall_back_to_default(make_config, capsys, section, key, value):
+    config = make_config({section: {key: value}})
+    assert config.get(section, key) == DefaultConfig.DEFAULT_CONFIG[section][key]
+    assert f"{section}.{key}" in capsys.readouterr().out
+
+
+def test_invalid_section_falls_back_to_default(make_config):
+    config = make_config()
+    with open(config.config_file, 'w', encoding='utf-8') as f:
+        json.dump({CONTENT: "none"}, f)
+    config = Config(config.config_file)
+    assert config.get(CONTENT, ConfigKeys.ContentTypes.ENABLE_TEXT) is True
+
+
+def test_reload_applies_hot_settings(make_config, capsys):
+    config = make_config()
+    rewrite(config, {CONTENT: {ConfigKeys.ContentTypes.MAX_TEXT_LENGTH: 10}})
+    assert config.reload()
+    assert config.settings.max_text_length == 10
+    assert "重启" not in capsys.readouterr().out
+
+
+def test_reload_reports_restart_only_settings(make_config, capsys):
+    config = make_config()
+    rewrite(config, {GENERAL: {ConfigKeys.General.BASE_DIR: "elsewhere"}})
+    assert config.reload()
+    assert f"{GENERAL}.{ConfigKeys.General.BASE_DIR}" in capsys.readouterr().out
+
+
+def test_reload_keeps_settings_when_file_is_broken(make_config):
+    config = make_config({CONTENT: {ConfigKeys.ContentTypes.MAX_TEXT_LENGTH: 10}})
+    with open(config.config_file, 'w', encoding='utf-8') as f:
+        f.write("{ not json")
+    assert not config.reload()
+    assert config.settings.max_text_length == 10
+
+
+def test_restart_required_lists_changed_keys():
+    old = {GENERAL: {ConfigKeys.General.CHECK_INTERVAL: 1.0}, LOGGING: {ConfigKeys.Logging.DEDUP_HISTORY: False}}
+    new = {GENERAL: {ConfigKeys.General.CHECK_INTERVAL: 2.0}, LOGGING: {ConfigKeys.Logging.DEDUP_HISTORY: True}}
+    assert restart_required(old, new) == [f"{LOGGING}.{ConfigKeys.Logging.DEDUP_HISTORY}"]
+
+
+def test_watcher_reloads_on_change(make_config):
+    config = make_config()
+    reloaded = []
+    watcher = ConfigWatcher(config, reloaded.append)
+    assert not watcher.check()
+
+    rewrite(config, {GENERAL: {ConfigKeys.General.CHECK_INTERVAL: 0.5}})
+    assert watcher.check()
+    assert reloaded[-1].check_interval == 0.5
+    assert not watcher.check()
+
+
+def test_default_config_file_matches_defaults():
+    """仓库中的 config.json 与代码中的默认配置一致"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+    with open(path, 'r', encoding='utf-8') as f:
+        shipped = json.load(f)
+    for section, values in DefaultConfig.DEFAULT_CONFIG.items():
+        for key, default in values.items():
+            if key in shipped.get(section, {}):
+                assert shipped[section][key] == default, f"{section}.{key}"
@@ -0,0 +1,77 @@
+"""历史去重的引用记录"""
+import pytest
+
+from conftest import text_content
+from src.history import HistoryReader
+from src.dedup_index import is_reference, promote_reference
+from src.constants import ConfigKeys, JsonKeys, StorageFormat
+
+LONG_A = "a" * 600
+LONG_B = "b" * 600
+
+
+def dedup_overrides(storage_format: str, segment_kb: int = 0):
+    return {ConfigKeys.Logging.SECTION: {
+        ConfigKeys.Logging.STORAGE_FORMAT: storage_format,
+        ConfigKeys.Logging.DEDUP_HISTORY: True,
+        ConfigKeys.Logging.SEGMENT_KB: segment_kb,
+    }}
+
+
+def raw_entries(logger):
+    return list(HistoryReader(logger).iter_entries(newest_first=False, resolve=False))
+
+
+@pytest.mark.parametrize("storage_format", [StorageFormat.JSON.value, StorageFormat.JSONL.value])
+def test_repeated_content_is_saved_as_reference(make_logger, storage_format):
+    logger = make_logger(dedup_overrides(storage_format))
+    texts = [LONG_A, LONG_B, LONG_A, "c", LONG_A]
+    for i, text in enumerate(texts):
+        logger.save(text_content(text, i))
+
+    assert [is_reference(entry) for entry in raw_entries(logger)] == [False, False, True, False, True]
+    resolved = list(HistoryReader(logger).iter_entries(newest_first=False))
+    assert [entry[JsonKeys.TEXT_CONTENT] for entry in resolved] == texts
+    # iter_log_files 同样还原引用记录
+    restored = [entry for records in logger.iter_log_files() for entry in records]
+    assert sorted(entry[JsonKeys.TEXT_CONTENT] for entry in restored) == sorted(texts)
+
+
+def test_index_survives_reopen(make_logger):
+    overrides = dedup_overrides(StorageFormat.JSONL.value)
+    logger = make_logger(overrides)
+    logger.save(text_content(LONG_A, 0))
+    logger.save(text_content(LONG_B, 1))
+    logger.close()
+
+    logger = make_logger(overrides)
+    logger.save(text_content(LONG_A, 2))
+    assert is_reference(raw_entries(logger)[-1])
+
+
+def test_removing_original_promotes_reference(make_logger):
+    logger = make_logger(dedup_overrides(StorageFormat.JSONL.value, segment_kb=1))
+    texts = [LONG_A, LONG_B, LONG_A, "c", LONG_A]
+    for i, text in enumerate(texts):
+        logger.save(text_content(text, i))
+    log_files = logger._list_log_files()
+    assert len(log_files) > 1
+
+    logger.remove_log_file(log_files[0])
+    entries = raw_entries(logger)
+    # 第一个分段中的原始记录被删除后，最早的引用记录改为完整记录，其余引用指向它
+    first = next(entry for entry in entries if entry[JsonKeys.CONTENT_HASH] == entries[-1][JsonKeys.CONTENT_HASH])
+    assert not is_reference(first) and first[JsonKeys.TEXT_CONTENT] == LONG_A
+    resolved = list(HistoryReader(logger).iter_entries(newest_first=False))
+    assert resolved[-1][JsonKeys.TEXT_CONTENT] == LONG_A
+
+
+def test_promote_reference_keeps_reference_metadata():
+    original = {JsonKeys.TIMESTAMP: "2024-01-01T00:00:00", JsonKeys.CONTENT_HASH: "h",
+                JsonKeys.CONTENT_TYPE: "text", JsonKeys.TEXT_CONTENT: LONG_A}
+    reference = {JsonKeys.TIMESTAMP: "2024-01-02T00:00:00", JsonKeys.CONTENT_HASH: "h",
+                 JsonKeys.CONTENT_TYPE: "text", JsonKeys.DUPLICATE_OF: original[JsonKeys.TIMESTAMP]}
+    promoted = promote_reference(reference, original)
+    assert not is_reference(promoted)
+    assert promoted[JsonKeys.TIMESTAMP] == reference[JsonKeys.TIMESTAMP]
+    assert promoted[JsonKeys.TEXT_CONTENT] == LONG_A
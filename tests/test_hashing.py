@@ -0,0 +1,41 @@
+"""像素哈希与像素复制"""
+import pytest
+from PIL import Image
+
+from src.hashing import buffer_hash, iter_raw_chunks, pixel_hash
+from src.shared_buffer import copy_pixels, raw_size
+
+
+def make_image(mode: str, size=(1000, 300)) -> Image.Image:
+    image = Image.linear_gradient("L").resize(size).convert(mode)
+    image.paste(Image.new(mode, (50, 50)), (10, 10))
+    return image
+
+
+@pytest.mark.parametrize("mode", ["1", "L", "LA", "RGB", "RGBA", "I", "F", "I;16"])
+def test_chunks_match_tobytes(mode):
+    image = make_image(mode)
+    assert b"".join(iter_raw_chunks(image)) == image.tobytes()
+    assert pixel_hash(image) == buffer_hash(image.mode, image.size, image.tobytes())
+
+    buffer = bytearray(raw_size(image))
+    assert copy_pixels(image, memoryview(buffer)) == len(buffer)
+    assert bytes(buffer) == image.tobytes()
+
+
+def test_hash_changes_with_pixels_and_palette():
+    image = make_image("RGB")
+    changed = image.copy()
+    changed.putpixel((999, 299), (1, 2, 3))
+    assert pixel_hash(image) != pixel_hash(changed)
+
+    palette = image.convert("P")
+    recolored = palette.copy()
+    recolored.putpalette([255 - value for value in palette.getpalette()])
+    assert pixel_hash(palette) != pixel_hash(recolored)
+
+
+def test_empty_image():
+    image = Image.new("RGB", (0, 0))
+    assert list(iter_raw_chunks(image)) == []
+    assert pixel_hash(image) == buffer_hash("RGB", (0, 0), b"")
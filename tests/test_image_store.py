@@ -0,0 +1,77 @@
+"""图片内容寻址存储的引用计数"""
+import os
+
+import pytest
+
+from conftest import png_bytes, timestamp_at
+from src.models import ClipboardContent
+from src.image_store import REFS_FILE_NAME, ImageStore
+from src.constants import ConfigKeys, FileFormat, ImageStorage, StorageFormat
+
+CORRUPT = "{ not json"
+
+
+def image_content(color, seconds: float) -> ClipboardContent:
+    content = ClipboardContent()
+    content.set_image_bytes(png_bytes(color))
+    content.timestamp = timestamp_at(seconds)
+    return content
+
+
+def corrupt_refs(root: str):
+    with open(os.path.join(root, REFS_FILE_NAME), 'w', encoding='utf-8') as f:
+        f.write(CORRUPT)
+
+
+def test_release_and_gc(tmp_path):
+    store = ImageStore(str(tmp_path))
+    first = store.put(bytes(png_bytes((1, 1, 1))))
+    second = store.put(bytes(png_bytes((2, 2, 2))))
+    store.put(bytes(png_bytes((1, 1, 1))))
+    store.release([first, second])
+    assert store.gc() == 1
+    assert store.contains(first) and not store.contains(second)
+
+
+def test_corrupt_refs_disable_gc(tmp_path):
+    store = ImageStore(str(tmp_path))
+    image_hash = store.put(bytes(png_bytes((1, 1, 1))))
+    store.flush()
+    corrupt_refs(str(tmp_path))
+
+    store = ImageStore(str(tmp_path))
+    assert not store.refs_valid
+    # 引用计数不可信时不把图片当作孤立文件删除，也不覆盖原文件
+    assert store.gc() == 0
+    store.put(bytes(png_bytes((2, 2, 2))))
+    store.flush()
+    assert store.contains(image_hash)
+    with open(os.path.join(str(tmp_path), REFS_FILE_NAME), 'r', encoding='utf-8') as f:
+        assert f.read() == CORRUPT
+
+
+@pytest.mark.parametrize("storage_format", [StorageFormat.JSON.value, StorageFormat.JSONL.value])
+def test_logger_rebuilds_corrupt_refs(make_logger, storage_format):
+    overrides = {ConfigKeys.Logging.SECTION: {
+        ConfigKeys.Logging.STORAGE_FORMAT: storage_format,
+        ConfigKeys.Logging.IMAGE_STORAGE: ImageStorage.CONTENT.value,
+    }}
+    logger = make_logger(overrides)
+    contents = [image_content((1, 1, 1), 1), image_content((2, 2, 2), 2), image_content((1, 1, 1), 3)]
+    logger.save_batch(contents)
+    logger.close()
+    corrupt_refs(logger.images_dir)
+
+    logger = make_logger(overrides)
+    store = logger.image_store
+    assert store.refs_valid
+    assert store.gc() == 0
+    assert all(store.contains(content.get_hash()) for content in contents)
+    with open(os.path.join(logger.images_dir, f"{REFS_FILE_NAME}{FileFormat.BACKUP_FILE_SUFFIX}"), 'r',
+              encoding='utf-8') as f:
+        assert f.read() == CORRUPT
+    # 重新统计的引用计数与日志一致：同一张图片被引用两次
+    store.release([contents[0].get_hash()])
+    assert store.gc() == 0
+    store.release([contents[0].get_hash(), contents[1].get_hash()])
+    assert store.gc() == 2
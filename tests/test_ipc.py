@@ -0,0 +1,53 @@
+"""拆分进程模式：捕获进程通过连接把内容交给存储进程"""
+import pytest
+
+from conftest import make_image, read_history
+from src.ipc import RemoteStore
+from src.backends import FakeClipboardBackend
+from src.monitor import ClipboardMonitor
+from src.constants import ContentType, JsonKeys
+
+
+@pytest.mark.parametrize("store", [{}, {"shared_memory": False}], indirect=True, ids=["shared", "inline"])
+def test_capture_through_store(store):
+    remote = RemoteStore(store.config, source="test")
+    assert remote.connect()
+    backend = FakeClipboardBackend()
+    monitor = ClipboardMonitor(store.config, backend, store=remote)
+    backend.set_text("通过存储进程保存")
+    assert monitor.check_and_save()
+    backend.set_image(make_image((640, 480)))
+    assert monitor.check_and_save()
+    backend.set_files(["C:\\a.txt"])
+    assert monitor.check_and_save()
+    monitor.close()
+    store.stop()
+
+    entries = read_history(store.config)
+    assert [entry[JsonKeys.CONTENT_TYPE] for entry in entries] == [
+        ContentType.TEXT.value, ContentType.IMAGE.value, ContentType.FILES.value
+    ]
+    assert entries[0][JsonKeys.TEXT_CONTENT] == "通过存储进程保存"
+    assert all(entry[JsonKeys.SOURCE] == "test" for entry in entries)
+
+
+@pytest.mark.parametrize("store", [{"async_write": False}], indirect=True)
+def test_last_entry_restores_dedup_state(store):
+    """新的捕获进程从存储进程取得最新记录，不重复保存同样的图片"""
+    image = make_image((320, 240))
+    remote = RemoteStore(store.config)
+    backend = FakeClipboardBackend()
+    monitor = ClipboardMonitor(store.config, backend, store=remote)
+    backend.set_image(image)
+    assert monitor.check_and_save()
+    # 同一连接上的消息按顺序处理，查询返回时图片已经写入
+    assert remote.get_last_entry()[JsonKeys.CONTENT_TYPE] == ContentType.IMAGE.value
+    monitor.close()
+
+    backend = FakeClipboardBackend()
+    monitor = ClipboardMonitor(store.config, backend, store=RemoteStore(store.config))
+    backend.set_image(image.copy())
+    assert not monitor.check_and_save()
+    monitor.close()
+    store.stop()
+    assert len(read_history(store.config)) == 1
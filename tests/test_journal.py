@@ -0,0 +1,130 @@
+"""JSONL 日志的残缺记录恢复与时间索引"""
+import os
+
+import pytest
+
+from src.segments import TimeIndex, index_path
+from src.journal import (
+    JournalWriter, iter_journal, iter_journal_range, iter_journal_reversed, read_last_record,
+    recover_journal, write_journal
+)
+from src.serialization import dumps
+from src.constants import FileFormat, FsyncPolicy, JsonKeys
+
+
+def make_records(count: int, text: str = "记录"):
+    """按秒递增的记录"""
+    return [
+        {JsonKeys.TIMESTAMP: f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}", JsonKeys.TEXT_CONTENT: f"{text}{i}"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    return str(tmp_path / f"{FileFormat.LOG_FILE_PREFIX}2024-01-01{FileFormat.JOURNAL_FILE_EXTENSION}")
+
+
+def test_torn_tail_is_skipped_and_recovered(log_file):
+    records = make_records(3)
+    write_journal(log_file, records)
+    with open(log_file, 'ab') as f:
+        f.write(b'{"timestamp": "2024-01-01T00:00:09", "text_con')
+
+    assert list(iter_journal(log_file)) == records
+    assert recover_journal(log_file)
+    assert not recover_journal(log_file)
+    with open(f"{log_file}{FileFormat.BACKUP_FILE_SUFFIX}", 'rb') as f:
+        assert f.read() == b'{"timestamp": "2024-01-01T00:00:09", "text_con'
+    with open(log_file, 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+
+def test_torn_multibyte_character(log_file):
+    records = make_records(2)
+    write_journal(log_file, records)
+    line = dumps({JsonKeys.TIMESTAMP: "2024-01-01T00:00:05", JsonKeys.TEXT_CONTENT: "中文"})
+    with open(log_file, 'ab') as f:
+        # 截断在多字节 UTF-8 字符中间
+        f.write(line[:line.index("中".encode('utf-8')) + 1])
+
+    assert list(iter_journal(log_file)) == records
+    assert list(iter_journal_reversed(log_file)) == records[::-1]
+    assert read_last_record(log_file) == records[-1]
+
+
+def test_writer_recovers_before_append(log_file):
+    write_journal(log_file, make_records(2))
+    with open(log_file, 'ab') as f:
+        f.write(b'{"timestamp": "torn')
+
+    writer = JournalWriter(FsyncPolicy.NEVER.value)
+    extra = make_records(4)[2:]
+    assert writer.append(log_file, extra) == 4
+    writer.close()
+    assert list(iter_journal(log_file)) == make_records(4)
+
+
+def test_reversed_reads_across_blocks(log_file):
+    records = make_records(200, "较长的一段文本" * 10)
+    write_journal(log_file, records)
+    assert list(iter_journal_reversed(log_file, block_size=512)) == records[::-1]
+
+
+def test_unterminated_tail_is_skipped_everywhere(log_file):
+    """没有换行符结尾但能够解析的最后一行同样是未写完的记录，各种读取方式都不返回它"""
+    records = make_records(3)
+    write_journal(log_file, records)
+    tail = make_records(4)[3]
+    with open(log_file, 'ab') as f:
+        f.write(dumps(tail))
+
+    assert list(iter_journal(log_file)) == records
+    assert list(iter_journal_reversed(log_file)) == records[::-1]
+    assert list(iter_journal_range(log_file, records[1][JsonKeys.TIMESTAMP])) == records[1:]
+    assert read_last_record(log_file) == records[-1]
+    assert recover_journal(log_file)
+    assert list(iter_journal(log_file)) == records
+
+
+def test_time_index_lookup(log_file):
+    records = make_records(300)
+    write_journal(log_file, records, index_interval=1024)
+    index = TimeIndex.load(log_file)
+    assert index is not None and len(index) > 2
+    assert index.verify(os.path.getsize(log_file))
+    assert index.floor(records[0][JsonKeys.TIMESTAMP]) is None
+    offset, timestamp = index.floor(records[150][JsonKeys.TIMESTAMP])
+    assert timestamp < records[150][JsonKeys.TIMESTAMP]
+    with open(log_file, 'rb') as f:
+        f.seek(offset)
+        assert timestamp in f.readline().decode('utf-8')
+    assert index.ceiling(records[-1][JsonKeys.TIMESTAMP] + "Z") is None
+
+
+def test_range_uses_index_and_survives_stale_index(log_file):
+    records = make_records(300)
+    write_journal(log_file, records, index_interval=1024)
+    since, until = records[100][JsonKeys.TIMESTAMP], records[120][JsonKeys.TIMESTAMP]
+    assert list(iter_journal_range(log_file, since, until)) == records[100:120]
+
+    # 重写日志后索引已过期：索引项指向的位置不是对应的记录，应从文件开头读取
+    write_journal(log_file, make_records(300, "更长的新内容"), index_interval=0)
+    with open(index_path(log_file), 'w', encoding='utf-8') as f:
+        f.write(f"{records[50][JsonKeys.TIMESTAMP]} 7\n{records[90][JsonKeys.TIMESTAMP]} 4096\n")
+    expected = make_records(300, "更长的新内容")[100:120]
+    assert list(iter_journal_range(log_file, since, until)) == expected
+
+
+def test_writer_rebuilds_missing_index(log_file):
+    writer = JournalWriter(FsyncPolicy.NEVER.value, index_interval=512)
+    records = make_records(100)
+    writer.append(log_file, records[:50])
+    writer.close()
+    os.remove(index_path(log_file))
+
+    writer.append(log_file, records[50:])
+    writer.close()
+    index = TimeIndex.load(log_file)
+    assert index.verify(os.path.getsize(log_file))
+    assert list(iter_journal_range(log_file, records[70][JsonKeys.TIMESTAMP])) == records[70:]
@@ -0,0 +1,63 @@
+"""监控循环的变化检测与读取失败重试"""
+import pytest
+
+from conftest import read_history
+from src.backends import FakeClipboardBackend
+from src.monitor import READ_RETRIES, ClipboardMonitor
+from src.constants import ConfigKeys
+
+
+@pytest.fixture
+def monitor(make_config):
+    config = make_config({ConfigKeys.Pipeline.SECTION: {ConfigKeys.Pipeline.ENABLE_ASYNC: False}})
+    monitor = ClipboardMonitor(config, FakeClipboardBackend())
+    yield monitor
+    monitor.close()
+
+
+def fail_text_reads(monitor, times: int):
+    """让之后的若干次文本读取抛出异常，模拟剪贴板被其他进程占用"""
+    get_text = monitor.backend.get_text
+    failures = [times]
+
+    def flaky():
+        if failures[0] > 0:
+            failures[0] -= 1
+            raise OSError("clipboard is locked")
+        return get_text()
+
+    monitor.backend.get_text = flaky
+
+
+def test_unchanged_clipboard_is_not_read_again(monitor):
+    monitor.backend.set_text("a")
+    assert monitor.check_and_save()
+    assert not monitor.check_and_save()
+    monitor.backend.set_text("b")
+    assert monitor.check_and_save()
+
+
+def test_failed_read_is_retried(monitor):
+    monitor.backend.set_text("a")
+    fail_text_reads(monitor, 1)
+    assert not monitor.check_and_save()
+    # 变更序号没有变化，仍然重新读取
+    assert monitor.check_and_save()
+    assert len(read_history(monitor._config)) == 1
+
+
+def test_persistent_read_failure_gives_up(monitor):
+    monitor.backend.set_text("a")
+    fail_text_reads(monitor, READ_RETRIES + 1)
+    for _ in range(READ_RETRIES + 1):
+        assert not monitor.check_and_save()
+    # 重试次数用完后等待下一次剪贴板变化
+    assert not monitor.check_and_save()
+    monitor.backend.set_text("b")
+    assert monitor.check_and_save()
+
+
+def test_empty_clipboard_is_not_retried(monitor):
+    monitor.backend.clear()
+    assert not monitor.check_and_save()
+    assert monitor.last_sequence is not None
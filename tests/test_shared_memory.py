@@ -0,0 +1,80 @@
+"""共享内存传递图片时捕获进程的常驻内存峰值"""
+import os
+import multiprocessing
+
+import pytest
+
+from conftest import make_image, read_history
+from src.config import Config
+from src.backends import FakeClipboardBackend
+from src.ipc import RemoteStore
+from src.monitor import ClipboardMonitor
+from src.shared_buffer import raw_size
+
+SIZE_4K = (3840, 2160)
+SIZE_8K = (7680, 4320)
+BUFFERS = 2
+
+
+def _status_kb(field: str) -> int:
+    """读取 /proc/self/status 中以 KB 为单位的字段"""
+    with open("/proc/self/status", 'r') as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def _peak_resettable() -> bool:
+    """重置当前进程的常驻内存峰值，不支持时返回 False"""
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def capture_peaks(config_file: str, size, rounds: int, results):
+    """捕获进程：连续捕获若干张不同的图片，返回每次捕获后常驻内存峰值相对捕获前的增量（KB）"""
+    config = Config(config_file)
+    store = RemoteStore(config)
+    store.connect()
+    backend = FakeClipboardBackend()
+    monitor = ClipboardMonitor(config, backend, store=store)
+    image = make_image(size)
+    image.load()
+    baseline = _status_kb("VmRSS")
+    _peak_resettable()
+    peaks = []
+    for i in range(rounds):
+        image.putpixel((i, 0), (i % 256, 0, 0))
+        backend.set_image(image)
+        assert monitor.check_and_save()
+        peaks.append(_status_kb("VmHWM") - baseline)
+    monitor.close()
+    results.put(peaks)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs") or not _peak_resettable(),
+                    reason="需要 Linux 的 /proc/self/clear_refs 重置常驻内存峰值")
+@pytest.mark.parametrize("store", [{"buffers": BUFFERS}], indirect=True)
+@pytest.mark.parametrize("size, rounds", [(SIZE_4K, 12), (SIZE_8K, 16)], ids=["4k", "8k"])
+def test_peak_rss_is_bounded(store, size, rounds):
+    """捕获进程的常驻内存峰值不随捕获次数增长：共享内存缓冲区之外，
+    只有缓冲区全部被占用时直接发送像素的临时副本"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=capture_peaks, args=(store.config.config_file, size, rounds, results))
+    process.start()
+    peaks = results.get(timeout=600)
+    process.join(timeout=60)
+    assert process.exitcode == 0
+
+    image_kb = raw_size(make_image(size)) // 1024
+    print(f"{size}: 峰值 {[peak // 1024 for peak in peaks]} MB，每张图片 {image_kb // 1024} MB")
+    # 缓冲区全部被占用、直接发送的路径也走过几次之后，后一半捕获不再抬高峰值
+    assert peaks[-1] - peaks[rounds // 2] < image_kb // 2
+    assert peaks[-1] < (BUFFERS + 5) * image_kb
+    store.stop()
+    assert len(read_history(store.config)) == rounds
@@ -0,0 +1,216 @@
+"""各存储格式的写入与读回"""
+import os
+
+import pytest
+
+from conftest import files_content, png_bytes, text_content, timestamp_at
+from src.models import ClipboardContent
+from src.history import HistoryReader
+from src.image_store import ImageStore
+from src.segments import index_path
+from src.journal import convert_log_file, iter_journal_range, read_journal, write_journal
+from src.compression import compress_file, is_compressed_file, open_log
+from src.constants import (
+    CompressionCodec, ConfigKeys, ContentType, FileFormat, ImageStorage, JsonKeys, Paths, StorageFormat
+)
+
+FORMATS = [StorageFormat.JSON.value, StorageFormat.JSONL.value, StorageFormat.SQLITE.value]
+
+
+def make_contents():
+    """几种典型内容：短文本、长文本、非 BMP 字符、文件路径"""
+    return [
+        text_content("hello", 1),
+        text_content("剪贴板历史 " * 2000, 2),
+        text_content("emoji 😀 和换行\r\n以及引号 \" \\", 3),
+        files_content(("C:\\文档\\报告.docx", "D:\\a b\\c.txt"), 4),
+    ]
+
+
+def logging_overrides(storage_format: str, **values):
+    """只设置日志区段的配置"""
+    return {ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.STORAGE_FORMAT: storage_format, **values}}
+
+
+def assert_same_content(entry: dict, content: ClipboardContent):
+    """读回的记录与写入的内容一致"""
+    assert entry[JsonKeys.TIMESTAMP] == content.timestamp
+    assert entry[JsonKeys.CONTENT_TYPE] == content.content_type
+    assert entry[JsonKeys.CONTENT_HASH] == content.get_hash()
+    if content.content_type == ContentType.TEXT.value:
+        assert entry[JsonKeys.TEXT_CONTENT] == content.data[JsonKeys.TEXT_CONTENT]
+    else:
+        assert list(entry[JsonKeys.FILE_PATHS]) == list(content.data[JsonKeys.FILE_PATHS])
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+@pytest.mark.parametrize("threshold", [0, 64])
+def test_round_trip(make_logger, storage_format, threshold):
+    contents = make_contents()
+    overrides = logging_overrides(storage_format, **{ConfigKeys.Logging.COMPRESS_TEXT_THRESHOLD: threshold})
+    logger = make_logger(overrides)
+    for content in contents:
+        logger.save(content)
+    logger.close()
+
+    reader = HistoryReader(make_logger(overrides, read_only=True))
+    entries = list(reader.iter_entries(newest_first=False))
+    assert len(entries) == len(contents)
+    for entry, content in zip(entries, contents):
+        assert_same_content(entry, content)
+    newest = list(reader.iter_entries())
+    assert [entry[JsonKeys.TIMESTAMP] for entry in newest] == [c.timestamp for c in reversed(contents)]
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_last_entry_after_reopen(make_logger, storage_format):
+    contents = make_contents()
+    logger = make_logger(logging_overrides(storage_format))
+    logger.save_batch(contents)
+    logger.close()
+
+    entry = make_logger(logging_overrides(storage_format)).get_last_entry()
+    assert entry[JsonKeys.CONTENT_HASH] == contents[-1].get_hash()
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+@pytest.mark.parametrize("image_storage", [ImageStorage.TIMESTAMPED.value, ImageStorage.CONTENT.value])
+def test_image_round_trip(make_logger, storage_format, image_storage):
+    overrides = logging_overrides(storage_format, **{ConfigKeys.Logging.IMAGE_STORAGE: image_storage})
+    logger = make_logger(overrides)
+    data = png_bytes((1, 2, 3))
+    content = ClipboardContent()
+    content.set_image_bytes(data)
+    content.timestamp = timestamp_at(5)
+    logger.save(content)
+    logger.close()
+
+    entry = next(HistoryReader(make_logger(overrides, read_only=True)).iter_entries())
+    assert entry[JsonKeys.CONTENT_HASH] == content.get_hash()
+    if image_storage == ImageStorage.CONTENT.value:
+        assert ImageStore(logger.images_dir).get(entry[JsonKeys.IMAGE_HASH]) == bytes(data)
+    else:
+        with open(os.path.join(logger.base_dir, entry[JsonKeys.IMAGE_PATH]), 'rb') as f:
+            assert f.read() == bytes(data)
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_read_only_logger_leaves_files_untouched(make_logger, storage_format):
+    overrides = logging_overrides(storage_format, **{ConfigKeys.Logging.DEDUP_HISTORY: True})
+    logger = make_logger(overrides)
+    logger.save_batch(make_contents())
+    logger.close()
+    if storage_format != StorageFormat.SQLITE.value:
+        # 去重索引过期时只读打开也只在内存中重新扫描
+        os.remove(os.path.join(logger.base_dir, Paths.DEFAULT_DEDUP_INDEX_FILE))
+
+    def snapshot():
+        result = {}
+        for root, _, names in os.walk(logger.base_dir):
+            for name in names:
+                # sqlite 只读连接也可能创建 -wal/-shm 文件
+                if name.endswith(("-wal", "-shm")):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    result[path] = f.read()
+        return result
+
+    before = snapshot()
+    reader = HistoryReader(make_logger(overrides, read_only=True))
+    assert len(list(reader.iter_entries())) == len(make_contents())
+    reader.logger.close()
+    assert snapshot() == before
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_read_only_without_logs(make_logger, storage_format):
+    """尚未记录过内容时日志目录不存在，只读打开视为没有历史且不创建目录"""
+    overrides = logging_overrides(storage_format, **{ConfigKeys.Logging.DEDUP_HISTORY: True})
+    logger = make_logger(overrides, read_only=True)
+    assert logger.get_last_entry() is None
+    assert list(HistoryReader(logger).iter_entries()) == []
+    assert not os.path.exists(logger.base_dir)
+
+
+def test_read_only_sqlite_without_database(make_logger):
+    overrides = logging_overrides(StorageFormat.SQLITE.value)
+    logger = make_logger(overrides, read_only=True)
+    assert logger.get_last_entry() is None
+    assert list(HistoryReader(logger).iter_entries()) == []
+    assert not os.path.exists(logger.history_db.path)
+
+
+def test_segments_keep_order(make_logger):
+    overrides = logging_overrides(StorageFormat.JSONL.value, **{
+        ConfigKeys.Logging.SEGMENT_KB: 1, ConfigKeys.Logging.INDEX_INTERVAL_KB: 1,
+    })
+    logger = make_logger(overrides)
+    contents = [text_content(f"{i:04d} " + "x" * 300, i) for i in range(40)]
+    for content in contents:
+        logger.save(content)
+    logger.close()
+
+    log_files = logger._list_log_files()
+    assert len(log_files) > 1
+    entries = list(HistoryReader(make_logger(overrides, read_only=True)).iter_entries(newest_first=False))
+    assert [entry[JsonKeys.TEXT_CONTENT] for entry in entries] == [c.data[JsonKeys.TEXT_CONTENT] for c in contents]
+
+
+@pytest.mark.parametrize("codec", [CompressionCodec.ZLIB.value, CompressionCodec.ZSTD.value])
+def test_compressed_journal(tmp_path, codec):
+    log_file = str(tmp_path / f"{FileFormat.LOG_FILE_PREFIX}2024-01-01{FileFormat.JOURNAL_FILE_EXTENSION}")
+    records = [{JsonKeys.TIMESTAMP: f"2024-01-01T00:00:{i:02d}", JsonKeys.TEXT_CONTENT: "文本" * i} for i in range(50)]
+    write_journal(log_file, records, index_interval=256)
+
+    compressed = compress_file(log_file, codec)
+    assert compressed is not None and is_compressed_file(compressed)
+    assert not os.path.exists(log_file)
+    assert read_journal(compressed) == records
+    window = list(iter_journal_range(compressed, "2024-01-01T00:00:10", "2024-01-01T00:00:20"))
+    assert window == records[10:20]
+
+
+def test_convert_between_json_and_jsonl(make_logger):
+    contents = make_contents()
+    logger = make_logger(logging_overrides(StorageFormat.JSON.value))
+    logger.save_batch(contents)
+    logger.close()
+    json_file = logger._list_log_files()[0]
+
+    journal_file = convert_log_file(json_file, StorageFormat.JSONL.value, index_interval=1024)
+    assert not os.path.exists(json_file)
+    assert os.path.exists(index_path(journal_file))
+    assert [record[JsonKeys.CONTENT_HASH] for record in read_journal(journal_file)] == \
+        [content.get_hash() for content in contents]
+
+    assert convert_log_file(journal_file, StorageFormat.JSON.value, indent=False) == json_file
+    assert not os.path.exists(index_path(journal_file))
+    with open(json_file, 'rb') as f:
+        assert b'\n' not in f.read()
+    reader = HistoryReader(make_logger(logging_overrides(StorageFormat.JSON.value), read_only=True))
+    entries = list(reader.iter_entries(newest_first=False))
+    assert len(entries) == len(contents)
+    for entry, content in zip(entries, contents):
+        assert_same_content(entry, content)
+
+
+@pytest.mark.parametrize("codec", [CompressionCodec.ZLIB.value, CompressionCodec.ZSTD.value])
+def test_convert_sealed_log(tmp_path, codec):
+    """压缩封存的日志转换后以同样的算法重新封存"""
+    journal_file = str(tmp_path / f"{FileFormat.LOG_FILE_PREFIX}2024-01-01{FileFormat.JOURNAL_FILE_EXTENSION}")
+    records = [{JsonKeys.TIMESTAMP: f"2024-01-01T00:00:{i:02d}", JsonKeys.TEXT_CONTENT: "文本" * i} for i in range(50)]
+    write_journal(journal_file, records, index_interval=256)
+    sealed = compress_file(journal_file, codec)
+    suffix = sealed[len(journal_file):]
+
+    json_file = convert_log_file(sealed, StorageFormat.JSON.value)
+    assert json_file.endswith(f"{FileFormat.LOG_FILE_EXTENSION}{suffix}")
+    assert not os.path.exists(sealed) and not os.path.exists(index_path(sealed))
+    with open_log(json_file) as f:
+        assert f.read().count('\n') > len(records)
+
+    sealed = convert_log_file(json_file, StorageFormat.JSONL.value)
+    assert sealed == f"{journal_file}{suffix}"
+    assert read_journal(sealed) == records
+    assert os.path.exists(index_path(sealed))
@@ -0,0 +1,94 @@
+"""文本增量的生成、还原与日志读回"""
+import random
+
+import pytest
+
+from conftest import text_content
+from src.history import HistoryReader
+from src.text_delta import apply_delta, diff_text, is_delta, materialize_deltas, record_key
+from src.constants import ConfigKeys, JsonKeys, StorageFormat
+
+WORDS = "剪贴板 历史 记录 clipboard history the quick brown fox 😀".split()
+
+
+def make_document(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def edit(rng: random.Random, text: str) -> str:
+    """随机插入、删除或替换一段文本"""
+    position = rng.randrange(len(text))
+    end = min(len(text), position + rng.randint(0, 40))
+    action = rng.random()
+    if action < 0.4:
+        return text[:position] + make_document(rng, 5) + text[position:]
+    if action < 0.7:
+        return text[:position] + text[end:]
+    return text[:position] + make_document(rng, 3) + text[end:]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_diff_round_trip(seed):
+    rng = random.Random(seed)
+    base = make_document(rng, 800)
+    text = base
+    for _ in range(rng.randint(1, 5)):
+        text = edit(rng, text)
+    ops = diff_text(base, text)
+    assert apply_delta(base, ops) == text
+
+
+def test_diff_identical_and_empty():
+    assert apply_delta("abc", diff_text("abc", "abc")) == "abc"
+    assert apply_delta("", diff_text("", "new")) == "new"
+    assert apply_delta("old", diff_text("old", "")) == ""
+
+
+def test_diff_gives_up_on_unrelated_text():
+    rng = random.Random(1)
+    base, text = make_document(rng, 2000), make_document(rng, 2000)
+    assert diff_text(base, text, max_insert=100) is None
+
+
+@pytest.mark.parametrize("storage_format", [StorageFormat.JSON.value, StorageFormat.JSONL.value])
+def test_logger_stores_and_restores_deltas(make_logger, storage_format):
+    overrides = {
+        ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.STORAGE_FORMAT: storage_format},
+        ConfigKeys.TextDelta.SECTION: {ConfigKeys.TextDelta.ENABLE: True, ConfigKeys.TextDelta.MAX_CHAIN: 3},
+    }
+    logger = make_logger(overrides)
+    rng = random.Random(0)
+    texts = [make_document(rng, 600)]
+    for _ in range(9):
+        texts.append(edit(rng, texts[-1]))
+    for i, text in enumerate(texts):
+        logger.save(text_content(text, i))
+    logger.close()
+
+    logger = make_logger(overrides, read_only=True)
+    raw = list(HistoryReader(logger).iter_entries(newest_first=False, resolve=False))
+    assert any(is_delta(entry) for entry in raw)
+    assert max(entry.get(JsonKeys.DELTA_DEPTH, 0) for entry in raw) <= 3
+    resolved = list(HistoryReader(logger).iter_entries(newest_first=False))
+    assert [entry[JsonKeys.TEXT_CONTENT] for entry in resolved] == texts
+    restored = [entry for records in logger.iter_log_files() for entry in records]
+    assert sorted(entry[JsonKeys.TEXT_CONTENT] for entry in restored) == sorted(texts)
+
+
+def test_materialize_deltas(make_logger):
+    overrides = {
+        ConfigKeys.Logging.SECTION: {ConfigKeys.Logging.STORAGE_FORMAT: StorageFormat.JSONL.value},
+        ConfigKeys.TextDelta.SECTION: {ConfigKeys.TextDelta.ENABLE: True},
+    }
+    logger = make_logger(overrides)
+    rng = random.Random(2)
+    texts = [make_document(rng, 600)]
+    texts.append(edit(rng, texts[0]))
+    texts.append(edit(rng, texts[1]))
+    for i, text in enumerate(texts):
+        logger.save(text_content(text, i))
+
+    records = list(HistoryReader(logger).iter_entries(newest_first=False, resolve=False))
+    targets = [record_key(record) for record in records if is_delta(record)]
+    assert materialize_deltas(records, targets) == len(targets) > 0
+    assert [record[JsonKeys.TEXT_CONTENT] for record in records] == texts